@@ -1,6 +1,51 @@
+import threading
+
 from django.apps import AppConfig
 
 
 class PatentmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PatentMS'
+
+    def ready(self):
+        # 注册模型信号，增量更新搜索建议索引
+        import PatentMS.suggestion_index  # noqa: F401
+
+
+_server_tasks_started = False
+_server_tasks_lock = threading.Lock()
+
+
+def start_server_tasks():
+    """
+    启动只有 Web 服务进程需要的后台任务（由 wsgi.py / asgi.py 在创建应用后调用）
+
+    migrate、test 等管理命令不经过这里，不会打开搜索结果存储或启动后台线程；
+    同一进程中多次调用只启动一次
+    """
+    global _server_tasks_started
+    with _server_tasks_lock:
+        if _server_tasks_started:
+            return
+        _server_tasks_started = True
+
+    from PatentMS.http_client import get_http_client_config, start_warm_up
+    from PatentMS.rate_limit import warn_if_process_local
+    from PatentMS.search_service import search_service
+    from PatentMS.search_store import get_search_store, start_warm_cache
+    from PatentMS.synthetic_search import get_synthetic_config, start_build_corpus
+
+    # 限流预算依赖共享缓存，进程内缓存时提示每个进程各自限流
+    warn_if_process_local()
+
+    # 预热到搜索引擎的连接，避免部署后的第一次搜索承担DNS和TLS握手耗时
+    if get_http_client_config()['WARMUP']:
+        start_warm_up(search_service.search_engine)
+
+    # 从持久化存储载入热门搜索结果，重启或新增进程后不必全部重新抓取
+    if search_service.result_cache is not None and get_search_store() is not None:
+        start_warm_cache(search_service.result_cache)
+
+    # 使用合成搜索引擎时在后台生成语料，第一次搜索不必等待
+    if get_synthetic_config()['BUILD_AT_STARTUP']:
+        start_build_corpus(search_service.search_engine)
@@ -0,0 +1,628 @@
+"""
+异步搜索服务模块
+基于 httpx.AsyncClient 的异步搜索引擎实现，供异步视图使用
+
+ASGI 服务器的事件循环长期运行，同一循环中的请求共享一个客户端（连接池），
+由 lifespan 关闭事件关闭；WSGI 下 Django 通过 async_to_sync 为每个请求创建新的事件循环，
+视图在 async_client_scope 中搜索，请求结束时关闭本次创建的客户端
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+
+from PatentMS.search_metrics import search_metrics
+from PatentMS.search_service import (
+    AdaptiveSearchService,
+    BaiduSearchService,
+    EngineRateLimited,
+    MetaSearchService,
+    PublicSearchService,
+    SearchEngineError,
+    SimpleSearchService,
+    get_pagination_config,
+    join_pages,
+    merge_results,
+    plan_pages,
+)
+from PatentMS.transport import make_async_transport
+
+try:
+    import httpx
+except ImportError:  # 未安装 httpx 时退回到线程池中执行同步引擎
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# 每个事件循环一个共享的 AsyncClient（httpx 客户端不能跨事件循环使用）
+_async_clients = weakref.WeakKeyDictionary()
+
+# 自适应搜索中落败、仍在后台执行的请求
+_background_tasks = set()
+
+# 共享连接池大小
+ASYNC_POOL_LIMITS = {"max_connections": 200, "max_keepalive_connections": 50}
+
+
+def get_async_client():
+    """
+    获取当前事件循环共享的 httpx.AsyncClient
+
+    Returns:
+        httpx.AsyncClient 实例
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            transport=make_async_transport(httpx.Limits(**ASYNC_POOL_LIMITS)),
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """关闭当前事件循环的共享客户端（ASGI lifespan 关闭或单次请求的事件循环结束前调用）"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def async_client_scope(shared: bool):
+    """
+    视图中使用异步客户端的范围
+
+    Args:
+        shared: 事件循环是否长期运行（ASGI）；为 False 时（WSGI 下每个请求一个事件循环）
+            退出时结束仍在后台执行的请求并关闭本次创建的客户端，不留下未关闭的连接
+    """
+    try:
+        yield
+    finally:
+        if not shared:
+            loop = asyncio.get_running_loop()
+            pending = [
+                task
+                for task in list(_background_tasks)
+                if task.get_loop() is loop and not task.done()
+            ]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            await close_async_client()
+
+
+def with_lifespan(application):
+    """
+    为 ASGI 应用处理 lifespan 事件（Django 的 ASGIHandler 只处理 HTTP 连接）：
+    服务器关闭时关闭事件循环共享的异步客户端
+
+    Args:
+        application: ASGI 应用
+
+    Returns:
+        包装后的 ASGI 应用
+    """
+
+    async def app(scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_async_client()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    return app
+
+
+class AsyncSearchMixin:
+    """
+    异步搜索混入类
+
+    复用同步引擎的 _build_search_request / _parse_search_response 等钩子，
+    只把网络请求替换为 httpx 异步请求，解析放到线程池中执行以免阻塞事件循环。
+    """
+
+    async def _fetch_text(self, url: str, params: Dict, timeout: float) -> str:
+        client = get_async_client()
+        response = await client.get(
+            url, params=params, headers=self.headers, timeout=timeout
+        )
+        response.raise_for_status()
+        return response.content.decode("utf-8", errors="replace")
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict]:
+        """
+        异步执行搜索，失败时返回空列表
+
+        Args:
+            query: 搜索关键词
+            num_results: 返回结果数量
+
+        Returns:
+            搜索结果列表
+        """
+        try:
+            return await self.fetch_results(query, num_results)
+        except SearchEngineError as e:
+            logger.error(str(e))
+            return []
+
+    async def fetch_results(self, query: str, num_results: int = 10) -> List[Dict]:
+        """
+        异步执行搜索，失败时抛出异常
+
+        需要的结果超过一页时并发请求后续各页
+
+        Args:
+            query: 搜索关键词
+            num_results: 返回结果数量
+
+        Returns:
+            搜索结果列表
+
+        Raises:
+            SearchEngineError: 请求或解析失败（翻页时所有页都失败）
+        """
+        with search_metrics.span("engine", self.name) as span:
+            config = get_pagination_config()
+            pages = plan_pages(num_results, self.page_size, config["MAX_PAGES"])
+            if pages == 1:
+                results = (await self.fetch_page(query))[:num_results]
+                span.results = len(results)
+                return results
+
+            results = {}
+            errors = []
+            async for offset, page in self.iter_pages(query, pages, errors=errors):
+                results[offset] = page
+            if not results and errors:
+                raise errors[0]
+            results = join_pages(results, num_results)
+            span.results = len(results)
+            return results
+
+    async def fetch_page(self, query: str, offset: int = 0) -> List[Dict]:
+        """
+        异步请求并解析一页搜索结果
+
+        Args:
+            query: 搜索关键词
+            offset: 结果偏移量（第一页为 0）
+
+        Returns:
+            该页的搜索结果列表
+
+        Raises:
+            SearchEngineError: 请求或解析失败
+        """
+        url, params = self._build_search_request(query, self.page_size, offset)
+        # 限流预约访问共享缓存，放到线程池中执行
+        wait = await sync_to_async(self._reserve, thread_sensitive=False)(url)
+        if wait:
+            with search_metrics.span("rate_wait", self.name):
+                await asyncio.sleep(wait)
+        try:
+            with search_metrics.span("fetch", self.name):
+                html_content = await self._fetch_text(url, params, self.search_timeout)
+        except httpx.HTTPError as e:
+            raise SearchEngineError(f"{self.name} 异步搜索请求失败: {e}") from e
+
+        logger.info(f"{self.name} 异步搜索请求成功: {query} (偏移 {offset})")
+
+        try:
+            with search_metrics.span("parse", self.name) as span:
+                results = await sync_to_async(
+                    self._parse_search_response, thread_sensitive=False
+                )(html_content, query, self.page_size)
+                span.results = len(results)
+        except Exception as e:
+            raise SearchEngineError(f"{self.name} 异步搜索解析失败: {e}") from e
+        if not results:
+            await sync_to_async(self._check_blocked, thread_sensitive=False)(
+                url, html_content
+            )
+        return results
+
+    async def iter_pages(
+        self, query: str, pages: int, offset: int = 0, errors: Optional[List] = None
+    ) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """
+        并发请求从 offset 开始的 pages 页，按到达顺序逐页产出，截止时间到达后停止
+
+        Args:
+            query: 搜索关键词
+            pages: 页数
+            offset: 第一页的结果偏移量
+            errors: 收集失败页的异常（可选）
+
+        Yields:
+            (该页的偏移量, 该页结果)
+        """
+        tasks = {
+            asyncio.ensure_future(self.fetch_page(query, page_offset)): page_offset
+            for page_offset in range(
+                offset, offset + pages * self.page_size, self.page_size
+            )
+        }
+        loop_deadline = time.monotonic() + get_pagination_config()["DEADLINE"]
+        pending = set(tasks)
+
+        try:
+            while pending:
+                remaining = loop_deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        f"{self.name} 翻页截止时间已到，未返回的偏移量: "
+                        f"{sorted(tasks[task] for task in pending)}"
+                    )
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    try:
+                        results = task.result()
+                    except SearchEngineError as e:
+                        logger.error(str(e))
+                        if errors is not None:
+                            errors.append(e)
+                        continue
+                    yield tasks[task], results
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_suggestions(self, query: str) -> List[str]:
+        """
+        异步获取搜索建议
+
+        Args:
+            query: 搜索关键词
+
+        Returns:
+            搜索建议列表
+        """
+        try:
+            url, params = self._build_suggest_request(query)
+            content = await self._fetch_text(url, params, self.suggest_timeout)
+            return self._parse_suggestions(content)
+        except Exception as e:
+            logger.error(f"{self.name} 异步获取搜索建议失败: {e}")
+
+        return []
+
+
+class AsyncBaiduSearchService(AsyncSearchMixin, BaiduSearchService):
+    """百度搜索服务（异步）"""
+
+
+class AsyncPublicSearchService(AsyncSearchMixin, PublicSearchService):
+    """DuckDuckGo搜索服务（异步）"""
+
+
+class AsyncSimpleSearchService(AsyncSearchMixin, SimpleSearchService):
+    """必应搜索服务（异步）"""
+
+
+class SyncEngineAdapter:
+    """把同步搜索引擎包装为异步接口（在线程池中执行）"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.name = engine.name
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict]:
+        return await sync_to_async(self.engine.search, thread_sensitive=False)(
+            query, num_results
+        )
+
+    async def fetch_results(self, query: str, num_results: int = 10) -> List[Dict]:
+        fetch = getattr(self.engine, "fetch_results", self.engine.search)
+        return await sync_to_async(fetch, thread_sensitive=False)(query, num_results)
+
+    async def get_suggestions(self, query: str) -> List[str]:
+        return await sync_to_async(self.engine.get_suggestions, thread_sensitive=False)(
+            query
+        )
+
+
+class AsyncMetaSearchService:
+    """元搜索服务（异步）：并发查询所有引擎，截止时间到达后合并已返回的结果"""
+
+    name = "meta"
+
+    def __init__(self, engines, deadline: float, early_return: bool = True):
+        self.engines = engines
+        self.deadline = deadline
+        self.early_return = early_return
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict]:
+        result_lists = await self._fan_out(
+            lambda engine: engine.search(query, num_results),
+            stop_when=lambda lists: self.early_return
+            and len(merge_results(lists)) >= num_results,
+        )
+        return merge_results(result_lists)
+
+    async def stream(
+        self, query: str, num_results: int = 10
+    ) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """
+        按到达顺序逐个产出各引擎的结果，截止时间到达后停止
+
+        Yields:
+            (引擎名称, 搜索结果列表)
+        """
+        tasks = {
+            asyncio.ensure_future(engine.search(query, num_results)): engine
+            for engine in self.engines
+        }
+        loop_deadline = time.monotonic() + self.deadline
+        pending = set(tasks)
+
+        try:
+            while pending:
+                remaining = loop_deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        f"元搜索截止时间已到，未返回的引擎: "
+                        f"{[tasks[task].name for task in pending]}"
+                    )
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    try:
+                        results = task.result()
+                    except Exception as e:
+                        logger.error(f"元搜索引擎 {tasks[task].name} 调用失败: {e}")
+                        continue
+                    if results:
+                        yield tasks[task].name, results
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_suggestions(self, query: str) -> List[str]:
+        suggestion_lists = await self._fan_out(
+            lambda engine: engine.get_suggestions(query),
+            stop_when=lambda lists: any(lists),
+        )
+        suggestions = []
+        for suggestion_list in suggestion_lists:
+            for suggestion in suggestion_list:
+                if suggestion not in suggestions:
+                    suggestions.append(suggestion)
+        return suggestions
+
+    async def _fan_out(self, call, stop_when) -> List[List]:
+        tasks = {asyncio.ensure_future(call(engine)): engine for engine in self.engines}
+        loop_deadline = time.monotonic() + self.deadline
+        pending = set(tasks)
+        arrived = []
+
+        try:
+            while pending:
+                remaining = loop_deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        f"元搜索截止时间已到，未返回的引擎: "
+                        f"{[tasks[task].name for task in pending]}"
+                    )
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    try:
+                        results = task.result()
+                    except Exception as e:
+                        logger.error(f"元搜索引擎 {tasks[task].name} 调用失败: {e}")
+                        continue
+                    if results:
+                        arrived.append(results)
+                if stop_when(arrived):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return arrived
+
+
+class AsyncAdaptiveSearchService:
+    """自适应搜索服务（异步）：与同步版本共用引擎健康统计"""
+
+    name = "adaptive"
+
+    def __init__(self, engines, registry, deadline: float):
+        self.engines = engines
+        self.registry = registry
+        self.deadline = deadline
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict]:
+        candidates = self.registry.rank(self.engines)
+        if not candidates:
+            logger.warning("所有搜索引擎均处于熔断状态")
+            return []
+
+        loop_deadline = time.monotonic() + self.deadline
+        tasks = {}
+
+        def launch():
+            while candidates:
+                engine = candidates.pop(0)
+                health = self.registry.get(engine.name)
+                if not health.begin_request():
+                    continue
+                task = asyncio.ensure_future(
+                    self._timed_search(engine, health, query, num_results)
+                )
+                tasks[task] = engine
+                return time.monotonic() + health.hedge_delay()
+            return None
+
+        hedge_at = launch()
+        try:
+            while tasks:
+                now = time.monotonic()
+                if now >= loop_deadline:
+                    logger.warning(
+                        f"自适应搜索截止时间已到，未返回的引擎: "
+                        f"{[engine.name for engine in tasks.values()]}"
+                    )
+                    break
+                timeout = loop_deadline - now
+                if hedge_at is not None:
+                    timeout = min(timeout, max(0.0, hedge_at - now))
+
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        logger.info(
+                            f"搜索引擎 {[e.name for e in tasks.values()]} "
+                            f"响应慢，发出对冲请求"
+                        )
+                        hedge_at = launch()
+                    continue
+
+                for task in done:
+                    tasks.pop(task)
+                    results = task.result()
+                    if results is not None:
+                        return results
+
+                hedge_at = launch()
+        finally:
+            # 落败的请求不取消，让它们在后台完成以记录真实的延迟和错误
+            # （受引擎自身超时限制）；保留引用避免任务被回收
+            for task in tasks:
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+
+        return []
+
+    async def _timed_search(self, engine, health, query: str, num_results: int):
+        started = time.monotonic()
+        try:
+            results = await engine.fetch_results(query, num_results)
+        except asyncio.CancelledError:
+            # 事件循环关闭时任务被取消，不计入健康统计
+            health.cancel_request()
+            raise
+        except EngineRateLimited as e:
+            # 请求没有发出，不计入健康统计，直接切换到下一个引擎
+            health.cancel_request()
+            logger.warning(str(e))
+            return None
+        except Exception as e:
+            health.record_failure(time.monotonic() - started)
+            logger.error(f"搜索引擎 {engine.name} 异步调用失败: {e}")
+            return None
+
+        # 空结果页计为成功，只有调用失败才切换引擎
+        health.record_success(time.monotonic() - started)
+        return results
+
+    async def get_suggestions(self, query: str) -> List[str]:
+        for engine in self.registry.rank(self.engines):
+            suggestions = await engine.get_suggestions(query)
+            if suggestions:
+                return suggestions
+        return []
+
+
+async def stream_search(
+    engine, query: str, num_results: int = 10
+) -> AsyncIterator[Tuple[str, List[Dict]]]:
+    """
+    以流的形式执行搜索：元搜索按引擎逐批产出，需要多页结果的单个引擎按页逐批产出，
+    其他引擎产出一批
+
+    Args:
+        engine: 异步搜索引擎实例
+        query: 搜索关键词
+        num_results: 返回结果数量
+
+    Yields:
+        (结果来源, 搜索结果列表)
+    """
+    if hasattr(engine, "stream"):
+        async for source, results in engine.stream(query, num_results):
+            yield source, results
+        return
+
+    if hasattr(engine, "iter_pages"):
+        pages = plan_pages(
+            num_results, engine.page_size, get_pagination_config()["MAX_PAGES"]
+        )
+        if pages > 1:
+            # 需要多页结果时逐页产出，每页到达后立即进入过滤
+            async with aclosing(engine.iter_pages(query, pages)) as page_stream:
+                async for _, results in page_stream:
+                    if results:
+                        yield engine.name, results
+            return
+
+    results = await engine.search(query, num_results)
+    if results:
+        # 自适应搜索的结果来自胜出的引擎
+        yield results[0].get("source") or engine.name, results
+
+
+# 同步引擎类 -> 异步引擎类
+ASYNC_ENGINE_CLASSES = {
+    BaiduSearchService: AsyncBaiduSearchService,
+    PublicSearchService: AsyncPublicSearchService,
+    SimpleSearchService: AsyncSimpleSearchService,
+}
+
+
+def make_async_engine(engine):
+    """
+    为同步搜索引擎创建对应的异步实现
+
+    已知的网络引擎使用 httpx 原生异步实现；其他引擎（如模拟引擎）
+    或未安装 httpx 时，在线程池中执行同步实现。
+
+    Args:
+        engine: 同步搜索引擎实例
+
+    Returns:
+        异步搜索引擎实例
+    """
+    if isinstance(engine, MetaSearchService):
+        return AsyncMetaSearchService(
+            [make_async_engine(e) for e in engine.engines],
+            deadline=engine.deadline,
+            early_return=engine.early_return,
+        )
+
+    if isinstance(engine, AdaptiveSearchService):
+        return AsyncAdaptiveSearchService(
+            [make_async_engine(e) for e in engine.engines],
+            registry=engine.registry,
+            deadline=engine.deadline,
+        )
+
+    async_class = ASYNC_ENGINE_CLASSES.get(type(engine))
+    if async_class is None or httpx is None:
+        return SyncEngineAdapter(engine)
+    return async_class()
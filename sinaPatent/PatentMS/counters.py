@@ -0,0 +1,386 @@
+"""
+浏览和点赞计数模块
+计数不再在 Python 中读取-加一-整行保存（并发时丢失更新，每次点击都要抢 SQLite 写锁），
+而是先累加到进程内缓冲，由后台线程定期把合并后的增量写入数据库：
+同一批中增量相同的行合并为一条 UPDATE ... SET 字段 = 字段 + 增量（F() 表达式），
+整批在一个事务中提交；显示计数时把缓冲中尚未写入的增量加到对象上
+
+持久性（DURABILITY）：
+    memory  只在内存中缓冲，进程正常退出时写入；崩溃时最多丢失一个写入间隔的计数
+    journal 每次计数同时追加到本进程的日志文件，进程崩溃后由其他进程或
+            flush_counters 命令重放；写入数据库后、删除日志前崩溃时该批会被重放一次
+    fsync   同 journal，每次追加后 fsync（断电也不丢失，写入明显变慢）
+"""
+
+import atexit
+import logging
+import os
+import threading
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+try:
+    import fcntl
+except ImportError:  # 计数日志依赖文件锁（POSIX）
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MEMORY = "memory"
+DURABILITY_JOURNAL = "journal"
+DURABILITY_FSYNC = "fsync"
+
+# 默认配置，可通过 settings.COUNTERS 覆盖
+DEFAULT_COUNTERS = {
+    "BUFFERED": True,  # False 时每次计数直接执行一条 F() UPDATE
+    "FLUSH_INTERVAL": 5,  # 后台线程写入数据库的间隔（秒），0 表示不启动后台线程
+    "MAX_PENDING": 1000,  # 缓冲的计数次数达到该值时立即写入
+    "BATCH_SIZE": 500,  # 每条 UPDATE 最多更新的行数
+    "DURABILITY": DURABILITY_MEMORY,
+    "JOURNAL_DIR": "",  # 计数日志目录（journal / fsync 时必填）
+}
+
+JOURNAL_SUFFIX = ".journal"
+FLUSHING_SUFFIX = ".flushing"
+
+# 计数写入数据库后发送：sender 为模型，deltas 为 {主键: {字段: 增量}}
+counters_flushed = Signal()
+
+
+def get_counters_config() -> Dict:
+    """获取合并后的计数配置"""
+    config = dict(DEFAULT_COUNTERS)
+    config.update(getattr(settings, "COUNTERS", {}))
+    return config
+
+
+def apply_deltas(
+    deltas: Dict[Tuple[str, object], Dict[str, int]], batch_size: int = 500
+):
+    """
+    把增量写入数据库：字段和增量完全相同的行合并为一条 UPDATE，整批一个事务
+
+    Args:
+        deltas: {(模型标签, 主键): {字段: 增量}}
+        batch_size: 每条 UPDATE 最多更新的行数
+
+    Returns:
+        (更新的行数, 执行的 UPDATE 数)
+    """
+    groups = defaultdict(list)
+    for (label, pk), fields in deltas.items():
+        items = tuple(
+            sorted((field, delta) for field, delta in fields.items() if delta)
+        )
+        if items:
+            groups[(label, items)].append(pk)
+    if not groups:
+        return 0, 0
+
+    rows = statements = 0
+    with transaction.atomic():
+        for (label, items), pks in groups.items():
+            model = apps.get_model(label)
+            updates = {field: F(field) + delta for field, delta in items}
+            for start in range(0, len(pks), batch_size):
+                rows += model.objects.filter(
+                    pk__in=pks[start : start + batch_size]
+                ).update(**updates)
+                statements += 1
+
+    by_model = defaultdict(dict)
+    for (label, pk), fields in deltas.items():
+        by_model[label][pk] = fields
+    for label, model_deltas in by_model.items():
+        counters_flushed.send(sender=apps.get_model(label), deltas=model_deltas)
+    return rows, statements
+
+
+def read_journal(file_obj) -> Dict[Tuple[str, object], Dict[str, int]]:
+    """
+    读取计数日志（每行 "模型标签\\t主键\\t字段\\t增量"），合并同一行同一字段的增量
+
+    崩溃时最后一行可能不完整，格式错误的行被忽略
+    """
+    deltas = {}
+    for line in file_obj:
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) != 4 or not line.endswith("\n"):
+            logger.warning(f"计数日志中格式错误的行已忽略: {line!r}")
+            continue
+        label, pk, field, delta = parts
+        try:
+            key = (label, int(pk) if pk.isdigit() else pk)
+            fields = deltas.setdefault(key, {})
+            fields[field] = fields.get(field, 0) + int(delta)
+        except ValueError:
+            logger.warning(f"计数日志中格式错误的行已忽略: {line!r}")
+    return deltas
+
+
+class CounterBuffer:
+    """进程内的计数缓冲"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config  # 为 None 时每次读取 settings.COUNTERS
+        self._deltas = {}  # {(模型标签, 主键): {字段: 增量}}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # 同一时间只有一个线程写入数据库
+        self._journal = None  # 当前日志文件 (路径, 文件描述符)
+        self._flushing = []  # 已轮换、等待写入数据库后删除的日志文件
+        self._recovered = False
+        self._thread = None
+        self._wake = threading.Event()
+        self._atexit_registered = False
+        self.stats = Counter()
+
+    def increment(self, instance, field: str, delta: int = 1):
+        """
+        增加一个对象的计数
+
+        Args:
+            instance: 模型对象（需已保存）
+            field: 计数字段
+            delta: 增量
+        """
+        config = self._config()
+        key = (instance._meta.label, instance.pk)
+        if not config["BUFFERED"]:
+            rows, statements = apply_deltas({key: {field: delta}})
+            with self._lock:
+                self.stats["increments"] += 1
+                self.stats["statements"] += statements
+            return
+
+        with self._lock:
+            fields = self._deltas.setdefault(key, {})
+            fields[field] = fields.get(field, 0) + delta
+            self._pending += 1
+            self.stats["increments"] += 1
+            if config["DURABILITY"] != DURABILITY_MEMORY:
+                self._append_journal(config, key, field, delta)
+            full = self._pending >= config["MAX_PENDING"]
+
+        self._ensure_flusher(config)
+        if full:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def pending(self, instance) -> Dict[str, int]:
+        """对象尚未写入数据库的增量 {字段: 增量}"""
+        with self._lock:
+            return dict(self._deltas.get((instance._meta.label, instance.pk), {}))
+
+    def with_pending(self, objects: Iterable) -> List:
+        """
+        把缓冲中尚未写入的增量加到对象的计数字段上（只用于显示，之后不要整行保存这些对象）
+
+        Args:
+            objects: 从数据库读取的模型对象（查询集会被求值）
+
+        Returns:
+            对象列表
+        """
+        objects = list(objects)
+        with self._lock:
+            if not self._deltas:
+                return objects
+            for obj in objects:
+                fields = self._deltas.get((obj._meta.label, obj.pk))
+                for field, delta in (fields or {}).items():
+                    setattr(obj, field, getattr(obj, field) + delta)
+        return objects
+
+    def flush(self) -> int:
+        """
+        把缓冲的增量写入数据库（失败时放回缓冲，下次重试）
+
+        Returns:
+            更新的行数
+        """
+        config = self._config()
+        with self._flush_lock:
+            if config["DURABILITY"] != DURABILITY_MEMORY and not self._recovered:
+                self._recovered = True
+                self.recover(config)
+
+            with self._lock:
+                deltas, self._deltas = self._deltas, {}
+                pending, self._pending = self._pending, 0
+                self._rotate_journal()
+                flushing, self._flushing = self._flushing, []
+
+            try:
+                rows, statements = apply_deltas(deltas, config["BATCH_SIZE"])
+            except Exception as e:
+                logger.error(f"计数写入数据库失败，稍后重试: {e}")
+                with self._lock:
+                    for key, fields in deltas.items():
+                        merged = self._deltas.setdefault(key, {})
+                        for field, delta in fields.items():
+                            merged[field] = merged.get(field, 0) + delta
+                    self._pending += pending
+                    self._flushing = flushing + self._flushing
+                self.stats["failed_flushes"] += 1
+                raise
+
+            for path, fd in flushing:
+                os.unlink(path)
+                os.close(fd)
+            if deltas:
+                self.stats["flushes"] += 1
+                self.stats["rows"] += rows
+                self.stats["statements"] += statements
+            return rows
+
+    def recover(self, config=None) -> int:
+        """
+        重放已退出进程留下的计数日志（仍被其他进程锁定的日志跳过）
+
+        Returns:
+            重放的日志文件数
+        """
+        config = config or self._config()
+        directory = config["JOURNAL_DIR"]
+        if fcntl is None or not directory or not os.path.isdir(directory):
+            return 0
+
+        recovered = 0
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith((JOURNAL_SUFFIX, FLUSHING_SUFFIX)):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                # 加锁前文件可能已被其他进程重放并删除
+                if (
+                    not os.path.exists(path)
+                    or os.stat(path).st_ino != os.fstat(fd).st_ino
+                ):
+                    continue
+                with open(fd, encoding="utf-8", closefd=False) as f:
+                    deltas = read_journal(f)
+                apply_deltas(deltas, config["BATCH_SIZE"])
+                os.unlink(path)
+                recovered += 1
+                logger.info(f"已重放计数日志 {name}：{len(deltas)} 行")
+            finally:
+                os.close(fd)
+        self.stats["recovered_journals"] += recovered
+        return recovered
+
+    def snapshot(self) -> Dict:
+        """缓冲和写入统计"""
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "pending_rows": len(self._deltas),
+                **self.stats,
+            }
+
+    def reset(self):
+        """清空缓冲（不写入数据库）和统计"""
+        with self._lock:
+            self._deltas = {}
+            self._pending = 0
+            self._rotate_journal()
+            for path, fd in self._flushing:
+                os.unlink(path)
+                os.close(fd)
+            self._flushing = []
+            self._recovered = False
+            self.stats.clear()
+
+    def _config(self) -> Dict:
+        if self.config is None:
+            return get_counters_config()
+        config = dict(DEFAULT_COUNTERS)
+        config.update(self.config)
+        return config
+
+    def _append_journal(self, config, key, field, delta):
+        """追加一条计数日志（调用方持有 self._lock）"""
+        if self._journal is None:
+            directory = config["JOURNAL_DIR"]
+            if fcntl is None or not directory:
+                if not self.stats["journal_unavailable"]:
+                    logger.warning(
+                        "计数日志不可用（未配置目录或系统不支持文件锁），只在内存中缓冲"
+                    )
+                self.stats["journal_unavailable"] += 1
+                return
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(
+                directory, f"{os.getpid()}-{uuid.uuid4().hex[:12]}{JOURNAL_SUFFIX}"
+            )
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._journal = (path, fd)
+        fd = self._journal[1]
+        os.write(fd, f"{key[0]}\t{key[1]}\t{field}\t{delta}\n".encode("utf-8"))
+        if config["DURABILITY"] == DURABILITY_FSYNC:
+            os.fsync(fd)
+
+    def _rotate_journal(self):
+        """把当前日志改名为待删除，下次计数时创建新日志（调用方持有 self._lock）"""
+        if self._journal is None:
+            return
+        path, fd = self._journal
+        flushing_path = path[: -len(JOURNAL_SUFFIX)] + FLUSHING_SUFFIX
+        os.rename(path, flushing_path)
+        self._flushing.append((flushing_path, fd))
+        self._journal = None
+
+    def _ensure_flusher(self, config):
+        """首次缓冲计数时启动后台写入线程，并在进程退出时写入剩余的计数"""
+        if self._atexit_registered and (
+            self._thread is not None or config["FLUSH_INTERVAL"] <= 0
+        ):
+            return
+        with self._lock:
+            if not self._atexit_registered:
+                atexit.register(self._flush_at_exit)
+                self._atexit_registered = True
+            if self._thread is None and config["FLUSH_INTERVAL"] > 0:
+                self._thread = threading.Thread(
+                    target=self._run, name="counter-flush", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._config()["FLUSH_INTERVAL"])
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"计数后台写入失败: {e}")
+            finally:
+                close_old_connections()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"进程退出时写入计数失败: {e}")
+
+
+# 全局计数缓冲
+counters = CounterBuffer()
@@ -0,0 +1,295 @@
+"""
+搜索引擎健康统计模块
+为每个搜索引擎记录滚动延迟分位数和错误率，并维护熔断器状态，
+供自适应搜索按实时健康数据选择引擎
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"  # 正常
+OPEN = "open"  # 熔断中，不再发送请求
+HALF_OPEN = "half_open"  # 熔断到期，允许一个探测请求
+
+# 默认配置，可通过 settings.SEARCH_ADAPTIVE 覆盖
+DEFAULT_ADAPTIVE = {
+    "ENGINES": ["bing", "baidu", "duckduckgo"],
+    "WINDOW": 50,  # 每个引擎保留的最近样本数
+    "MIN_SAMPLES": 5,  # 计算分位数和错误率所需的最少样本数
+    "FAILURE_THRESHOLD": 3,  # 连续失败次数达到该值时熔断
+    "ERROR_RATE_THRESHOLD": 0.5,  # 窗口内错误率达到该值时熔断
+    "OPEN_SECONDS": 30,  # 首次熔断时长（秒），再次熔断时加倍
+    "MAX_OPEN_SECONDS": 300,  # 熔断时长上限（秒）
+    "HEDGE_MIN_DELAY": 0.3,  # 对冲请求的最短等待时间（秒）
+    "HEDGE_MAX_DELAY": 3.0,  # 对冲请求的最长等待时间（秒）
+    "HEDGE_DEFAULT_DELAY": 1.5,  # 样本不足时的对冲等待时间（秒）
+    "DEADLINE": 8.0,  # 每次搜索的截止时间（秒）
+}
+
+
+def get_adaptive_config() -> Dict:
+    """
+    获取合并后的自适应搜索配置
+
+    Returns:
+        配置字典
+    """
+    config = dict(DEFAULT_ADAPTIVE)
+    config.update(getattr(settings, "SEARCH_ADAPTIVE", {}))
+    return config
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    计算已排序数据的分位数（最近秩法）
+
+    Args:
+        sorted_values: 升序排列的数据
+        fraction: 分位，如 0.95
+
+    Returns:
+        分位数，无数据时返回 0
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(fraction * len(sorted_values))))
+    return sorted_values[index]
+
+
+class EngineHealth:
+    """单个搜索引擎的健康统计和熔断器"""
+
+    def __init__(self, name: str, config: Optional[Dict] = None):
+        self.name = name
+        self.config = config or get_adaptive_config()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.trips = 0  # 连续熔断次数，用于计算熔断时长
+        self.total_requests = 0
+        self.total_failures = 0
+        self._samples = deque(maxlen=self.config["WINDOW"])  # (耗时, 是否成功)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """是否可以向该引擎发送请求（熔断中且未到期时不可用）"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() >= self.open_until
+            return not self._probe_in_flight
+
+    def is_probe_due(self) -> bool:
+        """熔断已到期，下一个请求将作为探测请求"""
+        with self._lock:
+            return self.state != CLOSED and not self._probe_in_flight
+
+    def begin_request(self) -> bool:
+        """
+        发送请求前调用；熔断到期时转为半开状态并占用唯一的探测名额
+
+        Returns:
+            是否允许发送请求
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() < self.open_until:
+                    return False
+                self.state = HALF_OPEN
+                logger.info(f"搜索引擎 {self.name} 熔断到期，发送探测请求")
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        """记录一次成功请求"""
+        with self._lock:
+            self.total_requests += 1
+            self._samples.append((latency, True))
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                # 探测成功，恢复正常并丢弃熔断前的样本
+                self.state = CLOSED
+                self.trips = 0
+                self._probe_in_flight = False
+                self._samples.clear()
+                self._samples.append((latency, True))
+                logger.info(f"搜索引擎 {self.name} 探测成功，熔断器关闭")
+
+    def record_failure(self, latency: float):
+        """记录一次失败请求（请求异常、超时或返回验证页面）"""
+        with self._lock:
+            self.total_requests += 1
+            self.total_failures += 1
+            self._samples.append((latency, False))
+            self.consecutive_failures += 1
+            if self.state != CLOSED:
+                self._trip()
+            elif self._should_trip():
+                self._trip()
+
+    def cancel_request(self):
+        """请求被取消（未产生结果），释放探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _should_trip(self) -> bool:
+        if self.consecutive_failures >= self.config["FAILURE_THRESHOLD"]:
+            return True
+        if len(self._samples) < self.config["MIN_SAMPLES"]:
+            return False
+        return self._error_rate() >= self.config["ERROR_RATE_THRESHOLD"]
+
+    def _trip(self):
+        open_seconds = min(
+            self.config["OPEN_SECONDS"] * (2**self.trips),
+            self.config["MAX_OPEN_SECONDS"],
+        )
+        self.state = OPEN
+        self.trips += 1
+        self.open_until = time.monotonic() + open_seconds
+        self._probe_in_flight = False
+        logger.warning(
+            f"搜索引擎 {self.name} 熔断 {open_seconds}s "
+            f"(连续失败 {self.consecutive_failures} 次)"
+        )
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        failures = sum(1 for _, ok in self._samples if not ok)
+        return failures / len(self._samples)
+
+    def _latencies(self) -> List[float]:
+        return sorted(latency for latency, _ in self._samples)
+
+    @property
+    def error_rate(self) -> float:
+        """窗口内错误率"""
+        with self._lock:
+            return self._error_rate()
+
+    def latency_percentile(self, fraction: float) -> Optional[float]:
+        """
+        窗口内延迟分位数
+
+        Args:
+            fraction: 分位，如 0.5、0.95
+
+        Returns:
+            延迟（秒），样本不足时返回 None
+        """
+        with self._lock:
+            if len(self._samples) < self.config["MIN_SAMPLES"]:
+                return None
+            return percentile(self._latencies(), fraction)
+
+    def hedge_delay(self) -> float:
+        """发出对冲请求前等待的时间：观测到的 p95，样本不足时使用默认值"""
+        p95 = self.latency_percentile(0.95)
+        if p95 is None:
+            return self.config["HEDGE_DEFAULT_DELAY"]
+        return min(
+            max(p95, self.config["HEDGE_MIN_DELAY"]), self.config["HEDGE_MAX_DELAY"]
+        )
+
+    def score(self) -> float:
+        """
+        排序分数（越小越好）：p50 延迟按错误率加权
+
+        没有样本的引擎分数为 0，优先尝试以积累健康数据
+        """
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            p50 = percentile(self._latencies(), 0.5)
+            return p50 / max(0.05, 1 - self._error_rate())
+
+    def snapshot(self) -> Dict:
+        """健康状态快照（用于日志和管理页面）"""
+        with self._lock:
+            latencies = self._latencies()
+            return {
+                "name": self.name,
+                "state": self.state,
+                "samples": len(self._samples),
+                "p50": round(percentile(latencies, 0.5), 3),
+                "p95": round(percentile(latencies, 0.95), 3),
+                "error_rate": round(self._error_rate(), 3),
+                "consecutive_failures": self.consecutive_failures,
+                "total_requests": self.total_requests,
+                "total_failures": self.total_failures,
+                "open_for": (
+                    round(max(0.0, self.open_until - time.monotonic()), 1)
+                    if self.state == OPEN
+                    else 0.0
+                ),
+            }
+
+
+class EngineHealthRegistry:
+    """所有搜索引擎的健康统计（进程内共享）"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> EngineHealth:
+        """获取（必要时创建）指定引擎的健康统计"""
+        health = self._engines.get(name)
+        if health is None:
+            with self._lock:
+                health = self._engines.get(name)
+                if health is None:
+                    health = EngineHealth(name, self.config)
+                    self._engines[name] = health
+        return health
+
+    def rank(self, engines) -> List:
+        """
+        按健康状况排序可用的引擎
+
+        熔断已到期、等待探测的引擎排在最前，其余按分数升序；
+        分数相同时保持配置中的顺序，熔断中的引擎被排除
+
+        Args:
+            engines: 引擎实例列表
+
+        Returns:
+            排序后的可用引擎列表
+        """
+        available = [e for e in engines if self.get(e.name).is_available()]
+        return sorted(
+            available,
+            key=lambda e: (
+                not self.get(e.name).is_probe_due(),
+                self.get(e.name).score(),
+            ),
+        )
+
+    def snapshot(self) -> List[Dict]:
+        """所有引擎的健康状态快照"""
+        return [health.snapshot() for health in list(self._engines.values())]
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._engines.clear()
+
+
+# 全局引擎健康统计
+engine_health = EngineHealthRegistry()
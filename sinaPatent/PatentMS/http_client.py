@@ -0,0 +1,193 @@
+"""
+HTTP客户端模块
+为搜索引擎提供线程安全的 requests 会话：每个线程一个 Session（Cookie 和请求头互不干扰），
+所有会话共享一个带连接池、重试和退避策略的 HTTPAdapter，并支持启动时预热连接
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+
+from PatentMS.transport import make_transport_adapter
+
+try:
+    import brotli  # noqa: F401
+
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_HTTP_CLIENT 覆盖
+DEFAULT_HTTP_CLIENT = {
+    "POOL_CONNECTIONS": 10,  # 缓存的主机连接池数量
+    "POOL_MAXSIZE": 20,  # 每个主机保持的最大连接数（应不小于并发线程数）
+    "MAX_RETRIES": 2,  # 连接失败和 5xx 响应的重试次数
+    "BACKOFF_FACTOR": 0.3,  # 重试退避系数（0.3s、0.6s ...）
+    "RETRY_STATUSES": [500, 502, 503, 504],
+    "WARMUP": False,  # 启动时是否预热到搜索引擎的连接
+    "WARMUP_TIMEOUT": 3,  # 预热请求超时（秒）
+}
+
+# 支持的压缩格式（安装 brotli 后才接受 br）
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
+_shared_adapter = None
+_session_adapter = None
+_shared_adapter_lock = threading.Lock()
+
+
+def get_http_client_config() -> Dict:
+    """获取合并后的HTTP客户端配置"""
+    config = dict(DEFAULT_HTTP_CLIENT)
+    config.update(getattr(settings, "SEARCH_HTTP_CLIENT", {}))
+    return config
+
+
+def build_adapter(config: Optional[Dict] = None) -> HTTPAdapter:
+    """
+    创建带连接池和重试策略的 HTTPAdapter
+
+    只重试连接失败和网关类错误，不重试读超时，避免慢引擎的等待时间翻倍；
+    不遵循 Retry-After，限流由调用方处理
+
+    Args:
+        config: HTTP客户端配置
+
+    Returns:
+        HTTPAdapter实例
+    """
+    config = config or get_http_client_config()
+    retry = Retry(
+        total=config["MAX_RETRIES"],
+        connect=config["MAX_RETRIES"],
+        read=0,
+        status=config["MAX_RETRIES"],
+        backoff_factor=config["BACKOFF_FACTOR"],
+        status_forcelist=config["RETRY_STATUSES"],
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=config["POOL_CONNECTIONS"],
+        pool_maxsize=config["POOL_MAXSIZE"],
+        max_retries=retry,
+    )
+
+
+def get_shared_adapter() -> HTTPAdapter:
+    """获取进程内共享的 HTTPAdapter（urllib3 连接池是线程安全的）"""
+    global _shared_adapter
+    if _shared_adapter is None:
+        with _shared_adapter_lock:
+            if _shared_adapter is None:
+                _shared_adapter = build_adapter()
+    return _shared_adapter
+
+
+def get_session_adapter() -> BaseAdapter:
+    """获取会话挂载的适配器：按传输模式（直连/录制/回放/替身）包装共享的 HTTPAdapter"""
+    global _session_adapter
+    if _session_adapter is None:
+        inner = get_shared_adapter()
+        with _shared_adapter_lock:
+            if _session_adapter is None:
+                _session_adapter = make_transport_adapter(inner)
+    return _session_adapter
+
+
+def build_session(
+    headers: Optional[Dict] = None, adapter: Optional[BaseAdapter] = None
+) -> requests.Session:
+    """
+    创建挂载共享连接池的会话
+
+    Args:
+        headers: 默认请求头（未指定 Accept-Encoding 时按可用的解压库协商）
+        adapter: 使用指定的适配器（默认按配置的传输模式）
+
+    Returns:
+        requests.Session实例
+    """
+    session = requests.Session()
+    adapter = adapter or get_session_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    session.headers.update(headers or {})
+    return session
+
+
+class ThreadLocalSessions:
+    """按线程分配的会话（requests.Session 不是线程安全的）"""
+
+    def __init__(
+        self, headers: Optional[Dict] = None, adapter: Optional[BaseAdapter] = None
+    ):
+        self.headers = dict(headers or {})
+        self.adapter = adapter
+        self._local = threading.local()
+
+    def get(self) -> requests.Session:
+        """获取当前线程的会话（首次调用时创建）"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = build_session(self.headers, self.adapter)
+        return session
+
+
+def warm_up(urls: Iterable[str], timeout: Optional[float] = None) -> Dict:
+    """
+    预热连接：并发向各主机发送 HEAD 请求，完成 DNS 解析和 TLS 握手，
+    建立的连接留在共享连接池中供后续搜索复用
+
+    Args:
+        urls: 需要预热的URL
+        timeout: 请求超时（秒）
+
+    Returns:
+        {URL: 耗时（秒），失败时为 None}
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    timeout = timeout or get_http_client_config()["WARMUP_TIMEOUT"]
+    session = build_session()
+
+    def head(url):
+        started = time.monotonic()
+        try:
+            session.head(url, timeout=timeout, allow_redirects=False)
+        except requests.RequestException as e:
+            logger.warning(f"预热连接失败 {url}: {e}")
+            return url, None
+        return url, round(time.monotonic() - started, 3)
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        timings = dict(executor.map(head, urls))
+    logger.info(f"搜索引擎连接预热完成: {timings}")
+    return timings
+
+
+def get_warmup_urls(engine) -> list:
+    """收集搜索引擎（包括组合引擎中的各个引擎）需要预热的URL"""
+    engines = getattr(engine, "engines", None) or [engine]
+    return [e.warmup_url for e in engines if getattr(e, "warmup_url", None)]
+
+
+def start_warm_up(engine):
+    """在后台线程中预热指定搜索引擎的连接（不阻塞启动）"""
+    urls = get_warmup_urls(engine)
+    if urls:
+        threading.Thread(
+            target=warm_up, args=(urls,), name="http-warmup", daemon=True
+        ).start()
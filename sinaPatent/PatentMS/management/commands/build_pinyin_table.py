@@ -0,0 +1,48 @@
+"""
+拼音表生成管理命令
+用 pypinyin 的单字读音数据生成 PatentMS/pinyin_table.bin（pypinyin 只在生成时需要）
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from PatentMS.pinyin_table import CJK_RANGES, DEFAULT_PINYIN_TABLE_FILE, write_table
+
+
+class Command(BaseCommand):
+    help = "用 pypinyin 生成按码位索引的拼音表文件"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="输出文件（默认 settings.PINYIN_TABLE_FILE）"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from pypinyin import Style, lazy_pinyin
+            from pypinyin.pinyin_dict import pinyin_dict
+        except ImportError:
+            raise CommandError("生成拼音表需要 pypinyin：pip install pypinyin")
+
+        output = options["output"] or getattr(
+            settings, "PINYIN_TABLE_FILE", DEFAULT_PINYIN_TABLE_FILE
+        )
+
+        readings = {}
+        for first, last in CJK_RANGES:
+            for cp in range(first, last + 1):
+                if cp not in pinyin_dict:
+                    continue
+                # 多音字取 pypinyin 的默认读音；ü 写作 v
+                syllable = lazy_pinyin(chr(cp), style=Style.NORMAL, errors="ignore")
+                if syllable and syllable[0].isascii() and syllable[0].isalpha():
+                    readings[cp] = syllable[0].lower()
+
+        stats = write_table(output, readings)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"拼音表已生成: {output}（汉字 {stats['characters']}，"
+                f"音节 {stats['syllables']}，区段 {stats['ranges']}，"
+                f"{stats['bytes'] / 1024:.0f} KB）"
+            )
+        )
@@ -108,9 +108,9 @@ class Command(BaseCommand):
                 orphan_profiles.delete()
                 self.stdout.write("已删除孤立档案")
 
-        # 检查没有页面的分类
-        empty_categories = Category.objects.annotate(page_count=Count("page")).filter(
-            page_count=0
+        # 检查没有页面的分类（按页面表统计，不依赖可能漂移的 page_count）
+        empty_categories = Category.objects.annotate(num_pages=Count("page")).filter(
+            num_pages=0
         )
 
         if empty_categories.exists():
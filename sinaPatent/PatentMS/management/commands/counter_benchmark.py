@@ -0,0 +1,136 @@
+"""
+计数基准测试管理命令
+多个线程同时为少数几个分类点赞，比较三种写法的吞吐量和丢失的点赞数：
+legacy（读取-加一-整行保存）、direct（每次一条 F() UPDATE）、buffered（缓冲后合并写入）
+"""
+
+import tempfile
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from PatentMS.counters import (
+    DURABILITY_FSYNC,
+    DURABILITY_JOURNAL,
+    DURABILITY_MEMORY,
+    CounterBuffer,
+)
+from PatentMS.models import Category
+
+MODES = ("legacy", "direct", "buffered")
+
+
+class Command(BaseCommand):
+    help = "并发点赞基准测试：每秒点赞数和丢失的点赞数（在当前数据库中创建临时分类）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="并发线程数")
+        parser.add_argument("--likes", type=int, default=500, help="每个线程的点赞数")
+        parser.add_argument("--categories", type=int, default=4, help="被点赞的分类数")
+        parser.add_argument(
+            "--modes", nargs="+", choices=MODES, default=list(MODES), help="测试的写法"
+        )
+        parser.add_argument(
+            "--durability",
+            choices=[DURABILITY_MEMORY, DURABILITY_JOURNAL, DURABILITY_FSYNC],
+            default=DURABILITY_MEMORY,
+            help="buffered 的持久性（日志写入临时目录）",
+        )
+        parser.add_argument(
+            "--flush-interval",
+            type=float,
+            default=1.0,
+            help="buffered 的写入间隔（秒）",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['threads']} 个线程 × {options['likes']} 次点赞，"
+            f"{options['categories']} 个分类，buffered 持久性 {options['durability']}"
+        )
+        self.stdout.write(
+            f"{'写法':<10}{'耗时(s)':>10}{'点赞/秒':>12}{'丢失':>8}{'错误':>8}{'UPDATE':>10}"
+        )
+        for mode in options["modes"]:
+            result = self.run_mode(mode, options)
+            self.stdout.write(
+                f"{mode:<10}{result['seconds']:>10.2f}{result['rate']:>12.0f}"
+                f"{result['lost']:>8}{result['errors']:>8}{result['statements']:>10}"
+            )
+
+    def run_mode(self, mode, options):
+        """运行一种写法，返回耗时、吞吐量、丢失的点赞数、错误数和 UPDATE 数"""
+        run_id = uuid.uuid4().hex[:8]
+        categories = [
+            Category.objects.create(name=f"__counter_benchmark_{run_id}_{i}")
+            for i in range(options["categories"])
+        ]
+        journal_dir = tempfile.TemporaryDirectory()
+        buffer = CounterBuffer(
+            {
+                "BUFFERED": mode == "buffered",
+                "FLUSH_INTERVAL": options["flush_interval"],
+                "MAX_PENDING": 10000,
+                "DURABILITY": options["durability"],
+                "JOURNAL_DIR": journal_dir.name,
+            }
+        )
+        errors = []
+        statements = [0]
+        start_event = threading.Event()
+
+        def worker(offset):
+            start_event.wait()
+            try:
+                for i in range(options["likes"]):
+                    category = categories[(offset + i) % len(categories)]
+                    try:
+                        if mode == "legacy":
+                            fresh = Category.objects.get(pk=category.pk)
+                            fresh.likes += 1
+                            fresh.save(update_fields=["likes"])
+                            statements[0] += 1
+                        else:
+                            buffer.increment(category, "likes")
+                    except DatabaseError as e:
+                        errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(offset,))
+            for offset in range(options["threads"])
+        ]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        start_event.set()
+        for thread in threads:
+            thread.join()
+        if mode == "buffered":
+            buffer.flush()
+        seconds = time.perf_counter() - started
+
+        try:
+            expected = options["threads"] * options["likes"]
+            stored = sum(
+                Category.objects.filter(pk__in=[c.pk for c in categories]).values_list(
+                    "likes", flat=True
+                )
+            )
+        finally:
+            Category.objects.filter(pk__in=[c.pk for c in categories]).delete()
+            journal_dir.cleanup()
+
+        if mode != "legacy":
+            statements[0] = buffer.snapshot().get("statements", 0)
+        return {
+            "seconds": seconds,
+            "rate": expected / seconds if seconds else 0.0,
+            "lost": expected - len(errors) - stored,
+            "errors": len(errors),
+            "statements": statements[0],
+        }
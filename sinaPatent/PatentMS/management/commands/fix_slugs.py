@@ -1,48 +1,66 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
 from PatentMS.models import Category, chinese_slugify
+from PatentMS.slug_allocator import SlugReservation
+
+# 并发写入占用了分配的slug时整体重试的次数
+FIX_ATTEMPTS = 3
 
 
 class Command(BaseCommand):
     help = "修复所有分类的slug字段"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="每次批量更新的分类数"
+        )
+
     def handle(self, *args, **options):
-        categories = Category.objects.filter(slug="")
-        count = 0
+        for attempt in range(FIX_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    categories = self.fix(options["batch_size"])
+                break
+            except IntegrityError as e:
+                if attempt + 1 == FIX_ATTEMPTS:
+                    raise CommandError(f"修复slug失败（分类正在被并发修改）: {e}")
 
-        for category in categories:
-            old_slug = category.slug
-            category.slug = chinese_slugify(category.name)
-
-            # 确保slug唯一性
-            if category.slug == "category":
-                # 如果是默认值，使用ID生成唯一slug
-                counter = 1
-                while Category.objects.filter(slug=f"category-{counter}").exists():
-                    counter += 1
-                category.slug = f"category-{counter}"
-            else:
-                # 检查slug唯一性
-                counter = 1
-                original_slug = category.slug
-                while (
-                    Category.objects.filter(slug=category.slug)
-                    .exclude(id=category.id)
-                    .exists()
-                ):
-                    category.slug = f"{original_slug}-{counter}"
-                    counter += 1
-
-            category.save(update_fields=["slug"])
-            count += 1
+        if not categories:
+            self.stdout.write(self.style.WARNING("没有找到需要修复slug的分类"))
+            return
 
+        for category, old_slug in categories:
             self.stdout.write(
                 self.style.SUCCESS(
                     f'修复分类 "{category.name}" 的slug: {old_slug} -> {category.slug}'
                 )
             )
+        self.stdout.write(
+            self.style.SUCCESS(f"成功修复了 {len(categories)} 个分类的slug")
+        )
 
-        if count == 0:
-            self.stdout.write(self.style.WARNING("没有找到需要修复slug的分类"))
-        else:
-            self.stdout.write(self.style.SUCCESS(f"成功修复了 {count} 个分类的slug"))
- 
\ No newline at end of file
+    def fix(self, batch_size):
+        """
+        为所有slug为空的分类分配slug并批量更新
+
+        已有的slug一次读入内存，分配时不再逐个查询数据库
+
+        Returns:
+            [(修复的分类, 原slug)]
+        """
+        categories = list(Category.objects.filter(slug="").only("id", "name", "slug"))
+        if not categories:
+            return []
+
+        reservation = SlugReservation(
+            Category.objects.exclude(slug="").values_list("slug", flat=True),
+            Category._meta.get_field("slug").max_length,
+        )
+        fixed = []
+        for category in categories:
+            fixed.append((category, category.slug))
+            base = chinese_slugify(category.name)
+            category.slug = reservation.allocate(base, allow_bare=base != "category")
+
+        Category.objects.bulk_update(categories, ["slug"], batch_size=batch_size)
+        return fixed
@@ -0,0 +1,23 @@
+"""
+计数日志重放管理命令
+把已退出（或崩溃）的进程留下的计数日志写入数据库，部署重启后或定时执行
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PatentMS.counters import DURABILITY_MEMORY, counters, get_counters_config
+
+
+class Command(BaseCommand):
+    help = "重放已退出进程留下的浏览和点赞计数日志"
+
+    def handle(self, *args, **options):
+        config = get_counters_config()
+        if config["DURABILITY"] == DURABILITY_MEMORY or not config["JOURNAL_DIR"]:
+            raise CommandError(
+                "计数只在内存中缓冲（DURABILITY=memory），没有需要重放的日志"
+            )
+
+        recovered = counters.recover()
+        counters.flush()
+        self.stdout.write(self.style.SUCCESS(f"已重放 {recovered} 个计数日志"))
@@ -0,0 +1,78 @@
+"""
+搜索缓存预热管理命令
+按热门分类和历史热门搜索预先执行搜索并写入缓存，可执行一轮或常驻运行；
+命令在独立进程中运行，只有 CACHES["default"] 为进程间共享的缓存时
+Web 服务进程才能读到预热的结果
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PatentMS.prewarm import Prewarmer, collect_targets, get_prewarm_config
+from PatentMS.search_service import search_service
+from PatentMS.search_store import get_search_store
+from PatentMS.utils import is_process_local_cache
+
+
+class Command(BaseCommand):
+    help = "预热热门分类和历史热门搜索的搜索结果缓存"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="只执行一轮（默认常驻运行）"
+        )
+        parser.add_argument("--interval", type=int, help="常驻运行时每轮的间隔（秒）")
+        parser.add_argument("--top-categories", type=int, help="预热的热门分类数")
+        parser.add_argument("--top-queries", type=int, help="预热的历史热门搜索数")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="只列出预热目标，不执行搜索"
+        )
+
+    def handle(self, *args, **options):
+        if search_service.result_cache is None:
+            raise CommandError("搜索服务未启用缓存，无法预热")
+
+        config = get_prewarm_config()
+        for option, key in (
+            ("interval", "INTERVAL"),
+            ("top_categories", "TOP_CATEGORIES"),
+            ("top_queries", "TOP_QUERIES"),
+        ):
+            if options[option] is not None:
+                config[key] = options[option]
+
+        store = get_search_store()
+        if not options["dry_run"] and is_process_local_cache():
+            raise CommandError(
+                "CACHES['default'] 是进程内缓存，预热结果不会被 Web 服务进程读取；"
+                "请配置 Redis、Memcached、数据库或文件缓存等共享缓存"
+            )
+
+        if options["dry_run"]:
+            targets = collect_targets(store, config)
+            self.stdout.write(f"预热目标: {len(targets)} 个")
+            for target in targets:
+                self.stdout.write(
+                    f"  {target.weight:>8}  {target.query}"
+                    f"{f' [{target.category}]' if target.category else ''}"
+                )
+            return
+
+        prewarmer = Prewarmer(search_service, store, config)
+        if options["once"]:
+            stats = prewarmer.run_once()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"预热完成: 目标 {stats['targets']}，刷新 {stats['refreshed']}，"
+                    f"仍新鲜 {stats['fresh']}，失败 {stats['failed']}，"
+                    f"推迟 {stats['deferred']}"
+                )
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"搜索缓存预热已启动，每 {config['INTERVAL']} 秒一轮")
+        )
+        try:
+            prewarmer.run_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,38 @@
+"""
+分类页面数量校正管理命令
+按页面表重新计算每个分类的 page_count（按主键分段，每段一条 UPDATE）
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PatentMS.page_counts import reconcile_page_counts
+
+
+class Command(BaseCommand):
+    help = "重新计算所有分类的页面数量，修正不一致的 page_count"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="每段的分类主键范围"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="只统计不一致的分类，不更新"
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size 必须大于 0")
+
+        checked, drifted = reconcile_page_counts(
+            chunk_size=options["chunk_size"], dry_run=options["dry_run"]
+        )
+        if options["dry_run"]:
+            self.stdout.write(
+                f"检查 {checked} 个分类，{drifted} 个分类的页面数量不一致"
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"检查 {checked} 个分类，修正 {drifted} 个分类的页面数量"
+                )
+            )
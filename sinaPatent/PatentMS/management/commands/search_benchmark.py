@@ -0,0 +1,165 @@
+"""
+搜索基准测试管理命令
+使用录制的语料库（回放或替身服务器）测量各搜索引擎的解析耗时、过滤耗时和端到端延迟分位数
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PatentMS.engine_health import percentile
+from PatentMS.http_client import get_shared_adapter
+from PatentMS.search_service import SEARCH_ENGINES, SearchService
+from PatentMS.transport import (
+    RecordingAdapter,
+    ReplayAdapter,
+    SerpCorpus,
+    StandinAdapter,
+    prepared_url,
+)
+
+# 默认的基准查询
+DEFAULT_QUERIES = [
+    "python 教程",
+    "django 文档",
+    "javascript 入门",
+    "linux 命令 手册",
+    "docker 部署 指南",
+]
+
+
+class Command(BaseCommand):
+    help = "离线基准测试：解析耗时、过滤耗时和端到端 p50/p95/p99"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--engines",
+            nargs="+",
+            default=["bing", "baidu", "duckduckgo"],
+            help="参与测试的搜索引擎",
+        )
+        parser.add_argument("--queries", nargs="+", help="测试查询（默认内置列表）")
+        parser.add_argument(
+            "--iterations", type=int, default=20, help="每个查询的重复次数"
+        )
+        parser.add_argument("--num-results", type=int, default=10, help="结果数量")
+        parser.add_argument("--corpus", help="语料库目录（默认使用配置）")
+        parser.add_argument(
+            "--transport",
+            choices=["replay", "standin"],
+            default="replay",
+            help="端到端测试使用的传输：直接回放或经过替身服务器",
+        )
+        parser.add_argument(
+            "--standin-url", default="http://127.0.0.1:8765", help="替身服务器地址"
+        )
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="先向真实搜索引擎发送查询并录制响应",
+        )
+
+    def handle(self, *args, **options):
+        corpus = (
+            SerpCorpus(options["corpus"])
+            if options["corpus"]
+            else SerpCorpus.from_settings()
+        )
+        queries = options["queries"] or DEFAULT_QUERIES
+        num_results = options["num_results"]
+
+        unknown = [name for name in options["engines"] if name not in SEARCH_ENGINES]
+        if unknown:
+            raise CommandError(f"未知的搜索引擎: {unknown}")
+        engine_names = [
+            name
+            for name in options["engines"]
+            if hasattr(SEARCH_ENGINES[name], "_build_search_request")
+        ]
+
+        if options["record"]:
+            self._record(corpus, engine_names, queries, num_results)
+
+        if options["transport"] == "standin":
+            adapter = StandinAdapter(get_shared_adapter(), options["standin_url"])
+        else:
+            adapter = ReplayAdapter(corpus)
+
+        # 只借用过滤逻辑，不使用缓存
+        service = SearchService(use_mock=True, use_cache=False)
+
+        for name in engine_names:
+            engine = SEARCH_ENGINES[name](adapter=adapter)
+            timings = {"parse": [], "filter": [], "end_to_end": []}
+            errors = 0
+            recorded = 0
+
+            for query in queries:
+                url, params = engine._build_search_request(query, num_results)
+                entry = corpus.load(prepared_url(url, params))
+                if entry is None:
+                    continue
+                recorded += 1
+
+                for _ in range(options["iterations"]):
+                    started = time.perf_counter()
+                    results = engine._parse_search_response(
+                        entry["body"], query, num_results
+                    )
+                    timings["parse"].append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    service._filter_results([dict(r) for r in results], query, "")
+                    timings["filter"].append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    try:
+                        engine.fetch_results(query, num_results)
+                    except Exception:
+                        errors += 1
+                    timings["end_to_end"].append(time.perf_counter() - started)
+
+            self._report(name, recorded, len(queries), timings, errors)
+            if hasattr(engine, "layout_stats"):
+                self._report_layouts(engine.layout_stats())
+
+    def _record(self, corpus, engine_names, queries, num_results):
+        """向真实搜索引擎发送查询并录制响应"""
+        adapter = RecordingAdapter(get_shared_adapter(), corpus)
+        for name in engine_names:
+            engine = SEARCH_ENGINES[name](adapter=adapter)
+            for query in queries:
+                try:
+                    results = engine.fetch_results(query, num_results)
+                    self.stdout.write(f"已录制 {name} / {query}: {len(results)} 条结果")
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.WARNING(f"录制失败 {name} / {query}: {e}")
+                    )
+
+    def _report(self, name, recorded, total, timings, errors):
+        self.stdout.write(
+            self.style.SUCCESS(f"\n{name}: 语料库命中 {recorded}/{total} 个查询")
+        )
+        if not recorded:
+            self.stdout.write("  没有录制的响应，可使用 --record 先录制")
+            return
+        self.stdout.write(
+            f"  {'指标':<12}{'次数':>8}{'p50(ms)':>12}{'p95(ms)':>12}{'p99(ms)':>12}"
+        )
+        for metric, values in timings.items():
+            values = sorted(values)
+            p50, p95, p99 = (percentile(values, q) * 1000 for q in (0.5, 0.95, 0.99))
+            self.stdout.write(
+                f"  {metric:<12}{len(values):>8}{p50:>12.3f}{p95:>12.3f}{p99:>12.3f}"
+            )
+        self.stdout.write(f"  端到端错误: {errors}")
+
+    def _report_layouts(self, stats):
+        """输出结果页各结构的命中率"""
+        self.stdout.write(f"  结果页结构命中（共解析 {stats['documents']} 个页面）:")
+        for layout, counts in stats["layouts"].items():
+            self.stdout.write(
+                f"    {layout:<12}{counts['hits']:>8}{counts['rate']:>10.1%}"
+            )
+        self.stdout.write(f"    {'miss':<12}{stats['miss']:>8}")
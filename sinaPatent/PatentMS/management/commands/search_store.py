@@ -0,0 +1,68 @@
+"""
+搜索结果存储管理命令
+查看持久化存储的统计信息、压缩过期条目或清空存储
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PatentMS.search_store import get_search_store
+
+
+class Command(BaseCommand):
+    help = "管理搜索结果持久化存储（统计、压缩、清空）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="删除超过保留时间的结果，条目过多时删除最冷门的",
+        )
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help="压缩后整理数据库文件，回收磁盘空间",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="删除所有条目",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="显示命中次数最多的查询数量",
+        )
+
+    def handle(self, *args, **options):
+        store = get_search_store()
+        if store is None:
+            raise CommandError("搜索结果存储未启用，请检查 settings.SEARCH_STORE")
+
+        if options["clear"]:
+            store.clear()
+            self.stdout.write(self.style.SUCCESS("已清空搜索结果存储"))
+        elif options["compact"] or options["vacuum"]:
+            deleted = store.compact(vacuum=options["vacuum"])
+            self.stdout.write(self.style.SUCCESS(f"压缩完成，删除 {deleted} 条"))
+
+        stats = store.stats()
+        self.stdout.write(f"存储文件: {stats['path']} ({stats['size'] / 1024:.1f} KB)")
+        self.stdout.write(f"查询数: {stats['entries']}，结果数: {stats['results']}")
+        if stats["entries"]:
+            self.stdout.write(
+                f"搜索时间: {self._format_time(stats['oldest'])} ~ "
+                f"{self._format_time(stats['newest'])}"
+            )
+        for entry in store.hottest(options["top"]):
+            self.stdout.write(
+                f"  {entry.hits:>6}  {entry.backend:<12}{entry.query}"
+                f"{f' [{entry.category}]' if entry.category else ''}"
+                f"  ({len(entry.results)} 条, {self._format_time(entry.created_at)})"
+            )
+
+    @staticmethod
+    def _format_time(timestamp):
+        return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
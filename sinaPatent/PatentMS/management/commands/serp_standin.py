@@ -0,0 +1,61 @@
+"""
+搜索引擎替身服务器管理命令
+从语料库返回录制的搜索结果页，可注入延迟和故障，配合 SEARCH_TRANSPORT["MODE"] = "standin" 使用
+"""
+
+from django.core.management.base import BaseCommand
+
+from PatentMS.transport import SerpCorpus, StandinServer
+
+
+class Command(BaseCommand):
+    help = "启动本地搜索引擎替身服务器（回放语料库）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+        parser.add_argument("--port", type=int, default=8765, help="监听端口")
+        parser.add_argument("--corpus", help="语料库目录（默认使用配置）")
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="每个响应的固定延迟（秒）"
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.0,
+            help="在固定延迟上增加的随机延迟上限（秒）",
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="返回 503 的概率"
+        )
+        parser.add_argument(
+            "--timeout-rate", type=float, default=0.0, help="不响应（模拟超时）的概率"
+        )
+        parser.add_argument("--seed", type=int, help="随机种子（便于复现）")
+
+    def handle(self, *args, **options):
+        corpus = (
+            SerpCorpus(options["corpus"])
+            if options["corpus"]
+            else SerpCorpus.from_settings()
+        )
+        server = StandinServer(
+            corpus,
+            (options["host"], options["port"]),
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            timeout_rate=options["timeout_rate"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"替身服务器已启动: {server.base_url}（语料库: {corpus.directory}）"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"请求统计: {dict(server.stats)}")
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.db import migrations, models
+
+# 迁移编写时 PatentMS.utils.canonical_url 的副本：之后修改规范化规则
+# 不影响新数据库执行本迁移的结果
+TRACKING_PARAMS = {"spm", "from", "ref", "fbclid", "gclid", "msclkid"}
+
+
+def canonical_url(url):
+    """规范化URL：忽略协议、www前缀、末尾斜杠、锚点和跟踪参数"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or ""
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+        )
+    )
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def fill_url_keys(apps, schema_editor):
+    """为已有页面计算规范化URL"""
+    Page = apps.get_model("PatentMS", "Page")
+    pages = list(Page.objects.only("id", "url"))
+    for page in pages:
+        page.url_key = canonical_url(page.url)[:255]
+    Page.objects.bulk_update(pages, ["url_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("PatentMS", "0008_alter_category_options_alter_page_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="page",
+            name="url_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, verbose_name="规范化URL"
+            ),
+        ),
+        migrations.RunPython(fill_url_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="page",
+            index=models.Index(
+                fields=["category", "url_key"], name="page_category_url_key"
+            ),
+        ),
+    ]
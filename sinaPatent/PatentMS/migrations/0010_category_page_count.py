@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:06
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_page_counts(apps, schema_editor):
+    """按已有页面计算每个分类的页面数量（一条 UPDATE，只使用历史模型）"""
+    Category = apps.get_model("PatentMS", "Category")
+    Page = apps.get_model("PatentMS", "Page")
+    page_count = (
+        Page.objects.filter(category=OuterRef("pk"))
+        .order_by()
+        .values("category")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Category.objects.update(
+        page_count=Coalesce(Subquery(page_count, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("PatentMS", "0009_page_url_key"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="page",
+            options={
+                "base_manager_name": "objects",
+                "ordering": ["-views", "title"],
+                "verbose_name": "页面",
+                "verbose_name_plural": "页面",
+            },
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="page_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="页面数量"
+            ),
+        ),
+        migrations.RunPython(fill_page_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+"""
+分类页面数量模块
+Category.page_count 保存分类下的页面数量，列表显示页面数量时不必逐个分类 COUNT；
+页面创建、删除和移动（包括批量操作）时在同一事务中增减，
+reconcile_page_counts 按主键分段用一条 UPDATE 重新计算一段分类的数量，修正漂移
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from PatentMS.counters import apply_deltas
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_LABEL = "PatentMS.Category"
+
+
+def adjust_page_counts(deltas: Dict[Optional[int], int]):
+    """
+    增减分类的页面数量：增量相同的分类合并为一条 UPDATE
+
+    Args:
+        deltas: {分类ID: 增量}
+    """
+    apply_deltas(
+        {
+            (CATEGORY_LABEL, category_id): {"page_count": delta}
+            for category_id, delta in deltas.items()
+            if category_id is not None and delta
+        }
+    )
+
+
+def page_count_subquery(page_model=None):
+    """每个分类实际页面数量的关联子查询（没有页面时为 0）"""
+    page_model = page_model or apps.get_model("PatentMS", "Page")
+    return Coalesce(
+        Subquery(
+            page_model.objects.filter(category=OuterRef("pk"))
+            .order_by()
+            .values("category")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def reconcile_page_counts(
+    category_model=None, page_model=None, chunk_size: int = 1000, dry_run: bool = False
+) -> Tuple[int, int]:
+    """
+    重新计算所有分类的页面数量
+
+    按主键分段，每段一条 UPDATE（只更新数量不一致的分类），各段分别提交，
+    不会长时间持有写锁
+
+    Args:
+        category_model: 分类模型（默认当前模型）
+        page_model: 页面模型（默认当前模型）
+        chunk_size: 每段的主键范围
+        dry_run: 只统计不一致的分类，不更新
+
+    Returns:
+        (检查的分类数, 不一致的分类数)
+    """
+    category_model = category_model or apps.get_model("PatentMS", "Category")
+    actual = page_count_subquery(page_model)
+    bounds = category_model.objects.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return 0, 0
+
+    checked = category_model.objects.count()
+    drifted = 0
+    for start in range(bounds["low"], bounds["high"] + 1, chunk_size):
+        chunk = category_model.objects.filter(pk__gte=start, pk__lt=start + chunk_size)
+        stale = (
+            chunk.order_by()
+            .annotate(actual=actual)
+            .exclude(page_count=F("actual"))
+            .values("pk")
+        )
+        if dry_run:
+            drifted += stale.count()
+            continue
+        with transaction.atomic():
+            drifted += category_model.objects.filter(pk__in=stale).update(
+                page_count=actual
+            )
+
+    if drifted:
+        logger.info(f"页面数量已重新计算: 检查 {checked} 个分类，修正 {drifted} 个")
+    return checked, drifted
@@ -0,0 +1,211 @@
+"""
+汉字拼音表模块
+按码位索引的紧凑拼音表：每个汉字存一个 2 字节的音节编号，音节（不带声调）只存一份，
+打包为二进制文件（由 build_pinyin_table 命令生成），首次使用时以内存映射方式加载，
+查找一个字只需一次数组下标访问；用于为术语表没有覆盖的中文名称生成可读的别名
+
+文件格式（小端）：
+    头部    magic(4) 版本(H) 区段数(H) 音节数(H) 保留(H)
+    区段    每段 起始码位(I) 码位数(I)
+    音节    总长度(I) + 以 "\n" 分隔的音节（长度补齐到偶数）
+    编号    按区段顺序每个码位一个 H，0 表示没有读音，n 表示第 n 个音节
+"""
+
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认拼音表文件，可通过 settings.PINYIN_TABLE_FILE 覆盖
+DEFAULT_PINYIN_TABLE_FILE = os.path.join(os.path.dirname(__file__), "pinyin_table.bin")
+
+MAGIC = b"PYTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHH")
+RANGE = struct.Struct("<II")
+LENGTH = struct.Struct("<I")
+
+# 收录的码位区段：中日韩统一表意文字及其扩展 A-F、兼容表意文字
+CJK_RANGES = (
+    (0x3400, 0x4DBF),  # 扩展 A
+    (0x4E00, 0x9FFF),  # 基本区
+    (0xF900, 0xFAFF),  # 兼容表意文字
+    (0x20000, 0x2A6DF),  # 扩展 B
+    (0x2A700, 0x2EBEF),  # 扩展 C-F
+)
+
+
+def write_table(file_path: str, readings: Dict[int, str]) -> Dict:
+    """
+    把 {码位: 音节} 打包写入拼音表文件
+
+    每个区段只保留第一个到最后一个有读音的码位，没有读音的区段不写入；
+    已加载的进程需重启后才会使用新文件
+
+    Args:
+        file_path: 文件路径
+        readings: {码位: 不带声调的小写音节}
+
+    Returns:
+        统计：收录的汉字数、音节数、区段数、文件字节数
+    """
+    syllables = sorted(set(readings.values()))
+    numbers = {syllable: number for number, syllable in enumerate(syllables, 1)}
+
+    ranges = []
+    indices = array("H")
+    for first, last in CJK_RANGES:
+        covered = [cp for cp in range(first, last + 1) if cp in readings]
+        if not covered:
+            continue
+        start, end = covered[0], covered[-1] + 1
+        ranges.append((start, end - start))
+        indices.extend(numbers.get(readings.get(cp), 0) for cp in range(start, end))
+    if sys.byteorder != "little":
+        indices.byteswap()
+
+    blob = "\n".join(syllables).encode("ascii")
+    if len(blob) % 2:
+        blob += b"\n"
+    # 先写临时文件再替换：正在映射旧文件的进程不会读到截断的内容
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(ranges), len(syllables), 0))
+        for start, count in ranges:
+            f.write(RANGE.pack(start, count))
+        f.write(LENGTH.pack(len(blob)))
+        f.write(blob)
+        f.write(indices.tobytes())
+    os.replace(temp_path, file_path)
+
+    return {
+        "characters": sum(1 for number in indices if number),
+        "syllables": len(syllables),
+        "ranges": len(ranges),
+        "bytes": os.path.getsize(file_path),
+    }
+
+
+class PinyinTable:
+    """内存映射的拼音表（只读，多个线程和进程共享同一份页面）"""
+
+    def __init__(self, file_path: str):
+        with open(file_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._mmap)
+
+        magic, version, range_count, syllable_count, _ = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"拼音表文件格式不支持: {file_path}")
+        offset = HEADER.size
+
+        # [(起始码位, 结束码位, 在编号数组中的起始下标)]
+        self.ranges = []
+        base = 0
+        for _ in range(range_count):
+            start, count = RANGE.unpack_from(data, offset)
+            self.ranges.append((start, start + count, base))
+            base += count
+            offset += RANGE.size
+
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        blob = bytes(data[offset : offset + length]).rstrip(b"\n")
+        self.syllables = ("",) + tuple(blob.decode("ascii").split("\n"))
+        if len(self.syllables) - 1 != syllable_count:
+            raise ValueError(f"拼音表文件已损坏: {file_path}")
+        offset += length
+
+        indices = data[offset : offset + base * 2]
+        if len(indices) != base * 2:
+            raise ValueError(f"拼音表文件已损坏: {file_path}")
+        if sys.byteorder == "little":
+            self._indices = indices.cast("H")
+        else:
+            self._indices = array("H", indices)
+            self._indices.byteswap()
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def lookup(self, char: str) -> Optional[str]:
+        """
+        查找一个汉字的拼音
+
+        Args:
+            char: 单个字符
+
+        Returns:
+            不带声调的音节（多音字取最常用的读音），不是汉字或没有收录时返回 None
+        """
+        cp = ord(char)
+        for start, end, base in self.ranges:
+            if start <= cp < end:
+                return self.syllables[self._indices[base + cp - start]] or None
+        return None
+
+    def transliterate(self, text: str) -> str:
+        """
+        把文本中的汉字替换为拼音（前后加空格，slugify 后成为连字符），其他字符不变
+
+        Args:
+            text: 文本
+
+        Returns:
+            替换后的文本
+        """
+        pieces = []
+        first = self.ranges[0][0] if self.ranges else 0
+        for char in text:
+            # 收录区段之前的字符（英文、数字、标点）不需要查表
+            syllable = self.lookup(char) if ord(char) >= first else None
+            pieces.append(f" {syllable} " if syllable else char)
+        return "".join(pieces)
+
+
+class _EmptyTable:
+    """拼音表文件不存在时使用：不替换任何字符"""
+
+    def lookup(self, char: str) -> Optional[str]:
+        return None
+
+    def transliterate(self, text: str) -> str:
+        return text
+
+
+_table = None
+_table_path = None
+_table_lock = threading.Lock()
+
+
+def get_pinyin_table():
+    """
+    获取全局拼音表（首次使用时加载，拼音表文件路径变化时重新加载）
+
+    Returns:
+        PinyinTable 实例，文件不存在或无法读取时返回不替换任何字符的空表
+    """
+    global _table, _table_path
+    path = getattr(settings, "PINYIN_TABLE_FILE", DEFAULT_PINYIN_TABLE_FILE)
+    if _table is None or _table_path != path:
+        with _table_lock:
+            if _table is None or _table_path != path:
+                table = _EmptyTable()
+                if path and os.path.exists(path):
+                    try:
+                        table = PinyinTable(path)
+                    except (OSError, ValueError, struct.error) as e:
+                        logger.error(f"加载拼音表失败 {path}: {e}")
+                else:
+                    logger.warning(f"拼音表文件不存在: {path}")
+                _table = table
+                _table_path = path
+    return _table
@@ -0,0 +1,220 @@
+"""
+搜索结果预热模块
+按点赞和浏览次数选出热门分类，结合持久化存储中的历史搜索频率，
+在缓存条目过期前重新搜索并写入缓存，使常见的交互式搜索直接命中缓存；
+预热请求只使用限流预算中的富余部分，不挤占用户的实时搜索；
+预热在独立进程中运行（prewarm_search 命令），需要 CACHES["default"] 为共享缓存
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db.models import F
+
+from PatentMS.http_client import get_warmup_urls
+from PatentMS.models import Category
+from PatentMS.rate_limit import rate_limiter
+from PatentMS.search_cache import normalize_text
+from PatentMS.search_service import search_window
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_PREWARM 覆盖
+DEFAULT_PREWARM = {
+    "TOP_CATEGORIES": 20,  # 预热的热门分类数（按点赞和浏览次数）
+    "TOP_QUERIES": 50,  # 预热的历史热门搜索数
+    "QUERIES_PER_CATEGORY": 3,  # 每个热门分类预热的历史搜索数（没有历史时搜索分类名称）
+    "LIKE_WEIGHT": 10,  # 每个点赞相当于的浏览次数
+    "NUM_RESULTS": None,  # 预热的结果数量，None 时与搜索接口一致（search_window）
+    "REFRESH_AHEAD": 120,  # 距离新鲜期结束不足该时间（秒）时刷新
+    "INTERVAL": 60,  # 常驻运行时每轮的间隔（秒）
+    "MAX_REFRESHES": 30,  # 每轮最多刷新的条目数
+    "RESERVE_TOKENS": 2,  # 为交互式搜索保留的令牌数，低于该值时推迟预热
+    "BUDGET_WAIT": 10,  # 等待限流预算恢复的最长时间（秒），超时后本轮结束
+}
+
+
+def get_prewarm_config() -> Dict:
+    """获取合并后的预热配置"""
+    config = dict(DEFAULT_PREWARM)
+    config.update(getattr(settings, "SEARCH_PREWARM", {}))
+    return config
+
+
+class PrewarmTarget(NamedTuple):
+    """一个预热目标"""
+
+    query: str  # 原始搜索关键词
+    category: str  # 分类名称
+    weight: int  # 热度（分类热度或历史命中次数），高的先预热
+
+
+def collect_targets(store=None, config: Optional[Dict] = None) -> List[PrewarmTarget]:
+    """
+    收集预热目标：热门分类（及其历史热门搜索）和全站历史热门搜索
+
+    访问数据库，异步代码中需通过 sync_to_async 调用
+
+    Args:
+        store: 持久化存储（SearchStore），为 None 时只预热热门分类的名称
+        config: 预热配置
+
+    Returns:
+        按热度降序、按规范化的查询和分类去重的目标列表
+    """
+    config = config or get_prewarm_config()
+    popular = []
+    if store is not None:
+        try:
+            popular = store.popular_queries(
+                config["TOP_QUERIES"]
+                + config["TOP_CATEGORIES"] * config["QUERIES_PER_CATEGORY"]
+            )
+        except sqlite3.Error as e:
+            logger.error(f"读取历史热门搜索失败: {e}")
+
+    by_category = {}
+    for query, category, hits in popular:
+        by_category.setdefault(category, []).append((query, hits))
+
+    targets = {}
+
+    def add(query, category, weight):
+        key = (normalize_text(query), normalize_text(category))
+        if key[0] and (key not in targets or targets[key].weight < weight):
+            targets[key] = PrewarmTarget(query, category, weight)
+
+    categories = (
+        Category.objects.only("name", "likes", "views")
+        .annotate(popularity=F("likes") * config["LIKE_WEIGHT"] + F("views"))
+        .order_by("-popularity", "name")
+    )
+    for category in categories[: config["TOP_CATEGORIES"]]:
+        history = by_category.get(category.name, [])
+        for query, hits in history[: config["QUERIES_PER_CATEGORY"]]:
+            add(query, category.name, category.popularity + hits)
+        if not history:
+            add(category.name, category.name, category.popularity)
+
+    for query, category, hits in popular[: config["TOP_QUERIES"]]:
+        add(query, category, hits)
+
+    return sorted(targets.values(), key=lambda target: -target.weight)
+
+
+class Prewarmer:
+    """按轮次预热搜索缓存"""
+
+    def __init__(self, service, store=None, config: Optional[Dict] = None):
+        self.service = service
+        self.store = store
+        self.config = config or get_prewarm_config()
+        self.hosts = [
+            urlsplit(url).hostname for url in get_warmup_urls(service.search_engine)
+        ]
+
+    def run_once(self, targets: Optional[List[PrewarmTarget]] = None) -> Dict:
+        """
+        执行一轮预热：跳过仍然新鲜的条目，按热度刷新即将过期或不存在的条目
+
+        Args:
+            targets: 预热目标，默认调用 collect_targets
+
+        Returns:
+            统计：目标数、刷新数、跳过的新鲜条目数、失败数、因预算不足推迟的数量
+        """
+        if self.service.result_cache is None:
+            raise ValueError("搜索服务未启用缓存，无法预热")
+        if targets is None:
+            targets = collect_targets(self.store, self.config)
+        stats = {
+            "targets": len(targets),
+            "refreshed": 0,
+            "fresh": 0,
+            "failed": 0,
+            "deferred": 0,
+        }
+        num_results = self.num_results()
+
+        for index, target in enumerate(targets):
+            if not self.needs_refresh(target):
+                stats["fresh"] += 1
+                continue
+            if stats["refreshed"] >= self.config["MAX_REFRESHES"]:
+                stats["deferred"] += 1
+                continue
+            if not self.wait_for_budget():
+                logger.info("限流预算不足，推迟本轮剩余的预热")
+                stats["deferred"] += len(targets) - index
+                break
+            try:
+                entry = self.service.refresh_pages(
+                    target.query, target.category, num_results
+                )
+            except Exception as e:
+                logger.error(f"预热搜索失败 {target.query}: {e}")
+                stats["failed"] += 1
+                continue
+            if entry is None:
+                # 其他进程正在刷新
+                stats["fresh"] += 1
+            elif entry["results"] and not entry["results"][0].get("degraded"):
+                stats["refreshed"] += 1
+            else:
+                stats["failed"] += 1
+
+        logger.info(f"搜索缓存预热完成: {stats}")
+        return stats
+
+    def num_results(self) -> int:
+        """预热的结果数量（默认与搜索接口使用同一个缓存键）"""
+        return self.config["NUM_RESULTS"] or search_window()
+
+    def needs_refresh(self, target: PrewarmTarget) -> bool:
+        """缓存条目不存在，或距离新鲜期结束不足 REFRESH_AHEAD 秒"""
+        key = self.service.pages_cache_key(
+            target.query, target.category, self.num_results()
+        )
+        entry = self.service.result_cache.get(key)
+        return (
+            entry is None
+            or entry["fresh_until"] - time.time() < self.config["REFRESH_AHEAD"]
+        )
+
+    def wait_for_budget(self) -> bool:
+        """
+        等待所有搜索引擎主机的剩余令牌超过保留数量
+
+        Returns:
+            在 BUDGET_WAIT 内等到预算时返回 True
+        """
+        deadline = time.monotonic() + self.config["BUDGET_WAIT"]
+        while True:
+            if all(
+                rate_limiter.headroom(host) > self.config["RESERVE_TOKENS"]
+                for host in self.hosts
+            ):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.5)
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None):
+        """
+        常驻运行，每隔 INTERVAL 秒执行一轮
+
+        Args:
+            stop_event: 设置后在本轮结束时退出
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"搜索缓存预热失败: {e}")
+            stop_event.wait(self.config["INTERVAL"])
@@ -0,0 +1,264 @@
+"""
+搜索引擎限流模块
+按主机维护令牌桶（GCRA 算法，状态保存在 Django 缓存中），
+请求按预约顺序排队等待，等待时间超过上限时放弃该引擎，交给调用方切换到其他引擎；
+遇到验证码页面时暂停请求该主机一段时间
+
+多个工作进程共用同一预算的前提是 CACHES["default"] 为进程间共享的缓存
+（Redis、Memcached、数据库或文件缓存）；使用 LocMemCache 时每个进程各有一个令牌桶，
+N 个进程向同一主机发出的请求最多是配置预算的 N 倍
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from PatentMS.engine_health import percentile
+from PatentMS.utils import get_cache_key, is_process_local_cache
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_RATE_LIMIT 覆盖
+DEFAULT_RATE_LIMIT = {
+    "ENABLED": True,
+    "RATE": 1.0,  # 每个主机每秒允许的请求数（未在 BUDGETS 中配置的主机）
+    "BURST": 3,  # 允许的突发请求数
+    "BUDGETS": {},  # 按主机覆盖预算，如 {"cn.bing.com": {"RATE": 2.0, "BURST": 5}}
+    "MAX_WAIT": 3.0,  # 排队等待的最长时间（秒），超过时放弃该引擎
+    "BLOCK_COOLDOWN": 60,  # 遇到验证码页面后暂停请求该主机的时间（秒）
+    "LOCK_TIMEOUT": 0.5,  # 获取预约锁的最长等待时间（秒）
+    "WINDOW": 200,  # 每个主机保留的最近等待时间样本数
+}
+
+
+def get_rate_limit_config() -> Dict:
+    """获取合并后的限流配置"""
+    config = dict(DEFAULT_RATE_LIMIT)
+    config.update(getattr(settings, "SEARCH_RATE_LIMIT", {}))
+    return config
+
+
+class HostStats:
+    """单个主机的限流统计（进程内）"""
+
+    def __init__(self, host: str, window: int):
+        self.host = host
+        self.requests = 0  # 获得预约的请求数
+        self.delayed = 0  # 需要排队等待的请求数
+        self.rejected = 0  # 等待时间超过上限被放弃的请求数
+        self.blocked = 0  # 遇到验证码页面的次数
+        self.total_wait = 0.0
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, wait: Optional[float]):
+        with self._lock:
+            if wait is None:
+                self.rejected += 1
+                return
+            self.requests += 1
+            self.total_wait += wait
+            self._waits.append(wait)
+            if wait > 0:
+                self.delayed += 1
+
+    def record_block(self):
+        with self._lock:
+            self.blocked += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "host": self.host,
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "rejected": self.rejected,
+                "blocked": self.blocked,
+                "wait_total": round(self.total_wait, 3),
+                "wait_p50": round(percentile(waits, 0.5), 3),
+                "wait_p95": round(percentile(waits, 0.95), 3),
+                "wait_max": round(waits[-1], 3) if waits else 0.0,
+            }
+
+
+class RateLimiter:
+    """
+    按主机的令牌桶
+
+    每个主机在缓存中保存“理论到达时间”（TAT）：每次预约把 TAT 推后一个发放间隔，
+    TAT 领先当前时间不超过突发容量时立即放行，否则需要等到对应的时间点。
+    预约在缓存中的短锁内完成，先预约的请求先发出；
+    只有缓存在进程间共享时，令牌桶和锁才跨进程生效
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._local_lock = threading.Lock()
+
+    def budget(self, host: str, config: Optional[Dict] = None) -> Dict:
+        """
+        主机的请求预算
+
+        Args:
+            host: 主机名
+            config: 限流配置
+
+        Returns:
+            {"RATE": 每秒请求数, "BURST": 突发请求数}
+        """
+        config = config or get_rate_limit_config()
+        budget = {"RATE": config["RATE"], "BURST": config["BURST"]}
+        budget.update(config["BUDGETS"].get(host, {}))
+        return budget
+
+    def reserve(self, host: str, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        预约一次请求
+
+        Args:
+            host: 主机名
+            max_wait: 最长等待时间（秒），默认使用 MAX_WAIT
+
+        Returns:
+            发出请求前需要等待的时间（秒），超过最长等待时间时返回 None（不占用预算）
+        """
+        config = get_rate_limit_config()
+        if not config["ENABLED"] or not host:
+            return 0.0
+        if max_wait is None:
+            max_wait = config["MAX_WAIT"]
+        budget = self.budget(host, config)
+        interval = 1.0 / budget["RATE"]
+        tolerance = interval * max(0, budget["BURST"] - 1)
+
+        with self._local_lock:
+            token = self._acquire_lock(host, config["LOCK_TIMEOUT"])
+            try:
+                now = time.time()
+                tat = max(cache.get(self._key(host)) or now, now)
+                wait = max(0.0, tat - tolerance - now)
+                if wait > max_wait:
+                    wait = None
+                else:
+                    # TAT 过期后等同于令牌桶已满
+                    cache.set(
+                        self._key(host),
+                        tat + interval,
+                        int(tat + interval - now) + 1,
+                    )
+            finally:
+                if token:
+                    self._release_lock(host, token)
+
+        self._host_stats(host, config).record(wait)
+        if wait is None:
+            logger.warning(f"{host} 请求预算已用完，排队等待将超过 {max_wait}s")
+        return wait
+
+    def headroom(self, host: str) -> float:
+        """
+        当前可以立即发出的请求数（令牌桶中剩余的令牌，不预约）
+
+        Args:
+            host: 主机名
+
+        Returns:
+            剩余令牌数，未启用限流时为无穷大
+        """
+        config = get_rate_limit_config()
+        if not config["ENABLED"] or not host:
+            return float("inf")
+        budget = self.budget(host, config)
+        interval = 1.0 / budget["RATE"]
+        now = time.time()
+        tat = max(cache.get(self._key(host)) or now, now)
+        return max(0.0, (now - tat) / interval + budget["BURST"])
+
+    def penalize(self, host: str, seconds: Optional[float] = None):
+        """
+        暂停请求指定主机（遇到验证码页面时调用，等待时间超过上限的请求会被放弃）
+
+        Args:
+            host: 主机名
+            seconds: 暂停时间（秒），默认使用 BLOCK_COOLDOWN
+        """
+        config = get_rate_limit_config()
+        if not config["ENABLED"] or not host:
+            return
+        if seconds is None:
+            seconds = config["BLOCK_COOLDOWN"]
+        with self._local_lock:
+            token = self._acquire_lock(host, config["LOCK_TIMEOUT"])
+            try:
+                now = time.time()
+                tat = max(cache.get(self._key(host)) or now, now + seconds)
+                cache.set(self._key(host), tat, int(tat - now) + 1)
+            finally:
+                if token:
+                    self._release_lock(host, token)
+        self._host_stats(host, config).record_block()
+        logger.warning(f"{host} 返回验证页面，暂停请求 {seconds}s")
+
+    def snapshot(self) -> List[Dict]:
+        """各主机的限流统计（等待时间单位为秒）"""
+        return [stats.snapshot() for stats in list(self._stats.values())]
+
+    def reset(self):
+        """清空统计和共享缓存中的令牌桶状态"""
+        with self._stats_lock:
+            hosts = list(self._stats)
+            self._stats.clear()
+        cache.delete_many([self._key(host) for host in hosts])
+
+    def _host_stats(self, host: str, config: Dict) -> HostStats:
+        stats = self._stats.get(host)
+        if stats is None:
+            with self._stats_lock:
+                stats = self._stats.setdefault(host, HostStats(host, config["WINDOW"]))
+        return stats
+
+    def _key(self, host: str) -> str:
+        return get_cache_key("rate-limit", host)
+
+    def _lock_key(self, host: str) -> str:
+        return get_cache_key("rate-limit-lock", host)
+
+    def _acquire_lock(self, host: str, timeout: float) -> Optional[str]:
+        """
+        获取预约锁（cache.add 在共享缓存中跨进程原子）；超时未获得时返回 None，
+        此时不加锁继续预约，最坏情况下多放行一个请求
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while not cache.add(self._lock_key(host), token, 5):
+            if time.monotonic() >= deadline:
+                logger.warning(f"获取 {host} 限流锁超时")
+                return None
+            time.sleep(0.005)
+        return token
+
+    def _release_lock(self, host: str, token: str):
+        lock_key = self._lock_key(host)
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def warn_if_process_local():
+    """限流启用但缓存只在进程内有效时记录警告（服务进程启动时调用）"""
+    if get_rate_limit_config()["ENABLED"] and is_process_local_cache():
+        logger.warning(
+            "搜索引擎限流使用进程内缓存，每个工作进程各自计算预算，"
+            "多进程部署时请为 CACHES['default'] 配置 Redis、Memcached 等共享缓存"
+        )
+
+
+# 全局限流器（所有搜索引擎共用，按主机区分预算）
+rate_limiter = RateLimiter()
@@ -0,0 +1,184 @@
+"""
+搜索结果相关性模块
+对标题和摘要分词（英文按单词，中文按二元组），以本次请求的结果集合为语料计算 BM25 分数，
+分类中的英文单词按标题的词项集合匹配，中文词段和教育类关键词各用一个预编译的正则一次匹配
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+# 默认配置，可通过 settings.SEARCH_RELEVANCE 覆盖
+DEFAULT_RELEVANCE = {
+    "K1": 1.2,  # 词频饱和系数
+    "B": 0.75,  # 文档长度归一化系数
+    "TITLE_WEIGHT": 2.0,  # 标题中命中的权重
+    "ABSTRACT_WEIGHT": 1.0,  # 摘要中命中的权重
+    "PHRASE_BONUS": 1.5,  # 标题包含完整查询词的加分
+    "CATEGORY_BONUS": 1.0,  # 标题包含分类词的加分
+    "KEYWORD_BONUS": 0.5,  # 标题包含教育类关键词的加分
+    "MIN_SCORE": 0.0,  # 分数不高于该值的结果被过滤
+}
+
+# 教育类关键词（教程、文档等内容优先）
+EDUCATIONAL_KEYWORDS = (
+    "教程",
+    "文档",
+    "学习",
+    "指南",
+    "手册",
+    "参考",
+    "api",
+    "开发",
+    "入门",
+    "基础",
+)
+
+# 英文单词（允许 c++、node.js、c# 这类写法）和连续的中日韩字符
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.+#-]+[a-z0-9]+)*[+#]*|[㐀-鿿豈-﫿]+")
+
+
+def get_relevance_config() -> Dict:
+    """获取合并后的相关性配置"""
+    config = dict(DEFAULT_RELEVANCE)
+    config.update(getattr(settings, "SEARCH_RELEVANCE", {}))
+    return config
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文和数字按单词，中文按相邻二元组（单字词保留单字）
+
+    Args:
+        text: 文本
+
+    Returns:
+        词项列表
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if token[0] < "㐀":
+            tokens.append(token)
+        elif len(token) == 1:
+            tokens.append(token)
+        else:
+            tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+def compile_terms(terms: Iterable[str]) -> Optional[re.Pattern]:
+    """
+    把一组关键词编译成一个正则（长词优先），用于一次扫描判断是否命中任一关键词
+
+    Args:
+        terms: 关键词
+
+    Returns:
+        编译后的正则，没有关键词时返回 None
+    """
+    terms = sorted({term.lower() for term in terms if term.strip()}, key=len)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in reversed(terms)))
+
+
+KEYWORD_MATCHER = compile_terms(EDUCATIONAL_KEYWORDS)
+
+
+class RelevanceScorer:
+    """一次搜索请求的相关性打分器：查询词和分类词只处理一次"""
+
+    def __init__(self, query: str, category_name: str = "", config: Dict = None):
+        self.config = config or get_relevance_config()
+        self.phrase = query.strip().lower()
+        self.query_terms = list(dict.fromkeys(tokenize(query)))
+        # 分类名称中的英文单词（与标题词项比较，"java" 不会命中 "javascript"）
+        # 和中文词段都算命中分类；单个字符（如 "C Programming" 中的 "c"）太宽泛，忽略
+        category_terms = [
+            term
+            for term in TOKEN_PATTERN.findall(category_name.lower())
+            if len(term) > 1
+        ]
+        self.category_words = frozenset(
+            term for term in category_terms if term[0] < "㐀"
+        )
+        self.category_matcher = compile_terms(
+            term for term in category_terms if term[0] >= "㐀"
+        )
+
+    def score_results(self, results: List[Dict]) -> List[Dict]:
+        """
+        为结果打分并过滤、排序
+
+        以结果集合本身为语料统计文档频率：在大多数结果中都出现的词权重较低
+
+        Args:
+            results: 搜索结果列表（会写入 relevance_score）
+
+        Returns:
+            分数高于阈值的结果，按分数降序
+        """
+        if not results:
+            return []
+        config = self.config
+        k1, b = config["K1"], config["B"]
+        query_terms = self.query_terms
+
+        docs = []
+        document_frequency = Counter()
+        total_title_length = total_abstract_length = 0
+        for result in results:
+            title = (result.get("title") or "").lower()
+            title_counts = Counter(tokenize(title))
+            abstract_counts = Counter(tokenize(result.get("abstract") or ""))
+            docs.append((title, title_counts, abstract_counts))
+            total_title_length += sum(title_counts.values())
+            total_abstract_length += sum(abstract_counts.values())
+            for term in query_terms:
+                if term in title_counts or term in abstract_counts:
+                    document_frequency[term] += 1
+
+        count = len(results)
+        idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+        fields = (
+            (1, config["TITLE_WEIGHT"], max(total_title_length / count, 1.0)),
+            (2, config["ABSTRACT_WEIGHT"], max(total_abstract_length / count, 1.0)),
+        )
+
+        scored = []
+        for result, doc in zip(results, docs):
+            score = 0.0
+            for index, weight, average_length in fields:
+                counts = doc[index]
+                if not counts:
+                    continue
+                norm = k1 * (1 - b + b * sum(counts.values()) / average_length)
+                for term, term_idf in idf.items():
+                    frequency = counts.get(term)
+                    if frequency:
+                        saturation = frequency * (k1 + 1) / (frequency + norm)
+                        score += weight * term_idf * saturation
+
+            title, title_counts = doc[0], doc[1]
+            if self.phrase and self.phrase in title:
+                score += config["PHRASE_BONUS"]
+            if not self.category_words.isdisjoint(title_counts) or (
+                self.category_matcher and self.category_matcher.search(title)
+            ):
+                score += config["CATEGORY_BONUS"]
+            if KEYWORD_MATCHER.search(title):
+                score += config["KEYWORD_BONUS"]
+
+            if score > config["MIN_SCORE"]:
+                result["relevance_score"] = round(score, 3)
+                scored.append(result)
+
+        scored.sort(key=lambda result: result["relevance_score"], reverse=True)
+        return scored
@@ -0,0 +1,420 @@
+"""
+搜索结果缓存模块
+为 SearchService.search_pages 提供两级缓存：进程内 LRU + Django 共享缓存
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from PatentMS.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存配置，可通过 settings.SEARCH_CACHE 覆盖
+DEFAULT_SEARCH_CACHE = {
+    "LOCAL_MAX_ENTRIES": 512,  # 进程内LRU最大条目数
+    "DEFAULT_TTL": 600,  # 默认新鲜期（秒）
+    "TTLS": {},  # 按搜索后端覆盖新鲜期，如 {"bing": 900}
+    "STALE_TTL": 1800,  # 过期后仍可返回旧结果的时间（秒）
+    "EMPTY_TTL": 30,  # 空结果的新鲜期，避免长期缓存失败的搜索
+    "LOCK_TIMEOUT": 30,  # 重算锁的最长持有时间（秒）
+    "WAIT_TIMEOUT": 20,  # 等待其他进程重算完成的最长时间（秒）
+}
+
+
+def get_search_cache_config() -> Dict:
+    """
+    获取合并后的搜索缓存配置
+
+    Returns:
+        配置字典
+    """
+    config = dict(DEFAULT_SEARCH_CACHE)
+    config.update(getattr(settings, "SEARCH_CACHE", {}))
+    return config
+
+
+def normalize_text(text: str) -> str:
+    """
+    规范化缓存键中的文本：小写并合并空白
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        规范化后的文本
+    """
+    return " ".join((text or "").lower().split())
+
+
+class SearchResultCache:
+    """两级搜索结果缓存（进程内LRU + 共享缓存），支持过期后异步刷新"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or get_search_cache_config()
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+
+    def make_key(
+        self, backend: str, optimized_query: str, category_name: str, num_results: int
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            backend: 搜索后端名称
+            optimized_query: 优化后的查询
+            category_name: 分类名称
+            num_results: 结果数量
+
+        Returns:
+            缓存键
+        """
+        raw = "\x1f".join(
+            [
+                normalize_text(optimized_query),
+                normalize_text(category_name),
+                str(num_results),
+            ]
+        )
+        digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+        return get_cache_key("search", backend, digest)
+
+    def get_ttl(self, backend: str) -> int:
+        """获取指定后端的新鲜期"""
+        return self.config["TTLS"].get(backend, self.config["DEFAULT_TTL"])
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        读取缓存条目，先查进程内缓存，再查共享缓存
+
+        Args:
+            key: 缓存键
+
+        进程内的条目已过新鲜期时也查询共享缓存，使用其他进程（如预热任务）刷新的结果
+
+        Returns:
+            缓存条目，不存在或已完全过期时返回 None
+        """
+        local = self._get_local(key)
+        if local is not None and time.time() < local["fresh_until"]:
+            return local
+        return self._newer(key, local, cache.get(key))
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        """异步读取缓存条目（共享缓存使用 Django 的异步缓存接口）"""
+        local = self._get_local(key)
+        if local is not None and time.time() < local["fresh_until"]:
+            return local
+        return self._newer(key, local, await cache.aget(key))
+
+    def _newer(
+        self, key: str, local: Optional[Dict], shared: Optional[Dict]
+    ) -> Optional[Dict]:
+        """在进程内条目和共享缓存条目中选择较新的可用条目"""
+        if shared is None or time.time() >= shared["stale_until"]:
+            return local
+        if local is not None and local["created_at"] >= shared["created_at"]:
+            return local
+        self._set_local(key, shared)
+        return shared
+
+    def set(self, key: str, results: List[Dict], backend: str) -> Dict:
+        """
+        写入缓存条目到两级缓存
+
+        Args:
+            key: 缓存键
+            results: 搜索结果
+            backend: 搜索后端名称
+
+        Returns:
+            写入的缓存条目
+        """
+        entry = self._make_entry(results, backend)
+        self._set_local(key, entry)
+        cache.set(key, entry, self._entry_timeout(entry))
+        return entry
+
+    async def aset(self, key: str, results: List[Dict], backend: str) -> Dict:
+        """异步写入缓存条目到两级缓存"""
+        entry = self._make_entry(results, backend)
+        self._set_local(key, entry)
+        await cache.aset(key, entry, self._entry_timeout(entry))
+        return entry
+
+    def delete(self, key: str):
+        """删除缓存条目"""
+        with self._local_lock:
+            self._local.pop(key, None)
+        cache.delete(key)
+
+    def clear_local(self):
+        """清空进程内缓存"""
+        with self._local_lock:
+            self._local.clear()
+
+    def get_or_compute(
+        self, key: str, compute: Callable[[], List[Dict]], backend: str
+    ) -> List[Dict]:
+        """
+        读取缓存，未命中时重算；同一键同时只允许一个重算者
+
+        - 新鲜条目：直接返回
+        - 过期但在 STALE_TTL 内：立即返回旧结果，并由一个线程在后台刷新
+        - 未命中：获得重算锁者执行搜索，其余调用者等待结果
+
+        Args:
+            key: 缓存键
+            compute: 执行实际搜索的回调函数
+            backend: 搜索后端名称
+
+        Returns:
+            搜索结果列表（副本，调用者可以修改）
+        """
+        entry = self.get(key)
+        if entry is not None:
+            if time.time() >= entry["fresh_until"]:
+                self._revalidate_in_background(key, compute, backend)
+            return self._copy_results(entry["results"])
+
+        token = self._acquire_lock(key)
+        if token:
+            try:
+                entry = self.set(key, compute(), backend)
+            finally:
+                self._release_lock(key, token)
+            return self._copy_results(entry["results"])
+
+        # 其他线程或进程正在重算，等待其结果
+        entry = self._wait_for_entry(key)
+        if entry is not None:
+            return self._copy_results(entry["results"])
+
+        logger.warning(f"等待搜索缓存超时，直接执行搜索: {key}")
+        return self._copy_results(self.set(key, compute(), backend)["results"])
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        acompute: Callable[[], Awaitable[List[Dict]]],
+        backend: str,
+        refresh: Callable[[], List[Dict]],
+    ) -> List[Dict]:
+        """
+        get_or_compute 的异步版本
+
+        Args:
+            key: 缓存键
+            acompute: 执行实际搜索的异步回调函数
+            backend: 搜索后端名称
+            refresh: 同步回调函数，用于后台线程刷新过期条目
+                （后台刷新不能依赖请求所在的事件循环）
+
+        Returns:
+            搜索结果列表（副本，调用者可以修改）
+        """
+        entry = await self.aget_and_revalidate(key, refresh, backend)
+        if entry is not None:
+            return self._copy_results(entry["results"])
+
+        token = await self._aacquire_lock(key)
+        if token:
+            try:
+                entry = await self.aset(key, await acompute(), backend)
+            finally:
+                await self._arelease_lock(key, token)
+            return self._copy_results(entry["results"])
+
+        deadline = time.time() + self.config["WAIT_TIMEOUT"]
+        while time.time() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await self.aget(key)
+            if entry is not None:
+                return self._copy_results(entry["results"])
+            if await cache.aget(self._lock_key(key)) is None:
+                break
+
+        entry = await self.aget(key)
+        if entry is None:
+            entry = await self.aset(key, await acompute(), backend)
+        return self._copy_results(entry["results"])
+
+    async def aget_and_revalidate(
+        self, key: str, refresh: Callable[[], List[Dict]], backend: str
+    ) -> Optional[Dict]:
+        """
+        异步读取缓存条目；条目已过期（但仍可用）时由一个调用者在后台线程中刷新
+
+        Args:
+            key: 缓存键
+            refresh: 同步回调函数，用于后台刷新
+            backend: 搜索后端名称
+
+        Returns:
+            缓存条目，不存在时返回 None
+        """
+        entry = await self.aget(key)
+        if entry is not None and time.time() >= entry["fresh_until"]:
+            token = await self._aacquire_lock(key)
+            if token:
+                self._start_refresh_thread(key, refresh, backend, token)
+        return entry
+
+    def _revalidate_in_background(
+        self, key: str, compute: Callable[[], List[Dict]], backend: str
+    ):
+        """在后台线程中刷新过期条目（只有获得锁的一个调用者会刷新）"""
+        token = self._acquire_lock(key)
+        if token:
+            self._start_refresh_thread(key, compute, backend, token)
+
+    def _start_refresh_thread(
+        self, key: str, compute: Callable[[], List[Dict]], backend: str, token: str
+    ):
+        def refresh():
+            try:
+                self.set(key, compute(), backend)
+                logger.info(f"后台刷新搜索缓存成功: {key}")
+            except Exception as e:
+                logger.error(f"后台刷新搜索缓存失败: {e}")
+            finally:
+                self._release_lock(key, token)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def refresh(
+        self, key: str, compute: Callable[[], List[Dict]], backend: str
+    ) -> Optional[Dict]:
+        """
+        立即重算并写入缓存（用于预热，不等待过期）
+
+        Args:
+            key: 缓存键
+            compute: 执行实际搜索的回调函数
+            backend: 搜索后端名称
+
+        Returns:
+            写入的缓存条目，其他调用者正在重算时返回 None
+        """
+        token = self._acquire_lock(key)
+        if not token:
+            return None
+        try:
+            return self.set(key, compute(), backend)
+        finally:
+            self._release_lock(key, token)
+
+    def _wait_for_entry(self, key: str) -> Optional[Dict]:
+        """轮询等待其他调用者写入缓存"""
+        deadline = time.time() + self.config["WAIT_TIMEOUT"]
+        lock_key = self._lock_key(key)
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            if cache.get(lock_key) is None:
+                # 重算者已放弃或失败，交给调用者自行处理
+                return self.get(key)
+        return None
+
+    def _lock_key(self, key: str) -> str:
+        return get_cache_key("search-lock", key)
+
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        """尝试获取重算锁（cache.add 在进程内和跨进程都是原子的）"""
+        token = uuid.uuid4().hex
+        if cache.add(self._lock_key(key), token, self.config["LOCK_TIMEOUT"]):
+            return token
+        return None
+
+    def _release_lock(self, key: str, token: str):
+        lock_key = self._lock_key(key)
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+    async def _aacquire_lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await cache.aadd(self._lock_key(key), token, self.config["LOCK_TIMEOUT"]):
+            return token
+        return None
+
+    async def _arelease_lock(self, key: str, token: str):
+        lock_key = self._lock_key(key)
+        if await cache.aget(lock_key) == token:
+            await cache.adelete(lock_key)
+
+    def load(self, key: str, results: List[Dict], backend: str, created_at: float):
+        """
+        载入持久化存储中的结果（启动预热）
+
+        保留原来的搜索时间：仍在新鲜期内的按原有效期缓存；已过期的作为旧结果载入，
+        首次请求时立即返回并在后台刷新
+
+        Args:
+            key: 缓存键
+            results: 搜索结果
+            backend: 搜索后端名称
+            created_at: 搜索时间（时间戳）
+        """
+        now = time.time()
+        fresh_until = created_at + self.get_ttl(backend)
+        entry = {
+            "results": results,
+            "backend": backend,
+            "created_at": created_at,
+            "fresh_until": fresh_until,
+            "stale_until": max(fresh_until, now) + self.config["STALE_TTL"],
+        }
+        self._set_local(key, entry)
+        cache.set(key, entry, max(1, int(entry["stale_until"] - now)))
+
+    def _make_entry(self, results: List[Dict], backend: str) -> Dict:
+        # 空结果和降级结果（来自持久化存储的历史结果）只短暂缓存，尽快重新搜索
+        usable = bool(results) and not results[0].get("degraded")
+        ttl = self.get_ttl(backend) if usable else self.config["EMPTY_TTL"]
+        stale_ttl = self.config["STALE_TTL"] if usable else 0
+        now = time.time()
+        return {
+            "results": results,
+            "backend": backend,
+            "created_at": now,
+            "fresh_until": now + ttl,
+            "stale_until": now + ttl + stale_ttl,
+        }
+
+    @staticmethod
+    def _entry_timeout(entry: Dict) -> int:
+        return max(1, int(entry["stale_until"] - entry["created_at"]))
+
+    def _get_local(self, key: str) -> Optional[Dict]:
+        with self._local_lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if time.time() < entry["stale_until"]:
+                self._local.move_to_end(key)
+                return entry
+            del self._local[key]
+        return None
+
+    def _set_local(self, key: str, entry: Dict):
+        with self._local_lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.config["LOCAL_MAX_ENTRIES"]:
+                self._local.popitem(last=False)
+
+    @staticmethod
+    def _copy_results(results: List[Dict]) -> List[Dict]:
+        return [dict(result) for result in results]
@@ -0,0 +1,344 @@
+"""
+搜索指标模块
+按搜索引擎和阶段（优化查询、限流等待、请求、解析、过滤等）记录耗时直方图和结果数，
+按原因统计被丢弃的结果（黑名单、URL校验、相关性过滤）；
+以 Prometheus 文本格式输出（连同引擎健康和限流统计），
+并可把单次请求的各阶段耗时作为 Server-Timing 调试响应头返回
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from PatentMS.engine_health import OPEN, engine_health
+from PatentMS.rate_limit import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_METRICS 覆盖
+DEFAULT_METRICS = {
+    "ENABLED": True,
+    # 耗时直方图的桶上限（秒）
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    # 抓取接口的访问令牌（Authorization: Bearer），为空时接口只在 DEBUG 模式下开放
+    "ENDPOINT_TOKEN": "",
+    "DEBUG_HEADERS": False,  # 允许请求携带 X-Search-Debug: 1 获取各阶段耗时响应头
+}
+
+# 结果被丢弃的原因
+DROP_BLOCKLIST = "blocklist"  # 网站黑名单
+DROP_INVALID_URL = "invalid_url"  # URL 无效
+DROP_RELEVANCE = "relevance"  # 相关性分数不足
+
+
+def get_metrics_config() -> Dict:
+    """获取合并后的指标配置"""
+    config = dict(DEFAULT_METRICS)
+    config.update(getattr(settings, "SEARCH_METRICS", {}))
+    return config
+
+
+class Histogram:
+    """固定桶的耗时直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """[(桶上限, 累计数量)]，最后一项为 "+Inf" """
+        total = 0
+        rows = []
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            rows.append((bound if bound == "+Inf" else f"{bound:g}", total))
+        return rows
+
+
+class RequestTrace:
+    """单次请求的各阶段耗时和丢弃的结果数（用于调试响应头）"""
+
+    def __init__(self):
+        self.spans = []  # [(阶段, 引擎, 耗时秒数)]
+        self.dropped = Counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, stage: str, engine: str, seconds: float):
+        with self._lock:
+            self.spans.append((stage, engine, seconds))
+
+    def add_drop(self, reason: str, count: int):
+        with self._lock:
+            self.dropped[reason] += count
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing 响应头：同一引擎和阶段的耗时合计
+
+        Returns:
+            如 'search;dur=812.3, fetch;desc="bing";dur=640.1'
+        """
+        totals = {}
+        with self._lock:
+            for stage, engine, seconds in self.spans:
+                totals[(stage, engine)] = totals.get((stage, engine), 0.0) + seconds
+        parts = []
+        for (stage, engine), seconds in totals.items():
+            desc = f'desc="{engine}";' if engine else ""
+            parts.append(f"{stage};{desc}dur={seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+    def dropped_header(self) -> str:
+        """丢弃结果数的调试响应头，如 "blocklist=2, relevance=5" """
+        with self._lock:
+            return ", ".join(f"{r}={n}" for r, n in sorted(self.dropped.items()))
+
+
+_current_trace = contextvars.ContextVar("search_trace", default=None)
+
+
+class Span:
+    """一个阶段的计时（results 为该阶段产出的结果数，可在阶段内设置）"""
+
+    __slots__ = ("stage", "engine", "results")
+
+    def __init__(self, stage: str, engine: str):
+        self.stage = stage
+        self.engine = engine
+        self.results = None
+
+
+class SearchMetrics:
+    """搜索指标（进程内，多进程部署时每个进程分别被抓取）"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._results = Counter()
+        self._dropped = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, engine: str = "") -> Iterator[Span]:
+        """
+        记录一个阶段的耗时（异常退出时同样记录）
+
+        Args:
+            stage: 阶段名称
+            engine: 搜索引擎名称
+
+        Yields:
+            Span，可设置 results 记录该阶段产出的结果数
+        """
+        span = Span(stage, engine)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            self.observe(stage, engine, time.perf_counter() - started, span.results)
+
+    def observe(
+        self, stage: str, engine: str, seconds: float, results: Optional[int] = None
+    ):
+        """
+        记录一个阶段的耗时和结果数
+
+        Args:
+            stage: 阶段名称
+            engine: 搜索引擎名称
+            seconds: 耗时（秒）
+            results: 该阶段产出的结果数（可选）
+        """
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, engine, seconds)
+        config = get_metrics_config()
+        if not config["ENABLED"]:
+            return
+        key = (engine, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(config["BUCKETS"])
+            histogram.observe(seconds)
+            if results is not None:
+                self._results[key] += results
+
+    def drop(self, engine: str, reason: str, count: int = 1):
+        """
+        记录被丢弃的结果
+
+        Args:
+            engine: 搜索引擎名称
+            reason: 丢弃原因（DROP_*）
+            count: 数量
+        """
+        if count <= 0:
+            return
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_drop(reason, count)
+        if not get_metrics_config()["ENABLED"]:
+            return
+        with self._lock:
+            self._dropped[(engine, reason)] += count
+
+    def snapshot(self) -> Dict:
+        """各阶段的调用次数、总耗时和结果数，以及丢弃的结果数"""
+        with self._lock:
+            return {
+                "stages": [
+                    {
+                        "engine": engine,
+                        "stage": stage,
+                        "count": histogram.count,
+                        "seconds": round(histogram.sum, 6),
+                        "results": self._results.get((engine, stage)),
+                    }
+                    for (engine, stage), histogram in sorted(self._histograms.items())
+                ],
+                "dropped": {
+                    f"{engine}:{reason}": count
+                    for (engine, reason), count in sorted(self._dropped.items())
+                },
+            }
+
+    def render(self) -> str:
+        """
+        以 Prometheus 文本格式输出所有指标（包括引擎健康和限流统计）
+
+        Returns:
+            指标文本
+        """
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP search_stage_duration_seconds 搜索各阶段耗时",
+                "# TYPE search_stage_duration_seconds histogram",
+            ]
+            for (engine, stage), histogram in sorted(self._histograms.items()):
+                labels = f'engine="{engine}",stage="{stage}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        f'search_stage_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                        f"{count}"
+                    )
+                lines.append(
+                    f"search_stage_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}"
+                )
+                lines.append(
+                    f"search_stage_duration_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+            lines += [
+                "# HELP search_stage_results_total 搜索各阶段产出的结果数",
+                "# TYPE search_stage_results_total counter",
+            ]
+            for (engine, stage), count in sorted(self._results.items()):
+                lines.append(
+                    f'search_stage_results_total{{engine="{engine}",stage="{stage}"}} '
+                    f"{count}"
+                )
+
+            lines += [
+                "# HELP search_results_dropped_total 被丢弃的搜索结果数",
+                "# TYPE search_results_dropped_total counter",
+            ]
+            for (engine, reason), count in sorted(self._dropped.items()):
+                lines.append(
+                    f'search_results_dropped_total{{engine="{engine}",reason="{reason}"}} '
+                    f"{count}"
+                )
+
+        lines += render_engine_health(engine_health.snapshot())
+        lines += render_rate_limit(rate_limiter.snapshot())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._histograms.clear()
+            self._results.clear()
+            self._dropped.clear()
+
+
+def render_engine_health(snapshots: List[Dict]) -> List[str]:
+    """引擎健康快照转换为 Prometheus 指标行"""
+    metrics = (
+        ("search_engine_up", "gauge", "引擎未熔断为 1", None),
+        ("search_engine_latency_p50_seconds", "gauge", "引擎延迟 p50", "p50"),
+        ("search_engine_latency_p95_seconds", "gauge", "引擎延迟 p95", "p95"),
+        ("search_engine_error_rate", "gauge", "引擎近期错误率", "error_rate"),
+        ("search_engine_requests_total", "counter", "引擎请求数", "total_requests"),
+        ("search_engine_failures_total", "counter", "引擎失败数", "total_failures"),
+    )
+    lines = []
+    for name, kind, help_text, field in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for snapshot in snapshots:
+            value = int(snapshot["state"] != OPEN) if field is None else snapshot[field]
+            lines.append(f'{name}{{engine="{snapshot["name"]}"}} {value}')
+    return lines
+
+
+def render_rate_limit(snapshots: List[Dict]) -> List[str]:
+    """限流统计转换为 Prometheus 指标行"""
+    metrics = (
+        ("search_rate_limit_requests_total", "获得预约的请求数", "requests"),
+        ("search_rate_limit_delayed_total", "需要排队等待的请求数", "delayed"),
+        ("search_rate_limit_rejected_total", "等待超过上限被放弃的请求数", "rejected"),
+        ("search_rate_limit_blocked_total", "遇到验证码页面的次数", "blocked"),
+        ("search_rate_limit_wait_seconds_total", "排队等待的总时间", "wait_total"),
+    )
+    lines = []
+    for name, help_text, field in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for snapshot in snapshots:
+            lines.append(f'{name}{{host="{snapshot["host"]}"}} {snapshot[field]}')
+    return lines
+
+
+@contextmanager
+def trace_request() -> Iterator[RequestTrace]:
+    """
+    在当前上下文中收集本次请求的各阶段耗时（线程池中的阶段需通过 submit 提交）
+
+    Yields:
+        RequestTrace
+    """
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def submit(executor, fn, *args):
+    """在线程池中执行 fn，沿用当前上下文（使请求的耗时追踪覆盖并发的子任务）"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def debug_headers_requested(request) -> bool:
+    """启用了调试响应头且请求携带 X-Search-Debug: 1"""
+    return (
+        get_metrics_config()["DEBUG_HEADERS"]
+        and request.headers.get("X-Search-Debug") == "1"
+    )
+
+
+# 全局搜索指标
+search_metrics = SearchMetrics()
@@ -4,679 +4,422 @@
 """
 
 import requests
+from requests.adapters import BaseAdapter
 import json
 import re
-from urllib.parse import quote, urljoin
-from bs4 import BeautifulSoup
+import sqlite3
+import time
+import threading
+from contextlib import aclosing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    TimeoutError,
+    as_completed,
+    wait,
+)
+from urllib.parse import quote, urljoin, urlsplit
 import logging
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Tuple
+from PatentMS.engine_health import engine_health, get_adaptive_config
+from PatentMS.http_client import ThreadLocalSessions
+from PatentMS.rate_limit import rate_limiter
+from PatentMS.relevance import RelevanceScorer
+from PatentMS.search_cache import SearchResultCache
+from PatentMS.search_metrics import (
+    DROP_BLOCKLIST,
+    DROP_INVALID_URL,
+    DROP_RELEVANCE,
+    search_metrics,
+    submit,
+)
+from PatentMS.search_store import get_search_store
+from PatentMS.serp_parser import (
+    BAIDU_LAYOUT_RULES,
+    BING_LAYOUT,
+    DUCKDUCKGO_LAYOUT,
+    MultiLayoutExtractor,
+    RawResult,
+    extract_results,
+)
+from PatentMS.singleflight import SingleFlight, make_flight_key
+from PatentMS.site_filter import is_blocked_site
+from PatentMS.synthetic_search import FaultModel, get_corpus
+from PatentMS.utils import canonical_url
 
 logger = logging.getLogger(__name__)
 
 
-class MockSearchService:
-    """模拟搜索服务，用于演示功能"""
+def build_search_result(raw: RawResult, query: str, source: str) -> Optional[Dict]:
+    """
+    校验原始结果并转换为统一的结果字典（各搜索引擎共用）
 
-    def search(self, query: str, num_results: int = 10) -> List[Dict]:
-        """模拟搜索功能"""
-        # 根据查询关键词生成模拟结果
-        mock_results = []
+    Args:
+        raw: 从结果容器中提取的原始字段
+        query: 搜索关键词
+        source: 结果来源（搜索引擎名称）
 
-        # 技术相关关键词
-        tech_keywords = {
-            "python": [
-                {
-                    "title": "Python官方教程 - 官方文档",
-                    "url": "https://docs.python.org/zh-cn/3/tutorial/",
-                    "abstract": "Python官方教程，包含Python基础语法、数据结构、模块等完整学习指南。",
-                },
-                {
-                    "title": "Python入门教程 - 菜鸟教程",
-                    "url": "https://www.runoob.com/python3/python3-tutorial.html",
-                    "abstract": "Python3教程，从基础语法到高级特性，适合初学者学习。",
-                },
-                {
-                    "title": "Python学习笔记 - 廖雪峰",
-                    "url": "https://www.liaoxuefeng.com/wiki/1016959663602400",
-                    "abstract": "廖雪峰的Python教程，深入浅出地讲解Python编程。",
-                },
-            ],
-            "django": [
-                {
-                    "title": "Django官方文档",
-                    "url": "https://docs.djangoproject.com/zh-hans/4.2/",
-                    "abstract": "Django官方文档，包含完整的Web开发框架指南。",
-                },
-                {
-                    "title": "Django教程 - 菜鸟教程",
-                    "url": "https://www.runoob.com/django/django-tutorial.html",
-                    "abstract": "Django Web框架教程，从安装到部署的完整指南。",
-                },
-            ],
-            "javascript": [
-                {
-                    "title": "JavaScript教程 - MDN",
-                    "url": "https://developer.mozilla.org/zh-CN/docs/Web/JavaScript",
-                    "abstract": "MDN JavaScript教程，权威的JavaScript学习资源。",
-                },
-                {
-                    "title": "JavaScript基础教程",
-                    "url": "https://www.w3school.com.cn/js/",
-                    "abstract": "W3School JavaScript教程，适合初学者的基础教程。",
-                },
-            ],
-            "html": [
-                {
-                    "title": "HTML教程 - MDN",
-                    "url": "https://developer.mozilla.org/zh-CN/docs/Web/HTML",
-                    "abstract": "MDN HTML教程，学习HTML标记语言的基础知识。",
-                },
-                {
-                    "title": "HTML5教程",
-                    "url": "https://www.w3school.com.cn/html5/",
-                    "abstract": "W3School HTML5教程，现代Web开发必备技能。",
-                },
-            ],
-            "css": [
-                {
-                    "title": "CSS教程 - MDN",
-                    "url": "https://developer.mozilla.org/zh-CN/docs/Web/CSS",
-                    "abstract": "MDN CSS教程，学习网页样式设计。",
-                },
-                {
-                    "title": "CSS3教程",
-                    "url": "https://www.w3school.com.cn/css3/",
-                    "abstract": "W3School CSS3教程，现代CSS技术指南。",
-                },
-            ],
-            "sql": [
-                {
-                    "title": "SQL教程 - W3School",
-                    "url": "https://www.w3school.com.cn/sql/",
-                    "abstract": "W3School SQL教程，数据库查询语言学习指南。",
-                },
-                {
-                    "title": "MySQL教程",
-                    "url": "https://www.runoob.com/mysql/mysql-tutorial.html",
-                    "abstract": "MySQL数据库教程，从基础到高级的完整指南。",
-                },
-            ],
-            "git": [
-                {
-                    "title": "Git教程 - 廖雪峰",
-                    "url": "https://www.liaoxuefeng.com/wiki/896043488029600",
-                    "abstract": "廖雪峰的Git教程，深入浅出地讲解版本控制。",
-                },
-                {
-                    "title": "Git官方文档",
-                    "url": "https://git-scm.com/doc",
-                    "abstract": "Git官方文档，最权威的Git使用指南。",
-                },
-            ],
-            "docker": [
-                {
-                    "title": "Docker官方文档",
-                    "url": "https://docs.docker.com/",
-                    "abstract": "Docker官方文档，容器化技术学习指南。",
-                },
-                {
-                    "title": "Docker教程",
-                    "url": "https://www.runoob.com/docker/docker-tutorial.html",
-                    "abstract": "Docker容器教程，从入门到实践的完整指南。",
-                },
-            ],
-        }
+    Returns:
+        结果字典，URL无效或网站不合适时返回 None
+    """
+    url = raw.url
 
-        # 通用教程
-        general_tutorials = [
-            {
-                "title": f"{query} 入门教程",
-                "url": f"https://example.com/tutorial/{query.lower()}",
-                "abstract": f"{query}入门教程，适合初学者学习。",
-            },
-            {
-                "title": f"{query} 官方文档",
-                "url": f"https://docs.example.com/{query.lower()}",
-                "abstract": f"{query}官方文档，包含完整的API参考和使用指南。",
-            },
-            {
-                "title": f"{query} 学习指南",
-                "url": f"https://learn.example.com/{query.lower()}",
-                "abstract": f"{query}学习指南，从基础到高级的完整学习路径。",
-            },
-        ]
+    # 验证URL
+    if not url or not url.startswith("http"):
+        search_metrics.drop(source, DROP_INVALID_URL)
+        return None
 
-        # 查找匹配的关键词
-        query_lower = query.lower()
-        for keyword, results in tech_keywords.items():
-            if keyword in query_lower:
-                mock_results.extend(results)
-                break
+    # 过滤不合适的网站
+    if is_blocked_site(url, source):
+        search_metrics.drop(source, DROP_BLOCKLIST)
+        return None
 
-        # 如果没有找到匹配的关键词，使用通用教程
-        if not mock_results:
-            mock_results = general_tutorials
+    abstract = raw.abstract or f"关于 {query} 的相关信息"
+    return {
+        "title": raw.title,
+        "url": url,
+        "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
+        "source": source,
+    }
 
-        # 添加来源信息
-        for result in mock_results:
-            result["source"] = "mock"
 
-        return mock_results[:num_results]
+class SearchEngineError(Exception):
+    """搜索引擎请求或解析失败"""
 
-    def get_suggestions(self, query: str) -> List[str]:
-        """获取搜索建议"""
-        suggestions = {
-            "python": [
-                "python教程",
-                "python安装",
-                "python基础",
-                "python进阶",
-                "python实战",
-            ],
-            "django": [
-                "django教程",
-                "django安装",
-                "django模型",
-                "django视图",
-                "django模板",
-            ],
-            "javascript": [
-                "javascript教程",
-                "javascript基础",
-                "javascript进阶",
-                "javascript实战",
-            ],
-            "html": ["html教程", "html基础", "html5教程", "html标签", "html表单"],
-            "css": ["css教程", "css基础", "css3教程", "css布局", "css动画"],
-            "sql": ["sql教程", "sql基础", "mysql教程", "sql查询", "sql优化"],
-            "git": ["git教程", "git基础", "git命令", "git分支", "git合并"],
-            "docker": [
-                "docker教程",
-                "docker基础",
-                "docker安装",
-                "docker镜像",
-                "docker容器",
-            ],
-        }
 
-        query_lower = query.lower()
-        for keyword, suggestion_list in suggestions.items():
-            if keyword in query_lower:
-                return suggestion_list
+class EngineRateLimited(SearchEngineError):
+    """搜索引擎的请求预算已用完（排队等待时间超过上限），请求没有发出"""
 
-        return [f"{query}教程", f"{query}基础", f"{query}入门", f"{query}实战"]
 
+# 翻页默认配置，可通过 settings.SEARCH_PAGINATION 覆盖
+DEFAULT_PAGINATION = {
+    "MAX_PAGES": 5,  # 每次搜索最多请求的结果页数（包括补充请求的页）
+    "DEADLINE": 8.0,  # 并发翻页的截止时间（秒），超时未返回的页被丢弃
+    "MAX_WORKERS": 8,  # 翻页线程池大小（所有请求共享）
+    "MAX_RESULTS": 50,  # 搜索接口一次搜索并缓存的结果数（分批加载的上限）
+}
 
-class BaiduSearchService:
-    """百度搜索服务类"""
+_pagination_executor = None
+_pagination_executor_lock = threading.Lock()
 
-    def __init__(self):
-        self.base_url = "https://www.baidu.com/s"
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            "Accept-Encoding": "gzip, deflate",  # 不接受br压缩
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-            "Cache-Control": "max-age=0",
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
 
-    def search(self, query: str, num_results: int = 10) -> List[Dict]:
-        """
-        执行百度搜索
+def get_pagination_config() -> Dict:
+    """获取合并后的翻页配置"""
+    config = dict(DEFAULT_PAGINATION)
+    config.update(getattr(settings, "SEARCH_PAGINATION", {}))
+    return config
 
-        Args:
-            query: 搜索关键词
-            num_results: 返回结果数量
 
-        Returns:
-            搜索结果列表
-        """
-        try:
-            # 构建搜索参数
-            params = {
-                "wd": query,
-                "rn": num_results,
-                "ie": "utf-8",
-                "tn": "baiduhome_pg",
-                "rsv_idx": "2",
-                "rsv_crq": "1",
-                "rsv_enter": "1",
-            }
+def search_window() -> int:
+    """
+    搜索接口每次搜索的结果数
 
-            # 发送请求
-            response = self.session.get(self.base_url, params=params, timeout=15)
-            response.raise_for_status()
-            response.encoding = "utf-8"
+    搜索接口按这个数量搜索、排序并缓存一次，各批次（cursor）都是同一个列表的切片，
+    缓存键与 cursor 无关：加载更多时不会重新抓取前面的结果页，也不会重复或遗漏结果
+    """
+    return get_pagination_config()["MAX_RESULTS"]
 
-            logger.info(f"百度搜索请求成功: {query}")
 
-            # 解析搜索结果
-            return self._parse_search_results(response.text, query)
+def get_pagination_executor() -> ThreadPoolExecutor:
+    """
+    获取翻页共享线程池（懒加载）
 
-        except requests.RequestException as e:
-            logger.error(f"百度搜索请求失败: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"百度搜索解析失败: {e}")
-            return []
+    与元搜索线程池分开：元搜索线程中的引擎翻页时不会等待同一个线程池而死锁
+    """
+    global _pagination_executor
+    if _pagination_executor is None:
+        with _pagination_executor_lock:
+            if _pagination_executor is None:
+                _pagination_executor = ThreadPoolExecutor(
+                    max_workers=get_pagination_config()["MAX_WORKERS"],
+                    thread_name_prefix="pagination",
+                )
+    return _pagination_executor
 
-    def _parse_search_results(self, html_content: str, query: str) -> List[Dict]:
-        """
-        解析百度搜索结果HTML
 
-        Args:
-            html_content: HTML内容
-            query: 原始搜索关键词
+def plan_pages(num_results: int, page_size: int, max_pages: int) -> int:
+    """
+    计算返回 num_results 条结果需要请求的页数（不超过 max_pages）
 
-        Returns:
-            解析后的搜索结果列表
-        """
-        results = []
+    Args:
+        num_results: 需要的结果数量
+        page_size: 每页结果数
+        max_pages: 页数上限
 
-        try:
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # 方法1: 查找标准搜索结果容器
-            result_containers = soup.find_all("div", class_="result")
-            if result_containers:
-                logger.info(f"找到 {len(result_containers)} 个标准搜索结果")
-                for container in result_containers[:10]:
-                    result = self._extract_result_info(container, query)
-                    if result:
-                        results.append(result)
-
-            # 方法2: 查找新的搜索结果结构
-            if not results:
-                logger.info("尝试新结构解析方法")
-                results = self._parse_new_structure_results(soup, query)
-
-            # 方法3: 如果没有找到标准结果，尝试其他选择器
-            if not results:
-                logger.info("尝试备用解析方法")
-                results = self._parse_alternative_results(soup, query)
-
-            # 方法4: 如果还是没有结果，尝试更宽松的解析
-            if not results:
-                logger.info("尝试宽松解析方法")
-                results = self._parse_loose_results(soup, query)
+    Returns:
+        页数（至少一页）
+    """
+    return max(1, min(-(-num_results // page_size), max_pages))
 
-        except Exception as e:
-            logger.error(f"解析搜索结果失败: {e}")
 
-        logger.info(f"最终解析到 {len(results)} 个搜索结果")
-        return results
+class PagePool:
+    """逐页累积的搜索结果（按规范化URL去重）"""
+
+    def __init__(self, results: List[Dict] = ()):
+        self.results = []
+        self._seen = set()
+        self.add(results)
 
-    def _parse_new_structure_results(self, soup, query: str) -> List[Dict]:
+    def add(self, results: List[Dict]) -> int:
         """
-        解析新的百度搜索结果结构
+        加入一页结果
 
         Args:
-            soup: BeautifulSoup对象
-            query: 搜索关键词
+            results: 该页结果
 
         Returns:
-            解析结果列表
+            新加入的结果数量
         """
-        results = []
+        added = 0
+        for result in results:
+            key = canonical_url(result.get("url", ""))
+            if key not in self._seen:
+                self._seen.add(key)
+                self.results.append(result)
+                added += 1
+        return added
 
-        try:
-            # 查找所有可能的搜索结果容器
-            # 百度搜索结果可能有多种class名称
-            possible_selectors = [
-                'div[class*="result"]',
-                'div[class*="c-container"]',
-                'div[class*="result-op"]',
-                'div[class*="c-result"]',
-                'div[class*="result-item"]',
-                'div[class*="search-result"]',
-            ]
 
-            for selector in possible_selectors:
-                containers = soup.select(selector)
-                if containers:
-                    logger.info(f"使用选择器 {selector} 找到 {len(containers)} 个结果")
-                    for container in containers[:15]:
-                        result = self._extract_from_container(container, query)
-                        if result:
-                            results.append(result)
-                            if len(results) >= 10:
-                                break
-                    if results:
-                        break
-
-            # 如果没有找到，尝试查找所有包含链接的div
-            if not results:
-                logger.info("尝试查找所有包含链接的div")
-                all_divs = soup.find_all("div")
-                for div in all_divs[:50]:  # 限制搜索范围
-                    links = div.find_all("a", href=True)
-                    for link in links:
-                        href = link.get("href", "")
-                        title = link.get_text(strip=True)
-
-                        # 过滤条件
-                        if (
-                            href.startswith("http")
-                            and len(title) > 10
-                            and len(title) < 200
-                            and not self._is_inappropriate_site(href)
-                            and not href.startswith("https://www.baidu.com")
-                            and not href.startswith("https://baidu.com")
-                            and "baidu" not in href.lower()
-                        ):
-
-                            # 查找摘要
-                            abstract_elem = div.find(
-                                ["div", "p", "span"],
-                                class_=re.compile(r"abstract|summary|desc|content"),
-                            )
-                            abstract = (
-                                abstract_elem.get_text(strip=True)
-                                if abstract_elem
-                                else f"关于 {query} 的相关信息"
-                            )
-
-                            results.append(
-                                {
-                                    "title": title,
-                                    "url": href,
-                                    "abstract": (
-                                        abstract[:200] + "..."
-                                        if len(abstract) > 200
-                                        else abstract
-                                    ),
-                                    "source": "baidu",
-                                }
-                            )
-
-                            if len(results) >= 10:
-                                break
+def join_pages(pages: Dict[int, List[Dict]], num_results: int) -> List[Dict]:
+    """
+    按页的偏移量顺序拼接各页结果，并按规范化URL去重（翻页时结果可能重复）
 
-                    if len(results) >= 10:
-                        break
+    Args:
+        pages: {偏移量: 该页结果}
+        num_results: 返回结果数量
 
-        except Exception as e:
-            logger.error(f"新结构解析方法失败: {e}")
+    Returns:
+        拼接后的结果列表
+    """
+    pool = PagePool()
+    for offset in sorted(pages):
+        pool.add(pages[offset])
+    return pool.results[:num_results]
 
-        return results
 
-    def _extract_from_container(self, container, query: str) -> Optional[Dict]:
+class PaginatedSearchEngine:
+    """
+    按页返回结果的搜索引擎基类
+
+    子类实现 fetch_page；需要的结果超过一页或过滤后不足时并发请求后续各页
+    """
+
+    name = ""
+    display_name = ""
+    page_size = 10  # 每页结果数（翻页偏移量的步长）
+
+    def search(self, query: str, num_results: int = 10) -> List[Dict]:
         """
-        从容器中提取搜索结果信息
+        执行搜索，失败时返回空列表
 
         Args:
-            container: 搜索结果容器
             query: 搜索关键词
+            num_results: 返回结果数量
 
         Returns:
-            提取的结果信息
+            搜索结果列表
         """
         try:
-            # 查找标题和链接
-            title_selectors = [
-                "h3 a",
-                "h2 a",
-                "h1 a",
-                'a[class*="title"]',
-                'a[class*="link"]',
-            ]
-            title_link = None
-
-            for selector in title_selectors:
-                title_link = container.select_one(selector)
-                if title_link:
-                    break
+            return self.fetch_results(query, num_results)
+        except SearchEngineError as e:
+            logger.error(str(e))
+            return []
 
-            if not title_link:
-                return None
-
-            title = title_link.get_text(strip=True)
-            url = title_link.get("href", "")
-
-            # 验证URL
-            if not url or not url.startswith("http"):
-                return None
-
-            # 过滤不合适的网站
-            if self._is_inappropriate_site(url):
-                return None
-
-            # 查找摘要
-            abstract_selectors = [
-                'div[class*="abstract"]',
-                'div[class*="summary"]',
-                'div[class*="desc"]',
-                'div[class*="content"]',
-                'p[class*="abstract"]',
-                'p[class*="summary"]',
-                'span[class*="abstract"]',
-                'span[class*="summary"]',
-            ]
+    def fetch_results(self, query: str, num_results: int = 10) -> List[Dict]:
+        """
+        执行搜索，失败时抛出异常（供引擎健康统计区分失败和无结果）
 
-            abstract = f"关于 {query} 的相关信息"
-            for selector in abstract_selectors:
-                abstract_elem = container.select_one(selector)
-                if abstract_elem:
-                    abstract = abstract_elem.get_text(strip=True)
-                    break
+        需要的结果超过一页时并发请求后续各页
 
-            return {
-                "title": title,
-                "url": url,
-                "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
-                "source": "baidu",
-            }
+        Args:
+            query: 搜索关键词
+            num_results: 返回结果数量
 
-        except Exception as e:
-            logger.error(f"从容器提取信息失败: {e}")
-            return None
+        Returns:
+            搜索结果列表
 
-    def _extract_result_info(self, container, query: str) -> Optional[Dict]:
+        Raises:
+            SearchEngineError: 请求或解析失败（翻页时所有页都失败）
+        """
+        with search_metrics.span("engine", self.name) as span:
+            config = get_pagination_config()
+            pages = plan_pages(num_results, self.page_size, config["MAX_PAGES"])
+            if pages == 1:
+                results = self.fetch_page(query)[:num_results]
+                span.results = len(results)
+                return results
+
+            results = {}
+            errors = []
+            for offset, page in self.iter_pages(query, pages, errors=errors):
+                results[offset] = page
+            if not results and errors:
+                raise errors[0]
+            results = join_pages(results, num_results)
+            span.results = len(results)
+            return results
+
+    def fetch_page(self, query: str, offset: int = 0) -> List[Dict]:
         """
-        从搜索结果容器中提取信息
+        获取一页搜索结果
 
         Args:
-            container: 搜索结果容器
             query: 搜索关键词
+            offset: 结果偏移量（第一页为 0）
 
         Returns:
-            提取的结果信息
-        """
-        try:
-            # 查找标题和链接
-            title_element = container.find("h3")
-            if not title_element:
-                return None
-
-            title_link = title_element.find("a")
-            if not title_link:
-                return None
-
-            title = title_link.get_text(strip=True)
-            url = title_link.get("href", "")
-
-            # 查找摘要
-            abstract_element = container.find("div", class_="c-abstract")
-            if abstract_element:
-                abstract = abstract_element.get_text(strip=True)
-            else:
-                abstract = f"关于 {query} 的相关信息"
-
-            # 验证URL
-            if not url or not url.startswith("http"):
-                return None
-
-            # 过滤掉一些不合适的网站
-            if self._is_inappropriate_site(url):
-                return None
+            该页的搜索结果列表
 
-            return {"title": title, "url": url, "abstract": abstract, "source": "baidu"}
-
-        except Exception as e:
-            logger.error(f"提取结果信息失败: {e}")
-            return None
+        Raises:
+            SearchEngineError: 获取失败
+        """
+        raise NotImplementedError
 
-    def _parse_alternative_results(self, soup, query: str) -> List[Dict]:
+    def iter_pages(
+        self, query: str, pages: int, offset: int = 0, errors: Optional[List] = None
+    ) -> Iterator[Tuple[int, List[Dict]]]:
         """
-        使用备用方法解析搜索结果
+        在共享线程池中并发请求从 offset 开始的 pages 页，按到达顺序逐页产出
+
+        截止时间到达后停止；调用方提前结束迭代时取消尚未开始的请求
 
         Args:
-            soup: BeautifulSoup对象
             query: 搜索关键词
+            pages: 页数
+            offset: 第一页的结果偏移量
+            errors: 收集失败页的异常（可选）
 
-        Returns:
-            解析结果列表
+        Yields:
+            (该页的偏移量, 该页结果)
         """
-        results = []
-
-        try:
-            # 查找所有可能的搜索结果容器
-            containers = soup.find_all(
-                ["div", "li"], class_=re.compile(r"result|item|list-item")
+        config = get_pagination_config()
+        executor = get_pagination_executor()
+        futures = {
+            submit(executor, self.fetch_page, query, page_offset): page_offset
+            for page_offset in range(
+                offset, offset + pages * self.page_size, self.page_size
             )
-
-            for container in containers[:20]:
-                # 查找链接
-                link = container.find("a", href=True)
-                if not link:
+        }
+        try:
+            for future in as_completed(futures, timeout=config["DEADLINE"]):
+                try:
+                    results = future.result()
+                except SearchEngineError as e:
+                    logger.error(str(e))
+                    if errors is not None:
+                        errors.append(e)
                     continue
+                yield futures[future], results
+        except TimeoutError:
+            pending = sorted(futures[f] for f in futures if not f.done())
+            logger.warning(
+                f"{self.display_name}翻页截止时间已到，未返回的偏移量: {pending}"
+            )
+        finally:
+            for future in futures:
+                future.cancel()
 
-                href = link.get("href", "")
-                title = link.get_text(strip=True)
-
-                # 过滤有效链接
-                if (
-                    href.startswith("http")
-                    and len(title) > 5
-                    and not self._is_inappropriate_site(href)
-                    and not href.startswith("https://www.baidu.com")
-                ):
 
-                    # 查找摘要
-                    abstract_elem = container.find(
-                        ["div", "p"], class_=re.compile(r"abstract|summary|desc")
-                    )
-                    abstract = (
-                        abstract_elem.get_text(strip=True)
-                        if abstract_elem
-                        else f"关于 {query} 的相关信息"
-                    )
+class HTTPSearchEngine(PaginatedSearchEngine):
+    """
+    基于 requests 的搜索引擎基类
 
-                    results.append(
-                        {
-                            "title": title,
-                            "url": href,
-                            "abstract": abstract,
-                            "source": "baidu",
-                        }
-                    )
+    子类实现 _build_search_request / _parse_search_response /
+    _build_suggest_request / _parse_suggestions 钩子（同步和异步实现共用），
+    _build_search_request 按 offset 构建翻页请求
+    """
 
-                    if len(results) >= 10:
-                        break
+    search_timeout = 15
+    suggest_timeout = 5
+    block_markers = ()  # 验证码（限流）页面的特征文本（小写）
+    headers = {}
+    warmup_url = None  # 启动预热连接时请求的URL
 
-        except Exception as e:
-            logger.error(f"备用解析方法失败: {e}")
+    def __init__(self, adapter: Optional[BaseAdapter] = None):
+        # adapter 用于替换传输层（如回放语料库），默认按 settings.SEARCH_TRANSPORT
+        self._sessions = ThreadLocalSessions(self.headers, adapter)
 
-        return results
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的会话（共享连接池）"""
+        return self._sessions.get()
 
-    def _parse_loose_results(self, soup, query: str) -> List[Dict]:
+    def fetch_page(self, query: str, offset: int = 0) -> List[Dict]:
         """
-        使用宽松方法解析搜索结果
+        请求并解析一页搜索结果
 
         Args:
-            soup: BeautifulSoup对象
             query: 搜索关键词
+            offset: 结果偏移量（第一页为 0）
 
         Returns:
-            解析结果列表
-        """
-        results = []
+            该页的搜索结果列表
 
+        Raises:
+            SearchEngineError: 请求或解析失败
+        """
+        url, params = self._build_search_request(query, self.page_size, offset)
+        wait = self._reserve(url)
+        if wait:
+            with search_metrics.span("rate_wait", self.name):
+                time.sleep(wait)
         try:
-            # 查找所有外部链接
-            links = soup.find_all("a", href=True)
-
-            for link in links:
-                href = link.get("href", "")
-                title = link.get_text(strip=True)
-
-                # 过滤条件
-                if (
-                    href.startswith("http")
-                    and len(title) > 10
-                    and len(title) < 200
-                    and not self._is_inappropriate_site(href)
-                    and not href.startswith("https://www.baidu.com")
-                    and not href.startswith("https://baidu.com")
-                    and "baidu" not in href.lower()
-                ):
-
-                    # 检查标题是否包含查询关键词
-                    if query.lower() in title.lower():
-                        results.append(
-                            {
-                                "title": title,
-                                "url": href,
-                                "abstract": f"关于 {query} 的相关信息",
-                                "source": "baidu",
-                            }
-                        )
+            with search_metrics.span("fetch", self.name):
+                response = self.session.get(
+                    url, params=params, timeout=self.search_timeout
+                )
+                response.raise_for_status()
+                response.encoding = "utf-8"
+        except requests.RequestException as e:
+            raise SearchEngineError(f"{self.display_name}搜索请求失败: {e}") from e
 
-                        if len(results) >= 10:
-                            break
+        logger.info(f"{self.display_name}搜索请求成功: {query} (偏移 {offset})")
 
+        try:
+            # 解析搜索结果
+            with search_metrics.span("parse", self.name) as span:
+                results = self._parse_search_response(
+                    response.text, query, self.page_size
+                )
+                span.results = len(results)
         except Exception as e:
-            logger.error(f"宽松解析方法失败: {e}")
-
+            raise SearchEngineError(f"{self.display_name}搜索解析失败: {e}") from e
+        if not results:
+            self._check_blocked(url, response.text)
         return results
 
-    def _is_inappropriate_site(self, url: str) -> bool:
+    def _reserve(self, url: str) -> float:
         """
-        检查是否为不合适的网站
+        向限流器预约一次对 url 所在主机的请求
 
         Args:
-            url: 网站URL
+            url: 请求URL
 
         Returns:
-            是否为不合适的网站
-        """
-        inappropriate_domains = [
-            "baidu.com",
-            "google.com",
-            "youtube.com",
-            "facebook.com",
-            "twitter.com",
-            "instagram.com",
-            "tiktok.com",
-            "douyin.com",
-            "weibo.com",
-            "zhihu.com",
-            "qq.com",
-            "wechat.com",
-            "taobao.com",
-            "tmall.com",
-            "jd.com",
-            "amazon.com",
-            "ebay.com",
-            "sina.com",
-            "sohu.com",
-            "163.com",
-            "126.com",
-            "mail.qq.com",
-            "mail.163.com",
-        ]
-
-        url_lower = url.lower()
-        return any(domain in url_lower for domain in inappropriate_domains)
+            发出请求前需要等待的时间（秒）
+
+        Raises:
+            EngineRateLimited: 排队等待时间超过上限
+        """
+        wait = rate_limiter.reserve(urlsplit(url).hostname)
+        if wait is None:
+            raise EngineRateLimited(f"{self.display_name}请求预算已用完，暂不请求")
+        return wait
+
+    def _check_blocked(self, url: str, content: str):
+        """
+        没有解析到结果时检查是否为验证码页面：是则暂停请求该主机并作为失败处理，
+        避免把限流当作“没有结果”
+
+        Raises:
+            SearchEngineError: 返回的是验证码页面
+        """
+        content = content.lower()
+        if any(marker in content for marker in self.block_markers):
+            rate_limiter.penalize(urlsplit(url).hostname)
+            raise SearchEngineError(f"{self.display_name}返回验证码页面，请求已被限流")
 
     def get_suggestions(self, query: str) -> List[str]:
         """
@@ -689,72 +432,402 @@ class BaiduSearchService:
             搜索建议列表
         """
         try:
-            suggest_url = "https://www.baidu.com/sugrec"
-            params = {"prod": "pc", "wd": query, "cb": "callback"}
-
-            response = self.session.get(suggest_url, params=params, timeout=5)
+            url, params = self._build_suggest_request(query)
+            response = self.session.get(
+                url, params=params, timeout=self.suggest_timeout
+            )
             response.raise_for_status()
 
-            # 解析JSONP响应
-            content = response.text
-            match = re.search(r"callback\((.*)\)", content)
-
-            if match:
-                data = json.loads(match.group(1))
-                suggestions = data.get("g", [])
-                return [item.get("q", "") for item in suggestions if item.get("q")]
+            return self._parse_suggestions(response.text)
 
         except Exception as e:
-            logger.error(f"获取搜索建议失败: {e}")
+            logger.error(f"获取{self.display_name}搜索建议失败: {e}")
 
         return []
 
 
-class PublicSearchService:
-    """使用公开搜索API的服务"""
+# 模拟搜索的固定结果（关键词 -> 结果列表）
+MOCK_RESULTS = {
+    "python": [
+        {
+            "title": "Python官方教程 - 官方文档",
+            "url": "https://docs.python.org/zh-cn/3/tutorial/",
+            "abstract": "Python官方教程，包含Python基础语法、数据结构、模块等完整学习指南。",
+        },
+        {
+            "title": "Python入门教程 - 菜鸟教程",
+            "url": "https://www.runoob.com/python3/python3-tutorial.html",
+            "abstract": "Python3教程，从基础语法到高级特性，适合初学者学习。",
+        },
+        {
+            "title": "Python学习笔记 - 廖雪峰",
+            "url": "https://www.liaoxuefeng.com/wiki/1016959663602400",
+            "abstract": "廖雪峰的Python教程，深入浅出地讲解Python编程。",
+        },
+    ],
+    "django": [
+        {
+            "title": "Django官方文档",
+            "url": "https://docs.djangoproject.com/zh-hans/4.2/",
+            "abstract": "Django官方文档，包含完整的Web开发框架指南。",
+        },
+        {
+            "title": "Django教程 - 菜鸟教程",
+            "url": "https://www.runoob.com/django/django-tutorial.html",
+            "abstract": "Django Web框架教程，从安装到部署的完整指南。",
+        },
+    ],
+    "javascript": [
+        {
+            "title": "JavaScript教程 - MDN",
+            "url": "https://developer.mozilla.org/zh-CN/docs/Web/JavaScript",
+            "abstract": "MDN JavaScript教程，权威的JavaScript学习资源。",
+        },
+        {
+            "title": "JavaScript基础教程",
+            "url": "https://www.w3school.com.cn/js/",
+            "abstract": "W3School JavaScript教程，适合初学者的基础教程。",
+        },
+    ],
+    "html": [
+        {
+            "title": "HTML教程 - MDN",
+            "url": "https://developer.mozilla.org/zh-CN/docs/Web/HTML",
+            "abstract": "MDN HTML教程，学习HTML标记语言的基础知识。",
+        },
+        {
+            "title": "HTML5教程",
+            "url": "https://www.w3school.com.cn/html5/",
+            "abstract": "W3School HTML5教程，现代Web开发必备技能。",
+        },
+    ],
+    "css": [
+        {
+            "title": "CSS教程 - MDN",
+            "url": "https://developer.mozilla.org/zh-CN/docs/Web/CSS",
+            "abstract": "MDN CSS教程，学习网页样式设计。",
+        },
+        {
+            "title": "CSS3教程",
+            "url": "https://www.w3school.com.cn/css3/",
+            "abstract": "W3School CSS3教程，现代CSS技术指南。",
+        },
+    ],
+    "sql": [
+        {
+            "title": "SQL教程 - W3School",
+            "url": "https://www.w3school.com.cn/sql/",
+            "abstract": "W3School SQL教程，数据库查询语言学习指南。",
+        },
+        {
+            "title": "MySQL教程",
+            "url": "https://www.runoob.com/mysql/mysql-tutorial.html",
+            "abstract": "MySQL数据库教程，从基础到高级的完整指南。",
+        },
+    ],
+    "git": [
+        {
+            "title": "Git教程 - 廖雪峰",
+            "url": "https://www.liaoxuefeng.com/wiki/896043488029600",
+            "abstract": "廖雪峰的Git教程，深入浅出地讲解版本控制。",
+        },
+        {
+            "title": "Git官方文档",
+            "url": "https://git-scm.com/doc",
+            "abstract": "Git官方文档，最权威的Git使用指南。",
+        },
+    ],
+    "docker": [
+        {
+            "title": "Docker官方文档",
+            "url": "https://docs.docker.com/",
+            "abstract": "Docker官方文档，容器化技术学习指南。",
+        },
+        {
+            "title": "Docker教程",
+            "url": "https://www.runoob.com/docker/docker-tutorial.html",
+            "abstract": "Docker容器教程，从入门到实践的完整指南。",
+        },
+    ],
+}
+
+# 模拟搜索的固定建议（关键词 -> 建议列表）
+MOCK_SUGGESTIONS = {
+    "python": [
+        "python教程",
+        "python安装",
+        "python基础",
+        "python进阶",
+        "python实战",
+    ],
+    "django": [
+        "django教程",
+        "django安装",
+        "django模型",
+        "django视图",
+        "django模板",
+    ],
+    "javascript": [
+        "javascript教程",
+        "javascript基础",
+        "javascript进阶",
+        "javascript实战",
+    ],
+    "html": ["html教程", "html基础", "html5教程", "html标签", "html表单"],
+    "css": ["css教程", "css基础", "css3教程", "css布局", "css动画"],
+    "sql": ["sql教程", "sql基础", "mysql教程", "sql查询", "sql优化"],
+    "git": ["git教程", "git基础", "git命令", "git分支", "git合并"],
+    "docker": [
+        "docker教程",
+        "docker基础",
+        "docker安装",
+        "docker镜像",
+        "docker容器",
+    ],
+}
 
-    def __init__(self):
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+
+class MockSearchService:
+    """模拟搜索服务，用于演示功能"""
+
+    name = "mock"
 
     def search(self, query: str, num_results: int = 10) -> List[Dict]:
+        """模拟搜索功能"""
+        # 查找匹配的关键词
+        query_lower = query.lower()
+        mock_results = next(
+            (
+                results
+                for keyword, results in MOCK_RESULTS.items()
+                if keyword in query_lower
+            ),
+            None,
+        )
+
+        # 如果没有找到匹配的关键词，使用通用教程
+        if mock_results is None:
+            mock_results = [
+                {
+                    "title": f"{query} 入门教程",
+                    "url": f"https://example.com/tutorial/{query.lower()}",
+                    "abstract": f"{query}入门教程，适合初学者学习。",
+                },
+                {
+                    "title": f"{query} 官方文档",
+                    "url": f"https://docs.example.com/{query.lower()}",
+                    "abstract": f"{query}官方文档，包含完整的API参考和使用指南。",
+                },
+                {
+                    "title": f"{query} 学习指南",
+                    "url": f"https://learn.example.com/{query.lower()}",
+                    "abstract": f"{query}学习指南，从基础到高级的完整学习路径。",
+                },
+            ]
+
+        # 添加来源信息（复制结果，不修改共享的固定结果）
+        return [dict(result, source="mock") for result in mock_results[:num_results]]
+
+    def get_suggestions(self, query: str) -> List[str]:
+        """获取搜索建议"""
+        query_lower = query.lower()
+        for keyword, suggestion_list in MOCK_SUGGESTIONS.items():
+            if keyword in query_lower:
+                return list(suggestion_list)
+
+        return [f"{query}教程", f"{query}基础", f"{query}入门", f"{query}实战"]
+
+
+class SyntheticSearchService(PaginatedSearchEngine):
+    """
+    合成搜索引擎：从合成语料的倒排索引中检索，按配置的分布模拟延迟和错误
+
+    用于在没有网络的环境中以真实的结果规模对搜索服务和视图做压力测试
+    """
+
+    name = "synthetic"
+    display_name = "合成搜索"
+
+    def __init__(self, corpus=None, faults: Optional[FaultModel] = None):
+        # corpus 默认使用全局合成语料（首次使用时生成）
+        self._corpus = corpus
+        self.faults = faults or FaultModel()
+
+    @property
+    def corpus(self):
+        return self._corpus or get_corpus()
+
+    def fetch_page(self, query: str, offset: int = 0) -> List[Dict]:
+        """
+        检索一页结果（先等待模拟的延迟）
+
+        Args:
+            query: 搜索关键词
+            offset: 结果偏移量（第一页为 0）
+
+        Returns:
+            该页的搜索结果列表
+
+        Raises:
+            SearchEngineError: 模拟的错误或超时
         """
-        使用DuckDuckGo搜索（无需API密钥）
+        delay, failure = self.faults.sample()
+        if delay:
+            with search_metrics.span("fetch", self.name):
+                time.sleep(delay)
+        if failure:
+            raise SearchEngineError(f"{self.display_name}{failure}")
+        corpus = self.corpus
+        with search_metrics.span("parse", self.name) as span:
+            results = [
+                dict(corpus.document(doc_id), source=self.name)
+                for doc_id in corpus.match(query, offset, self.page_size)
+            ]
+            span.results = len(results)
+        return results
+
+    def get_suggestions(self, query: str) -> List[str]:
+        """获取搜索建议（按词表补全）"""
+        return self.corpus.suggest(query)
+
+
+class BaiduSearchService(HTTPSearchEngine):
+    """百度搜索服务类"""
+
+    name = "baidu"
+    display_name = "百度"
+    warmup_url = "https://www.baidu.com/"
+    base_url = "https://www.baidu.com/s"
+    extractor = MultiLayoutExtractor(BAIDU_LAYOUT_RULES)
+    block_markers = ("wappass.baidu.com", "安全验证")
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        "Accept-Encoding": "gzip, deflate",  # 不接受br压缩
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": "none",
+        "Sec-Fetch-User": "?1",
+        "Cache-Control": "max-age=0",
+    }
+
+    def _build_search_request(self, query: str, num_results: int, offset: int = 0):
+        """
+        构建搜索请求
 
         Args:
             query: 搜索关键词
             num_results: 返回结果数量
+            offset: 结果偏移量（翻页）
 
         Returns:
-            搜索结果列表
+            (请求URL, 请求参数)
         """
-        try:
-            # 使用DuckDuckGo搜索
-            search_url = "https://html.duckduckgo.com/html/"
-            params = {
-                "q": query,
-                "kl": "cn-zh",  # 中文结果
-            }
+        params = {
+            "wd": query,
+            "rn": num_results,
+            "pn": offset,
+            "ie": "utf-8",
+            "tn": "baiduhome_pg",
+            "rsv_idx": "2",
+            "rsv_crq": "1",
+            "rsv_enter": "1",
+        }
+        return self.base_url, params
 
-            response = self.session.get(search_url, params=params, timeout=15)
-            response.raise_for_status()
-            response.encoding = "utf-8"
+    def _parse_search_response(
+        self, html_content: str, query: str, num_results: int
+    ) -> List[Dict]:
+        """解析搜索响应（同步和异步实现共用）"""
+        return self._parse_search_results(html_content, query)
 
-            logger.info(f"DuckDuckGo搜索请求成功: {query}")
+    def _parse_search_results(self, html_content: str, query: str) -> List[Dict]:
+        """
+        解析百度搜索结果HTML
 
-            # 解析搜索结果
-            return self._parse_duckduckgo_results(response.text, query)
+        一次遍历文档树同时匹配所有已知的结果结构，使用优先级最高且有有效结果的结构，
+        各结构的命中率见 layout_stats()
 
-        except requests.RequestException as e:
-            logger.error(f"DuckDuckGo搜索请求失败: {e}")
-            return []
+        Args:
+            html_content: HTML内容
+            query: 原始搜索关键词
+
+        Returns:
+            解析后的搜索结果列表
+        """
+        try:
+            match = self.extractor.extract(
+                html_content,
+                query,
+                self.page_size,
+                accept=lambda raw: build_search_result(raw, query, self.name),
+            )
         except Exception as e:
-            logger.error(f"DuckDuckGo搜索解析失败: {e}")
+            logger.error(f"解析搜索结果失败: {e}")
             return []
 
+        if match.layout is None:
+            logger.warning(f"百度搜索结果页没有匹配的结构: {query}")
+        elif match.layout != BAIDU_LAYOUT_RULES[0].name:
+            logger.info(f"百度搜索结果使用 {match.layout} 结构解析")
+        logger.info(f"最终解析到 {len(match.results)} 个搜索结果")
+        return match.results
+
+    @classmethod
+    def layout_stats(cls) -> Dict:
+        """百度结果页各结构的命中统计"""
+        return cls.extractor.stats.snapshot()
+
+    def _build_suggest_request(self, query: str):
+        """构建搜索建议请求，返回 (请求URL, 请求参数)"""
+        return "https://www.baidu.com/sugrec", {
+            "prod": "pc",
+            "wd": query,
+            "cb": "callback",
+        }
+
+    def _parse_suggestions(self, content: str) -> List[str]:
+        """解析JSONP格式的搜索建议响应"""
+        match = re.search(r"callback\((.*)\)", content)
+
+        if match:
+            data = json.loads(match.group(1))
+            suggestions = data.get("g", [])
+            return [item.get("q", "") for item in suggestions if item.get("q")]
+
+        return []
+
+
+class PublicSearchService(HTTPSearchEngine):
+    """使用公开搜索API的服务"""
+
+    name = "duckduckgo"
+    display_name = "DuckDuckGo"
+    warmup_url = "https://html.duckduckgo.com/"
+    block_markers = ("anomaly-modal", "challenge-form")
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    }
+
+    def _build_search_request(self, query: str, num_results: int, offset: int = 0):
+        """构建搜索请求（offset 为翻页偏移量），返回 (请求URL, 请求参数)"""
+        params = {
+            "q": query,
+            "kl": "cn-zh",  # 中文结果
+        }
+        if offset:
+            params["s"] = offset
+        return "https://html.duckduckgo.com/html/", params
+
+    def _parse_search_response(
+        self, html_content: str, query: str, num_results: int
+    ) -> List[Dict]:
+        """解析搜索响应（同步和异步实现共用）"""
+        return self._parse_duckduckgo_results(html_content, query)
+
     def _parse_duckduckgo_results(self, html_content: str, query: str) -> List[Dict]:
         """
         解析DuckDuckGo搜索结果
@@ -769,13 +842,9 @@ class PublicSearchService:
         results = []
 
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # 查找搜索结果
-            result_containers = soup.find_all("div", class_="result")
-
-            for container in result_containers[:10]:
-                result = self._extract_duckduckgo_result(container, query)
+            # 只解析搜索结果容器
+            for raw in extract_results(html_content, DUCKDUCKGO_LAYOUT, self.page_size):
+                result = build_search_result(raw, query, self.name)
                 if result:
                     results.append(result)
 
@@ -786,94 +855,220 @@ class PublicSearchService:
 
         return results
 
-    def _extract_duckduckgo_result(self, container, query: str) -> Optional[Dict]:
+    def _build_suggest_request(self, query: str):
+        """构建搜索建议请求，返回 (请求URL, 请求参数)"""
+        params = {"q": query, "kl": "cn-zh", "callback": "callback"}
+        return "https://duckduckgo.com/ac/", params
+
+    def _parse_suggestions(self, content: str) -> List[str]:
+        """解析JSONP格式的搜索建议响应"""
+        match = re.search(r"callback\((.*)\)", content)
+
+        if match:
+            data = json.loads(match.group(1))
+            suggestions = []
+            for item in data:
+                if "phrase" in item:
+                    suggestions.append(item["phrase"])
+            return suggestions[:5]  # 限制建议数量
+
+        return []
+
+
+class SimpleSearchService(HTTPSearchEngine):
+    """简单的搜索服务，使用必应搜索"""
+
+    name = "bing"
+    display_name = "必应"
+    warmup_url = "https://cn.bing.com/"
+    block_markers = ("/captcha/", "b_captcha")
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    }
+
+    def _build_search_request(self, query: str, num_results: int, offset: int = 0):
+        """构建搜索请求（offset 为翻页偏移量），返回 (请求URL, 请求参数)"""
+        params = {
+            "q": query,
+            "ensearch": "0",  # 中文搜索
+        }
+        if offset:
+            params["first"] = offset + 1  # 必应的 first 从 1 开始
+        return "https://cn.bing.com/search", params
+
+    def _parse_search_response(
+        self, html_content: str, query: str, num_results: int
+    ) -> List[Dict]:
+        """解析搜索响应（同步和异步实现共用）"""
+        return self._parse_bing_results(html_content, query, num_results)
+
+    def _parse_bing_results(
+        self, html_content: str, query: str, num_results: int
+    ) -> List[Dict]:
         """
-        从DuckDuckGo结果容器中提取信息
+        解析必应搜索结果
 
         Args:
-            container: 搜索结果容器
+            html_content: HTML内容
             query: 搜索关键词
+            num_results: 结果数量
 
         Returns:
-            提取的结果信息
+            解析后的搜索结果列表
         """
+        results = []
+
         try:
-            # 查找标题和链接
-            title_elem = container.find("a", class_="result__a")
-            if not title_elem:
-                return None
-
-            title = title_elem.get_text(strip=True)
-            url = title_elem.get("href", "")
-
-            # 验证URL
-            if not url or not url.startswith("http"):
-                return None
-
-            # 过滤不合适的网站
-            if self._is_inappropriate_site(url):
-                return None
-
-            # 查找摘要
-            abstract_elem = container.find("a", class_="result__snippet")
-            abstract = (
-                abstract_elem.get_text(strip=True)
-                if abstract_elem
-                else f"关于 {query} 的相关信息"
-            )
+            # 只解析搜索结果容器
+            for raw in extract_results(html_content, BING_LAYOUT, num_results):
+                result = build_search_result(raw, query, self.name)
+                if result:
+                    results.append(result)
 
-            return {
-                "title": title,
-                "url": url,
-                "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
-                "source": "duckduckgo",
-            }
+            logger.info(f"解析到 {len(results)} 个搜索结果")
 
         except Exception as e:
-            logger.error(f"提取DuckDuckGo结果信息失败: {e}")
-            return None
+            logger.error(f"解析必应搜索结果失败: {e}")
+
+        return results
 
-    def _is_inappropriate_site(self, url: str) -> bool:
+    def _build_suggest_request(self, query: str):
+        """构建搜索建议请求，返回 (请求URL, 请求参数)"""
+        params = {
+            "qry": query,
+            "cvid": "1",
+            "IG": "1",
+            "IID": "1",
+            "type": "cb",
+        }
+        return "https://cn.bing.com/AS/Suggestions", params
+
+    def _parse_suggestions(self, content: str) -> List[str]:
+        """解析JSON格式的搜索建议响应"""
+        data = json.loads(content)
+        suggestions = []
+
+        if "Suggests" in data:
+            for item in data["Suggests"]:
+                if "Txt" in item:
+                    suggestions.append(item["Txt"])
+
+        return suggestions[:5]  # 限制建议数量
+
+
+# 可用的搜索引擎（名称 -> 引擎类）
+SEARCH_ENGINES = {
+    "bing": SimpleSearchService,
+    "baidu": BaiduSearchService,
+    "duckduckgo": PublicSearchService,
+    "mock": MockSearchService,
+    "synthetic": SyntheticSearchService,
+}
+
+# 元搜索默认配置，可通过 settings.SEARCH_METASEARCH 覆盖
+DEFAULT_METASEARCH = {
+    "ENGINES": ["bing", "baidu", "duckduckgo"],
+    "MAX_WORKERS": 8,  # 线程池大小（所有请求共享）
+    "DEADLINE": 6.0,  # 每次请求的截止时间（秒）
+    "EARLY_RETURN": True,  # 去重后结果已足够时不再等待较慢的引擎
+}
+
+_metasearch_executor = None
+_metasearch_executor_lock = threading.Lock()
+
+
+def get_metasearch_config() -> Dict:
+    """获取合并后的元搜索配置"""
+    config = dict(DEFAULT_METASEARCH)
+    config.update(getattr(settings, "SEARCH_METASEARCH", {}))
+    return config
+
+
+def get_metasearch_executor() -> ThreadPoolExecutor:
+    """获取元搜索共享线程池（懒加载，限制并发上限）"""
+    global _metasearch_executor
+    if _metasearch_executor is None:
+        with _metasearch_executor_lock:
+            if _metasearch_executor is None:
+                _metasearch_executor = ThreadPoolExecutor(
+                    max_workers=get_metasearch_config()["MAX_WORKERS"],
+                    thread_name_prefix="metasearch",
+                )
+    return _metasearch_executor
+
+
+def merge_results(result_lists: List[List[Dict]]) -> List[Dict]:
+    """
+    合并多个引擎的结果：按排名交替合并，并按规范化URL去重
+
+    Args:
+        result_lists: 各引擎的结果列表（按到达顺序）
+
+    Returns:
+        合并后的结果列表，重复结果会在 sources 中记录所有来源
+    """
+    merged = []
+    seen = {}
+
+    longest = max((len(results) for results in result_lists), default=0)
+    for rank in range(longest):
+        for results in result_lists:
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            key = canonical_url(result.get("url", ""))
+            source = result.get("source", "")
+            if key in seen:
+                sources = seen[key]["sources"]
+                if source and source not in sources:
+                    sources.append(source)
+                continue
+            result = dict(result)
+            result["sources"] = [source] if source else []
+            seen[key] = result
+            merged.append(result)
+
+    return merged
+
+
+class MetaSearchService:
+    """元搜索服务：并发查询多个引擎，在截止时间内合并已返回的结果"""
+
+    name = "meta"
+
+    def __init__(self, engines=None, deadline=None, early_return=None):
+        config = get_metasearch_config()
+        if engines is None:
+            engines = [SEARCH_ENGINES[name]() for name in config["ENGINES"]]
+        self.engines = engines
+        self.deadline = config["DEADLINE"] if deadline is None else deadline
+        self.early_return = (
+            config["EARLY_RETURN"] if early_return is None else early_return
+        )
+
+    def search(self, query: str, num_results: int = 10) -> List[Dict]:
         """
-        检查是否为不合适的网站
+        并发搜索所有引擎
 
         Args:
-            url: 网站URL
+            query: 搜索关键词
+            num_results: 返回结果数量
 
         Returns:
-            是否为不合适的网站
-        """
-        inappropriate_domains = [
-            "duckduckgo.com",
-            "google.com",
-            "youtube.com",
-            "facebook.com",
-            "twitter.com",
-            "instagram.com",
-            "tiktok.com",
-            "douyin.com",
-            "weibo.com",
-            "qq.com",
-            "wechat.com",
-            "taobao.com",
-            "tmall.com",
-            "jd.com",
-            "amazon.com",
-            "ebay.com",
-            "sina.com",
-            "sohu.com",
-            "163.com",
-            "126.com",
-            "mail.qq.com",
-            "mail.163.com",
-        ]
-
-        url_lower = url.lower()
-        return any(domain in url_lower for domain in inappropriate_domains)
+            合并去重后的搜索结果列表
+        """
+        result_lists = self._fan_out(
+            lambda engine: engine.search(query, num_results),
+            stop_when=lambda lists: self.early_return
+            and len(merge_results(lists)) >= num_results,
+        )
+        return merge_results(result_lists)
 
     def get_suggestions(self, query: str) -> List[str]:
         """
-        获取搜索建议（使用DuckDuckGo建议API）
+        并发获取搜索建议并去重
 
         Args:
             query: 搜索关键词
@@ -881,276 +1076,650 @@ class PublicSearchService:
         Returns:
             搜索建议列表
         """
-        try:
-            suggest_url = "https://duckduckgo.com/ac/"
-            params = {"q": query, "kl": "cn-zh", "callback": "callback"}
+        suggestion_lists = self._fan_out(
+            lambda engine: engine.get_suggestions(query),
+            stop_when=lambda lists: any(lists),
+        )
+        suggestions = []
+        for suggestion_list in suggestion_lists:
+            for suggestion in suggestion_list:
+                if suggestion not in suggestions:
+                    suggestions.append(suggestion)
+        return suggestions
+
+    def _fan_out(self, call, stop_when) -> List[List]:
+        """
+        在共享线程池中并发调用所有引擎，截止时间到达后返回已完成的结果
 
-            response = self.session.get(suggest_url, params=params, timeout=5)
-            response.raise_for_status()
+        Args:
+            call: 对单个引擎执行的调用
+            stop_when: 根据已到达结果判断是否可以提前返回
 
-            # 解析JSONP响应
-            content = response.text
-            match = re.search(r"callback\((.*)\)", content)
+        Returns:
+            按到达顺序排列的各引擎结果
+        """
+        executor = get_metasearch_executor()
+        started = time.monotonic()
+        futures = {submit(executor, call, engine): engine for engine in self.engines}
+        arrived = []
 
-            if match:
-                data = json.loads(match.group(1))
-                suggestions = []
-                for item in data:
-                    if "phrase" in item:
-                        suggestions.append(item["phrase"])
-                return suggestions[:5]  # 限制建议数量
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                engine = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"元搜索引擎 {engine.name} 调用失败: {e}")
+                    continue
+                logger.info(
+                    f"元搜索引擎 {engine.name} 返回 {len(results)} 条，"
+                    f"耗时 {time.monotonic() - started:.2f}s"
+                )
+                if results:
+                    arrived.append(results)
+                if stop_when(arrived):
+                    break
+        except TimeoutError:
+            pending = [futures[f].name for f in futures if not f.done()]
+            logger.warning(f"元搜索截止时间已到，未返回的引擎: {pending}")
 
-        except Exception as e:
-            logger.error(f"获取DuckDuckGo搜索建议失败: {e}")
+        for future in futures:
+            future.cancel()
 
-        return []
+        return arrived
 
 
-class SimpleSearchService:
-    """简单的搜索服务，使用必应搜索"""
+class AdaptiveSearchService:
+    """
+    自适应搜索服务：根据实时健康数据选择引擎
 
-    def __init__(self):
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+    - 优先使用延迟低、错误率低的引擎，熔断中的引擎被跳过
+    - 主引擎超过其观测 p95 仍未返回时，向次优引擎发出对冲请求，先返回者胜出
+    - 引擎调用失败（包括被限流、返回验证页面）时立即切换到下一个引擎；
+      正常返回的空结果直接作为搜索结果，不计为失败
+    """
+
+    name = "adaptive"
+
+    def __init__(self, engines=None, registry=None, deadline=None):
+        config = get_adaptive_config()
+        if engines is None:
+            engines = [SEARCH_ENGINES[name]() for name in config["ENGINES"]]
+        self.engines = engines
+        self.registry = registry or engine_health
+        self.deadline = config["DEADLINE"] if deadline is None else deadline
 
     def search(self, query: str, num_results: int = 10) -> List[Dict]:
         """
-        使用必应搜索
+        搜索（带对冲和故障切换）
 
         Args:
             query: 搜索关键词
             num_results: 返回结果数量
 
         Returns:
-            搜索结果列表
+            最先成功返回的引擎的搜索结果
         """
+        candidates = self.registry.rank(self.engines)
+        if not candidates:
+            logger.warning("所有搜索引擎均处于熔断状态")
+            return []
+
+        executor = get_metasearch_executor()
+        deadline = time.monotonic() + self.deadline
+        futures = {}
+        hedge_at = None
+
+        def launch():
+            # 启动下一个可用的候选引擎，返回下次对冲的时间点
+            while candidates:
+                engine = candidates.pop(0)
+                health = self.registry.get(engine.name)
+                if not health.begin_request():
+                    continue
+                future = submit(
+                    executor, self._timed_search, engine, health, query, num_results
+                )
+                futures[future] = engine
+                return time.monotonic() + health.hedge_delay()
+            return None
+
+        hedge_at = launch()
         try:
-            # 使用必应搜索
-            search_url = "https://cn.bing.com/search"
-            params = {
-                "q": query,
-                "ensearch": "0",  # 中文搜索
-            }
+            while futures:
+                now = time.monotonic()
+                if now >= deadline:
+                    logger.warning(
+                        f"自适应搜索截止时间已到，未返回的引擎: "
+                        f"{[engine.name for engine in futures.values()]}"
+                    )
+                    break
+                timeout = deadline - now
+                if hedge_at is not None:
+                    timeout = min(timeout, max(0.0, hedge_at - now))
+
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        logger.info(
+                            f"搜索引擎 {[e.name for e in futures.values()]} "
+                            f"响应慢，发出对冲请求"
+                        )
+                        hedge_at = launch()
+                    continue
 
-            response = self.session.get(search_url, params=params, timeout=15)
-            response.raise_for_status()
-            response.encoding = "utf-8"
+                for future in done:
+                    futures.pop(future)
+                    results = future.result()
+                    if results is not None:
+                        return results
+
+                # 引擎调用失败，立即切换
+                hedge_at = launch()
+        finally:
+            # 已在执行的请求无法中断，它们结束后仍会记录健康数据；
+            # 尚未开始的请求被取消时需要释放探测名额
+            for future, engine in futures.items():
+                if future.cancel():
+                    self.registry.get(engine.name).cancel_request()
 
-            logger.info(f"必应搜索请求成功: {query}")
+        return []
 
-            # 解析搜索结果
-            return self._parse_bing_results(response.text, query, num_results)
+    def _timed_search(self, engine, health, query: str, num_results: int):
+        """
+        调用引擎并记录耗时和结果
 
-        except requests.RequestException as e:
-            logger.error(f"必应搜索请求失败: {e}")
-            return []
+        验证页面由 _check_blocked 抛出异常，正常返回的空结果页计为成功
+        （冷门查询确实没有结果时不应触发熔断）
+
+        Returns:
+            搜索结果列表，调用失败时返回 None
+        """
+        fetch = getattr(engine, "fetch_results", engine.search)
+        started = time.monotonic()
+        try:
+            results = fetch(query, num_results)
+        except EngineRateLimited as e:
+            # 请求没有发出，不计入健康统计，直接切换到下一个引擎
+            health.cancel_request()
+            logger.warning(str(e))
+            return None
         except Exception as e:
-            logger.error(f"必应搜索解析失败: {e}")
-            return []
+            health.record_failure(time.monotonic() - started)
+            logger.error(f"搜索引擎 {engine.name} 调用失败: {e}")
+            return None
 
-    def _parse_bing_results(
-        self, html_content: str, query: str, num_results: int
-    ) -> List[Dict]:
+        health.record_success(time.monotonic() - started)
+        return results
+
+    def get_suggestions(self, query: str) -> List[str]:
         """
-        解析必应搜索结果
+        获取搜索建议（依次尝试健康的引擎）
 
         Args:
-            html_content: HTML内容
             query: 搜索关键词
-            num_results: 结果数量
 
         Returns:
-            解析后的搜索结果列表
+            搜索建议列表
         """
-        results = []
+        for engine in self.registry.rank(self.engines):
+            suggestions = engine.get_suggestions(query)
+            if suggestions:
+                return suggestions
+        return []
 
-        try:
-            soup = BeautifulSoup(html_content, "html.parser")
+    def engine_stats(self) -> List[Dict]:
+        """各引擎的健康状态"""
+        return [self.registry.get(engine.name).snapshot() for engine in self.engines]
 
-            # 查找搜索结果
-            result_containers = soup.find_all("li", class_="b_algo")
 
-            for container in result_containers[:num_results]:
-                result = self._extract_bing_result(container, query)
-                if result:
-                    results.append(result)
+def make_search_engine(backend: str):
+    """
+    根据后端名称创建搜索引擎
 
-            logger.info(f"解析到 {len(results)} 个搜索结果")
+    Args:
+        backend: "adaptive"、"meta" 或 SEARCH_ENGINES 中的引擎名称
 
-        except Exception as e:
-            logger.error(f"解析必应搜索结果失败: {e}")
+    Returns:
+        搜索引擎实例
+    """
+    if backend == AdaptiveSearchService.name:
+        return AdaptiveSearchService()
+    if backend == MetaSearchService.name:
+        return MetaSearchService()
+    return SEARCH_ENGINES[backend]()
 
-        return results
 
-    def _extract_bing_result(self, container, query: str) -> Optional[Dict]:
+class SearchService:
+    """搜索服务主类"""
+
+    def __init__(
+        self,
+        use_mock=False,
+        use_simple_search=False,
+        use_cache=True,
+        use_meta_search=False,
+        backend=None,
+    ):
+        if backend is None and not (use_mock or use_simple_search or use_meta_search):
+            # 未指定旧的引擎开关时，由配置决定（默认根据健康数据自适应选择引擎）
+            backend = getattr(settings, "SEARCH_BACKEND", AdaptiveSearchService.name)
+
+        if backend is not None:
+            self.search_engine = make_search_engine(backend)
+        elif use_meta_search:
+            self.search_engine = MetaSearchService()
+        elif use_mock:
+            self.search_engine = MockSearchService()
+        else:
+            self.search_engine = SimpleSearchService()
+
+        # 搜索结果缓存（进程内LRU + 共享缓存）
+        self.result_cache = SearchResultCache() if use_cache else None
+
+        # 相同查询的并发请求只向搜索引擎发送一次
+        self.flight = SingleFlight()
+
+        # 异步引擎（懒加载，随 search_engine 变化而重建）
+        self._async_engine = None
+        self._async_engine_source = None
+
+    @property
+    def result_store(self):
+        """持久化的搜索结果存储（仅在启用缓存且配置了 SEARCH_STORE 时可用）"""
+        if self.result_cache is None:
+            return None
+        return get_search_store()
+
+    @property
+    def async_engine(self):
+        """当前搜索引擎对应的异步实现"""
+        if self._async_engine_source is not self.search_engine:
+            from PatentMS.async_search_service import make_async_engine
+
+            self._async_engine = make_async_engine(self.search_engine)
+            self._async_engine_source = self.search_engine
+        return self._async_engine
+
+    def search_pages(
+        self, query: str, category_name: str = "", num_results: int = 10
+    ) -> List[Dict]:
         """
-        从必应结果容器中提取信息
+        搜索相关页面
 
         Args:
-            container: 搜索结果容器
             query: 搜索关键词
+            category_name: 分类名称（用于优化搜索）
+            num_results: 返回结果数量
 
         Returns:
-            提取的结果信息
+            搜索结果列表
         """
-        try:
-            # 查找标题和链接
-            title_elem = container.find("h2")
-            if not title_elem:
-                return None
-
-            title_link = title_elem.find("a")
-            if not title_link:
-                return None
-
-            title = title_link.get_text(strip=True)
-            url = title_link.get("href", "")
-
-            # 验证URL
-            if not url or not url.startswith("http"):
-                return None
-
-            # 过滤不合适的网站
-            if self._is_inappropriate_site(url):
-                return None
-
-            # 查找摘要
-            abstract_elem = container.find("p")
-            abstract = (
-                abstract_elem.get_text(strip=True)
-                if abstract_elem
-                else f"关于 {query} 的相关信息"
+        backend = self.search_engine.name
+        with search_metrics.span("search", backend) as span:
+            # 优化搜索关键词
+            with search_metrics.span("optimize", backend):
+                optimized_query = self._optimize_query(query, category_name)
+
+            def compute():
+                return self._search_and_filter(
+                    optimized_query, query, category_name, num_results
+                )
+
+            flight_key = make_flight_key(
+                "search", backend, optimized_query, category_name, num_results
             )
 
-            return {
-                "title": title,
-                "url": url,
-                "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
-                "source": "bing",
-            }
-
-        except Exception as e:
-            logger.error(f"提取必应结果信息失败: {e}")
-            return None
-
-    def _is_inappropriate_site(self, url: str) -> bool:
+            if self.result_cache is None:
+                results = self.flight.do(flight_key, compute)
+            else:
+                # 结果缓存已通过重算锁跨进程合并，这里只需合并进程内的并发请求
+                cache_key = self.result_cache.make_key(
+                    backend, optimized_query, category_name, num_results
+                )
+                results = self.flight.do(
+                    flight_key,
+                    lambda: self.result_cache.get_or_compute(
+                        cache_key, compute, backend
+                    ),
+                    lease=False,
+                )
+            span.results = len(results)
+        return [dict(result) for result in results]
+
+    def refresh_pages(
+        self, query: str, category_name: str = "", num_results: int = 10
+    ) -> Optional[Dict]:
         """
-        检查是否为不合适的网站
+        立即重新搜索并写入缓存（预热用，不计入持久化存储的命中次数）
 
         Args:
-            url: 网站URL
+            query: 搜索关键词
+            category_name: 分类名称
+            num_results: 返回结果数量
 
         Returns:
-            是否为不合适的网站
-        """
-        inappropriate_domains = [
-            "bing.com",
-            "google.com",
-            "youtube.com",
-            "facebook.com",
-            "twitter.com",
-            "instagram.com",
-            "tiktok.com",
-            "douyin.com",
-            "weibo.com",
-            "qq.com",
-            "wechat.com",
-            "taobao.com",
-            "tmall.com",
-            "jd.com",
-            "amazon.com",
-            "ebay.com",
-            "sina.com",
-            "sohu.com",
-            "163.com",
-            "126.com",
-            "mail.qq.com",
-            "mail.163.com",
-        ]
-
-        url_lower = url.lower()
-        return any(domain in url_lower for domain in inappropriate_domains)
-
-    def get_suggestions(self, query: str) -> List[str]:
+            写入的缓存条目；未启用缓存或其他调用者正在重算时返回 None
         """
-        获取搜索建议
+        if self.result_cache is None:
+            return None
+        optimized_query = self._optimize_query(query, category_name)
+        return self.result_cache.refresh(
+            self.pages_cache_key(query, category_name, num_results),
+            lambda: self._search_and_filter(
+                optimized_query, query, category_name, num_results, hits=0
+            ),
+            self.search_engine.name,
+        )
+
+    def pages_cache_key(
+        self, query: str, category_name: str = "", num_results: int = 10
+    ) -> str:
+        """search_pages 使用的缓存键"""
+        return self.result_cache.make_key(
+            self.search_engine.name,
+            self._optimize_query(query, category_name),
+            category_name,
+            num_results,
+        )
+
+    async def asearch_pages(
+        self, query: str, category_name: str = "", num_results: int = 10
+    ) -> List[Dict]:
+        """
+        搜索相关页面（异步版本，供 ASGI 异步视图使用）
 
         Args:
             query: 搜索关键词
+            category_name: 分类名称（用于优化搜索）
+            num_results: 返回结果数量
 
         Returns:
-            搜索建议列表
+            搜索结果列表
         """
-        try:
-            suggest_url = "https://cn.bing.com/AS/Suggestions"
-            params = {
-                "qry": query,
-                "cvid": "1",
-                "IG": "1",
-                "IID": "1",
-                "type": "cb",
-            }
+        backend = self.search_engine.name
+        with search_metrics.span("search", backend) as span:
+            with search_metrics.span("optimize", backend):
+                optimized_query = self._optimize_query(query, category_name)
+
+            async def acompute():
+                engine = self.async_engine
+                results = await engine.search(optimized_query, num_results)
+                filtered_results = self._filter_results(results, query, category_name)
+
+                plan = self._refill_plan(engine, results, filtered_results, num_results)
+                if plan is not None:
+                    offset, pages = plan
+                    pool = PagePool(results)
+                    page_stream = engine.iter_pages(optimized_query, pages, offset)
+                    async with aclosing(page_stream):
+                        async for _, page in page_stream:
+                            if pool.add(page):
+                                filtered_results = self._filter_results(
+                                    pool.results, query, category_name
+                                )
+                            if len(filtered_results) >= num_results:
+                                break
+                    results = pool.results
+                search_metrics.drop(
+                    engine.name, DROP_RELEVANCE, len(results) - len(filtered_results)
+                )
+
+                return await self._apersist_or_fallback(
+                    optimized_query,
+                    query,
+                    category_name,
+                    num_results,
+                    filtered_results[:num_results],
+                )
+
+            flight_key = make_flight_key(
+                "search", backend, optimized_query, category_name, num_results
+            )
 
-            response = self.session.get(suggest_url, params=params, timeout=5)
-            response.raise_for_status()
+            if self.result_cache is None:
+                results = await self.flight.ado(flight_key, acompute)
+            else:
 
-            # 解析JSON响应
-            data = response.json()
-            suggestions = []
+                def refresh():
+                    return self._search_and_filter(
+                        optimized_query, query, category_name, num_results
+                    )
 
-            if "Suggests" in data:
-                for item in data["Suggests"]:
-                    if "Txt" in item:
-                        suggestions.append(item["Txt"])
+                cache_key = self.result_cache.make_key(
+                    backend, optimized_query, category_name, num_results
+                )
+                results = await self.flight.ado(
+                    flight_key,
+                    lambda: self.result_cache.aget_or_compute(
+                        cache_key, acompute, backend, refresh
+                    ),
+                    lease=False,
+                )
+            span.results = len(results)
+        return [dict(result) for result in results]
+
+    async def astream_pages(
+        self, query: str, category_name: str = "", num_results: int = 10
+    ) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """
+        以流的形式搜索相关页面：每个引擎返回并过滤后立即产出一批结果
 
-            return suggestions[:5]  # 限制建议数量
+        命中缓存时一次产出全部缓存结果；未命中时流结束后把所有批次写入缓存
 
-        except Exception as e:
-            logger.error(f"获取必应搜索建议失败: {e}")
+        Args:
+            query: 搜索关键词
+            category_name: 分类名称（用于优化搜索）
+            num_results: 返回结果数量
 
-        return []
+        Yields:
+            (结果来源, 本批结果)，跨批次按规范化URL去重，总数不超过 num_results
+        """
+        from PatentMS.async_search_service import stream_search
 
+        optimized_query = self._optimize_query(query, category_name)
+        backend = self.search_engine.name
 
-class SearchService:
-    """搜索服务主类"""
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(
+                backend, optimized_query, category_name, num_results
+            )
 
-    def __init__(self, use_mock=False, use_simple_search=False):
-        if use_mock:
-            self.search_engine = MockSearchService()
-        elif use_simple_search:
-            self.search_engine = SimpleSearchService()
-        else:
-            self.search_engine = BaiduSearchService()
+            def refresh():
+                return self._search_and_filter(
+                    optimized_query, query, category_name, num_results
+                )
 
-    def search_pages(
-        self, query: str, category_name: str = "", num_results: int = 10
+            entry = await self.result_cache.aget_and_revalidate(
+                cache_key, refresh, backend
+            )
+            if entry is not None:
+                yield "cache", [dict(result) for result in entry["results"]]
+                return
+
+        emitted = []
+        seen = set()
+        async for source, results in stream_search(
+            self.async_engine, optimized_query, num_results
+        ):
+            batch = []
+            filtered_results = self._filter_results(results, query, category_name)
+            search_metrics.drop(
+                source, DROP_RELEVANCE, len(results) - len(filtered_results)
+            )
+            for result in filtered_results:
+                if len(emitted) + len(batch) >= num_results:
+                    break
+                key = canonical_url(result.get("url", ""))
+                if key not in seen:
+                    seen.add(key)
+                    batch.append(result)
+            if batch:
+                emitted.extend(batch)
+                yield source, [dict(result) for result in batch]
+            if len(emitted) >= num_results:
+                break
+
+        persisted = await self._apersist_or_fallback(
+            optimized_query, query, category_name, num_results, emitted
+        )
+        if not emitted and persisted:
+            # 所有引擎都没有返回结果，使用持久化存储中最后一次成功的结果
+            yield "store", [dict(result) for result in persisted]
+
+        if cache_key is not None:
+            await self.result_cache.aset(cache_key, persisted, backend)
+
+    def _search_and_filter(
+        self,
+        optimized_query: str,
+        query: str,
+        category_name: str,
+        num_results: int,
+        hits: int = 1,
     ) -> List[Dict]:
         """
-        搜索相关页面
+        执行实际搜索并过滤结果（不经过缓存）
 
         Args:
-            query: 搜索关键词
-            category_name: 分类名称（用于优化搜索）
+            optimized_query: 优化后的查询
+            query: 原始搜索关键词
+            category_name: 分类名称
             num_results: 返回结果数量
+            hits: 计入持久化存储的命中次数
 
         Returns:
             搜索结果列表
         """
-        # 优化搜索关键词
-        optimized_query = self._optimize_query(query, category_name)
-
         # 执行搜索
         results = self.search_engine.search(optimized_query, num_results)
 
         # 过滤和排序结果
         filtered_results = self._filter_results(results, query, category_name)
 
-        return filtered_results[:num_results]
+        plan = self._refill_plan(
+            self.search_engine, results, filtered_results, num_results
+        )
+        if plan is not None:
+            # 过滤后结果不足，请求后续结果页，每页到达后立即与已有结果一起过滤
+            offset, pages = plan
+            pool = PagePool(results)
+            for _, page in self.search_engine.iter_pages(
+                optimized_query, pages, offset
+            ):
+                if pool.add(page):
+                    filtered_results = self._filter_results(
+                        pool.results, query, category_name
+                    )
+                if len(filtered_results) >= num_results:
+                    break
+            results = pool.results
+        search_metrics.drop(
+            self.search_engine.name,
+            DROP_RELEVANCE,
+            len(results) - len(filtered_results),
+        )
+
+        return self._persist_or_fallback(
+            optimized_query,
+            query,
+            category_name,
+            num_results,
+            filtered_results[:num_results],
+            hits,
+        )
+
+    @staticmethod
+    def _refill_plan(
+        engine, results: List[Dict], filtered_results: List[Dict], num_results: int
+    ) -> Optional[Tuple[int, int]]:
+        """
+        过滤后结果不足时，计算需要补充请求的结果页
+
+        只有支持翻页的单个引擎可以补充；补充的页数按缺少的结果数计算，
+        与第一次请求的页数合计不超过 MAX_PAGES
+
+        Args:
+            engine: 搜索引擎
+            results: 第一次请求的原始结果
+            filtered_results: 过滤后的结果
+            num_results: 需要的结果数量
+
+        Returns:
+            (补充请求的起始偏移量, 页数)，不需要或不能补充时返回 None
+        """
+        if (
+            not results
+            or len(filtered_results) >= num_results
+            or not hasattr(engine, "iter_pages")
+        ):
+            return None
+        max_pages = get_pagination_config()["MAX_PAGES"]
+        fetched = plan_pages(num_results, engine.page_size, max_pages)
+        if fetched >= max_pages:
+            return None
+        pages = plan_pages(
+            num_results - len(filtered_results), engine.page_size, max_pages - fetched
+        )
+        return fetched * engine.page_size, pages
+
+    def _persist_or_fallback(
+        self,
+        optimized_query: str,
+        query: str,
+        category_name: str,
+        num_results: int,
+        results: List[Dict],
+        hits: int = 1,
+    ) -> List[Dict]:
+        """
+        把成功的搜索结果写入持久化存储；没有结果时（通常是所有引擎都不可用）
+        返回存储中最后一次成功的结果（降级模式，结果带 degraded 标记）
+
+        Args:
+            optimized_query: 优化后的查询
+            query: 原始搜索关键词
+            category_name: 分类名称
+            num_results: 结果数量
+            results: 本次搜索的结果
+            hits: 计入的命中次数
+
+        Returns:
+            本次结果，或降级使用的历史结果
+        """
+        store = self.result_store
+        if store is None:
+            return results
+
+        key = self.result_cache.make_key(
+            self.search_engine.name, optimized_query, category_name, num_results
+        )
+        try:
+            if results:
+                store.put(
+                    key, self.search_engine.name, query, category_name, results, hits
+                )
+                return results
+            stored = store.get(key)
+        except sqlite3.Error as e:
+            logger.error(f"搜索结果存储读写失败: {e}")
+            return results
+
+        if stored is None:
+            return results
+        logger.warning(
+            f"搜索引擎没有返回结果，使用 {time.ctime(stored.created_at)} 的历史结果: {query}"
+        )
+        return [dict(result, degraded=True) for result in stored.results]
+
+    async def _apersist_or_fallback(self, *args) -> List[Dict]:
+        """_persist_or_fallback 的异步版本（SQLite 读写在线程池中执行）"""
+        if self.result_store is None:
+            return args[-1]
+        return await sync_to_async(self._persist_or_fallback, thread_sensitive=False)(
+            *args
+        )
 
     def _optimize_query(self, query: str, category_name: str) -> str:
         """
@@ -1198,56 +1767,34 @@ class SearchService:
             category_name: 分类名称
 
         Returns:
-            过滤后的结果
+            过滤后的结果（按 relevance_score 降序）
         """
-        filtered_results = []
-
-        for result in results:
-            # 检查标题相关性
-            title = result.get("title", "").lower()
-            query_lower = query.lower()
-            category_lower = category_name.lower()
-
-            # 计算相关性分数
-            relevance_score = 0
-
-            # 标题包含查询关键词
-            if query_lower in title:
-                relevance_score += 3
-
-            # 标题包含分类关键词
-            if category_lower in title:
-                relevance_score += 2
-
-            # 检查是否为教程、文档等教育类内容
-            educational_keywords = [
-                "教程",
-                "文档",
-                "学习",
-                "指南",
-                "手册",
-                "参考",
-                "api",
-                "开发",
-                "入门",
-                "基础",
-            ]
-            if any(keyword in title for keyword in educational_keywords):
-                relevance_score += 1
+        # 按标题和摘要的 BM25 分数排序，并过滤不相关的结果
+        with search_metrics.span("filter", self.search_engine.name) as span:
+            results = RelevanceScorer(query, category_name).score_results(results)
+            span.results = len(results)
+        return results
 
-            # 过滤低相关性结果
-            if relevance_score > 0:
-                result["relevance_score"] = relevance_score
-                filtered_results.append(result)
+    def get_suggestions(self, query: str) -> List[str]:
+        """
+        获取搜索建议
 
-        # 按相关性排序
-        filtered_results.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
+        Args:
+            query: 搜索关键词
 
-        return filtered_results
+        Returns:
+            搜索建议列表
+        """
+        flight_key = make_flight_key("suggest", self.search_engine.name, query)
+        return list(
+            self.flight.do(
+                flight_key, lambda: self.search_engine.get_suggestions(query)
+            )
+        )
 
-    def get_suggestions(self, query: str) -> List[str]:
+    async def aget_suggestions(self, query: str) -> List[str]:
         """
-        获取搜索建议
+        获取搜索建议（异步版本）
 
         Args:
             query: 搜索关键词
@@ -1255,8 +1802,33 @@ class SearchService:
         Returns:
             搜索建议列表
         """
-        return self.search_engine.get_suggestions(query)
+        flight_key = make_flight_key("suggest", self.search_engine.name, query)
+        return list(
+            await self.flight.ado(
+                flight_key, lambda: self.async_engine.get_suggestions(query)
+            )
+        )
+
+    def engine_stats(self) -> List[Dict]:
+        """
+        当前搜索引擎的健康状态（仅自适应搜索有统计数据）
+
+        Returns:
+            各引擎的健康状态列表
+        """
+        if isinstance(self.search_engine, AdaptiveSearchService):
+            return self.search_engine.engine_stats()
+        return []
+
+    def rate_limit_stats(self) -> List[Dict]:
+        """
+        各搜索引擎主机的限流统计
+
+        Returns:
+            每个主机的请求数、排队和放弃次数、等待时间分位数（秒）
+        """
+        return rate_limiter.snapshot()
 
 
-# 全局搜索服务实例（使用Bing搜索，更稳定可靠）
-search_service = SearchService(use_mock=False, use_simple_search=True)
+# 全局搜索服务实例（引擎由 settings.SEARCH_BACKEND 决定）
+search_service = SearchService()
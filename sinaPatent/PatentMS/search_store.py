@@ -0,0 +1,350 @@
+"""
+搜索结果持久化存储模块
+把搜索结果保存到独立的 SQLite 文件（与业务数据库分开，不参与迁移），用于：
+启动时把最热门的查询预热到缓存、所有搜索引擎都不可用时返回最后一次成功的结果
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_STORE 覆盖
+DEFAULT_SEARCH_STORE = {
+    "ENABLED": False,
+    "PATH": "",  # SQLite 文件路径
+    "RETENTION": 7 * 24 * 3600,  # 结果保留时间（秒），超过后在压缩时删除
+    "MAX_ENTRIES": 20000,  # 最多保留的查询数，超过时删除最冷门的
+    "WARM_ENTRIES": 200,  # 启动时预热到缓存的热门查询数
+    "COMPACT_INTERVAL": 3600,  # 自动压缩的最小间隔（秒）
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_results (
+    key TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    query TEXT NOT NULL,
+    category TEXT NOT NULL,
+    results BLOB NOT NULL,
+    result_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS search_results_created_at ON search_results (created_at);
+CREATE INDEX IF NOT EXISTS search_results_hits ON search_results (hits);
+"""
+
+
+def get_search_store_config() -> Dict:
+    """获取合并后的持久化存储配置"""
+    config = dict(DEFAULT_SEARCH_STORE)
+    config.update(getattr(settings, "SEARCH_STORE", {}))
+    return config
+
+
+class StoredResults(NamedTuple):
+    """一条持久化的搜索结果"""
+
+    key: str  # 缓存键（包含搜索后端、查询、分类和结果数量）
+    backend: str
+    query: str  # 原始搜索关键词
+    category: str  # 分类名称
+    results: List[Dict]
+    created_at: float  # 搜索时间（时间戳）
+    hits: int  # 写入和命中次数，用于选出热门查询
+
+
+def _encode(results: List[Dict]) -> bytes:
+    return zlib.compress(
+        json.dumps(results, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+
+
+def _decode(blob: bytes) -> List[Dict]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SearchStore:
+    """基于 SQLite 的搜索结果存储（每个线程一个连接，WAL 模式支持多进程读写）"""
+
+    def __init__(self, path: str, config: Optional[Dict] = None):
+        self.path = path
+        self.config = config or get_search_store_config()
+        self._local = threading.local()
+        self._last_compact = time.monotonic()
+        self._compact_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def put(
+        self,
+        key: str,
+        backend: str,
+        query: str,
+        category: str,
+        results: List[Dict],
+        hits: int = 1,
+    ):
+        """
+        保存一次搜索的结果（同一个键只保留最新一次，累计命中次数）
+
+        Args:
+            key: 缓存键
+            backend: 搜索后端名称
+            query: 原始搜索关键词
+            category: 分类名称
+            results: 搜索结果（空结果不保存，避免覆盖最后一次成功的结果）
+            hits: 本次累计的命中次数
+        """
+        if not results:
+            return
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT INTO search_results "
+                "(key, backend, query, category, results, result_count, "
+                "created_at, hits) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET backend = excluded.backend, "
+                "query = excluded.query, category = excluded.category, "
+                "results = excluded.results, "
+                "result_count = excluded.result_count, "
+                "created_at = excluded.created_at, hits = hits + excluded.hits",
+                (
+                    key,
+                    backend,
+                    query,
+                    category,
+                    _encode(results),
+                    len(results),
+                    time.time(),
+                    hits,
+                ),
+            )
+        self._maybe_compact()
+
+    def get(self, key: str) -> Optional[StoredResults]:
+        """
+        读取指定键最后一次成功的结果（超过保留时间的结果不返回）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            StoredResults，不存在时返回 None
+        """
+        row = (
+            self._connect()
+            .execute(
+                "SELECT key, backend, query, category, results, created_at, hits "
+                "FROM search_results WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.config["RETENTION"]),
+            )
+            .fetchone()
+        )
+        return self._row_to_results(row) if row else None
+
+    def hottest(self, limit: int) -> List[StoredResults]:
+        """
+        命中次数最多的结果（用于启动预热）
+
+        Args:
+            limit: 数量
+
+        Returns:
+            按命中次数降序的结果列表
+        """
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT key, backend, query, category, results, created_at, hits "
+                "FROM search_results WHERE created_at >= ? "
+                "ORDER BY hits DESC, created_at DESC LIMIT ?",
+                (time.time() - self.config["RETENTION"], limit),
+            )
+            .fetchall()
+        )
+        return [self._row_to_results(row) for row in rows]
+
+    def popular_queries(self, limit: int) -> List[Tuple[str, str, int]]:
+        """
+        按查询和分类合计命中次数最多的搜索（不区分搜索后端和结果数量）
+
+        Args:
+            limit: 数量
+
+        Returns:
+            [(原始搜索关键词, 分类名称, 命中次数)]，按命中次数降序
+        """
+        return (
+            self._connect()
+            .execute(
+                "SELECT query, category, SUM(hits) AS total FROM search_results "
+                "WHERE created_at >= ? GROUP BY query, category "
+                "ORDER BY total DESC LIMIT ?",
+                (time.time() - self.config["RETENTION"], limit),
+            )
+            .fetchall()
+        )
+
+    def compact(self, vacuum: bool = False) -> int:
+        """
+        压缩存储：删除超过保留时间的结果，条目过多时删除最冷门的
+
+        Args:
+            vacuum: 是否整理数据库文件以回收磁盘空间
+
+        Returns:
+            删除的条目数
+        """
+        connection = self._connect()
+        with connection:
+            deleted = connection.execute(
+                "DELETE FROM search_results WHERE created_at < ?",
+                (time.time() - self.config["RETENTION"],),
+            ).rowcount
+            deleted += connection.execute(
+                "DELETE FROM search_results WHERE key IN ("
+                "SELECT key FROM search_results "
+                "ORDER BY hits DESC, created_at DESC LIMIT -1 OFFSET ?)",
+                (self.config["MAX_ENTRIES"],),
+            ).rowcount
+        if vacuum:
+            connection.execute("VACUUM")
+        self._last_compact = time.monotonic()
+        if deleted:
+            logger.info(f"搜索结果存储压缩完成，删除 {deleted} 条")
+        return deleted
+
+    def _maybe_compact(self):
+        """距离上次压缩超过 COMPACT_INTERVAL 时自动压缩（只有一个线程执行）"""
+        if time.monotonic() - self._last_compact < self.config["COMPACT_INTERVAL"]:
+            return
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            self.compact()
+        except sqlite3.Error as e:
+            logger.error(f"搜索结果存储压缩失败: {e}")
+        finally:
+            self._compact_lock.release()
+
+    def stats(self) -> Dict:
+        """存储统计：条目数、结果总数、最早和最新的搜索时间、文件大小"""
+        count, results, oldest, newest = (
+            self._connect()
+            .execute(
+                "SELECT COUNT(*), COALESCE(SUM(result_count), 0), "
+                "MIN(created_at), MAX(created_at) FROM search_results"
+            )
+            .fetchone()
+        )
+        return {
+            "path": self.path,
+            "entries": count,
+            "results": results,
+            "oldest": oldest,
+            "newest": newest,
+            "size": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+    def clear(self):
+        """删除所有条目"""
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM search_results")
+
+    def close(self):
+        """关闭当前线程的连接"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    @staticmethod
+    def _row_to_results(row) -> StoredResults:
+        key, backend, query, category, blob, created_at, hits = row
+        return StoredResults(
+            key, backend, query, category, _decode(blob), created_at, hits
+        )
+
+
+_search_store = None
+_search_store_lock = threading.Lock()
+
+
+def get_search_store() -> Optional[SearchStore]:
+    """
+    获取全局搜索结果存储
+
+    Returns:
+        SearchStore 实例，未启用时返回 None
+    """
+    global _search_store
+    config = get_search_store_config()
+    if not config["ENABLED"] or not config["PATH"]:
+        return None
+    if _search_store is None or _search_store.path != config["PATH"]:
+        with _search_store_lock:
+            if _search_store is None or _search_store.path != config["PATH"]:
+                _search_store = SearchStore(config["PATH"], config)
+    return _search_store
+
+
+def warm_cache(result_cache, store: SearchStore, limit: int) -> int:
+    """
+    把存储中最热门的结果载入缓存
+
+    Args:
+        result_cache: SearchResultCache 实例
+        store: 搜索结果存储
+        limit: 载入的条目数
+
+    Returns:
+        载入的条目数
+    """
+    started = time.monotonic()
+    entries = store.hottest(limit)
+    for entry in entries:
+        result_cache.load(entry.key, entry.results, entry.backend, entry.created_at)
+    logger.info(
+        f"已从搜索结果存储预热 {len(entries)} 条缓存，"
+        f"耗时 {time.monotonic() - started:.3f}s"
+    )
+    return len(entries)
+
+
+def start_warm_cache(result_cache):
+    """启动时在后台线程中预热缓存（存储文件不存在时跳过，不阻塞启动）"""
+    config = get_search_store_config()
+    store = get_search_store()
+    if store is None or not config["WARM_ENTRIES"] or not os.path.exists(store.path):
+        return
+
+    def warm():
+        try:
+            warm_cache(result_cache, store, config["WARM_ENTRIES"])
+        except sqlite3.Error as e:
+            logger.error(f"搜索结果缓存预热失败: {e}")
+        finally:
+            store.close()
+
+    threading.Thread(target=warm, name="search-store-warmup", daemon=True).start()
@@ -0,0 +1,617 @@
+"""
+搜索结果页解析模块
+为各搜索引擎提供统一的结果提取接口，支持切换 html.parser / lxml / selectolax 解析引擎，
+并且只解析结果容器节点，而不是构建整页文档树；
+结构多变的结果页（百度）使用多结构提取器，一次遍历文档树同时匹配所有已知结构
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+from django.conf import settings
+
+try:
+    import lxml.html
+
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax 为可选依赖
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+# 可选的解析引擎
+PARSER_HTML = "html.parser"
+PARSER_LXML = "lxml"
+PARSER_SELECTOLAX = "selectolax"
+
+
+class ResultLayout(NamedTuple):
+    """搜索结果页中单条结果的结构描述"""
+
+    container_tag: str  # 结果容器标签，如 "li"
+    container_class: str  # 结果容器 class，如 "b_algo"
+    title_selector: str  # 容器内标题链接的CSS选择器
+    abstract_selector: str  # 容器内摘要的CSS选择器
+
+    @property
+    def container_selector(self) -> str:
+        return f"{self.container_tag}.{self.container_class}"
+
+
+class RawResult(NamedTuple):
+    """从结果容器中提取的原始字段"""
+
+    title: str
+    url: str
+    abstract: Optional[str]
+
+
+# 各搜索引擎的结果结构
+BING_LAYOUT = ResultLayout("li", "b_algo", "h2 a", "p")
+DUCKDUCKGO_LAYOUT = ResultLayout("div", "result", "a.result__a", "a.result__snippet")
+
+
+class LayoutRule(NamedTuple):
+    """
+    多结构提取器中一种结果结构的匹配规则
+
+    title_rules 和 abstract_rules 按优先级排列，排在前面的规则命中时优先使用
+    """
+
+    name: str  # 结构名称（用于命中统计）
+    container_tags: frozenset  # 容器标签；为空表示直接匹配链接（宽松结构）
+    container_class: Optional[Pattern]  # 容器 class 的匹配正则
+    title_rules: Tuple  # ((标题所在的标题标签或 None, 链接 class 正则或 None), ...)
+    abstract_rules: Tuple  # ((摘要标签, 摘要 class 正则), ...)
+    min_title_length: int = 1
+    max_title_length: int = 0  # 0 表示不限制
+    require_query: bool = False  # 标题必须包含查询词
+    max_candidates: int = 20  # 最多收集的容器数量
+
+
+def _class_token(name: str) -> Pattern:
+    """匹配完整 class 名（而不是子串）的正则"""
+    return re.compile(rf"(?:^|\s){re.escape(name)}(?:\s|$)")
+
+
+# 百度结果页的已知结构（按优先级排列）
+BAIDU_LAYOUT_RULES = (
+    # 标准结构：div.result > h3 a + div.c-abstract
+    LayoutRule(
+        "standard",
+        frozenset({"div"}),
+        _class_token("result"),
+        (("h3", None),),
+        (("div", _class_token("c-abstract")),),
+    ),
+    # 新结构：class 包含 result / c-container（c-result、result-op 等）的容器
+    LayoutRule(
+        "container",
+        frozenset({"div"}),
+        re.compile(r"result|c-container"),
+        (
+            ("h3", None),
+            ("h2", None),
+            ("h1", None),
+            (None, re.compile("title")),
+            (None, re.compile("link")),
+        ),
+        (
+            ("div", re.compile("abstract")),
+            ("div", re.compile("summary")),
+            ("div", re.compile("desc")),
+            ("div", re.compile("content")),
+            ("p", re.compile("abstract")),
+            ("p", re.compile("summary")),
+            ("span", re.compile("abstract")),
+            ("span", re.compile("summary")),
+        ),
+    ),
+    # 列表结构：class 包含 result / item 的 div 或 li，取第一个链接
+    LayoutRule(
+        "list",
+        frozenset({"div", "li"}),
+        re.compile(r"result|item"),
+        ((None, None),),
+        (
+            ("div", re.compile(r"abstract|summary|desc")),
+            ("p", re.compile(r"abstract|summary|desc")),
+        ),
+        min_title_length=6,
+    ),
+    # 宽松结构：标题包含查询词的任意外部链接
+    LayoutRule(
+        "loose",
+        frozenset(),
+        None,
+        (),
+        (),
+        min_title_length=11,
+        max_title_length=199,
+        require_query=True,
+        max_candidates=200,
+    ),
+)
+
+
+def get_parser_name(parser: Optional[str] = None) -> str:
+    """
+    获取可用的解析引擎名称
+
+    未指定时读取 settings.SEARCH_HTML_PARSER；所选引擎未安装时依次退回 lxml、html.parser
+
+    Args:
+        parser: 解析引擎名称
+
+    Returns:
+        实际使用的解析引擎名称
+    """
+    parser = parser or getattr(settings, "SEARCH_HTML_PARSER", PARSER_LXML)
+    if parser == PARSER_SELECTOLAX and LexborHTMLParser is None:
+        parser = PARSER_LXML
+    if parser == PARSER_LXML and not HAS_LXML:
+        parser = PARSER_HTML
+    return parser
+
+
+def make_soup(html_content: str, parser: Optional[str] = None, parse_only=None):
+    """
+    构建 BeautifulSoup 文档树
+
+    Args:
+        html_content: HTML内容
+        parser: 解析引擎名称（selectolax 不支持构建 BeautifulSoup，退回 lxml）
+        parse_only: 只解析匹配的节点（SoupStrainer）
+
+    Returns:
+        BeautifulSoup对象
+    """
+    parser = get_parser_name(parser)
+    if parser == PARSER_SELECTOLAX:
+        parser = get_parser_name(PARSER_LXML)
+    return BeautifulSoup(html_content, parser, parse_only=parse_only)
+
+
+def extract_results(
+    html_content: str, layout: ResultLayout, limit: int, parser: Optional[str] = None
+) -> List[RawResult]:
+    """
+    从搜索结果页中提取结果
+
+    只处理结果容器节点：lxml 引擎直接用 XPath 定位容器，selectolax 引擎用CSS选择器
+    定位容器，html.parser 引擎使用 SoupStrainer 只为容器构建文档树。
+
+    Args:
+        html_content: HTML内容
+        layout: 结果结构描述
+        limit: 最多处理的容器数量
+        parser: 解析引擎名称
+
+    Returns:
+        原始结果列表（未做URL校验和过滤）
+    """
+    parser = get_parser_name(parser)
+    if not html_content or not html_content.strip():
+        return []
+    if parser == PARSER_SELECTOLAX:
+        return _extract_with_selectolax(html_content, layout, limit)
+    if parser == PARSER_LXML:
+        return _extract_with_lxml(html_content, layout, limit)
+    return _extract_with_soup(html_content, layout, limit, parser)
+
+
+def css_to_xpath(selector: str, prefix: str = "descendant::") -> str:
+    """
+    把简单的CSS选择器转换为XPath
+
+    只支持结果结构描述中用到的语法：标签、标签.class 以及空格分隔的后代选择器
+
+    Args:
+        selector: CSS选择器，如 "h2 a"、"div.c-abstract"
+        prefix: 第一步使用的轴
+
+    Returns:
+        XPath表达式
+    """
+    steps = []
+    for part in selector.split():
+        tag, _, class_name = part.partition(".")
+        step = f"descendant::{tag or '*'}"
+        if class_name:
+            step += (
+                f"[contains(concat(' ', normalize-space(@class), ' '), "
+                f"' {class_name} ')]"
+            )
+        steps.append(step)
+    return prefix + "/".join(steps)[len("descendant::") :]
+
+
+def _lxml_text(element) -> str:
+    # 与 BeautifulSoup 的 get_text(strip=True) 保持一致
+    return "".join(text.strip() for text in element.itertext())
+
+
+def _extract_with_lxml(
+    html_content: str, layout: ResultLayout, limit: int
+) -> List[RawResult]:
+    try:
+        tree = lxml.html.fromstring(html_content)
+    except ValueError:
+        # 带编码声明的字符串需要以字节形式解析
+        tree = lxml.html.fromstring(html_content.encode("utf-8"))
+
+    title_xpath = css_to_xpath(layout.title_selector)
+    abstract_xpath = css_to_xpath(layout.abstract_selector)
+
+    results = []
+    containers = tree.xpath(css_to_xpath(layout.container_selector, prefix="//"))
+    for container in containers[:limit]:
+        title_links = container.xpath(title_xpath)
+        if not title_links:
+            continue
+        abstract_elems = container.xpath(abstract_xpath)
+        results.append(
+            RawResult(
+                title=_lxml_text(title_links[0]),
+                url=title_links[0].get("href") or "",
+                abstract=_lxml_text(abstract_elems[0]) if abstract_elems else None,
+            )
+        )
+    return results
+
+
+def _extract_with_soup(
+    html_content: str, layout: ResultLayout, limit: int, parser: str
+) -> List[RawResult]:
+    def has_container_class(value) -> bool:
+        # 解析阶段 class 属性尚未拆分为列表，需要自行按空白拆分匹配
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return layout.container_class in classes
+
+    strainer = SoupStrainer(layout.container_tag, class_=has_container_class)
+    soup = BeautifulSoup(html_content, parser, parse_only=strainer)
+
+    results = []
+    containers = soup.find_all(
+        layout.container_tag, class_=layout.container_class, limit=limit
+    )
+    for container in containers:
+        title_link = container.select_one(layout.title_selector)
+        if not title_link:
+            continue
+        abstract_elem = container.select_one(layout.abstract_selector)
+        results.append(
+            RawResult(
+                title=title_link.get_text(strip=True),
+                url=title_link.get("href", ""),
+                abstract=abstract_elem.get_text(strip=True) if abstract_elem else None,
+            )
+        )
+    return results
+
+
+def _extract_with_selectolax(
+    html_content: str, layout: ResultLayout, limit: int
+) -> List[RawResult]:
+    tree = LexborHTMLParser(html_content)
+
+    results = []
+    for container in tree.css(layout.container_selector)[:limit]:
+        title_link = container.css_first(layout.title_selector)
+        if title_link is None:
+            continue
+        abstract_elem = container.css_first(layout.abstract_selector)
+        results.append(
+            RawResult(
+                title=title_link.text(strip=True),
+                url=title_link.attributes.get("href") or "",
+                abstract=abstract_elem.text(strip=True) if abstract_elem else None,
+            )
+        )
+    return results
+
+
+class _LxmlTree:
+    """多结构提取器使用的 lxml 文档树操作"""
+
+    def __init__(self, html_content: str):
+        try:
+            self.root = lxml.html.fromstring(html_content)
+        except ValueError:
+            self.root = lxml.html.fromstring(html_content.encode("utf-8"))
+
+    def elements(self):
+        return (el for el in self.root.iter() if isinstance(el.tag, str))
+
+    @staticmethod
+    def descendants(node):
+        return (el for el in node.iterdescendants() if isinstance(el.tag, str))
+
+    @staticmethod
+    def tag(el) -> str:
+        return el.tag
+
+    @staticmethod
+    def classes(el) -> str:
+        return el.get("class") or ""
+
+    @staticmethod
+    def href(el) -> Optional[str]:
+        return el.get("href")
+
+    @staticmethod
+    def parent(el):
+        return el.getparent()
+
+    @staticmethod
+    def text(el) -> str:
+        return _lxml_text(el)
+
+
+class _SoupTree:
+    """多结构提取器使用的 BeautifulSoup 文档树操作（未安装 lxml 时）"""
+
+    def __init__(self, html_content: str, parser: str):
+        self.root = BeautifulSoup(html_content, parser)
+
+    def elements(self):
+        return self.root.find_all(True)
+
+    @staticmethod
+    def descendants(node):
+        return node.find_all(True)
+
+    @staticmethod
+    def tag(el) -> str:
+        return el.name
+
+    @staticmethod
+    def classes(el) -> str:
+        return " ".join(el.get("class") or ())
+
+    @staticmethod
+    def href(el) -> Optional[str]:
+        return el.get("href")
+
+    @staticmethod
+    def parent(el):
+        return el.parent
+
+    @staticmethod
+    def text(el) -> str:
+        return el.get_text(strip=True)
+
+
+class LayoutMatch(NamedTuple):
+    """多结构提取的结果"""
+
+    layout: Optional[str]  # 命中的结构名称，没有命中时为 None
+    results: List
+
+
+class MultiLayoutExtractor:
+    """
+    多结构结果提取器
+
+    一次遍历文档树，为每种结构收集候选容器（容器内的字段只在容器子树内查找），
+    然后按优先级依次提取，第一个产生有效结果的结构即为命中结构。
+    页面结构变化时不会像逐个尝试解析方法那样重复遍历整个文档。
+    """
+
+    def __init__(self, rules: Iterable[LayoutRule]):
+        self.rules = tuple(rules)
+        self.container_tags = frozenset().union(
+            *(rule.container_tags for rule in self.rules)
+        )
+        self.stats = LayoutStats([rule.name for rule in self.rules])
+
+    def extract(
+        self,
+        html_content: str,
+        query: str,
+        limit: int,
+        accept=None,
+        parser: Optional[str] = None,
+    ) -> LayoutMatch:
+        """
+        提取搜索结果
+
+        Args:
+            html_content: HTML内容
+            query: 搜索关键词（宽松结构要求标题包含查询词）
+            limit: 最多返回的结果数量
+            accept: 把 RawResult 转换为最终结果的函数，返回 None 表示丢弃
+            parser: 解析引擎名称（selectolax 退回 lxml）
+
+        Returns:
+            LayoutMatch，results 为 accept 的返回值列表（未指定 accept 时为 RawResult）
+        """
+        if not html_content or not html_content.strip():
+            self.stats.record(None)
+            return LayoutMatch(None, [])
+
+        parser = get_parser_name(parser)
+        if parser != PARSER_HTML and HAS_LXML:
+            tree = _LxmlTree(html_content)
+        else:
+            tree = _SoupTree(html_content, PARSER_HTML)
+        candidates = self._collect(tree)
+
+        accept = accept or (lambda raw: raw)
+        query_lower = query.lower()
+        for rule, elements in zip(self.rules, candidates):
+            results = []
+            seen_urls = set()
+            for element in elements:
+                raw = self._extract_one(tree, rule, element, query_lower)
+                if raw is None or raw.url in seen_urls:
+                    continue
+                result = accept(raw)
+                if result is None:
+                    continue
+                seen_urls.add(raw.url)
+                results.append(result)
+                if len(results) >= limit:
+                    break
+            if results:
+                self.stats.record(rule.name)
+                return LayoutMatch(rule.name, results)
+
+        self.stats.record(None)
+        return LayoutMatch(None, [])
+
+    def _collect(self, tree) -> List[List]:
+        """一次遍历文档树，按结构收集候选容器（宽松结构收集链接）"""
+        candidates = [[] for _ in self.rules]
+        container_tags = self.container_tags
+        for el in tree.elements():
+            tag = tree.tag(el)
+            if tag == "a":
+                for index, rule in enumerate(self.rules):
+                    if not rule.container_tags and len(candidates[index]) < (
+                        rule.max_candidates
+                    ):
+                        candidates[index].append(el)
+                continue
+            if tag not in container_tags:
+                continue
+            classes = tree.classes(el)
+            if not classes:
+                continue
+            for index, rule in enumerate(self.rules):
+                if (
+                    tag in rule.container_tags
+                    and len(candidates[index]) < rule.max_candidates
+                    and rule.container_class.search(classes)
+                ):
+                    candidates[index].append(el)
+        return candidates
+
+    def _extract_one(self, tree, rule: LayoutRule, element, query_lower: str):
+        """从一个候选容器（或宽松结构的链接）中提取原始结果"""
+        if not rule.container_tags:
+            link, abstract = element, None
+        else:
+            link, abstract = self._find_fields(tree, rule, element)
+            if link is None:
+                return None
+
+        title = tree.text(link)
+        if len(title) < rule.min_title_length:
+            return None
+        if rule.max_title_length and len(title) > rule.max_title_length:
+            return None
+        if rule.require_query and query_lower not in title.lower():
+            return None
+        return RawResult(
+            title=title,
+            url=tree.href(link) or "",
+            abstract=tree.text(abstract) if abstract is not None else None,
+        )
+
+    @staticmethod
+    def _find_fields(tree, rule: LayoutRule, container):
+        """在容器子树内一次遍历，按规则优先级找出标题链接和摘要元素"""
+        title_rules, abstract_rules = rule.title_rules, rule.abstract_rules
+        link = abstract = None
+        link_rank, abstract_rank = len(title_rules), len(abstract_rules)
+
+        for el in tree.descendants(container):
+            tag = tree.tag(el)
+            if tag == "a":
+                if link_rank == 0:
+                    continue
+                headings = None
+                for rank, (heading, class_pattern) in enumerate(
+                    title_rules[:link_rank]
+                ):
+                    if heading is not None:
+                        if headings is None:
+                            headings = _ancestor_tags(tree, el, container)
+                        matched = heading in headings
+                    elif class_pattern is not None:
+                        matched = bool(class_pattern.search(tree.classes(el)))
+                    else:
+                        matched = tree.href(el) is not None
+                    if matched:
+                        link, link_rank = el, rank
+                        break
+            elif abstract_rank:
+                classes = None
+                for rank, (abstract_tag, class_pattern) in enumerate(
+                    abstract_rules[:abstract_rank]
+                ):
+                    if tag != abstract_tag:
+                        continue
+                    if classes is None:
+                        classes = tree.classes(el)
+                    if class_pattern.search(classes):
+                        abstract, abstract_rank = el, rank
+                        break
+            if link_rank == 0 and abstract_rank == 0:
+                break
+        return link, abstract
+
+
+def _ancestor_tags(tree, el, container) -> set:
+    """元素与容器之间的祖先标签"""
+    tags = set()
+    node = tree.parent(el)
+    while node is not None and node is not container:
+        tags.add(tree.tag(node))
+        node = tree.parent(node)
+    return tags
+
+
+class LayoutStats:
+    """多结构提取器的结构命中统计"""
+
+    def __init__(self, layouts: Iterable[str]):
+        self.layouts = list(layouts)
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, layout: Optional[str]):
+        """记录一次解析命中的结构（None 表示所有结构都没有命中）"""
+        with self._lock:
+            self._counts["documents"] += 1
+            self._counts[layout or "miss"] += 1
+
+    def snapshot(self) -> Dict:
+        """
+        命中统计
+
+        Returns:
+            documents: 解析的页面数；layouts: 各结构的命中次数和命中率；miss: 未命中次数
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        documents = counts.get("documents", 0)
+        return {
+            "documents": documents,
+            "layouts": {
+                name: {
+                    "hits": counts.get(name, 0),
+                    "rate": (
+                        round(counts.get(name, 0) / documents, 3) if documents else 0
+                    ),
+                }
+                for name in self.layouts
+            },
+            "miss": counts.get("miss", 0),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
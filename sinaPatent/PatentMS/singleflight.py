@@ -0,0 +1,223 @@
+"""
+请求合并模块（single-flight）
+相同键的并发请求只执行一次上游调用，其余调用者等待并共享结果：
+进程内通过 threading.Event / asyncio.Task 合并，跨进程通过共享缓存中的租约合并
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from PatentMS.search_cache import normalize_text
+from PatentMS.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_SINGLEFLIGHT 覆盖
+DEFAULT_SINGLEFLIGHT = {
+    "LEASE_TIMEOUT": 30,  # 跨进程租约的最长持有时间（秒）
+    "RESULT_TTL": 5,  # 租约持有者发布结果的保留时间（秒）
+    "WAIT_TIMEOUT": 20,  # 等待其他调用者结果的最长时间（秒）
+    "POLL_INTERVAL": 0.05,  # 跨进程等待时的轮询间隔（秒）
+}
+
+# 未发布结果的占位值（结果本身可能为 None）
+_MISSING = object()
+
+
+def get_singleflight_config() -> Dict:
+    """获取合并后的请求合并配置"""
+    config = dict(DEFAULT_SINGLEFLIGHT)
+    config.update(getattr(settings, "SEARCH_SINGLEFLIGHT", {}))
+    return config
+
+
+def make_flight_key(kind: str, *parts) -> str:
+    """
+    生成请求合并键（文本部分先规范化）
+
+    Args:
+        kind: 请求类型，如 "search"、"suggest"
+        parts: 参与区分请求的各部分
+
+    Returns:
+        合并键
+    """
+    raw = "\x1f".join(normalize_text(str(part)) for part in parts)
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return get_cache_key("flight", kind, digest)
+
+
+class _Call:
+    """进程内一次正在执行的调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """请求合并组"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or get_singleflight_config()
+        self._calls = {}
+        self._lock = threading.Lock()
+        # 每个事件循环一组正在执行的任务（asyncio.Task 不能跨事件循环等待）
+        self._tasks = weakref.WeakKeyDictionary()
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], lease: bool = True) -> Any:
+        """
+        执行调用，相同键的并发调用只执行一次
+
+        Args:
+            key: 合并键
+            fn: 实际执行的调用
+            lease: 是否通过共享缓存租约跨进程合并
+
+        Returns:
+            调用结果（并发调用者共享同一个对象，调用者修改前需自行复制）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._count("shared")
+            if not call.event.wait(self.config["WAIT_TIMEOUT"]):
+                logger.warning(f"等待合并请求超时，直接执行: {key}")
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self._count("leader")
+        try:
+            call.result = self._run_leased(key, fn) if lease else fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def ado(
+        self, key: str, afn: Callable[[], Awaitable[Any]], lease: bool = True
+    ) -> Any:
+        """
+        do 的异步版本：同一事件循环中相同键的并发调用共享一个任务
+
+        Args:
+            key: 合并键
+            afn: 实际执行的异步调用
+            lease: 是否通过共享缓存租约跨进程合并
+
+        Returns:
+            调用结果
+        """
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        if task is not None:
+            self._count("shared")
+            # shield 保证某个等待者被取消时不会取消共享的任务
+            return await asyncio.shield(task)
+
+        self._count("leader")
+        task = asyncio.ensure_future(self._arun_leased(key, afn) if lease else afn())
+        tasks[key] = task
+        task.add_done_callback(lambda _: tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _run_leased(self, key: str, fn: Callable[[], Any]) -> Any:
+        """跨进程合并：获得租约者执行调用并发布结果，其余进程等待结果"""
+        lease_key, result_key = self._lease_keys(key)
+        token = uuid.uuid4().hex
+        if cache.add(lease_key, token, self.config["LEASE_TIMEOUT"]):
+            try:
+                result = fn()
+                cache.set(result_key, result, self.config["RESULT_TTL"])
+                return result
+            finally:
+                if cache.get(lease_key) == token:
+                    cache.delete(lease_key)
+
+        deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+        while time.monotonic() < deadline:
+            result = cache.get(result_key, _MISSING)
+            if result is not _MISSING:
+                self._count("remote")
+                return result
+            if cache.get(lease_key) is None:
+                # 租约持有者已结束但未发布结果（失败）
+                result = cache.get(result_key, _MISSING)
+                if result is not _MISSING:
+                    self._count("remote")
+                    return result
+                break
+            time.sleep(self.config["POLL_INTERVAL"])
+
+        return fn()
+
+    async def _arun_leased(self, key: str, afn: Callable[[], Awaitable[Any]]) -> Any:
+        lease_key, result_key = self._lease_keys(key)
+        token = uuid.uuid4().hex
+        if await cache.aadd(lease_key, token, self.config["LEASE_TIMEOUT"]):
+            try:
+                result = await afn()
+                await cache.aset(result_key, result, self.config["RESULT_TTL"])
+                return result
+            finally:
+                if await cache.aget(lease_key) == token:
+                    await cache.adelete(lease_key)
+
+        deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+        while time.monotonic() < deadline:
+            result = await cache.aget(result_key, _MISSING)
+            if result is not _MISSING:
+                self._count("remote")
+                return result
+            if await cache.aget(lease_key) is None:
+                result = await cache.aget(result_key, _MISSING)
+                if result is not _MISSING:
+                    self._count("remote")
+                    return result
+                break
+            await asyncio.sleep(self.config["POLL_INTERVAL"])
+
+        return await afn()
+
+    @staticmethod
+    def _lease_keys(key: str):
+        return get_cache_key("flight-lease", key), get_cache_key("flight-result", key)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        合并统计
+
+        Returns:
+            leader: 实际执行的调用数；shared: 进程内合并的调用数；
+            remote: 使用其他进程结果的调用数
+        """
+        with self._stats_lock:
+            return dict(self._stats)
@@ -0,0 +1,250 @@
+"""
+网站过滤模块
+所有搜索引擎共用的域名黑名单：解析一次主机名，按域名后缀做集合查找
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认屏蔽的域名（同时屏蔽其所有子域名）
+DEFAULT_BLOCKED_DOMAINS = [
+    "google.com",
+    "youtube.com",
+    "facebook.com",
+    "twitter.com",
+    "instagram.com",
+    "tiktok.com",
+    "douyin.com",
+    "weibo.com",
+    "qq.com",
+    "wechat.com",
+    "taobao.com",
+    "tmall.com",
+    "jd.com",
+    "amazon.com",
+    "ebay.com",
+    "sina.com",
+    "sohu.com",
+    "163.com",
+    "126.com",
+    # 原先按子串匹配时 "sina.com" 等规则也覆盖了 .com.cn / .com.hk 等国家域名
+    "google.com.hk",
+    "google.com.cn",
+    "amazon.com.cn",
+    "qq.com.cn",
+    "taobao.com.cn",
+    "tmall.com.cn",
+    "jd.com.cn",
+    "weibo.com.cn",
+    "sina.com.cn",
+    "sina.com.hk",
+    "sohu.com.cn",
+    "163.com.cn",
+    "126.com.cn",
+]
+
+# 各搜索引擎额外屏蔽的域名（搜索引擎自身的页面等）
+DEFAULT_ENGINE_BLOCKED_DOMAINS = {
+    "bing": ["bing.com"],
+    "baidu": ["baidu.com", "zhihu.com"],
+    "duckduckgo": ["duckduckgo.com"],
+}
+
+# 检查黑名单文件是否修改的最小间隔（秒）
+FILE_CHECK_INTERVAL = 5
+
+
+def normalize_domain(domain: str) -> str:
+    """规范化域名：去除空白、小写、去掉首尾的点"""
+    return domain.strip().lower().strip(".")
+
+
+def extract_hostname(url: str) -> str:
+    """
+    提取URL中的主机名
+
+    Args:
+        url: 网站URL
+
+    Returns:
+        小写主机名，无法解析时返回空字符串
+    """
+    try:
+        return (urlsplit(url.strip()).hostname or "").rstrip(".")
+    except ValueError:
+        return ""
+
+
+class DomainFilter:
+    """按域名后缀匹配的网站黑名单"""
+
+    def __init__(
+        self,
+        domains: Iterable[str] = (),
+        engine_domains: Optional[Dict[str, Iterable[str]]] = None,
+        file_path: Optional[str] = None,
+    ):
+        self.file_path = file_path
+        self._base_domains = list(domains)
+        self._base_engine_domains = engine_domains or {}
+        self._lock = threading.Lock()
+        self._drops = Counter()
+        self._file_mtime = None
+        self._next_file_check = 0
+        self._load()
+
+    @classmethod
+    def from_settings(cls) -> "DomainFilter":
+        """根据 settings 创建过滤器"""
+        return cls(
+            getattr(settings, "SEARCH_BLOCKED_DOMAINS", DEFAULT_BLOCKED_DOMAINS),
+            getattr(
+                settings,
+                "SEARCH_ENGINE_BLOCKED_DOMAINS",
+                DEFAULT_ENGINE_BLOCKED_DOMAINS,
+            ),
+            getattr(settings, "SEARCH_BLOCKLIST_FILE", None),
+        )
+
+    def _load(self):
+        """构建域名集合（基础配置 + 黑名单文件）"""
+        domains = {normalize_domain(d) for d in self._base_domains}
+        engine_domains = {
+            engine: {normalize_domain(d) for d in engine_list}
+            for engine, engine_list in self._base_engine_domains.items()
+        }
+
+        mtime = None
+        if self.file_path and os.path.exists(self.file_path):
+            mtime = os.path.getmtime(self.file_path)
+            for engine, domain in self._read_file(self.file_path):
+                if engine:
+                    engine_domains.setdefault(engine, set()).add(domain)
+                else:
+                    domains.add(domain)
+
+        domains.discard("")
+        self._domains = frozenset(domains)
+        self._engine_domains = {
+            engine: frozenset(engine_set - {""})
+            for engine, engine_set in engine_domains.items()
+        }
+        self._file_mtime = mtime
+
+    @staticmethod
+    def _read_file(file_path: str):
+        """
+        读取黑名单文件
+
+        每行一个域名，"#" 之后为注释；"引擎名 域名" 格式表示只对该引擎生效
+
+        Yields:
+            (引擎名或None, 域名)
+        """
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.split()
+                if len(parts) == 1:
+                    yield None, normalize_domain(parts[0])
+                else:
+                    yield parts[0], normalize_domain(parts[1])
+
+    def reload(self):
+        """重新加载配置和黑名单文件（无需重启进程）"""
+        with self._lock:
+            self._load()
+        logger.info(f"网站黑名单已重新加载，共 {len(self._domains)} 个通用规则")
+
+    def _maybe_reload_file(self):
+        """黑名单文件被修改后自动重新加载（按间隔检查，开销可忽略）"""
+        if not self.file_path:
+            return
+        now = time.monotonic()
+        if now < self._next_file_check:
+            return
+        self._next_file_check = now + FILE_CHECK_INTERVAL
+        try:
+            mtime = os.path.getmtime(self.file_path)
+        except OSError:
+            mtime = None
+        if mtime != self._file_mtime:
+            self.reload()
+
+    def match(self, url: str, engine: Optional[str] = None) -> Optional[str]:
+        """
+        查找URL命中的规则
+
+        Args:
+            url: 网站URL
+            engine: 搜索引擎名称（用于匹配引擎专属规则）
+
+        Returns:
+            命中的域名规则，未命中时返回 None
+        """
+        self._maybe_reload_file()
+
+        host = extract_hostname(url)
+        if not host:
+            return None
+
+        domains = self._domains
+        engine_domains = self._engine_domains.get(engine, frozenset())
+
+        # 依次检查 a.b.example.com、b.example.com、example.com ...
+        suffix = host
+        while True:
+            if suffix in domains or suffix in engine_domains:
+                return suffix
+            dot = suffix.find(".")
+            if dot < 0:
+                return None
+            suffix = suffix[dot + 1 :]
+
+    def is_blocked(self, url: str, engine: Optional[str] = None) -> bool:
+        """
+        检查是否为不合适的网站，并记录命中的规则
+
+        Args:
+            url: 网站URL
+            engine: 搜索引擎名称
+
+        Returns:
+            是否为不合适的网站
+        """
+        rule = self.match(url, engine)
+        if rule is None:
+            return False
+        with self._lock:
+            self._drops[rule] += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """各规则过滤掉的结果数量"""
+        with self._lock:
+            return dict(self._drops)
+
+    def reset_stats(self):
+        """清空统计"""
+        with self._lock:
+            self._drops.clear()
+
+
+# 全局网站过滤器实例
+site_filter = DomainFilter.from_settings()
+
+
+def is_blocked_site(url: str, engine: Optional[str] = None) -> bool:
+    """检查是否为不合适的网站（使用全局过滤器）"""
+    return site_filter.is_blocked(url, engine)
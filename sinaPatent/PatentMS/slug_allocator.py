@@ -0,0 +1,141 @@
+"""
+别名（slug）分配模块
+为基础别名找到第一个未被占用的数字后缀（"base"、"base-1"、"base-2"……）：
+保存单个对象时用一次索引范围查询取出同一前缀的所有别名；
+批量修复时把已有别名读入内存集合，逐个分配不再访问数据库
+"""
+
+from typing import Iterable, Optional, Set
+
+from django.db.models import Q
+
+# 数字后缀预留的长度（"-" 加最多 6 位数字）
+SUFFIX_LENGTH = 7
+
+
+def slug_stem(base: str, max_length: int) -> str:
+    """
+    加数字后缀时使用的前缀：截断后为后缀留出空间
+
+    Args:
+        base: 基础别名
+        max_length: 别名字段的最大长度
+
+    Returns:
+        前缀（不以连字符结尾）
+    """
+    if len(base) + SUFFIX_LENGTH <= max_length:
+        return base
+    return base[: max_length - SUFFIX_LENGTH].rstrip("-") or base[:1]
+
+
+def suffix_number(slug: str, stem: str) -> Optional[int]:
+    """
+    解析 "stem-N" 形式的别名中的数字后缀
+
+    Returns:
+        N，别名不是这种形式时返回 None
+    """
+    prefix = f"{stem}-"
+    if not slug.startswith(prefix):
+        return None
+    suffix = slug[len(prefix) :]
+    if not suffix.isdigit() or suffix.startswith("0"):
+        return None
+    return int(suffix)
+
+
+def first_free(
+    base: str, stem: str, used: Set[str], allow_bare: bool, start: int = 1
+) -> str:
+    """
+    在已占用的别名之外找到第一个可用的别名
+
+    Args:
+        base: 基础别名
+        stem: 加数字后缀时使用的前缀
+        used: 已占用的别名
+        allow_bare: 是否可以直接使用不带后缀的基础别名
+        start: 从这个后缀开始查找
+
+    Returns:
+        可用的别名
+    """
+    if allow_bare and base not in used:
+        return base
+    number = start
+    while f"{stem}-{number}" in used:
+        number += 1
+    return f"{stem}-{number}"
+
+
+def allocate_slug(
+    queryset,
+    base: str,
+    max_length: int,
+    allow_bare: bool = True,
+    taken: Iterable[str] = (),
+    field: str = "slug",
+) -> str:
+    """
+    用一次查询为基础别名分配未被占用的别名
+
+    "stem-" 开头的别名都落在 ["stem-", "stem.") 之间（"." 紧跟在 "-" 之后），
+    按范围查询可以直接使用别名字段的唯一索引；
+    并发插入仍可能占用同一个别名，调用方需在保存出现 IntegrityError 时
+    把该别名加入 taken 后重新分配
+
+    Args:
+        queryset: 参与唯一性检查的对象（应排除正在保存的对象本身）
+        base: 基础别名
+        max_length: 别名字段的最大长度
+        allow_bare: 是否可以直接使用不带后缀的基础别名
+        taken: 额外视为已占用的别名
+        field: 别名字段名
+
+    Returns:
+        可用的别名
+    """
+    base = base[:max_length].rstrip("-") or base[:1]
+    stem = slug_stem(base, max_length)
+    used = set(taken)
+    used.update(
+        queryset.filter(
+            Q(**{field: base})
+            | Q(**{f"{field}__gte": f"{stem}-", f"{field}__lt": f"{stem}."})
+        ).values_list(field, flat=True)
+    )
+    return first_free(base, stem, used, allow_bare)
+
+
+class SlugReservation:
+    """
+    内存中的别名占用表（批量分配用）
+
+    同一前缀记住上次分配到的后缀，连续为同一前缀分配 N 个别名的总耗时与 N 成正比
+    """
+
+    def __init__(self, existing: Iterable[str], max_length: int):
+        self.used = set(existing)
+        self.max_length = max_length
+        self._next = {}  # {前缀: 下次开始查找的后缀}
+
+    def allocate(self, base: str, allow_bare: bool = True) -> str:
+        """
+        分配一个别名并标记为已占用
+
+        Args:
+            base: 基础别名
+            allow_bare: 是否可以直接使用不带后缀的基础别名
+
+        Returns:
+            可用的别名
+        """
+        base = base[: self.max_length].rstrip("-") or base[:1]
+        stem = slug_stem(base, self.max_length)
+        slug = first_free(base, stem, self.used, allow_bare, self._next.get(stem, 1))
+        number = suffix_number(slug, stem)
+        if number is not None:
+            self._next[stem] = number + 1
+        self.used.add(slug)
+        return slug
@@ -0,0 +1,187 @@
+"""
+分类别名（slug）术语模块
+从术语表文件加载中文术语到英文别名的映射，构建一次 Aho-Corasick 自动机，
+一次扫描名称即可按“最左最长、互不重叠”的规则替换所有已知术语
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认术语表文件，可通过 settings.SLUG_TERMS_FILE 覆盖
+DEFAULT_SLUG_TERMS_FILE = os.path.join(os.path.dirname(__file__), "slug_terms.txt")
+
+
+def read_terms(file_path: str) -> Dict[str, str]:
+    """
+    读取术语表文件
+
+    每行 "术语 别名"，"#" 之后为注释；同一术语出现多次时以最后一行为准
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        {小写术语: 别名}
+    """
+    terms = {}
+    with open(file_path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) != 2:
+                logger.warning(f"术语表第 {number} 行格式错误，已忽略: {line}")
+                continue
+            terms[parts[0].lower()] = parts[1]
+    return terms
+
+
+def _is_word_char(char: str) -> bool:
+    """英文字母或数字（术语在这类字符旁边时不能从单词中间匹配）"""
+    return char.isascii() and char.isalnum()
+
+
+class TermTranslator:
+    """
+    多模式术语替换（Aho-Corasick 自动机）
+
+    构建时间与术语总长度成正比；替换时对名称只扫描一次，
+    耗时与名称长度和命中数成正比，与术语数量无关
+    """
+
+    def __init__(self, terms: Dict[str, str]):
+        self.terms = [(term, slug) for term, slug in terms.items() if term]
+        # 状态转移表、失败指针、每个状态结束的术语（下标）
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for index, (term, _) in enumerate(self.terms):
+            self._insert(term, index)
+        self._link()
+
+    def _insert(self, term: str, index: int):
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (index,)
+
+    def _link(self):
+        """按广度优先计算失败指针，并把失败链上的输出合并到每个状态"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state] += self._output[fail]
+                queue.append(next_state)
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        查找文本中的术语：从左到右，每个位置取最长的术语，命中之间互不重叠
+
+        包含英文字母的术语只在前后不是字母或数字时命中
+
+        Args:
+            text: 文本（术语按小写匹配，调用方需先转为小写）
+
+        Returns:
+            [(起始位置, 结束位置, 别名)]
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        # 每个起始位置上最长的命中（结束位置, 术语下标）
+        longest = {}
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            end = position + 1
+            for index in output[state]:
+                term = self.terms[index][0]
+                start = end - len(term)
+                if start in longest and longest[start][0] >= end:
+                    continue
+                if (
+                    _is_word_char(term[0])
+                    and start > 0
+                    and _is_word_char(text[start - 1])
+                ) or (
+                    _is_word_char(term[-1])
+                    and end < len(text)
+                    and _is_word_char(text[end])
+                ):
+                    continue
+                longest[start] = (end, index)
+
+        matches = []
+        position = 0
+        for start in range(len(text)):
+            if start >= position and start in longest:
+                end, index = longest[start]
+                matches.append((start, end, self.terms[index][1]))
+                position = end
+        return matches
+
+    def translate(self, text: str) -> str:
+        """
+        把文本中的术语替换为别名（前后加空格，slugify 后成为连字符）
+
+        Args:
+            text: 文本
+
+        Returns:
+            替换后的小写文本
+        """
+        text = text.lower()
+        pieces = []
+        position = 0
+        for start, end, slug in self.find(text):
+            pieces.append(text[position:start])
+            pieces.append(f" {slug} ")
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+
+_translator = None
+_translator_path = None
+_translator_lock = threading.Lock()
+
+
+def get_slug_translator() -> TermTranslator:
+    """
+    获取全局术语替换器（首次使用时构建，术语表文件路径变化时重新构建）
+
+    Returns:
+        TermTranslator 实例，术语表文件不存在时不替换任何术语
+    """
+    global _translator, _translator_path
+    path = getattr(settings, "SLUG_TERMS_FILE", DEFAULT_SLUG_TERMS_FILE)
+    if _translator is None or _translator_path != path:
+        with _translator_lock:
+            if _translator is None or _translator_path != path:
+                terms = {}
+                if path and os.path.exists(path):
+                    terms = read_terms(path)
+                else:
+                    logger.warning(f"分类别名术语表不存在: {path}")
+                _translator = TermTranslator(terms)
+                _translator_path = path
+    return _translator
@@ -0,0 +1,326 @@
+"""
+本地搜索建议模块
+在内存中维护分类名称、页面标题和历史搜索词的前缀索引（有序数组 + 二分查找），
+模型保存、删除和计数写入数据库时增量更新，供分类建议和搜索建议接口使用
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from PatentMS.counters import counters_flushed
+from PatentMS.models import Category, Page
+from PatentMS.search_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 建议来源
+KIND_CATEGORY = "category"
+KIND_PAGE = "page"
+KIND_QUERY = "query"
+
+# 默认配置，可通过 settings.SEARCH_SUGGESTIONS 覆盖
+DEFAULT_SUGGESTIONS = {
+    "REFRESH_INTERVAL": 300,  # 从数据库重建索引的间隔（秒），同步其他进程的修改
+    "MAX_QUERIES": 5000,  # 保留的历史搜索词数量
+    "LIKE_WEIGHT": 10,  # 分类每个点赞相当于的浏览次数
+    "QUERY_WEIGHT": 5,  # 历史搜索词每次搜索相当于的浏览次数
+}
+
+
+def get_suggestions_config() -> Dict:
+    """获取合并后的搜索建议配置"""
+    config = dict(DEFAULT_SUGGESTIONS)
+    config.update(getattr(settings, "SEARCH_SUGGESTIONS", {}))
+    return config
+
+
+class Suggestion(NamedTuple):
+    """一条建议"""
+
+    kind: str  # 来源：分类、页面或历史搜索词
+    ident: object  # 来源内的唯一标识（分类ID、页面ID或规范化的搜索词）
+    text: str  # 显示文本
+    weight: int  # 排序权重（点赞、浏览次数或搜索次数折算）
+    slug: str = ""  # 分类的URL别名
+
+
+class SuggestionIndex:
+    """前缀索引：有序数组保存 (规范化文本, 来源, 标识)，按前缀二分查找"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or get_suggestions_config()
+        self._keys = []  # 有序的 (规范化文本, 来源, 标识)
+        self._entries = {}  # (来源, 标识) -> (规范化文本, Suggestion)
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._query_count = 0
+        self._built_at = None
+
+    @property
+    def is_built(self) -> bool:
+        return self._built_at is not None
+
+    def needs_refresh(self) -> bool:
+        """索引尚未建立或已超过重建间隔"""
+        return (
+            self._built_at is None
+            or time.monotonic() - self._built_at > self.config["REFRESH_INTERVAL"]
+        )
+
+    def refresh(self):
+        """
+        从数据库重建分类和页面的索引（历史搜索词保留）
+
+        访问数据库，异步代码中需通过 sync_to_async 调用
+        """
+        with self._lock:
+            entries = {
+                key: value
+                for key, value in self._entries.items()
+                if key[0] == KIND_QUERY
+            }
+        for category in Category.objects.only("id", "name", "slug", "likes", "views"):
+            suggestion = self._category_suggestion(category)
+            entries[(KIND_CATEGORY, category.id)] = (
+                normalize_text(suggestion.text),
+                suggestion,
+            )
+        for page in Page.objects.only("id", "title", "views"):
+            suggestion = self._page_suggestion(page)
+            entries[(KIND_PAGE, page.id)] = (
+                normalize_text(suggestion.text),
+                suggestion,
+            )
+
+        keys = sorted(
+            (norm, kind, ident) for (kind, ident), (norm, _) in entries.items()
+        )
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._query_count = sum(1 for kind, _ in entries if kind == KIND_QUERY)
+            self._built_at = time.monotonic()
+        logger.info(f"搜索建议索引已重建，共 {len(keys)} 条")
+
+    def ensure_fresh(self):
+        """必要时重建索引（已有索引时，其他线程正在重建则直接使用旧索引）"""
+        if not self.needs_refresh():
+            return
+        if not self._refresh_lock.acquire(blocking=not self.is_built):
+            return
+        try:
+            if self.needs_refresh():
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def reset(self):
+        """清空索引（下次使用时从数据库重建）"""
+        with self._lock:
+            self._keys = []
+            self._entries = {}
+            self._query_count = 0
+            self._built_at = None
+
+    def suggest(
+        self, prefix: str, limit: int = 5, kinds: Optional[Iterable[str]] = None
+    ) -> List[Suggestion]:
+        """
+        查找以 prefix 开头的建议，按权重降序
+
+        不访问数据库；索引未建立时返回空列表
+
+        Args:
+            prefix: 输入的前缀（空字符串匹配全部）
+            limit: 返回数量
+            kinds: 只返回指定来源的建议
+
+        Returns:
+            建议列表
+        """
+        prefix = normalize_text(prefix)
+        kinds = set(kinds) if kinds else None
+        matches = []
+        with self._lock:
+            keys = self._keys
+            index = bisect.bisect_left(keys, (prefix,))
+            while index < len(keys) and keys[index][0].startswith(prefix):
+                _, kind, ident = keys[index]
+                if kinds is None or kind in kinds:
+                    matches.append(self._entries[(kind, ident)][1])
+                index += 1
+
+        top = heapq.nlargest(limit, matches, key=lambda s: s.weight)
+        # 相同文本只保留权重最高的一条
+        seen = set()
+        results = []
+        for suggestion in top:
+            norm = normalize_text(suggestion.text)
+            if norm not in seen:
+                seen.add(norm)
+                results.append(suggestion)
+        return results
+
+    def suggest_texts(self, prefix: str, limit: int = 5) -> List[str]:
+        """查找建议文本（用于搜索建议接口）"""
+        return [s.text for s in self.suggest(prefix, limit)]
+
+    def add_category(self, category: Category):
+        """添加或更新分类"""
+        self._put(self._category_suggestion(category))
+
+    def add_page(self, page: Page):
+        """添加或更新页面"""
+        self._put(self._page_suggestion(page))
+
+    def add_weight(self, kind: str, ident, delta: int):
+        """
+        调整一条建议的排序权重（计数增量写入数据库后使用，不必重新读取对象）
+
+        Args:
+            kind: 来源
+            ident: 来源内的唯一标识
+            delta: 权重增量
+        """
+        with self._lock:
+            entry = self._entries.get((kind, ident))
+            if entry is None or not delta:
+                return
+            suggestion = entry[1]
+            self._put(suggestion._replace(weight=suggestion.weight + delta))
+
+    def record_query(self, query: str):
+        """
+        记录一次成功的搜索
+
+        Args:
+            query: 搜索关键词
+        """
+        norm = normalize_text(query)
+        if not norm:
+            return
+        with self._lock:
+            existing = self._entries.get((KIND_QUERY, norm))
+            count = existing[1].weight // self.config["QUERY_WEIGHT"] if existing else 0
+            self._put(
+                Suggestion(
+                    KIND_QUERY,
+                    norm,
+                    query.strip(),
+                    (count + 1) * self.config["QUERY_WEIGHT"],
+                )
+            )
+            if existing is None:
+                self._evict_queries()
+
+    def remove(self, kind: str, ident):
+        """删除一条建议"""
+        with self._lock:
+            entry = self._entries.pop((kind, ident), None)
+            if entry is None:
+                return
+            if kind == KIND_QUERY:
+                self._query_count -= 1
+            key = (entry[0], kind, ident)
+            index = bisect.bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def _put(self, suggestion: Suggestion):
+        norm = normalize_text(suggestion.text)
+        with self._lock:
+            if self._built_at is None and suggestion.kind != KIND_QUERY:
+                # 索引尚未建立，首次使用时会从数据库加载
+                return
+            self.remove(suggestion.kind, suggestion.ident)
+            if not norm:
+                return
+            self._entries[(suggestion.kind, suggestion.ident)] = (norm, suggestion)
+            if suggestion.kind == KIND_QUERY:
+                self._query_count += 1
+            bisect.insort(self._keys, (norm, suggestion.kind, suggestion.ident))
+
+    def _evict_queries(self):
+        """历史搜索词超过上限时，淘汰搜索次数最少的 10%"""
+        max_queries = self.config["MAX_QUERIES"]
+        if self._query_count <= max_queries:
+            return
+        queries = [s for k, (_, s) in self._entries.items() if k[0] == KIND_QUERY]
+        evict = len(queries) - max_queries + max(1, max_queries // 10)
+        for suggestion in heapq.nsmallest(evict, queries, key=lambda s: s.weight):
+            self.remove(KIND_QUERY, suggestion.ident)
+
+    def _category_suggestion(self, category: Category) -> Suggestion:
+        return Suggestion(
+            KIND_CATEGORY,
+            category.id,
+            category.name,
+            category.likes * self.config["LIKE_WEIGHT"] + category.views,
+            category.slug or "",
+        )
+
+    @staticmethod
+    def _page_suggestion(page: Page) -> Suggestion:
+        return Suggestion(KIND_PAGE, page.id, page.title, page.views)
+
+
+# 全局搜索建议索引
+suggestion_index = SuggestionIndex()
+
+
+def _resolve_counters(instance, fields):
+    """计数字段以 F() 表达式保存时，从数据库读取计算后的值"""
+    expressions = [
+        field
+        for field in fields
+        if hasattr(getattr(instance, field), "resolve_expression")
+    ]
+    if expressions:
+        instance.refresh_from_db(fields=expressions)
+
+
+@receiver(post_save, sender=Category)
+def update_category_suggestion(sender, instance, **kwargs):
+    _resolve_counters(instance, ("likes", "views"))
+    suggestion_index.add_category(instance)
+
+
+@receiver(post_save, sender=Page)
+def update_page_suggestion(sender, instance, **kwargs):
+    _resolve_counters(instance, ("views",))
+    suggestion_index.add_page(instance)
+
+
+@receiver(counters_flushed, sender=Category)
+def update_category_weights(sender, deltas, **kwargs):
+    like_weight = suggestion_index.config["LIKE_WEIGHT"]
+    for pk, fields in deltas.items():
+        suggestion_index.add_weight(
+            KIND_CATEGORY,
+            pk,
+            fields.get("likes", 0) * like_weight + fields.get("views", 0),
+        )
+
+
+@receiver(counters_flushed, sender=Page)
+def update_page_weights(sender, deltas, **kwargs):
+    for pk, fields in deltas.items():
+        suggestion_index.add_weight(KIND_PAGE, pk, fields.get("views", 0))
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_suggestion(sender, instance, **kwargs):
+    suggestion_index.remove(KIND_CATEGORY, instance.id)
+
+
+@receiver(post_delete, sender=Page)
+def remove_page_suggestion(sender, instance, **kwargs):
+    suggestion_index.remove(KIND_PAGE, instance.id)
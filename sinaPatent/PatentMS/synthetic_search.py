@@ -0,0 +1,439 @@
+"""
+合成搜索语料模块
+按固定种子生成可复现的大规模合成文档集合（文档的词项保存在紧凑数组中），
+建立数组形式的倒排索引，合成搜索引擎按真实的检索路径返回结果；
+延迟和错误按配置的分布随机产生，用于在没有网络的环境中对搜索服务和视图做压力测试
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from PatentMS.relevance import tokenize
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可通过 settings.SEARCH_SYNTHETIC 覆盖
+DEFAULT_SYNTHETIC = {
+    "SEED": 20240601,  # 随机种子，配置相同时生成相同的语料
+    "DOCUMENTS": 200000,  # 文档数（压力测试可调到数百万）
+    "VOCABULARY": 5000,  # 词表大小（常用技术词之外用合成词补足）
+    "TERMS_PER_DOCUMENT": 8,  # 每篇文档的词项数
+    "ZIPF_EXPONENT": 1.0,  # 词频幂律分布的指数（越大高频词越集中）
+    "LATENCY_DISTRIBUTION": "lognormal",  # "fixed" / "uniform" / "lognormal"
+    "LATENCY_MEDIAN": 0.2,  # 延迟中位数（秒），fixed 时为固定延迟
+    "LATENCY_SIGMA": 0.6,  # 对数正态分布的形状参数（越大长尾越重）
+    "LATENCY_MIN": 0.0,  # 延迟下限（秒），uniform 时为区间下限
+    "LATENCY_MAX": 5.0,  # 延迟上限（秒），uniform 时为区间上限
+    "ERROR_RATE": 0.0,  # 请求立即失败的概率
+    "TIMEOUT_RATE": 0.0,  # 请求超时的概率（等待 LATENCY_MAX 后失败）
+    "BUILD_AT_STARTUP": True,  # 使用合成引擎时在启动后台线程中生成语料
+}
+
+# 内置词（中文词只用两个字，与分词得到的二元组一致）
+# 通用词排在专业词之前（出现频率更高），检索结果不足时先放宽这些词
+GENERIC_TERMS = (
+    "教程",
+    "文档",
+    "学习",
+    "指南",
+    "入门",
+    "基础",
+    "进阶",
+    "实战",
+    "开发",
+    "手册",
+    "参考",
+    "示例",
+    "安装",
+    "配置",
+    "部署",
+    "性能",
+    "优化",
+    "调试",
+    "测试",
+    "源码",
+    "原理",
+    "框架",
+    "数据",
+    "网络",
+    "安全",
+    "面试",
+    "笔记",
+    "api",
+    "web",
+    "http",
+)
+
+TOPIC_TERMS = (
+    "python",
+    "django",
+    "flask",
+    "java",
+    "spring",
+    "javascript",
+    "typescript",
+    "node.js",
+    "react",
+    "vue",
+    "html",
+    "css",
+    "sql",
+    "mysql",
+    "postgresql",
+    "redis",
+    "mongodb",
+    "git",
+    "docker",
+    "kubernetes",
+    "linux",
+    "nginx",
+    "go",
+    "rust",
+    "c++",
+    "c#",
+    "算法",
+    "并发",
+    "缓存",
+    "爬虫",
+)
+
+# 合成词的音节（只用小写字母，分词时作为一个英文单词）
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"]
+
+SITES = (
+    "docs.example.com",
+    "learn.example.org",
+    "blog.example.net",
+    "wiki.example.cn",
+    "forum.example.io",
+    "notes.example.dev",
+)
+
+# 生成文档词项时每批抽样的数量（限制中间列表的内存）
+BATCH_SIZE = 1 << 20
+
+
+def get_synthetic_config() -> Dict:
+    """获取合并后的合成搜索配置"""
+    config = dict(DEFAULT_SYNTHETIC)
+    config.update(getattr(settings, "SEARCH_SYNTHETIC", {}))
+    return config
+
+
+def make_vocabulary(rng: random.Random, size: int) -> List[str]:
+    """
+    生成按频率排名排列的词表：少量合成的高频词，其后是通用词和专业词，其余为合成词
+
+    Args:
+        rng: 随机数生成器
+        size: 词表大小（不小于内置词的数量）
+
+    Returns:
+        词表，下标即频率排名
+    """
+    known = list(GENERIC_TERMS + TOPIC_TERMS)
+    words = set(known)
+    synthetic = []
+    while len(known) + len(synthetic) < size:
+        word = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        if word not in words:
+            words.add(word)
+            synthetic.append(word)
+    head = min(20, len(synthetic))
+    return synthetic[:head] + known + synthetic[head:]
+
+
+class SyntheticCorpus:
+    """
+    合成文档集合及其倒排索引
+
+    文档 i 的词项是 doc_terms[i * k:(i + 1) * k]；词项 t 的倒排列表是
+    postings[offsets[t]:offsets[t + 1]]（按文档编号升序，编号越小排名越靠前）
+    """
+
+    def __init__(
+        self,
+        vocabulary: List[str],
+        doc_terms: array,
+        terms_per_document: int,
+        offsets: array,
+        postings: array,
+    ):
+        self.vocabulary = vocabulary
+        self.term_ids = {term: index for index, term in enumerate(vocabulary)}
+        self.doc_terms = doc_terms
+        self.terms_per_document = terms_per_document
+        self.offsets = offsets
+        self.postings = postings
+        self._postings_view = memoryview(postings)
+
+    @classmethod
+    def build(cls, config: Optional[Dict] = None) -> "SyntheticCorpus":
+        """
+        按配置生成语料并建立倒排索引
+
+        Args:
+            config: 合成搜索配置
+
+        Returns:
+            SyntheticCorpus 实例
+        """
+        config = config or get_synthetic_config()
+        started = time.monotonic()
+        rng = random.Random(config["SEED"])
+        vocabulary = make_vocabulary(rng, config["VOCABULARY"])
+        size = len(vocabulary)
+        k = config["TERMS_PER_DOCUMENT"]
+        total = config["DOCUMENTS"] * k
+
+        # 词项按排名服从幂律分布
+        exponent = config["ZIPF_EXPONENT"]
+        cum_weights = list(accumulate(rank**-exponent for rank in range(1, size + 1)))
+        doc_terms = array("H" if size <= 0xFFFF else "I")
+        population = range(size)
+        for start in range(0, total, BATCH_SIZE):
+            doc_terms.extend(
+                rng.choices(
+                    population,
+                    cum_weights=cum_weights,
+                    k=min(BATCH_SIZE, total - start),
+                )
+            )
+
+        # 两遍计数排序建立倒排列表：先统计每个词项的文档数，再按文档顺序填入
+        counts = array("I", bytes(4 * size))
+        for term in doc_terms:
+            counts[term] += 1
+        offsets = array("I", [0])
+        offsets.extend(accumulate(counts))
+        cursor = array("I", offsets[:-1])
+        postings = array("I", bytes(4 * total))
+        for position, term in enumerate(doc_terms):
+            postings[cursor[term]] = position // k
+            cursor[term] += 1
+
+        corpus = cls(vocabulary, doc_terms, k, offsets, postings)
+        logger.info(
+            f"合成语料生成完成: {config['DOCUMENTS']} 篇文档，{size} 个词项，"
+            f"索引 {corpus.nbytes / 1048576:.1f}MB，"
+            f"耗时 {time.monotonic() - started:.2f}s"
+        )
+        return corpus
+
+    @property
+    def documents(self) -> int:
+        """文档数"""
+        return len(self.doc_terms) // self.terms_per_document
+
+    @property
+    def nbytes(self) -> int:
+        """文档词项和倒排索引占用的字节数"""
+        return sum(
+            len(a) * a.itemsize for a in (self.doc_terms, self.offsets, self.postings)
+        )
+
+    def lookup(self, query: str) -> List[int]:
+        """
+        查询中属于词表的词项（与相关性打分使用相同的分词）
+
+        Args:
+            query: 搜索关键词
+
+        Returns:
+            去重后的词项编号
+        """
+        term_ids = (self.term_ids.get(token) for token in tokenize(query))
+        return list(dict.fromkeys(t for t in term_ids if t is not None))
+
+    def posting(self, term_id: int) -> memoryview:
+        """词项的倒排列表（不复制）"""
+        return self._postings_view[self.offsets[term_id] : self.offsets[term_id + 1]]
+
+    def match(self, query: str, offset: int = 0, limit: int = 10) -> List[int]:
+        """
+        检索包含查询词项的文档
+
+        先取包含全部词项的文档；不足时依次放宽最常见的词项（只要求较罕见的词项），
+        各层内按文档编号排序，匹配到 offset + limit 篇即停止
+
+        Args:
+            query: 搜索关键词
+            offset: 跳过的结果数
+            limit: 返回的结果数
+
+        Returns:
+            文档编号列表
+        """
+        needed = offset + limit
+        lists = sorted((self.posting(t) for t in self.lookup(query)), key=len)
+        found = []
+        seen = set()
+        for size in range(len(lists), 0, -1):
+            self._intersect(lists[:size], needed, found, seen)
+            if len(found) >= needed:
+                break
+        return found[offset:needed]
+
+    @staticmethod
+    def _intersect(lists: List[memoryview], needed: int, found: List, seen: set):
+        """遍历最短的倒排列表，在其余列表中二分查找，结果追加到 found"""
+        first, rest = lists[0], lists[1:]
+        previous = -1
+        for doc_id in first:
+            if doc_id == previous or doc_id in seen:
+                continue
+            previous = doc_id
+            for other in rest:
+                index = bisect_left(other, doc_id)
+                if index == len(other) or other[index] != doc_id:
+                    break
+            else:
+                seen.add(doc_id)
+                found.append(doc_id)
+                if len(found) >= needed:
+                    return
+
+    def document(self, doc_id: int) -> Dict:
+        """
+        由文档的词项生成标题、URL和摘要
+
+        Args:
+            doc_id: 文档编号
+
+        Returns:
+            {"title", "url", "abstract"}
+        """
+        k = self.terms_per_document
+        words = [
+            self.vocabulary[t] for t in self.doc_terms[doc_id * k : doc_id * k + k]
+        ]
+        site = SITES[doc_id % len(SITES)]
+        return {
+            "title": f"{' '.join(words[:4])} - {site.split('.')[0]}",
+            "url": f"https://{site}/doc/{doc_id:x}",
+            "abstract": f"{'，'.join(words)}。",
+        }
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        """
+        搜索建议：补全最后一个词，已是完整的词时追加常见的通用词
+
+        Args:
+            query: 搜索关键词
+            limit: 建议数量
+
+        Returns:
+            按词频排序的建议
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        head, _, prefix = query.rpartition(" ")
+        head = f"{head} " if head else ""
+        suggestions = [
+            f"{head}{term}"
+            for term in self.vocabulary
+            if term.startswith(prefix) and term != prefix
+        ][:limit]
+        if not suggestions:
+            suggestions = [f"{query} {term}" for term in GENERIC_TERMS[:limit]]
+        return suggestions
+
+
+class FaultModel:
+    """按配置的分布为每次请求抽取延迟和失败"""
+
+    def __init__(self, config: Optional[Dict] = None, seed: Optional[int] = None):
+        self.config = config or get_synthetic_config()
+        self._rng = random.Random(self.config["SEED"] if seed is None else seed)
+        self._lock = threading.Lock()
+
+    def latency(self) -> float:
+        """
+        抽取一次请求的延迟
+
+        Returns:
+            延迟（秒），限制在 [LATENCY_MIN, LATENCY_MAX] 内
+        """
+        config = self.config
+        distribution = config["LATENCY_DISTRIBUTION"]
+        low, high = config["LATENCY_MIN"], config["LATENCY_MAX"]
+        with self._lock:
+            if distribution == "fixed":
+                value = config["LATENCY_MEDIAN"]
+            elif distribution == "uniform":
+                value = self._rng.uniform(low, high)
+            elif distribution == "lognormal":
+                median = config["LATENCY_MEDIAN"]
+                value = (
+                    self._rng.lognormvariate(math.log(median), config["LATENCY_SIGMA"])
+                    if median > 0
+                    else 0.0
+                )
+            else:
+                raise ValueError(f"未知的延迟分布: {distribution}")
+        return min(max(value, low), high)
+
+    def sample(self) -> Tuple[float, Optional[str]]:
+        """
+        抽取一次请求的结果
+
+        Returns:
+            (等待时间（秒）, 失败原因)，成功时失败原因为 None
+        """
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.config["ERROR_RATE"]:
+            return self.latency(), "请求失败（模拟错误）"
+        if roll < self.config["ERROR_RATE"] + self.config["TIMEOUT_RATE"]:
+            return self.config["LATENCY_MAX"], "请求超时（模拟超时）"
+        return self.latency(), None
+
+
+_corpus = None
+_corpus_key = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> SyntheticCorpus:
+    """
+    获取全局合成语料（首次调用时生成，生成参数变化时重新生成）
+
+    Returns:
+        SyntheticCorpus 实例
+    """
+    global _corpus, _corpus_key
+    config = get_synthetic_config()
+    key = tuple(
+        config[name]
+        for name in (
+            "SEED",
+            "DOCUMENTS",
+            "VOCABULARY",
+            "TERMS_PER_DOCUMENT",
+            "ZIPF_EXPONENT",
+        )
+    )
+    if _corpus is None or _corpus_key != key:
+        with _corpus_lock:
+            if _corpus is None or _corpus_key != key:
+                _corpus = SyntheticCorpus.build(config)
+                _corpus_key = key
+    return _corpus
+
+
+def start_build_corpus(engine):
+    """搜索引擎（包括组合引擎中的各个引擎）使用合成引擎时，在后台线程中生成语料"""
+    engines = getattr(engine, "engines", None) or [engine]
+    if not any(getattr(e, "name", "") == "synthetic" for e in engines):
+        return
+    threading.Thread(target=get_corpus, name="synthetic-corpus", daemon=True).start()
@@ -1,11 +1,13 @@
 from django import template
+from PatentMS.counters import counters
 from PatentMS.models import Category
 
 register = template.Library()
 
 @register.inclusion_tag('PatentMS/categories.html')
 def get_category_list(current_category=None):
-    return {'categories':Category.objects.all(),
+    # 计数加上尚未写入数据库的增量
+    return {'categories':counters.with_pending(Category.objects.all()),
             'current_category':current_category}
 
 # 自定义数学运算过滤器
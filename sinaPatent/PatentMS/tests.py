@@ -3,6 +3,25 @@ from django.urls import reverse
 from PatentMS.models import Category, Page, UserProfile
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import override_settings
+import tempfile
+
+# 测试期间搜索结果存储使用临时文件，不写入开发环境的存储
+_store_dir = tempfile.TemporaryDirectory()
+_store_settings = override_settings(
+    SEARCH_STORE={"ENABLED": True, "PATH": f"{_store_dir.name}/search_store.sqlite3"},
+    # 计数直接写入数据库（缓冲的后台线程不能写入测试事务）
+    COUNTERS={"BUFFERED": False},
+)
+
+
+def setUpModule():
+    _store_settings.enable()
+
+
+def tearDownModule():
+    _store_settings.disable()
+    _store_dir.cleanup()
 
 
 class CategoryMethodTests(TestCase):
@@ -245,3 +264,2415 @@ class URLTests(TestCase):
         """测试管理后台URL"""
         response = self.client.get("/admin/")
         self.assertEqual(response.status_code, 302)  # 重定向到登录页面
+
+
+class CountingSearchEngine:
+    """测试用搜索引擎，记录调用次数"""
+
+    name = "counting"
+
+    def __init__(self, results=None):
+        self.calls = 0
+        self.results = results
+
+    def search(self, query, num_results=10):
+        self.calls += 1
+        if self.results is not None:
+            return [dict(result) for result in self.results]
+        return [
+            {
+                "title": f"{query} 教程 {self.calls}",
+                "url": f"https://example.com/{self.calls}",
+                "abstract": "测试摘要",
+                "source": self.name,
+            }
+        ]
+
+    def get_suggestions(self, query):
+        return [f"{query}教程"]
+
+
+class SearchResultCacheTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from django.core.cache import cache
+        from PatentMS.search_service import SearchService
+
+        cache.clear()
+        self.service = SearchService(use_mock=True)
+        self.engine = CountingSearchEngine()
+        self.service.search_engine = self.engine
+
+    def test_repeated_search_served_from_cache(self):
+        """测试相同查询只执行一次实际搜索"""
+        first = self.service.search_pages("Python", "Python", 10)
+        second = self.service.search_pages("  python ", "PYTHON", 10)
+        self.assertEqual(self.engine.calls, 1)
+        self.assertEqual(first, second)
+
+    def test_cached_results_are_copies(self):
+        """测试调用者修改结果不会污染缓存"""
+        results = self.service.search_pages("Python", "", 10)
+        results[0]["exists"] = True
+        again = self.service.search_pages("Python", "", 10)
+        self.assertNotIn("exists", again[0])
+
+    def test_local_tier_is_bounded(self):
+        """测试进程内LRU的容量限制"""
+        from PatentMS.search_cache import SearchResultCache, get_search_cache_config
+
+        config = get_search_cache_config()
+        config["LOCAL_MAX_ENTRIES"] = 2
+        result_cache = SearchResultCache(config)
+        for i in range(3):
+            result_cache.set(f"key-{i}", [{"title": str(i)}], "counting")
+        self.assertEqual(list(result_cache._local), ["key-1", "key-2"])
+        # 被淘汰的条目仍可从共享缓存读取
+        self.assertIsNotNone(result_cache.get("key-0"))
+
+    def test_stale_entry_served_while_revalidating(self):
+        """测试过期条目立即返回，并在后台刷新"""
+        import time
+
+        result_cache = self.service.result_cache
+        key = result_cache.make_key("counting", "old query", "", 10)
+        entry = result_cache.set(key, [{"title": "旧结果"}], "counting")
+        entry["fresh_until"] = time.time() - 1
+        result_cache._set_local(key, entry)
+
+        results = result_cache.get_or_compute(
+            key, lambda: [{"title": "新结果"}], "counting"
+        )
+        self.assertEqual(results[0]["title"], "旧结果")
+
+        deadline = time.time() + 2
+        while time.time() < deadline:
+            if result_cache.get(key)["results"][0]["title"] == "新结果":
+                break
+            time.sleep(0.01)
+        self.assertEqual(result_cache.get(key)["results"][0]["title"], "新结果")
+
+
+class SleepySearchEngine(CountingSearchEngine):
+    """测试用搜索引擎，返回前先等待一段时间"""
+
+    def __init__(self, name, delay, results):
+        super().__init__(results)
+        self.name = name
+        self.delay = delay
+
+    def search(self, query, num_results=10):
+        import time
+
+        time.sleep(self.delay)
+        return super().search(query, num_results)
+
+
+class MetaSearchTests(TestCase):
+    def test_canonical_url(self):
+        """测试URL规范化忽略协议、www、末尾斜杠、锚点和跟踪参数"""
+        from PatentMS.search_service import canonical_url
+
+        self.assertEqual(
+            canonical_url("http://www.Example.com/docs/?utm_source=x&b=2&a=1#top"),
+            canonical_url("https://example.com/docs?a=1&b=2"),
+        )
+        self.assertNotEqual(
+            canonical_url("https://example.com/a"),
+            canonical_url("https://example.com/b"),
+        )
+
+    def test_results_merged_and_deduplicated(self):
+        """测试多引擎结果按规范化URL去重并记录来源"""
+        from PatentMS.search_service import MetaSearchService
+
+        bing = SleepySearchEngine(
+            "bing",
+            0,
+            [
+                {"title": "A", "url": "https://example.com/a", "source": "bing"},
+                {"title": "B", "url": "https://example.com/b", "source": "bing"},
+            ],
+        )
+        baidu = SleepySearchEngine(
+            "baidu",
+            0.05,
+            [{"title": "A2", "url": "http://www.example.com/a/", "source": "baidu"}],
+        )
+        service = MetaSearchService(
+            engines=[bing, baidu], deadline=2, early_return=False
+        )
+        results = service.search("python", 10)
+        self.assertEqual([r["title"] for r in results], ["A", "B"])
+        self.assertEqual(results[0]["sources"], ["bing", "baidu"])
+
+    def test_deadline_returns_arrived_results(self):
+        """测试截止时间到达时只返回已完成引擎的结果"""
+        import time
+        from PatentMS.search_service import MetaSearchService
+
+        fast = SleepySearchEngine(
+            "fast",
+            0,
+            [{"title": "快", "url": "https://fast.example/", "source": "fast"}],
+        )
+        slow = SleepySearchEngine(
+            "slow",
+            1,
+            [{"title": "慢", "url": "https://slow.example/", "source": "slow"}],
+        )
+        service = MetaSearchService(
+            engines=[slow, fast], deadline=0.2, early_return=False
+        )
+        started = time.monotonic()
+        results = service.search("python", 10)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual([r["title"] for r in results], ["快"])
+
+
+class FailingSearchEngine(CountingSearchEngine):
+    """测试用搜索引擎，每次调用都抛出异常"""
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def fetch_results(self, query, num_results=10):
+        from PatentMS.search_service import SearchEngineError
+
+        self.calls += 1
+        raise SearchEngineError("模拟失败")
+
+
+class AdaptiveSearchTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from PatentMS.engine_health import DEFAULT_ADAPTIVE, EngineHealthRegistry
+
+        self.config = dict(DEFAULT_ADAPTIVE, FAILURE_THRESHOLD=2, OPEN_SECONDS=60)
+        self.registry = EngineHealthRegistry(self.config)
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        """测试连续失败后熔断，熔断到期后探测成功即恢复"""
+        from PatentMS.engine_health import CLOSED, HALF_OPEN, OPEN
+
+        health = self.registry.get("bing")
+        health.record_failure(0.1)
+        health.record_failure(0.1)
+        self.assertEqual(health.state, OPEN)
+        self.assertFalse(health.begin_request())
+
+        health.open_until = 0  # 模拟熔断到期
+        self.assertTrue(health.begin_request())
+        self.assertEqual(health.state, HALF_OPEN)
+        self.assertFalse(health.begin_request())  # 只允许一个探测请求
+
+        health.record_success(0.2)
+        self.assertEqual(health.state, CLOSED)
+        self.assertTrue(health.begin_request())
+
+    def test_failover_skips_failing_engine(self):
+        """测试引擎失败时立即切换，熔断后不再调用该引擎"""
+        from PatentMS.search_service import AdaptiveSearchService
+
+        broken = FailingSearchEngine("broken")
+        backup = SleepySearchEngine(
+            "backup",
+            0,
+            [{"title": "备用", "url": "https://backup.example/", "source": "backup"}],
+        )
+        # 备用引擎较慢，故障引擎熔断前会被优先选择
+        for _ in range(5):
+            self.registry.get("backup").record_success(1.0)
+        service = AdaptiveSearchService(
+            engines=[broken, backup], registry=self.registry, deadline=2
+        )
+        for _ in range(3):
+            results = service.search("python", 10)
+            self.assertEqual([r["title"] for r in results], ["备用"])
+        self.assertEqual(broken.calls, 2)
+        self.assertEqual(self.registry.get("broken").snapshot()["state"], "open")
+
+    def test_empty_results_do_not_open_breaker(self):
+        """测试正常返回的空结果计为成功，不触发熔断也不切换引擎"""
+        from PatentMS.search_service import AdaptiveSearchService
+
+        empty = SleepySearchEngine("empty", 0, [])
+        backup = SleepySearchEngine(
+            "backup",
+            0,
+            [{"title": "备用", "url": "https://backup.example/", "source": "backup"}],
+        )
+        for _ in range(5):
+            self.registry.get("backup").record_success(1.0)
+        service = AdaptiveSearchService(
+            engines=[empty, backup], registry=self.registry, deadline=2
+        )
+        for _ in range(3):
+            self.assertEqual(service.search("冷门查询", 10), [])
+        self.assertEqual(empty.calls, 3)
+        self.assertEqual(backup.calls, 0)
+        self.assertEqual(self.registry.get("empty").snapshot()["state"], "closed")
+
+    def test_hedged_request_when_primary_slow(self):
+        """测试主引擎超过对冲等待时间未返回时，向次优引擎发出对冲请求"""
+        import time
+        from PatentMS.search_service import AdaptiveSearchService
+
+        self.config["HEDGE_DEFAULT_DELAY"] = 0.05
+        slow = SleepySearchEngine(
+            "slow",
+            1,
+            [{"title": "慢", "url": "https://slow.example/", "source": "slow"}],
+        )
+        fast = SleepySearchEngine(
+            "fast",
+            0,
+            [{"title": "快", "url": "https://fast.example/", "source": "fast"}],
+        )
+        service = AdaptiveSearchService(
+            engines=[slow, fast], registry=self.registry, deadline=3
+        )
+        started = time.monotonic()
+        results = service.search("python", 10)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual([r["title"] for r in results], ["快"])
+
+    def test_rank_by_latency_and_errors(self):
+        """测试按延迟和错误率排序引擎"""
+        for _ in range(5):
+            self.registry.get("a").record_success(1.0)
+            self.registry.get("b").record_success(0.2)
+        self.registry.get("b").record_failure(0.2)
+        engines = [SleepySearchEngine(name, 0, []) for name in ("a", "b")]
+        ranked = self.registry.rank(engines)
+        self.assertEqual([e.name for e in ranked], ["b", "a"])
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_concurrent_searches_coalesced(self):
+        """测试同一进程中相同查询的并发搜索只请求一次搜索引擎"""
+        import threading
+        from PatentMS.search_service import SearchService
+
+        service = SearchService(use_mock=True, use_cache=False)
+        engine = SleepySearchEngine(
+            "slow",
+            0.2,
+            [{"title": "python 教程", "url": "https://a.example/", "source": "slow"}],
+        )
+        service.search_engine = engine
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(service.search_pages("python"))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(engine.calls, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r[0]["title"] == "python 教程" for r in results))
+        # 每个调用者拿到独立的副本
+        self.assertIsNot(results[0][0], results[1][0])
+
+    def test_waits_for_lease_holder_in_other_process(self):
+        """测试租约被其他进程持有时等待其发布的结果"""
+        import threading
+        from django.core.cache import cache
+        from PatentMS.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        lease_key, result_key = flight._lease_keys("k")
+        cache.add(lease_key, "other-process", 30)
+
+        def publish():
+            cache.set(result_key, ["远程结果"], 5)
+            cache.delete(lease_key)
+
+        threading.Timer(0.1, publish).start()
+        calls = []
+        result = flight.do("k", lambda: calls.append(1) or ["本地结果"])
+        self.assertEqual(result, ["远程结果"])
+        self.assertEqual(calls, [])
+        self.assertEqual(flight.stats()["remote"], 1)
+
+    def test_async_suggestions_coalesced(self):
+        """测试异步并发获取相同的搜索建议只请求一次"""
+        import asyncio
+        from PatentMS.search_service import SearchService
+
+        class SlowSuggestEngine(CountingSearchEngine):
+            async def get_suggestions(self, query):
+                self.calls += 1
+                await asyncio.sleep(0.05)
+                return [f"{query}教程"]
+
+        service = SearchService(use_mock=True)
+        engine = SlowSuggestEngine()
+        service._async_engine = engine
+        service._async_engine_source = service.search_engine
+
+        async def run():
+            return await asyncio.gather(
+                *[service.aget_suggestions("Django ") for _ in range(5)]
+            )
+
+        suggestions = asyncio.run(run())
+        self.assertEqual(engine.calls, 1)
+        self.assertEqual(suggestions[0], ["Django 教程"])
+
+
+class HTTPClientTests(TestCase):
+    def test_sessions_are_per_thread_with_shared_pool(self):
+        """测试每个线程使用独立会话，且所有会话共享同一个连接池"""
+        import threading
+        from PatentMS.search_service import SimpleSearchService
+
+        engine = SimpleSearchService()
+        sessions = [engine.session]
+        thread = threading.Thread(target=lambda: sessions.append(engine.session))
+        thread.start()
+        thread.join()
+
+        self.assertIs(engine.session, sessions[0])
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertIs(
+            sessions[0].get_adapter("https://cn.bing.com/"),
+            sessions[1].get_adapter("https://cn.bing.com/"),
+        )
+        self.assertIn("zh-CN", sessions[1].headers["Accept-Language"])
+
+    def test_adapter_pool_and_retry(self):
+        """测试连接池大小和重试策略来自配置"""
+        from PatentMS.http_client import DEFAULT_HTTP_CLIENT, build_adapter
+
+        config = dict(DEFAULT_HTTP_CLIENT, POOL_MAXSIZE=7, MAX_RETRIES=4)
+        adapter = build_adapter(config)
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertEqual(adapter.max_retries.connect, 4)
+        self.assertEqual(adapter.max_retries.read, 0)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+    def test_warm_up(self):
+        """测试预热连接并收集组合引擎的预热URL"""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from PatentMS.http_client import get_warmup_urls, warm_up
+        from PatentMS.search_service import AdaptiveSearchService
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/"
+            timings = warm_up([url, "http://127.0.0.1:1/"], timeout=1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertIsNotNone(timings[url])
+        self.assertIsNone(timings["http://127.0.0.1:1/"])
+        self.assertIn("https://cn.bing.com/", get_warmup_urls(AdaptiveSearchService()))
+
+
+class SuggestionIndexTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from PatentMS.suggestion_index import suggestion_index
+
+        self.index = suggestion_index
+        self.index.reset()
+        self.python = Category.objects.create(name="Python", likes=1)
+        self.pytorch = Category.objects.create(name="PyTorch", likes=5)
+        Page.objects.create(
+            category=self.python, title="Python 官方文档", url="https://a.example/"
+        )
+
+    def test_prefix_search_ranked_by_weight(self):
+        """测试按前缀查找并按权重排序，可按来源过滤"""
+        from PatentMS.suggestion_index import KIND_CATEGORY
+
+        self.index.ensure_fresh()
+        texts = [s.text for s in self.index.suggest("py", 5)]
+        self.assertEqual(texts[:2], ["PyTorch", "Python"])
+        self.assertIn("Python 官方文档", texts)
+        categories = self.index.suggest("PY", 5, kinds=[KIND_CATEGORY])
+        self.assertEqual({s.text for s in categories}, {"PyTorch", "Python"})
+        self.assertEqual(self.index.suggest("java", 5), [])
+
+    def test_incremental_update_on_save_and_delete(self):
+        """测试模型保存和删除时增量更新索引"""
+        self.index.ensure_fresh()
+        self.python.likes = 10
+        self.python.save()
+        Category.objects.create(name="Pygame")
+        self.assertEqual(self.index.suggest_texts("py", 1), ["Python"])
+        self.assertIn("Pygame", self.index.suggest_texts("pyg", 5))
+
+        self.pytorch.delete()
+        self.assertNotIn("PyTorch", self.index.suggest_texts("py", 5))
+
+    def test_query_history_frequency_and_eviction(self):
+        """测试历史搜索词按次数排序，超过上限时淘汰最少使用的"""
+        from PatentMS.suggestion_index import DEFAULT_SUGGESTIONS, SuggestionIndex
+
+        index = SuggestionIndex(dict(DEFAULT_SUGGESTIONS, MAX_QUERIES=3))
+        for query in ["django 入门", "django orm", "django orm", "django 部署"]:
+            index.record_query(query)
+        self.assertEqual(index.suggest_texts("django", 1), ["django orm"])
+
+        index.record_query("django admin")
+        texts = index.suggest_texts("django", 5)
+        self.assertIn("django orm", texts)
+        self.assertLessEqual(len(texts), 3)
+
+    def test_views_use_local_index_before_upstream(self):
+        """测试搜索建议优先使用本地索引，分类建议不再查询数据库"""
+        from PatentMS import views
+
+        engine = CountingSearchEngine()
+        original_engine = views.search_service.search_engine
+        views.search_service.search_engine = engine
+        try:
+            for name in ["Pyramid", "PySpark", "PyQt"]:
+                Category.objects.create(name=name)
+            response = self.client.get(reverse("search_suggestions"), {"query": "py"})
+            self.assertEqual(len(response.json()["suggestions"]), 5)
+            self.assertEqual(response.json()["suggestions"][0], "PyTorch")
+        finally:
+            views.search_service.search_engine = original_engine
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("suggest"), {"suggestion": "pyt"})
+        self.assertContains(response, "PyTorch")
+        self.assertContains(response, "Python")
+
+
+class TransportTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        import tempfile
+        from PatentMS.transport import SerpCorpus, prepared_url
+        from PatentMS.search_service import SimpleSearchService
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.corpus = SerpCorpus(self.tmpdir.name)
+        url, params = SimpleSearchService()._build_search_request("python", 10)
+        self.url = prepared_url(url, params)
+        self.corpus.save(
+            self.url, 200, {"Content-Type": "text/html"}, BING_SERP_HTML.encode()
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_corpus_roundtrip_ignores_scheme_and_param_order(self):
+        """测试语料库压缩存储，键忽略协议和参数顺序"""
+        import os
+        from PatentMS.transport import SerpCorpus
+
+        corpus = SerpCorpus(self.tmpdir.name)  # 新实例，从磁盘读取
+        same = "http://cn.bing.com/search?ensearch=0&q=python"
+        self.assertEqual(corpus.load(same)["body"], BING_SERP_HTML)
+        self.assertTrue(corpus.path_for(self.url).endswith(".json.gz"))
+        self.assertTrue(os.path.exists(corpus.path_for(self.url)))
+        self.assertIsNone(corpus.load("https://cn.bing.com/search?q=java"))
+
+    def test_replay_adapter(self):
+        """测试引擎通过回放传输得到录制的结果，未录制的请求视为失败"""
+        from PatentMS.search_service import SearchEngineError, SimpleSearchService
+        from PatentMS.transport import ReplayAdapter
+
+        engine = SimpleSearchService(adapter=ReplayAdapter(self.corpus))
+        results = engine.fetch_results("python", 10)
+        self.assertEqual(results[0]["url"], "https://docs.python.org/3/")
+        with self.assertRaises(SearchEngineError):
+            engine.fetch_results("java", 10)
+
+    def test_standin_server_with_error_injection(self):
+        """测试替身服务器回放语料库，并按概率注入错误"""
+        import threading
+        from PatentMS.http_client import DEFAULT_HTTP_CLIENT, build_adapter
+        from PatentMS.search_service import SearchEngineError, SimpleSearchService
+        from PatentMS.transport import StandinAdapter, StandinServer
+
+        server = StandinServer(self.corpus, ("127.0.0.1", 0), seed=1)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            adapter = StandinAdapter(
+                build_adapter(dict(DEFAULT_HTTP_CLIENT, MAX_RETRIES=0)),
+                server.base_url,
+            )
+            engine = SimpleSearchService(adapter=adapter)
+            self.assertEqual(len(engine.fetch_results("python", 10)), 2)
+
+            server.error_rate = 1.0
+            with self.assertRaises(SearchEngineError):
+                engine.fetch_results("python", 10)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(server.stats["ok"], 1)
+        self.assertEqual(server.stats["error"], 1)
+
+    def test_benchmark_command(self):
+        """测试基准测试命令输出各指标的分位数"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command(
+            "search_benchmark",
+            engines=["bing"],
+            queries=["python", "java"],
+            iterations=3,
+            corpus=self.tmpdir.name,
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("语料库命中 1/2", output)
+        for metric in ("parse", "filter", "end_to_end"):
+            self.assertIn(metric, output)
+        self.assertIn("端到端错误: 0", output)
+
+
+class AsyncSearchTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from django.core.cache import cache
+        from PatentMS import views
+
+        cache.clear()
+        views.suggestion_index.reset()
+        self.user = User.objects.create_user(
+            username="searcher", password="testpass123"
+        )
+        self.category = Category.objects.create(name="Python")
+        Page.objects.create(
+            category=self.category, title="Python 教程", url="https://example.com/1"
+        )
+        self.engine = CountingSearchEngine(
+            [
+                {
+                    "title": "Python 教程",
+                    "url": "https://example.com/1",
+                    "abstract": "测试摘要",
+                    "source": "counting",
+                }
+            ]
+        )
+        self.original_engine = views.search_service.search_engine
+        views.search_service.search_engine = self.engine
+        views.search_service.result_cache.clear_local()
+
+    def tearDown(self):
+        from PatentMS import views
+
+        views.search_service.search_engine = self.original_engine
+
+    def test_real_search_view(self):
+        """测试异步搜索视图返回结果并标记已存在页面"""
+        self.client.login(username="searcher", password="testpass123")
+        response = self.client.get(
+            reverse("real_search"), {"query": "python", "category_id": self.category.id}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["total"], 1)
+        self.assertTrue(data["results"][0]["exists"])
+        self.assertEqual(self.engine.calls, 1)
+
+    def test_real_search_view_requires_login(self):
+        """测试未登录用户访问搜索接口被重定向"""
+        response = self.client.get(reverse("real_search"), {"query": "python"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_search_suggestions_view(self):
+        """测试异步搜索建议视图"""
+        response = self.client.get(reverse("search_suggestions"), {"query": "django"})
+        self.assertEqual(response.json(), {"suggestions": ["django教程"]})
+
+    def test_real_search_view_cursor(self):
+        """测试搜索接口按游标分批返回结果"""
+        self.engine.results = make_page(0, count=15)
+        self.client.login(username="searcher", password="testpass123")
+
+        data = self.client.get(reverse("real_search"), {"query": "python"}).json()
+        self.assertEqual((data["total"], data["next_cursor"]), (10, 10))
+
+        data = self.client.get(
+            reverse("real_search"), {"query": "python", "cursor": 10}
+        ).json()
+        self.assertEqual((data["cursor"], data["total"]), (10, 5))
+        self.assertIsNone(data["next_cursor"])
+
+        for cursor in ("-1", "abc", "50"):
+            response = self.client.get(
+                reverse("real_search"), {"query": "python", "cursor": cursor}
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_load_more_batches_never_overlap(self):
+        """测试加载更多时各批次取同一个排序列表的切片：不重复、不遗漏、不重新抓取"""
+        from PatentMS import views
+
+        # 第二页的结果比第一页更相关，排序后会排在第一页之前
+        engine = make_paged_engine(
+            {
+                0: make_page(0, title="Python 页面"),
+                10: make_page(10, title="Python 入门 Python 教程"),
+            }
+        )
+        views.search_service.search_engine = engine
+        self.client.login(username="searcher", password="testpass123")
+
+        first = self.client.get(reverse("real_search"), {"query": "python"}).json()
+        requested = list(engine.requested)
+        second = self.client.get(
+            reverse("real_search"), {"query": "python", "cursor": first["next_cursor"]}
+        ).json()
+
+        first_urls = {result["url"] for result in first["results"]}
+        second_urls = {result["url"] for result in second["results"]}
+        self.assertEqual(len(first_urls), 10)
+        self.assertEqual(len(second_urls), 10)
+        self.assertFalse(first_urls & second_urls)
+        self.assertTrue(all("入门" in r["title"] for r in first["results"]))
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(engine.requested, requested)
+
+    def test_existing_pages_checked_with_one_query(self):
+        """测试已添加页面的检查只查询一次数据库，与结果数量无关"""
+        from asgiref.sync import async_to_sync
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        results = [
+            {"title": f"Python 教程 {i}", "url": f"https://example.com/p/{i}"}
+            for i in range(10)
+        ] + [{"title": "Python 教程", "url": "https://example.com/1"}]
+        with self.assertNumQueries(1):
+            async_to_sync(Page.amark_existing)(self.category, results)
+        self.assertEqual([r["exists"] for r in results], [False] * 10 + [True])
+
+        # 整个搜索请求的查询次数不随结果数量增长
+        self.client.login(username="searcher", password="testpass123")
+        params = {"query": "python", "category_id": self.category.id}
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(reverse("real_search"), params)
+        self.engine.results = results
+        self.engine.calls = 0
+        params["query"] = "python 教程"
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("real_search"), params)
+        self.assertEqual(response.json()["total"], 10)
+        self.assertEqual(len(many), len(single))
+
+    def test_existing_pages_matched_by_canonical_url(self):
+        """测试标题不同但规范化URL相同的结果被标记为已添加"""
+        from asgiref.sync import async_to_sync
+
+        page = Page.objects.get(title="Python 教程")
+        self.assertEqual(page.url_key, "example.com/1")
+        page.url = "https://docs.example.com/tutorial/?utm_source=x"
+        page.save(update_fields=["url"])
+        page.refresh_from_db()
+        self.assertEqual(page.url_key, "docs.example.com/tutorial")
+
+        results = [
+            {"title": "官方教程", "url": "http://www.docs.example.com/tutorial"},
+            {"title": "其他", "url": "https://example.com/1"},
+        ]
+        async_to_sync(Page.amark_existing)(self.category, results)
+        self.assertEqual([r["exists"] for r in results], [True, False])
+
+    async def _read_stream(self, params):
+        """以登录用户请求流式搜索接口，返回响应和完整内容"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("real_search"), params)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        return response, content.decode("utf-8")
+
+    async def test_ndjson_stream_emits_batches_then_summary(self):
+        """测试 NDJSON 流式搜索先输出结果批次，最后输出汇总"""
+        import json
+
+        response, content = await self._read_stream(
+            {"query": "python", "category_id": self.category.id, "stream": "ndjson"}
+        )
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        events = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([event["type"] for event in events], ["batch", "summary"])
+        self.assertEqual(events[0]["source"], "counting")
+        result = events[0]["results"][0]
+        self.assertTrue(result["exists"])
+        self.assertGreater(result["relevance_score"], 0)
+        self.assertEqual(events[1]["total"], 1)
+        self.assertEqual(events[1]["sources"], ["counting"])
+
+    async def test_sse_stream_and_cache_hit(self):
+        """测试 SSE 格式，第二次搜索从缓存一次返回"""
+        import json
+
+        params = {"query": "python", "stream": "sse"}
+        response, content = await self._read_stream(params)
+        self.assertEqual(response["Content-Type"], "text/event-stream; charset=utf-8")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        frames = content.strip().split("\n\n")
+        self.assertTrue(frames[0].startswith("event: batch\ndata: "))
+        self.assertTrue(frames[-1].startswith("event: summary\ndata: "))
+
+        _, content = await self._read_stream(params)
+        batch = json.loads(content.split("\n\n")[0].split("data: ", 1)[1])
+        self.assertEqual(batch["source"], "cache")
+        self.assertEqual(self.engine.calls, 1)
+
+    async def test_stream_cursor_slices_cached_list(self):
+        """测试流式搜索只输出本批范围的结果，下一批从缓存取同一列表的切片"""
+        import json
+
+        self.engine.results = make_page(0, count=15)
+        params = {"query": "python", "stream": "ndjson"}
+        _, content = await self._read_stream(params)
+        events = [json.loads(line) for line in content.splitlines()]
+        first = [r["url"] for e in events if e["type"] == "batch" for r in e["results"]]
+        self.assertEqual(len(first), 10)
+        self.assertEqual(events[-1]["next_cursor"], 10)
+
+        _, content = await self._read_stream(dict(params, cursor=10))
+        events = [json.loads(line) for line in content.splitlines()]
+        second = [
+            r["url"] for e in events if e["type"] == "batch" for r in e["results"]
+        ]
+        self.assertEqual(len(second), 5)
+        self.assertFalse(set(first) & set(second))
+        self.assertIsNone(events[-1]["next_cursor"])
+        self.assertEqual(self.engine.calls, 1)
+
+    async def test_meta_stream_yields_engines_in_arrival_order(self):
+        """测试元搜索按引擎到达顺序输出批次，并跨批次去重"""
+        import json
+
+        from PatentMS import views
+        from PatentMS.search_service import MetaSearchService
+
+        fast = SleepySearchEngine(
+            "fast",
+            0,
+            [{"title": "Python 入门", "url": "https://a.example/", "source": "fast"}],
+        )
+        slow = SleepySearchEngine(
+            "slow",
+            0.1,
+            [
+                {
+                    "title": "Python 入门",
+                    "url": "http://www.a.example",
+                    "source": "slow",
+                },
+                {"title": "Python 文档", "url": "https://b.example/", "source": "slow"},
+            ],
+        )
+        views.search_service.search_engine = MetaSearchService(
+            engines=[slow, fast], deadline=2
+        )
+        _, content = await self._read_stream({"query": "python", "stream": "ndjson"})
+        events = [json.loads(line) for line in content.splitlines()]
+        batches = [event for event in events if event["type"] == "batch"]
+        self.assertEqual([batch["source"] for batch in batches], ["fast", "slow"])
+        self.assertEqual(
+            [result["title"] for result in batches[1]["results"]], ["Python 文档"]
+        )
+        self.assertEqual(events[-1]["total"], 2)
+
+    async def test_async_bing_engine_uses_shared_client(self):
+        """测试异步必应引擎通过共享的 httpx 客户端请求并解析结果"""
+        import asyncio
+        import httpx
+        from PatentMS import async_search_service
+        from PatentMS.async_search_service import AsyncSimpleSearchService
+
+        html = (
+            '<ol><li class="b_algo"><h2><a href="https://docs.python.org/3/">'
+            "Python 文档</a></h2><p>官方文档</p></li></ol>"
+        )
+        requested = []
+
+        def handler(request):
+            requested.append(request.url.host)
+            return httpx.Response(200, content=html.encode("utf-8"))
+
+        loop = asyncio.get_running_loop()
+        async_search_service._async_clients[loop] = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+        try:
+            results = await AsyncSimpleSearchService().search("python", 10)
+        finally:
+            await async_search_service.close_async_client()
+
+        self.assertEqual(requested, ["cn.bing.com"])
+        self.assertEqual(results[0]["url"], "https://docs.python.org/3/")
+        self.assertEqual(results[0]["source"], "bing")
+
+    def test_per_request_loop_closes_client(self):
+        """测试 WSGI 下每个请求的事件循环结束前关闭本次创建的异步客户端"""
+        from asgiref.sync import async_to_sync
+        from PatentMS import async_search_service
+        from PatentMS.async_search_service import async_client_scope, get_async_client
+
+        clients = []
+
+        async def request():
+            async with async_client_scope(shared=False):
+                clients.append(get_async_client())
+
+        for _ in range(3):
+            async_to_sync(request)()
+        self.assertEqual(len(clients), 3)
+        self.assertTrue(all(client.is_closed for client in clients))
+        self.assertEqual(len(async_search_service._async_clients), 0)
+
+    async def test_lifespan_shutdown_closes_shared_client(self):
+        """测试 ASGI 下请求共享客户端，lifespan 关闭时关闭"""
+        from PatentMS.async_search_service import (
+            async_client_scope,
+            get_async_client,
+            with_lifespan,
+        )
+
+        async with async_client_scope(shared=True):
+            client = get_async_client()
+        async with async_client_scope(shared=True):
+            self.assertIs(get_async_client(), client)
+        self.assertFalse(client.is_closed)
+
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await with_lifespan(None)({"type": "lifespan"}, receive, send)
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
+        self.assertTrue(client.is_closed)
+
+
+BING_SERP_HTML = """
+<html><head><script>var noise = 1;</script></head><body>
+<div class="nav"><a href="https://cn.bing.com/images">图片</a></div>
+<ol id="b_results">
+  <li class="b_algo"><h2><a href="https://docs.python.org/3/">Python <b>文档</b></a></h2>
+    <div class="b_caption"><p>Python 官方文档</p></div></li>
+  <li class="b_algo"><h2><a href="/relative">站内链接</a></h2><p>无效</p></li>
+  <li class="b_algo"><h2><a href="https://www.taobao.com/python">淘宝</a></h2></li>
+  <li class="b_algo b_wide"><h2><a href="https://www.runoob.com/python3/">Python3 教程</a></h2></li>
+</ol>
+</body></html>
+"""
+
+
+class SerpParserTests(TestCase):
+    def test_parser_engines_extract_same_results(self):
+        """测试各解析引擎提取的结果一致"""
+        from PatentMS.serp_parser import (
+            BING_LAYOUT,
+            LexborHTMLParser,
+            extract_results,
+        )
+
+        parsers = ["html.parser", "lxml"]
+        if LexborHTMLParser is not None:
+            parsers.append("selectolax")
+
+        expected = extract_results(BING_SERP_HTML, BING_LAYOUT, 10, "html.parser")
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(expected[0].title, "Python文档")
+        self.assertEqual(expected[0].abstract, "Python 官方文档")
+        self.assertIsNone(expected[3].abstract)
+        for parser in parsers:
+            with self.subTest(parser=parser):
+                self.assertEqual(
+                    extract_results(BING_SERP_HTML, BING_LAYOUT, 10, parser), expected
+                )
+
+    def test_limit_applies_to_containers(self):
+        """测试只处理前 limit 个结果容器"""
+        from PatentMS.serp_parser import BING_LAYOUT, extract_results
+
+        self.assertEqual(len(extract_results(BING_SERP_HTML, BING_LAYOUT, 2)), 2)
+        self.assertEqual(extract_results("", BING_LAYOUT, 10), [])
+
+    def test_bing_engine_filters_extracted_results(self):
+        """测试必应引擎对提取结果做URL校验和网站过滤"""
+        from PatentMS.search_service import SimpleSearchService
+
+        results = SimpleSearchService()._parse_bing_results(
+            BING_SERP_HTML, "python", 10
+        )
+        self.assertEqual(
+            [r["url"] for r in results],
+            ["https://docs.python.org/3/", "https://www.runoob.com/python3/"],
+        )
+        self.assertEqual(results[1]["abstract"], "关于 python 的相关信息")
+
+    def test_baidu_falls_back_to_full_document(self):
+        """测试百度标准结构缺失时仍可使用备用解析方法"""
+        from PatentMS.search_service import BaiduSearchService
+
+        html = (
+            '<div class="c-container"><h3><a href="https://www.runoob.com/python3/">'
+            'Python3 教程</a></h3><div class="c-abstract">菜鸟教程</div></div>'
+        )
+        results = BaiduSearchService()._parse_search_results(html, "python")
+        self.assertEqual(results[0]["url"], "https://www.runoob.com/python3/")
+        self.assertEqual(results[0]["abstract"], "菜鸟教程")
+
+
+BAIDU_LAYOUT_PAGES = {
+    "standard": (
+        '<div class="result c-container"><h3><a href="https://docs.python.org/">'
+        'Python 文档</a></h3><div class="c-abstract">官方文档</div></div>'
+    ),
+    "container": (
+        '<div class="c-container new"><div><a class="c-title" '
+        'href="https://www.runoob.com/python3/">Python3 教程</a></div>'
+        '<span class="summary-text">菜鸟教程</span></div>'
+    ),
+    "list": (
+        '<ul><li class="list-item"><a href="https://realpython.com/">'
+        "Real Python 入门</a><p class='desc'>英文教程</p></li></ul>"
+    ),
+    "loose": (
+        '<p><a href="https://www.baidu.com/">百度首页</a>'
+        '<a href="https://example.com/guide">Python 学习路线完整指南</a></p>'
+    ),
+}
+
+
+class BaiduLayoutTests(TestCase):
+    def setUp(self):
+        from PatentMS.search_service import BaiduSearchService
+
+        BaiduSearchService.extractor.stats.reset()
+
+    def test_each_known_layout_recognized(self):
+        """测试各种已知的百度结果结构都能被识别，并统计命中率"""
+        from PatentMS.search_service import BaiduSearchService
+        from PatentMS.serp_parser import BAIDU_LAYOUT_RULES
+
+        engine = BaiduSearchService()
+        for parser in ("lxml", "html.parser"):
+            for layout, html in BAIDU_LAYOUT_PAGES.items():
+                match = engine.extractor.extract(html, "python", 10, parser=parser)
+                self.assertEqual(match.layout, layout, (parser, layout))
+                self.assertEqual(len(match.results), 1, (parser, layout))
+
+        result = engine._parse_search_results(BAIDU_LAYOUT_PAGES["container"], "py")
+        self.assertEqual(result[0]["url"], "https://www.runoob.com/python3/")
+        self.assertEqual(result[0]["abstract"], "菜鸟教程")
+        # 宽松结构只接受包含查询词的较长链接文本
+        result = engine._parse_search_results(BAIDU_LAYOUT_PAGES["loose"], "python")
+        self.assertEqual([r["url"] for r in result], ["https://example.com/guide"])
+
+        stats = BaiduSearchService.layout_stats()
+        self.assertEqual(stats["documents"], 10)
+        self.assertEqual(stats["layouts"]["standard"]["hits"], 2)
+        self.assertEqual(stats["layouts"]["container"]["rate"], 0.3)
+        self.assertEqual(set(stats["layouts"]), {r.name for r in BAIDU_LAYOUT_RULES})
+
+    def test_higher_priority_layout_wins(self):
+        """测试同一页面包含多种结构时使用优先级最高的结构，且按URL去重"""
+        from PatentMS.search_service import BaiduSearchService
+
+        html = BAIDU_LAYOUT_PAGES["container"] + BAIDU_LAYOUT_PAGES["standard"] * 2
+        match = BaiduSearchService.extractor.extract(html, "python", 10)
+        self.assertEqual(match.layout, "standard")
+        self.assertEqual([r.url for r in match.results], ["https://docs.python.org/"])
+
+        match = BaiduSearchService.extractor.extract("<p>无结果</p>", "python", 10)
+        self.assertIsNone(match.layout)
+        self.assertEqual(BaiduSearchService.layout_stats()["miss"], 1)
+
+    def test_fallback_layouts_walk_document_once(self):
+        """测试回退到宽松结构时整个文档树也只遍历一次"""
+        from unittest import mock
+        from PatentMS.search_service import BaiduSearchService
+        from PatentMS.serp_parser import _LxmlTree
+
+        html = "<div class='other'>" * 50 + BAIDU_LAYOUT_PAGES["loose"]
+        original = _LxmlTree.elements
+        with mock.patch.object(
+            _LxmlTree, "elements", autospec=True, side_effect=original
+        ) as elements:
+            match = BaiduSearchService.extractor.extract(
+                html, "python", 10, parser="lxml"
+            )
+        self.assertEqual(match.layout, "loose")
+        self.assertEqual(elements.call_count, 1)
+
+
+class SiteFilterTests(TestCase):
+    def test_hostname_suffix_matching(self):
+        """测试按主机名后缀匹配，不会误判路径中的域名"""
+        from PatentMS.site_filter import DomainFilter
+
+        site_filter = DomainFilter(["qq.com", "jd.com"])
+        self.assertTrue(site_filter.is_blocked("https://mail.qq.com/inbox"))
+        self.assertTrue(site_filter.is_blocked("https://JD.com"))
+        self.assertFalse(site_filter.is_blocked("https://notjd.com/"))
+        self.assertFalse(
+            site_filter.is_blocked("https://example.com/how-to-use-qq.com-api")
+        )
+        self.assertFalse(site_filter.is_blocked("not a url"))
+
+    def test_default_rules_cover_country_domains(self):
+        """测试默认规则覆盖原先子串匹配能命中的 .com.cn 等域名"""
+        from PatentMS.site_filter import DEFAULT_BLOCKED_DOMAINS, DomainFilter
+
+        site_filter = DomainFilter(DEFAULT_BLOCKED_DOMAINS)
+        for url in [
+            "https://news.sina.com.cn/c/2024-01-01/doc.shtml",
+            "https://www.sina.com.cn/",
+            "https://www.sohu.com.cn/",
+            "https://www.google.com.hk/search?q=python",
+            "https://finance.sina.com/",
+        ]:
+            self.assertTrue(site_filter.is_blocked(url), url)
+        self.assertFalse(site_filter.is_blocked("https://www.python.org/"))
+
+    def test_engine_specific_rules_and_stats(self):
+        """测试引擎专属规则和按规则统计过滤数量"""
+        from PatentMS.site_filter import DomainFilter
+
+        site_filter = DomainFilter(["qq.com"], {"bing": ["bing.com"]})
+        self.assertTrue(site_filter.is_blocked("https://cn.bing.com/images", "bing"))
+        self.assertFalse(site_filter.is_blocked("https://cn.bing.com/images", "baidu"))
+        site_filter.is_blocked("https://v.qq.com/")
+        self.assertEqual(site_filter.stats(), {"bing.com": 1, "qq.com": 1})
+
+    def test_blocklist_file_reload(self):
+        """测试黑名单文件修改后重新加载"""
+        import os
+        import tempfile
+        from PatentMS.site_filter import DomainFilter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocked.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# 注释\ncsdn.net\nbaidu zhihu.com\n")
+
+            site_filter = DomainFilter([], file_path=path)
+            self.assertTrue(site_filter.is_blocked("https://blog.csdn.net/a"))
+            self.assertTrue(site_filter.is_blocked("https://www.zhihu.com/", "baidu"))
+            self.assertFalse(site_filter.is_blocked("https://www.zhihu.com/", "bing"))
+
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("zhihu.com\n")
+            site_filter.reload()
+            self.assertFalse(site_filter.is_blocked("https://blog.csdn.net/a"))
+            self.assertTrue(site_filter.is_blocked("https://www.zhihu.com/", "bing"))
+
+
+class RelevanceTests(TestCase):
+    def test_tokenize_words_and_cjk_bigrams(self):
+        """测试英文按单词、中文按二元组分词"""
+        from PatentMS.relevance import tokenize
+
+        self.assertEqual(
+            tokenize("Python 官方教程: C++ 与 Node.js"),
+            ["python", "官方", "方教", "教程", "c++", "与", "node.js"],
+        )
+
+    def test_partial_matches_ranked_by_bm25(self):
+        """测试不包含完整查询词的结果按词项命中保留并排序，无关结果被过滤"""
+        from PatentMS.search_service import SearchService
+
+        results = [
+            {"title": "无关页面", "url": "https://a.example/", "abstract": "天气"},
+            {
+                "title": "Django 框架说明",
+                "url": "https://b.example/",
+                "abstract": "用 Python 编写",
+            },
+            {
+                "title": "Python 教程：Django 入门",
+                "url": "https://c.example/",
+                "abstract": "Django 与 Python",
+            },
+        ]
+        service = SearchService(use_mock=True)
+        filtered = service._filter_results(results, "django python", "Web")
+        self.assertEqual(
+            [r["url"] for r in filtered], ["https://c.example/", "https://b.example/"]
+        )
+        self.assertGreater(
+            filtered[0]["relevance_score"], filtered[1]["relevance_score"]
+        )
+
+    def test_category_bonus_matches_whole_words(self):
+        """测试分类词按整词匹配标题，单字符词不计入"""
+        from PatentMS.relevance import RelevanceScorer
+
+        scorer = RelevanceScorer("", "C Programming")
+        self.assertEqual(scorer.category_words, {"programming"})
+        results = [
+            {"title": title, "url": f"https://example.com/{i}", "abstract": ""}
+            for i, title in enumerate(
+                ["React hooks tutorial", "Basic guide", "Programming in C"]
+            )
+        ]
+        scored = scorer.score_results(results)
+        self.assertEqual([r["title"] for r in scored], ["Programming in C"])
+
+        scorer = RelevanceScorer("", "Java 数据库")
+        results = [
+            {"title": "JavaScript 框架", "url": "https://a.example/", "abstract": ""},
+            {"title": "Java 并发", "url": "https://b.example/", "abstract": ""},
+            {"title": "数据库索引", "url": "https://c.example/", "abstract": ""},
+        ]
+        scored = scorer.score_results(results)
+        self.assertEqual(
+            sorted(r["url"] for r in scored),
+            ["https://b.example/", "https://c.example/"],
+        )
+
+    def test_scores_hundreds_of_results_quickly(self):
+        """测试每个结果的打分耗时远小于 1 毫秒"""
+        import time
+        from PatentMS.relevance import RelevanceScorer
+
+        results = [
+            {
+                "title": f"Python 教程 第{i}章",
+                "url": f"https://example.com/{i}",
+                "abstract": "学习 Python 编程的入门指南，包含大量示例代码和练习" * 3,
+            }
+            for i in range(500)
+        ]
+        scorer = RelevanceScorer("python 教程", "Python")
+        started = time.perf_counter()
+        scored = scorer.score_results(results)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(scored), 500)
+        self.assertLess(elapsed / len(results), 0.0005)
+
+
+class SearchStoreTests(TestCase):
+    def setUp(self):
+        """每个测试使用独立的存储文件"""
+        from django.core.cache import cache
+        from PatentMS.search_store import SearchStore, get_search_store_config
+
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = f"{self.directory.name}/store.sqlite3"
+        self.store = SearchStore(self.path, get_search_store_config())
+        self.addCleanup(self.store.close)
+
+    def test_roundtrip_hottest_and_compaction(self):
+        """测试结果读写、按命中次数排序，以及按保留时间和条目上限压缩"""
+        results = [{"title": "Python 教程", "url": "https://example.com/"}]
+        self.store.put("k1", "bing", "python", "", results)
+        self.store.put("k2", "bing", "django", "Web", results, hits=5)
+        self.store.put("k1", "bing", "python", "", results)
+        self.store.put("k3", "baidu", "flask", "", results)
+        self.store.put("empty", "bing", "nothing", "", [])
+
+        self.assertEqual(self.store.get("k1").results, results)
+        self.assertIsNone(self.store.get("empty"))
+        self.assertEqual(
+            [(e.key, e.hits) for e in self.store.hottest(2)], [("k2", 5), ("k1", 2)]
+        )
+
+        connection = self.store._connect()
+        with connection:
+            connection.execute(
+                "UPDATE search_results SET created_at = 0 WHERE key = 'k3'"
+            )
+        self.assertIsNone(self.store.get("k3"))
+        self.store.config = dict(self.store.config, MAX_ENTRIES=1)
+        self.assertEqual(self.store.compact(vacuum=True), 2)
+        self.assertEqual(self.store.stats()["entries"], 1)
+        self.assertIsNotNone(self.store.get("k2"))
+
+    def test_degraded_mode_serves_last_known_results(self):
+        """测试所有引擎都没有结果时返回最后一次成功的结果，并且只短暂缓存"""
+        from django.core.cache import cache
+        from PatentMS.search_service import SearchService
+
+        with override_settings(SEARCH_STORE={"ENABLED": True, "PATH": self.path}):
+            service = SearchService(use_mock=True)
+            engine = CountingSearchEngine()
+            service.search_engine = engine
+            first = service.search_pages("python", "", 10)
+            self.assertFalse(first[0].get("degraded"))
+
+            engine.results = []
+            service.result_cache.clear_local()
+            cache.clear()
+            degraded = service.search_pages("python", "", 10)
+            self.assertEqual(degraded[0]["url"], first[0]["url"])
+            self.assertTrue(degraded[0]["degraded"])
+            self.assertEqual(engine.calls, 2)
+
+            key = service.result_cache.make_key(
+                engine.name, service._optimize_query("python", ""), "", 10
+            )
+            entry = service.result_cache.get(key)
+            self.assertEqual(entry["stale_until"], entry["fresh_until"])
+            self.assertLessEqual(
+                entry["fresh_until"] - entry["created_at"],
+                service.result_cache.config["EMPTY_TTL"],
+            )
+
+    def test_warm_cache_loads_hottest_entries(self):
+        """测试启动预热载入热门结果，已过期的结果作为旧结果载入"""
+        import time
+        from PatentMS.search_cache import SearchResultCache
+        from PatentMS.search_store import warm_cache
+
+        results = [{"title": "Python 教程", "url": "https://example.com/"}]
+        self.store.put("fresh", "bing", "python", "", results, hits=3)
+        self.store.put("old", "bing", "django", "", results, hits=2)
+        self.store.put("cold", "bing", "flask", "", results)
+        connection = self.store._connect()
+        with connection:
+            connection.execute(
+                "UPDATE search_results SET created_at = ? WHERE key = 'old'",
+                (time.time() - 86400,),
+            )
+
+        result_cache = SearchResultCache()
+        self.assertEqual(warm_cache(result_cache, self.store, 2), 2)
+        self.assertIsNone(result_cache.get("cold"))
+        fresh = result_cache.get("fresh")
+        self.assertGreater(fresh["fresh_until"], time.time())
+        old = result_cache.get("old")
+        self.assertLess(old["fresh_until"], time.time())
+        self.assertEqual(old["results"], results)
+
+    def test_warm_start_only_in_server_process(self):
+        """测试应用加载时不预热缓存，服务进程启动后台任务时只预热一次"""
+        from unittest import mock
+        import PatentMS.apps
+        from django.apps import apps
+
+        with mock.patch("PatentMS.search_store.start_warm_cache") as start_warm_cache:
+            apps.get_app_config("PatentMS").ready()
+            start_warm_cache.assert_not_called()
+
+            with mock.patch.object(
+                PatentMS.apps, "_server_tasks_started", False
+            ), mock.patch("PatentMS.rate_limit.warn_if_process_local"):
+                PatentMS.apps.start_server_tasks()
+                PatentMS.apps.start_server_tasks()
+            self.assertEqual(start_warm_cache.call_count, 1)
+
+    def test_management_command(self):
+        """测试存储管理命令输出统计并压缩"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        with override_settings(SEARCH_STORE={"ENABLED": True, "PATH": self.path}):
+            self.store.put("k1", "bing", "python", "Python", [{"title": "t"}])
+            out = StringIO()
+            call_command("search_store", "--compact", stdout=out)
+        output = out.getvalue()
+        self.assertIn("压缩完成，删除 0 条", output)
+        self.assertIn("查询数: 1", output)
+        self.assertIn("python [Python]", output)
+
+
+def make_paged_engine(pages, delay=0):
+    """
+    创建测试用的翻页引擎：按偏移量返回预设的结果页，记录请求过的偏移量
+
+    Args:
+        pages: {偏移量: 结果列表或异常}
+        delay: 每页返回前等待的时间（秒）
+    """
+    import time
+    from PatentMS.search_service import HTTPSearchEngine
+
+    class PagedSearchEngine(HTTPSearchEngine):
+        name = "paged"
+        display_name = "翻页测试"
+
+        def __init__(self):
+            super().__init__()
+            self.requested = []
+
+        def fetch_page(self, query, offset=0):
+            self.requested.append(offset)
+            time.sleep(delay)
+            page = pages.get(offset, [])
+            if isinstance(page, Exception):
+                raise page
+            return [dict(result) for result in page]
+
+    return PagedSearchEngine()
+
+
+def make_page(offset, title="Python 教程", count=10):
+    """生成一页测试结果"""
+    return [
+        {
+            "title": f"{title} {offset + i}",
+            "url": f"https://example.com/page/{offset + i}",
+            "abstract": "测试摘要",
+            "source": "paged",
+        }
+        for i in range(count)
+    ]
+
+
+class PaginationTests(TestCase):
+    def test_fetch_results_requests_pages_concurrently(self):
+        """测试需要多页结果时并发请求各页，按偏移量顺序拼接"""
+        import time
+
+        engine = make_paged_engine(
+            {offset: make_page(offset) for offset in (0, 10, 20)}, delay=0.1
+        )
+        started = time.monotonic()
+        results = engine.fetch_results("python", 25)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(len(results), 25)
+        self.assertEqual(results[0]["url"], "https://example.com/page/0")
+        self.assertEqual(results[-1]["url"], "https://example.com/page/24")
+        self.assertEqual(sorted(engine.requested), [0, 10, 20])
+        self.assertLess(elapsed, 0.25)
+
+        # 一页以内只请求第一页
+        engine = make_paged_engine({0: make_page(0)})
+        self.assertEqual(len(engine.fetch_results("python", 5)), 5)
+        self.assertEqual(engine.requested, [0])
+
+    def test_page_cap_deadline_and_failures(self):
+        """测试页数上限和截止时间，部分页失败时返回其余页，全部失败时抛出异常"""
+        from PatentMS.search_service import SearchEngineError
+
+        with override_settings(SEARCH_PAGINATION={"MAX_PAGES": 2}):
+            engine = make_paged_engine({0: make_page(0), 10: make_page(10)})
+            self.assertEqual(len(engine.fetch_results("python", 50)), 20)
+            self.assertEqual(sorted(engine.requested), [0, 10])
+
+        with override_settings(SEARCH_PAGINATION={"DEADLINE": 0.05}):
+            engine = make_paged_engine({0: make_page(0)}, delay=0.2)
+            self.assertEqual(engine.fetch_results("python", 20), [])
+
+        engine = make_paged_engine({0: SearchEngineError("失败"), 10: make_page(10)})
+        results = engine.fetch_results("python", 20)
+        self.assertEqual(
+            [r["url"] for r in results][:1], ["https://example.com/page/10"]
+        )
+
+        error = SearchEngineError("失败")
+        engine = make_paged_engine({0: error, 10: error})
+        with self.assertRaises(SearchEngineError):
+            engine.fetch_results("python", 20)
+
+    def test_refill_when_filtering_leaves_too_few(self):
+        """测试过滤后结果不足时补充请求后续结果页，结果足够后停止"""
+        from PatentMS.search_service import SearchService
+
+        service = SearchService(use_mock=True, use_cache=False)
+        service.search_engine = make_paged_engine(
+            {
+                0: make_page(0, title="无关内容", count=7) + make_page(7, count=3),
+                10: make_page(10),
+                20: make_page(20),
+            }
+        )
+        results = service.search_pages("python", "", 10)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(r["title"].startswith("Python") for r in results))
+        # 缺少 7 条结果，只补充请求一页
+        self.assertEqual(service.search_engine.requested, [0, 10])
+
+    async def test_async_fetch_results_and_stream_by_page(self):
+        """测试异步引擎并发翻页，流式搜索按页逐批产出"""
+        import asyncio
+        import httpx
+        from PatentMS import async_search_service
+        from PatentMS.async_search_service import (
+            AsyncSimpleSearchService,
+            stream_search,
+        )
+
+        def handler(request):
+            first = int(request.url.params.get("first", "1"))
+            items = "".join(
+                f'<li class="b_algo"><h2><a href="https://example.com/{first + i}">'
+                f"Python 教程 {first + i}</a></h2><p>摘要</p></li>"
+                for i in range(10)
+            )
+            return httpx.Response(200, content=f"<ol>{items}</ol>".encode("utf-8"))
+
+        loop = asyncio.get_running_loop()
+        async_search_service._async_clients[loop] = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+        try:
+            engine = AsyncSimpleSearchService()
+            results = await engine.fetch_results("python", 20)
+            batches = [batch async for _, batch in stream_search(engine, "python", 30)]
+        finally:
+            await async_search_service.close_async_client()
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[10]["url"], "https://example.com/11")
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(sum(len(batch) for batch in batches), 30)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from django.core.cache import cache
+        from PatentMS.rate_limit import rate_limiter
+
+        cache.clear()
+        rate_limiter.reset()
+        self.settings_override = override_settings(
+            SEARCH_RATE_LIMIT={"RATE": 10.0, "BURST": 2, "MAX_WAIT": 0.15}
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        from PatentMS.rate_limit import rate_limiter
+
+        self.settings_override.disable()
+        rate_limiter.reset()
+
+    def test_token_bucket_burst_queue_and_max_wait(self):
+        """测试突发请求立即放行，之后按发放间隔排队，等待超过上限时放弃且不占用预算"""
+        from PatentMS.rate_limit import RateLimiter, rate_limiter
+
+        waits = [rate_limiter.reserve("cn.bing.com") for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.02)
+        self.assertIsNone(waits[3])
+        # 被放弃的请求没有推后队列
+        self.assertAlmostEqual(rate_limiter.reserve("cn.bing.com", 1), 0.2, delta=0.02)
+
+        # 预算保存在共享缓存中，其他实例（进程）看到同一个队列，不同主机互不影响
+        self.assertIsNone(RateLimiter().reserve("cn.bing.com"))
+        self.assertEqual(RateLimiter().reserve("www.baidu.com"), 0.0)
+
+        stats = self._stats("cn.bing.com")
+        self.assertEqual((stats["requests"], stats["delayed"]), (4, 2))
+        self.assertEqual(stats["rejected"], 1)
+        self.assertAlmostEqual(stats["wait_max"], 0.2, delta=0.02)
+
+    def test_host_budget_override(self):
+        """测试按主机配置的预算覆盖默认预算"""
+        from PatentMS.rate_limit import rate_limiter
+
+        with override_settings(
+            SEARCH_RATE_LIMIT={
+                "RATE": 10.0,
+                "BURST": 1,
+                "BUDGETS": {"cn.bing.com": {"BURST": 3}},
+            }
+        ):
+            self.assertEqual(
+                [rate_limiter.reserve("cn.bing.com") for _ in range(3)], [0.0] * 3
+            )
+            self.assertEqual(rate_limiter.reserve("www.baidu.com"), 0.0)
+            self.assertGreater(rate_limiter.reserve("www.baidu.com"), 0)
+
+    def test_captcha_page_pauses_host(self):
+        """测试验证码页面作为失败处理，并暂停请求该主机"""
+        from PatentMS.search_service import (
+            EngineRateLimited,
+            SearchEngineError,
+            SimpleSearchService,
+        )
+        from PatentMS.transport import ReplayAdapter, SerpCorpus, prepared_url
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            corpus = SerpCorpus(tmpdir)
+            engine = SimpleSearchService(adapter=ReplayAdapter(corpus))
+            url, params = engine._build_search_request("python", 10)
+            corpus.save(
+                prepared_url(url, params),
+                200,
+                {"Content-Type": "text/html"},
+                b'<form action="/captcha/verify"><div class="b_captcha"></div></form>',
+            )
+            with self.assertRaises(SearchEngineError):
+                engine.fetch_results("python", 10)
+            with self.assertRaises(EngineRateLimited):
+                engine.fetch_results("python", 10)
+
+        stats = self._stats("cn.bing.com")
+        self.assertEqual((stats["blocked"], stats["rejected"]), (1, 1))
+
+    def test_adaptive_search_falls_back_without_health_penalty(self):
+        """测试引擎预算用完时自适应搜索切换到其他引擎，且不计入该引擎的失败"""
+        from PatentMS.engine_health import EngineHealthRegistry
+        from PatentMS.rate_limit import rate_limiter
+        from PatentMS.search_service import AdaptiveSearchService, SimpleSearchService
+        from PatentMS.transport import ReplayAdapter, SerpCorpus
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bing = SimpleSearchService(adapter=ReplayAdapter(SerpCorpus(tmpdir)))
+            fallback = CountingSearchEngine()
+            registry = EngineHealthRegistry()
+            service = AdaptiveSearchService(
+                engines=[bing, fallback], registry=registry, deadline=2
+            )
+            rate_limiter.penalize("cn.bing.com", 10)
+            results = service.search("python", 10)
+
+        self.assertEqual(results[0]["source"], "counting")
+        self.assertEqual(fallback.calls, 1)
+        self.assertEqual(registry.get("bing").total_failures, 0)
+
+    def _stats(self, host):
+        from PatentMS.rate_limit import rate_limiter
+
+        return {s["host"]: s for s in rate_limiter.snapshot()}[host]
+
+    def test_warns_when_cache_is_process_local(self):
+        """测试缓存只在进程内有效时提示限流预算不跨进程"""
+        import tempfile
+        from PatentMS.rate_limit import warn_if_process_local
+
+        with self.assertLogs("PatentMS.rate_limit", "WARNING"):
+            warn_if_process_local()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                        "LOCATION": tmp,
+                    }
+                }
+            ):
+                with self.assertNoLogs("PatentMS.rate_limit", "WARNING"):
+                    warn_if_process_local()
+
+
+class PrewarmTests(TestCase):
+    def setUp(self):
+        """设置测试数据"""
+        from django.core.cache import cache
+        from PatentMS.search_service import SearchService
+        from PatentMS.search_store import SearchStore, get_search_store_config
+
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = SearchStore(
+            f"{self.directory.name}/store.sqlite3", get_search_store_config()
+        )
+        self.addCleanup(self.store.close)
+
+        Category.objects.create(name="Python", likes=5, views=10)
+        Category.objects.create(name="Django", likes=1, views=100)
+        Category.objects.create(name="Rust", views=1)
+        results = [{"title": "t", "url": "https://example.com/"}]
+        self.store.put("a", "bing", "python 入门", "Python", results, hits=4)
+        self.store.put("b", "baidu", "python 入门", "Python", results, hits=2)
+        self.store.put("c", "bing", "flask", "", results, hits=30)
+
+        self.service = SearchService(use_mock=True)
+        self.service.search_engine = CountingSearchEngine()
+
+    def _targets(self, **config):
+        from PatentMS.prewarm import collect_targets, get_prewarm_config
+
+        return collect_targets(self.store, dict(get_prewarm_config(), **config))
+
+    def test_collect_targets(self):
+        """测试按分类热度和历史搜索频率收集预热目标"""
+        targets = self._targets(TOP_CATEGORIES=2)
+        # 分类热度 = 点赞 × 10 + 浏览；有历史搜索的分类预热历史搜索，否则预热分类名称
+        self.assertEqual(
+            [(t.query, t.category, t.weight) for t in targets],
+            [
+                ("Django", "Django", 110),
+                ("python 入门", "Python", 60 + 6),
+                ("flask", "", 30),
+            ],
+        )
+        self.assertNotIn("Rust", [t.query for t in targets])
+
+    def test_refreshes_missing_and_expiring_entries(self):
+        """测试刷新不存在和即将过期的条目，跳过新鲜条目，且不计入历史命中次数"""
+        from PatentMS.prewarm import Prewarmer, PrewarmTarget
+        from PatentMS.search_service import search_window
+
+        store = self.service.result_store
+        python_key = self.service.pages_cache_key("python", "Python", search_window())
+        hits = getattr(store.get(python_key), "hits", 0)
+
+        prewarmer = Prewarmer(self.service, self.store)
+        targets = [PrewarmTarget("python", "Python", 1), PrewarmTarget("git", "", 1)]
+        stats = prewarmer.run_once(targets)
+        self.assertEqual((stats["refreshed"], stats["fresh"]), (2, 0))
+        self.assertEqual(self.service.search_engine.calls, 2)
+
+        # 预热后的交互式搜索（与搜索接口相同的结果数）直接命中缓存
+        self.service.search_pages("python", "Python", search_window())
+        self.assertEqual(self.service.search_engine.calls, 2)
+        self.assertEqual(prewarmer.run_once(targets)["fresh"], 2)
+
+        # 即将过期的条目提前刷新
+        key = self.service.pages_cache_key("git", "", search_window())
+        entry = dict(self.service.result_cache.get(key))
+        entry["fresh_until"] = entry["created_at"] + 60
+        self.service.result_cache._set_local(key, entry)
+        stats = prewarmer.run_once(targets)
+        self.assertEqual((stats["refreshed"], stats["fresh"]), (1, 1))
+        self.assertEqual(self.service.search_engine.calls, 3)
+
+        # 预热写入持久化存储，但不增加命中次数
+        self.assertEqual(store.get(python_key).hits, hits)
+
+    def test_defers_when_rate_budget_is_low(self):
+        """测试搜索引擎主机的剩余预算不足时推迟预热"""
+        from PatentMS.prewarm import Prewarmer, PrewarmTarget, get_prewarm_config
+        from PatentMS.rate_limit import rate_limiter
+
+        prewarmer = Prewarmer(
+            self.service, self.store, dict(get_prewarm_config(), BUDGET_WAIT=0)
+        )
+        prewarmer.hosts = ["cn.bing.com"]
+        rate_limiter.penalize("cn.bing.com", 5)
+        self.addCleanup(rate_limiter.reset)
+
+        stats = prewarmer.run_once([PrewarmTarget("python", "", 1)] * 2)
+        self.assertEqual((stats["refreshed"], stats["deferred"]), (0, 2))
+        self.assertEqual(self.service.search_engine.calls, 0)
+
+    def test_newer_shared_entry_replaces_stale_local_entry(self):
+        """测试进程内条目过期后使用其他进程（预热任务）写入共享缓存的新条目"""
+        from PatentMS.search_cache import SearchResultCache
+
+        web = SearchResultCache()
+        web.set("k", [{"title": "old"}], "bing")
+        stale = dict(web.get("k"), fresh_until=0)
+        web._set_local("k", stale)
+
+        SearchResultCache().set("k", [{"title": "new"}], "bing")
+        self.assertEqual(web.get("k")["results"], [{"title": "new"}])
+
+
+def make_synthetic_engine(**overrides):
+    """创建使用小规模合成语料、没有延迟的合成搜索引擎"""
+    from PatentMS.search_service import SyntheticSearchService
+    from PatentMS.synthetic_search import (
+        FaultModel,
+        SyntheticCorpus,
+        get_synthetic_config,
+    )
+
+    config = dict(
+        get_synthetic_config(),
+        DOCUMENTS=5000,
+        VOCABULARY=300,
+        LATENCY_DISTRIBUTION="fixed",
+        LATENCY_MEDIAN=0.0,
+    )
+    config.update(overrides)
+    return SyntheticSearchService(SyntheticCorpus.build(config), FaultModel(config))
+
+    def test_command_requires_shared_cache(self):
+        """测试缓存只在进程内有效时预热命令直接报错，只列出目标时仍可运行"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with self.assertRaisesMessage(CommandError, "进程内缓存"):
+            call_command("prewarm_search", "--once", stdout=StringIO())
+        self.assertEqual(self.service.search_engine.calls, 0)
+
+        out = StringIO()
+        call_command("prewarm_search", "--dry-run", stdout=out)
+        self.assertIn("预热目标", out.getvalue())
+
+
+class SyntheticSearchTests(TestCase):
+    def test_corpus_is_reproducible_and_index_matches_documents(self):
+        """测试相同种子生成相同的语料，倒排列表与文档词项一致"""
+        corpus = make_synthetic_engine().corpus
+        self.assertEqual(corpus.documents, 5000)
+        self.assertEqual(make_synthetic_engine().corpus.doc_terms, corpus.doc_terms)
+        self.assertNotEqual(
+            make_synthetic_engine(SEED=1).corpus.doc_terms, corpus.doc_terms
+        )
+
+        k = corpus.terms_per_document
+        for term in ("python", "教程", corpus.vocabulary[-1]):
+            term_id = corpus.term_ids[term]
+            expected = [
+                doc_id
+                for doc_id in range(corpus.documents)
+                if term_id in corpus.doc_terms[doc_id * k : doc_id * k + k]
+            ]
+            self.assertEqual(sorted(set(corpus.posting(term_id))), expected)
+
+    def test_match_ranks_conjunctive_hits_first_and_pages(self):
+        """测试先返回包含全部词项的文档，不足时放宽常见词项，翻页结果连续不重复"""
+        corpus = make_synthetic_engine().corpus
+        matched = corpus.match("python 教程", 0, 40)
+        self.assertEqual(len(matched), 40)
+        self.assertEqual(len(set(matched)), 40)
+
+        both = set(corpus.posting(corpus.term_ids["python"])) & set(
+            corpus.posting(corpus.term_ids["教程"])
+        )
+        head = matched[: min(len(both), 40)]
+        self.assertTrue(all(doc_id in both for doc_id in head))
+        self.assertEqual(head, sorted(head))
+
+        pages = corpus.match("python 教程", 0, 20) + corpus.match("python 教程", 20, 20)
+        self.assertEqual(pages, matched)
+        self.assertEqual(corpus.match("未知词", 0, 10), [])
+        self.assertIn("python", corpus.document(matched[0])["abstract"])
+
+    def test_search_service_returns_requested_volume(self):
+        """测试搜索服务使用合成引擎时按页检索，过滤后返回请求的结果数量"""
+        from PatentMS.search_service import SearchService
+
+        service = SearchService(use_mock=True, use_cache=False)
+        service.search_engine = make_synthetic_engine()
+        results = service.search_pages("python", "Python", 30)
+
+        self.assertEqual(len(results), 30)
+        self.assertEqual(len({result["url"] for result in results}), 30)
+        self.assertTrue(all(result["source"] == "synthetic" for result in results))
+        self.assertTrue(service.get_suggestions("pyth"))
+
+    def test_fault_model_errors_timeouts_and_latency(self):
+        """测试按配置的概率模拟错误和超时，延迟限制在上下限之内"""
+        from PatentMS.search_service import SearchEngineError
+        from PatentMS.synthetic_search import FaultModel, get_synthetic_config
+
+        engine = make_synthetic_engine(ERROR_RATE=1.0)
+        with self.assertRaises(SearchEngineError):
+            engine.fetch_page("python")
+        self.assertEqual(engine.search("python"), [])
+
+        config = dict(get_synthetic_config(), TIMEOUT_RATE=1.0, LATENCY_MAX=0.5)
+        self.assertEqual(FaultModel(config).sample(), (0.5, "请求超时（模拟超时）"))
+
+        config = dict(
+            get_synthetic_config(), LATENCY_SIGMA=2.0, LATENCY_MIN=0.1, LATENCY_MAX=1.0
+        )
+        latencies = [FaultModel(config, seed).latency() for seed in range(200)]
+        self.assertTrue(all(0.1 <= latency <= 1.0 for latency in latencies))
+        self.assertLess(min(latencies), 0.2)
+        self.assertEqual(max(latencies), 1.0)
+
+
+class SearchMetricsTests(TestCase):
+    def setUp(self):
+        from PatentMS.search_metrics import search_metrics
+
+        search_metrics.reset()
+        self.addCleanup(search_metrics.reset)
+
+    def test_histogram_buckets_and_prometheus_output(self):
+        """测试耗时按桶累计，并以 Prometheus 文本格式输出"""
+        from PatentMS.search_metrics import SearchMetrics
+
+        metrics = SearchMetrics()
+        with override_settings(SEARCH_METRICS={"BUCKETS": (0.1, 1.0)}):
+            for seconds in (0.05, 0.1, 0.5, 3.0):
+                metrics.observe("fetch", "bing", seconds, results=10)
+            with metrics.span("parse", "bing") as span:
+                span.results = 7
+
+        output = metrics.render()
+        labels = 'engine="bing",stage="fetch"'
+        self.assertIn(
+            f'search_stage_duration_seconds_bucket{{{labels},le="0.1"}} 2', output
+        )
+        self.assertIn(
+            f'search_stage_duration_seconds_bucket{{{labels},le="1"}} 3', output
+        )
+        self.assertIn(
+            f'search_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 4', output
+        )
+        self.assertIn(f"search_stage_duration_seconds_count{{{labels}}} 4", output)
+        self.assertIn(f"search_stage_results_total{{{labels}}} 40", output)
+        self.assertIn(
+            'search_stage_results_total{engine="bing",stage="parse"} 7', output
+        )
+        self.assertIn("# TYPE search_engine_up gauge", output)
+        self.assertIn("# TYPE search_rate_limit_requests_total counter", output)
+
+    def test_drop_reasons_are_counted(self):
+        """测试分别统计URL无效、黑名单和相关性不足丢弃的结果"""
+        from PatentMS.search_metrics import search_metrics
+        from PatentMS.search_service import SearchService, build_search_result
+        from PatentMS.serp_parser import RawResult
+
+        build_search_result(RawResult("标题", "javascript:void(0)", ""), "q", "bing")
+        build_search_result(
+            RawResult("标题", "https://www.google.com/x", ""), "q", "bing"
+        )
+
+        service = SearchService(use_mock=True, use_cache=False)
+        service.search_engine = CountingSearchEngine(
+            [
+                {"title": "Python 教程", "url": "https://example.com/1"},
+                {"title": "无关内容", "url": "https://example.com/2"},
+            ]
+        )
+        self.assertEqual(len(service.search_pages("python", "Python")), 1)
+
+        self.assertEqual(
+            search_metrics.snapshot()["dropped"],
+            {"bing:blocklist": 1, "bing:invalid_url": 1, "counting:relevance": 1},
+        )
+
+    def test_request_trace_covers_pooled_pages(self):
+        """测试请求追踪包含线程池中并发请求的结果页的各阶段耗时"""
+        from PatentMS.search_metrics import search_metrics, trace_request
+        from PatentMS.search_service import SearchService
+
+        service = SearchService(use_mock=True, use_cache=False)
+        service.search_engine = make_synthetic_engine(
+            LATENCY_DISTRIBUTION="fixed", LATENCY_MEDIAN=0.01
+        )
+        with trace_request() as trace:
+            service.search_pages("python", "Python", 20)
+
+        stages = [(stage, engine) for stage, engine, _ in trace.spans]
+        for stage in ("search", "optimize", "engine", "filter"):
+            self.assertIn((stage, "synthetic"), stages)
+        self.assertEqual(stages.count(("fetch", "synthetic")), 2)
+        self.assertEqual(stages.count(("parse", "synthetic")), 2)
+        self.assertIn('fetch;desc="synthetic";dur=', trace.server_timing())
+
+        parse = next(
+            row
+            for row in search_metrics.snapshot()["stages"]
+            if row["stage"] == "parse"
+        )
+        self.assertEqual((parse["count"], parse["results"]), (2, 20))
+
+    def test_metrics_endpoint_and_debug_headers(self):
+        """测试指标接口的访问令牌，以及按请求返回的 Server-Timing 调试响应头"""
+        from PatentMS import views
+
+        # 未配置令牌时只在 DEBUG 模式下开放
+        self.assertEqual(self.client.get(reverse("search_metrics")).status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(
+                self.client.get(reverse("search_metrics")).status_code, 200
+            )
+        with override_settings(SEARCH_METRICS={"ENDPOINT_TOKEN": "secret"}):
+            self.assertEqual(
+                self.client.get(reverse("search_metrics")).status_code, 403
+            )
+            self.assertEqual(
+                self.client.get(
+                    reverse("search_metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+                ).status_code,
+                403,
+            )
+            response = self.client.get(
+                reverse("search_metrics"), HTTP_AUTHORIZATION="Bearer secret"
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("search_stage_duration_seconds", response.content.decode())
+
+        User.objects.create_user(username="searcher", password="testpass123")
+        self.client.login(username="searcher", password="testpass123")
+        original_engine = views.search_service.search_engine
+        views.search_service.search_engine = CountingSearchEngine()
+        self.addCleanup(setattr, views.search_service, "search_engine", original_engine)
+        views.search_service.result_cache.clear_local()
+
+        with override_settings(SEARCH_METRICS={"DEBUG_HEADERS": True}):
+            response = self.client.get(
+                reverse("real_search"), {"query": "metrics"}, HTTP_X_SEARCH_DEBUG="1"
+            )
+            self.assertIn('search;desc="counting";dur=', response["Server-Timing"])
+            self.assertIn("X-Search-Dropped", response)
+
+            response = self.client.get(reverse("real_search"), {"query": "metrics"})
+            self.assertNotIn("Server-Timing", response)
+
+
+class SlugTermTests(TestCase):
+    def test_leftmost_longest_non_overlapping_matches(self):
+        """测试每个位置取最长的术语，命中之间互不重叠，英文术语不从单词中间匹配"""
+        from PatentMS.slug_terms import TermTranslator
+
+        translator = TermTranslator(
+            {
+                "机器": "machine",
+                "机器学习": "machine-learning",
+                "学习": "learning",
+                "习题": "exercise",
+                "base": "base-theory",
+            }
+        )
+        self.assertEqual(
+            translator.find("机器学习习题"),
+            [(0, 4, "machine-learning"), (4, 6, "exercise")],
+        )
+        self.assertEqual(translator.find("database 与 base"), [(11, 15, "base-theory")])
+        self.assertEqual(translator.translate("学习机器"), " learning  machine ")
+
+    def test_chinese_slugify_replaces_all_terms(self):
+        """测试名称中的所有术语都被替换，而不只是第一个命中的术语"""
+        from PatentMS.models import chinese_slugify
+
+        self.assertEqual(chinese_slugify("你好"), "ni-hao")
+        self.assertEqual(chinese_slugify("中国北京"), "china-beijing")
+        self.assertEqual(
+            chinese_slugify("情感分析与语义分析"),
+            "sentiment-analysis-yu-semantic-analysis",
+        )
+        self.assertEqual(chinese_slugify("CAP定理"), "cap-theorem")
+        self.assertEqual(chinese_slugify("！！"), "category")
+
+    def test_terms_file_can_be_extended(self):
+        """测试术语表文件可以追加术语，同一术语以最后一行为准"""
+        import os
+        import tempfile
+
+        from PatentMS.models import chinese_slugify
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "terms.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(
+                    "# 测试术语表\n专利 patent\n检索 search\n检索 retrieval\n坏行\n"
+                )
+            with override_settings(SLUG_TERMS_FILE=path):
+                self.assertEqual(chinese_slugify("专利检索"), "patent-retrieval")
+        self.assertEqual(chinese_slugify("专利"), "zhuan-li")
+
+
+class PinyinTableTests(TestCase):
+    def test_packed_table_round_trip(self):
+        """测试拼音表打包后按码位查找，区段外和没有读音的码位返回 None"""
+        import os
+        import tempfile
+
+        from PatentMS.pinyin_table import PinyinTable, write_table
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pinyin.bin")
+            stats = write_table(
+                path,
+                {ord("专"): "zhuan", ord("利"): "li", ord("丽"): "li", 0x20000: "he"},
+            )
+            self.assertEqual(stats["characters"], 4)
+            self.assertEqual(stats["syllables"], 3)
+            self.assertEqual(stats["ranges"], 2)
+
+            table = PinyinTable(path)
+            self.assertEqual(table.lookup("专"), "zhuan")
+            self.assertEqual(table.lookup("丽"), "li")
+            self.assertEqual(table.lookup(chr(0x20000)), "he")
+            self.assertIsNone(table.lookup("中"))  # 区段内但没有读音
+            self.assertIsNone(table.lookup("a"))
+            self.assertEqual(table.transliterate("A专利!"), "A zhuan  li !")
+
+    def test_default_table_is_compact(self):
+        """测试默认拼音表覆盖常用汉字，文件只有几百 KB"""
+        import os
+
+        from PatentMS.pinyin_table import DEFAULT_PINYIN_TABLE_FILE, PinyinTable
+
+        table = PinyinTable(DEFAULT_PINYIN_TABLE_FILE)
+        self.assertLess(os.path.getsize(DEFAULT_PINYIN_TABLE_FILE), 400 * 1024)
+        self.assertGreater(len(table), 20000)
+        for char, syllable in (("中", "zhong"), ("绿", "lv"), ("鑫", "xin")):
+            self.assertEqual(table.lookup(char), syllable)
+
+    def test_chinese_slugify_falls_back_to_pinyin(self):
+        """测试术语表没有覆盖的汉字按拼音生成别名，拼音表不存在时退回默认值"""
+        from PatentMS.models import Category, chinese_slugify
+
+        self.assertEqual(chinese_slugify("锂电池隔膜"), "li-dian-chi-ge-mo")
+        self.assertEqual(chinese_slugify("北京大学"), "beijing-da-xue")
+        self.assertEqual(
+            Category.objects.create(name="量子纠缠").slug, "liang-zi-jiu-chan"
+        )
+
+        with override_settings(PINYIN_TABLE_FILE="/nonexistent/pinyin.bin"):
+            self.assertEqual(chinese_slugify("锂电池隔膜"), "category")
+
+
+class SlugAllocatorTests(TestCase):
+    def test_allocate_slug_uses_one_query(self):
+        """测试分配别名只查询一次数据库，并复用已删除分类空出的后缀"""
+        from PatentMS.slug_allocator import allocate_slug
+
+        Category.objects.bulk_create(
+            [Category(name=f"分类{i}", slug=f"category-{i}") for i in range(1, 501)]
+            + [
+                Category(name="热门", slug="python"),
+                Category(name="热门2", slug="python-1"),
+            ]
+        )
+        with self.assertNumQueries(1):
+            slug = allocate_slug(Category.objects, "category", 50, allow_bare=False)
+        self.assertEqual(slug, "category-501")
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_slug(Category.objects, "python", 50), "python-2")
+
+        Category.objects.filter(slug="category-7").delete()
+        self.assertEqual(Category.objects.create(name="！！").slug, "category-7")
+        self.assertEqual(Category.objects.create(name="？？").slug, "category-501")
+
+    def test_long_slugs_are_truncated_with_room_for_suffix(self):
+        """测试过长的别名截断到字段长度，加数字后缀时也不超过字段长度"""
+        name = "量子纠缠通信方法及其在分布式密钥分发网络中的应用研究"
+        first = Category.objects.create(name=name)
+        second = Category.objects.create(name=name + "综述")
+        self.assertLessEqual(len(first.slug), 50)
+        self.assertFalse(first.slug.endswith("-"))
+        self.assertLessEqual(len(second.slug), 50)
+        self.assertNotEqual(first.slug, second.slug)
+        self.assertTrue(second.slug.endswith("-1"))
+
+    def test_save_retries_when_slug_taken_concurrently(self):
+        """测试并发保存占用了分配的别名时重新分配，其他完整性错误照常抛出"""
+        from unittest import mock
+
+        from django.db import IntegrityError
+
+        from PatentMS import models
+
+        Category.objects.create(name="你好")
+        original = models.allocate_slug
+        calls = []
+
+        def stale_allocate(queryset, base, max_length, **kwargs):
+            # 第一次分配时模拟另一个进程刚刚插入了同一个别名
+            calls.append(set(kwargs["taken"]))
+            if len(calls) == 1:
+                return "ni-hao"
+            return original(queryset, base, max_length, **kwargs)
+
+        with mock.patch.object(models, "allocate_slug", side_effect=stale_allocate):
+            category = Category.objects.create(name="你好！")
+        self.assertEqual(category.slug, "ni-hao-1")
+        self.assertEqual(calls, [set(), {"ni-hao"}])
+
+        duplicate = Category(name="你好！")
+        with self.assertRaises(IntegrityError):
+            duplicate.save()
+        self.assertEqual(duplicate.slug, "")
+
+    def test_fix_slugs_reserves_in_memory_and_bulk_updates(self):
+        """测试修复命令在内存中分配别名并批量更新"""
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from PatentMS.slug_allocator import SlugReservation
+
+        reservation = SlugReservation(["category-1", "category-3", "python"], 50)
+        self.assertEqual(
+            [reservation.allocate("category", allow_bare=False) for _ in range(3)],
+            ["category-2", "category-4", "category-5"],
+        )
+        self.assertEqual(reservation.allocate("python"), "python-1")
+        self.assertEqual(reservation.allocate("java"), "java")
+
+        Category.objects.create(name="你好")
+        broken = Category.objects.create(name="你好 ")
+        Category.objects.filter(pk=broken.pk).update(slug="")
+        out = StringIO()
+        with self.assertNumQueries(5):
+            # 读取待修复分类、读取已有别名、批量更新（及事务保存点）
+            call_command("fix_slugs", stdout=out)
+        broken.refresh_from_db()
+        self.assertEqual(broken.slug, "ni-hao-1")
+        self.assertIn(f'修复分类 "{broken.name}" 的slug:  -> ni-hao-1', out.getvalue())
+        self.assertIn("成功修复了 1 个分类的slug", out.getvalue())
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.python = Category.objects.create(name="Python")
+        self.java = Category.objects.create(name="Java")
+        self.rust = Category.objects.create(name="Rust")
+
+    def tearDown(self):
+        from PatentMS.counters import counters
+
+        counters.reset()
+
+    def test_flush_coalesces_increments_into_f_updates(self):
+        """测试缓冲的计数合并后写入：增量相同的行共用一条 UPDATE，写入前显示缓冲的计数"""
+        from PatentMS.counters import CounterBuffer
+
+        buffer = CounterBuffer({"BUFFERED": True, "FLUSH_INTERVAL": 0})
+        with self.assertNumQueries(0):
+            for category in (self.python, self.java):
+                buffer.increment(category, "likes")
+                buffer.increment(category, "views")
+            buffer.increment(self.rust, "views", 5)
+
+        self.assertEqual(buffer.pending(self.python), {"likes": 1, "views": 1})
+        shown = buffer.with_pending(Category.objects.order_by("name"))
+        self.assertEqual(
+            [(c.name, c.likes, c.views) for c in shown],
+            [("Java", 1, 1), ("Python", 1, 1), ("Rust", 0, 5)],
+        )
+        self.python.refresh_from_db()
+        self.assertEqual(self.python.likes, 0)
+
+        # 事务保存点 2 条 + Python/Java 一条 UPDATE + Rust 一条 UPDATE
+        with self.assertNumQueries(4):
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(
+            list(Category.objects.order_by("name").values_list("likes", "views")),
+            [(1, 1), (1, 1), (0, 5)],
+        )
+        self.assertEqual(buffer.pending(self.python), {})
+        self.assertEqual(buffer.snapshot()["increments"], 5)
+
+    def test_journal_replays_orphaned_logs(self):
+        """测试已退出进程留下的计数日志被重放，仍被锁定的日志和不完整的行跳过"""
+        import os
+
+        from PatentMS.counters import CounterBuffer
+
+        with tempfile.TemporaryDirectory() as directory:
+            config = {
+                "BUFFERED": True,
+                "FLUSH_INTERVAL": 0,
+                "DURABILITY": "journal",
+                "JOURNAL_DIR": directory,
+            }
+            live = CounterBuffer(config)
+            live.increment(self.java, "likes", 2)
+
+            # 崩溃进程的日志：最后一行写了一半
+            with open(os.path.join(directory, "1-dead.journal"), "w") as f:
+                f.write(f"PatentMS.Category\t{self.python.pk}\tlikes\t1\n" * 3)
+                f.write(f"PatentMS.Category\t{self.python.pk}\tvie")
+
+            self.assertEqual(CounterBuffer(config).recover(), 1)
+            self.python.refresh_from_db()
+            self.java.refresh_from_db()
+            self.assertEqual((self.python.likes, self.python.views), (3, 0))
+            self.assertEqual(self.java.likes, 0)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            live.flush()
+            self.java.refresh_from_db()
+            self.assertEqual(self.java.likes, 2)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_like_view_returns_buffered_count(self):
+        """测试点赞接口支持 GET/POST，返回包含缓冲点赞的计数，写入后更新搜索建议权重"""
+        from PatentMS.counters import counters
+        from PatentMS.suggestion_index import KIND_CATEGORY, suggestion_index
+
+        User.objects.create_user(username="fan", password="testpass123")
+        self.client.login(username="fan", password="testpass123")
+        suggestion_index.refresh()
+        with override_settings(COUNTERS={"BUFFERED": True, "FLUSH_INTERVAL": 0}):
+            url = reverse("like_category")
+            self.assertEqual(
+                self.client.post(url, {"category_id": self.python.id}).json(), 1
+            )
+            self.assertEqual(
+                self.client.get(url, {"category_id": self.python.id}).json(), 2
+            )
+            self.python.refresh_from_db()
+            self.assertEqual(self.python.likes, 0)
+            response = self.client.get(reverse("show_category", args=["python"]))
+            self.assertEqual(response.context["category"].likes, 2)
+
+            counters.flush()
+        self.python.refresh_from_db()
+        self.assertEqual(self.python.likes, 2)
+        weight = suggestion_index.suggest("pyth", 1, kinds=[KIND_CATEGORY])[0].weight
+        self.assertEqual(weight, 2 * suggestion_index.config["LIKE_WEIGHT"])
+
+    def test_saving_f_expressions_keeps_suggestions_consistent(self):
+        """测试以 F() 表达式保存计数时，模型校验和搜索建议索引都能处理"""
+        from django.db.models import F
+
+        from PatentMS.suggestion_index import KIND_CATEGORY, suggestion_index
+
+        suggestion_index.refresh()
+        self.rust.likes = F("likes") + 3
+        self.rust.views = F("views") + 1
+        self.rust.save(update_fields=["likes", "views"])
+        self.assertEqual((self.rust.likes, self.rust.views), (3, 1))
+        weight = suggestion_index.suggest("rust", 1, kinds=[KIND_CATEGORY])[0].weight
+        self.assertEqual(weight, 3 * suggestion_index.config["LIKE_WEIGHT"] + 1)
+
+
+class PageCountTests(TestCase):
+    def setUp(self):
+        self.python = Category.objects.create(name="Python")
+        self.java = Category.objects.create(name="Java")
+
+    def counts(self):
+        return dict(Category.objects.values_list("name", "page_count"))
+
+    def test_single_page_create_move_delete(self):
+        """测试逐个创建、移动和删除页面时分类的页面数量随之更新，读取数量不查询页面表"""
+        page = Page.objects.create(
+            category=self.python, title="教程", url="https://python.org/"
+        )
+        Page.objects.create(
+            category=self.python, title="文档", url="https://docs.python.org/"
+        )
+        self.assertEqual(self.counts(), {"Python": 2, "Java": 0})
+
+        page = Page.objects.get(pk=page.pk)
+        page.category = self.java
+        page.save()
+        page.title = "入门"
+        page.save()
+        self.assertEqual(self.counts(), {"Python": 1, "Java": 1})
+
+        page.delete()
+        self.assertEqual(self.counts(), {"Python": 1, "Java": 0})
+
+        category = Category.objects.get(pk=self.python.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(category.get_pages_count(), 1)
+
+        # 整行保存读取较早的分类对象不会覆盖页面数量
+        Page.objects.create(category=self.python, title="新闻", url="https://n.org/")
+        category.views = 9
+        category.save()
+        self.assertEqual(self.counts(), {"Python": 2, "Java": 0})
+
+    def test_deleting_same_page_twice_decrements_once(self):
+        """测试同一页面的两个对象先后删除时页面数量只减少一次"""
+        page = Page.objects.create(
+            category=self.python, title="教程", url="https://python.org/"
+        )
+        first, second = Page.objects.get(pk=page.pk), Page.objects.get(pk=page.pk)
+        first.delete()
+        second.delete()
+        self.assertEqual(self.counts(), {"Python": 0, "Java": 0})
+
+    def test_category_save_keeps_insert_fallback(self):
+        """测试整行保存不写页面数量，但行不存在时仍按 Django 的默认行为插入"""
+        stale = Category.objects.get(pk=self.java.pk)
+        Category.objects.filter(pk=self.java.pk).delete()
+        stale.views = 3
+        stale.save()
+        self.assertEqual(
+            Category.objects.filter(pk=self.java.pk).values_list("name", "views").get(),
+            ("Java", 3),
+        )
+
+        copy = Category.objects.get(pk=self.python.pk)
+        copy.pk = None
+        copy.name, copy.slug = "Python 3", ""
+        copy.save(force_insert=True)
+        self.assertEqual(copy.slug, "python-3")
+        self.assertTrue(Category.objects.filter(name="Python 3").exists())
+
+    def test_bulk_operations_update_counts(self):
+        """测试批量创建、批量移动（包括关联管理器）和批量删除页面时更新页面数量"""
+        Page.objects.bulk_create(
+            [
+                Page(category=self.python, title=f"页面{i}", url=f"https://p{i}.com/")
+                for i in range(5)
+            ]
+            + [Page(category=self.java, title="Java", url="https://java.com/")]
+        )
+        self.assertEqual(self.counts(), {"Python": 5, "Java": 1})
+
+        Page.objects.filter(title__in=["页面0", "页面1"]).update(category=self.java)
+        self.assertEqual(self.counts(), {"Python": 3, "Java": 3})
+
+        self.python.page_set.add(Page.objects.get(title="Java"))
+        self.assertEqual(self.counts(), {"Python": 4, "Java": 2})
+
+        Page.objects.filter(title__startswith="页面").delete()
+        self.assertEqual(self.counts(), {"Python": 1, "Java": 0})
+
+    def test_reconcile_command_fixes_drift_in_chunks(self):
+        """测试校正命令分段重新计算页面数量，--dry-run 只统计"""
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        for i in range(3):
+            Page.objects.create(
+                category=self.java, title=f"J{i}", url=f"https://j{i}.com/"
+            )
+        for i in range(5):
+            Category.objects.create(name=f"空分类{i}")
+        Category.objects.filter(name__in=["Python", "Java"]).update(page_count=7)
+
+        out = StringIO()
+        call_command("reconcile_page_counts", dry_run=True, stdout=out)
+        self.assertIn("检查 7 个分类，2 个分类的页面数量不一致", out.getvalue())
+        self.assertEqual(self.counts()["Java"], 7)
+
+        out = StringIO()
+        call_command("reconcile_page_counts", chunk_size=2, stdout=out)
+        self.assertIn("修正 2 个分类", out.getvalue())
+        self.assertEqual(self.counts()["Java"], 3)
+        self.assertEqual(self.counts()["Python"], 0)
+
+    def test_listings_render_counts_without_per_category_queries(self):
+        """测试分类列表显示页面数量的查询数与分类数无关，清理命令统计空分类不冲突"""
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.template import Context, Template
+
+        template = Template("{% load PatentMS_template_tags %}{% get_category_list %}")
+        Page.objects.create(
+            category=self.python, title="教程", url="https://python.org/"
+        )
+        with self.assertNumQueries(1):
+            html = template.render(Context())
+        self.assertIn("1 页面", html)
+
+        for i in range(10):
+            Category.objects.create(name=f"分类{i}")
+        with self.assertNumQueries(1):
+            template.render(Context())
+
+        call_command("cleanup_data", orphans=True, stdout=StringIO())
+        self.assertEqual(self.counts(), {"Python": 1})
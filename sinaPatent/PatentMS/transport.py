@@ -0,0 +1,443 @@
+"""
+搜索引擎传输层模块
+可插拔的HTTP传输：直连（live）、录制真实响应到压缩语料库（record）、
+从语料库回放（replay）、转发到本地替身服务器（standin），用于离线基准测试和压测
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:  # 异步传输依赖 httpx
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# 传输模式
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_STANDIN = "standin"
+
+# 默认配置，可通过 settings.SEARCH_TRANSPORT 覆盖
+DEFAULT_TRANSPORT = {
+    "MODE": MODE_LIVE,
+    "CORPUS_DIR": "serp_corpus",  # 语料库目录
+    "STANDIN_URL": "http://127.0.0.1:8765",  # 替身服务器地址
+}
+
+# 录制时保留的响应头
+RECORDED_HEADERS = ("Content-Type",)
+
+
+def get_transport_config() -> Dict:
+    """获取合并后的传输层配置"""
+    config = dict(DEFAULT_TRANSPORT)
+    config.update(getattr(settings, "SEARCH_TRANSPORT", {}))
+    return config
+
+
+def request_key(url: str) -> str:
+    """
+    请求在语料库中的键：主机 + 路径 + 排序后的查询参数（忽略协议和参数顺序）
+
+    Args:
+        url: 完整请求URL
+
+    Returns:
+        规范化的请求标识
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{(parts.hostname or '').lower()}{parts.path or '/'}?{query}"
+
+
+def prepared_url(url: str, params: Optional[Dict] = None) -> str:
+    """按 requests 的规则拼接请求URL（与引擎实际发送的URL一致）"""
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+class SerpCorpus:
+    """
+    搜索结果页语料库
+
+    每个请求一个 gzip 压缩的 JSON 文件：<目录>/<主机>/<键的sha1>.json.gz
+    """
+
+    def __init__(self, directory: str):
+        self.directory = str(directory)
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "SerpCorpus":
+        directory = get_transport_config()["CORPUS_DIR"]
+        if not os.path.isabs(directory):
+            directory = os.path.join(settings.BASE_DIR, directory)
+        return cls(directory)
+
+    def path_for(self, url: str) -> str:
+        key = request_key(url)
+        host = key.split("/", 1)[0] or "unknown"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, host, f"{digest}.json.gz")
+
+    def save(self, url: str, status: int, headers: Dict, body: bytes):
+        """
+        保存一个响应
+
+        Args:
+            url: 请求URL
+            status: 状态码
+            headers: 响应头（只保留 RECORDED_HEADERS）
+            body: 已解压的响应体
+        """
+        entry = {
+            "key": request_key(url),
+            "url": url,
+            "status": status,
+            "headers": {
+                name: headers[name] for name in RECORDED_HEADERS if name in headers
+            },
+            "body": body.decode("utf-8", errors="replace"),
+            "recorded_at": time.time(),
+        }
+        path = self.path_for(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._memory[entry["key"]] = entry
+        logger.info(f"已录制搜索响应: {entry['key']}")
+
+    def load(self, url: str) -> Optional[Dict]:
+        """
+        读取一个响应
+
+        Args:
+            url: 请求URL
+
+        Returns:
+            响应记录，未录制时返回 None
+        """
+        key = request_key(url)
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        path = self.path_for(url)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def entries(self) -> Iterator[Dict]:
+        """遍历语料库中的所有记录"""
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in sorted(files):
+                if name.endswith(".json.gz"):
+                    with gzip.open(
+                        os.path.join(root, name), "rt", encoding="utf-8"
+                    ) as f:
+                        yield json.load(f)
+
+
+def build_response(request: requests.PreparedRequest, entry: Dict) -> requests.Response:
+    """用语料库记录构造 requests 响应"""
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+    response._content = entry["body"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if entry["status"] < 400 else "Error"
+    return response
+
+
+class RecordingAdapter(BaseAdapter):
+    """透传请求，并把响应录制到语料库"""
+
+    def __init__(self, inner: BaseAdapter, corpus: SerpCorpus):
+        super().__init__()
+        self.inner = inner
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        response = self.inner.send(request, **kwargs)
+        self.corpus.save(
+            request.url, response.status_code, response.headers, response.content
+        )
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """从语料库回放响应，不访问网络"""
+
+    def __init__(self, corpus: SerpCorpus):
+        super().__init__()
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        entry = self.corpus.load(request.url)
+        if entry is None:
+            raise requests.ConnectionError(
+                f"语料库中没有该请求的记录: {request_key(request.url)}",
+                request=request,
+            )
+        return build_response(request, entry)
+
+    def close(self):
+        pass
+
+
+def standin_url(url: str, base_url: str) -> str:
+    """把请求URL改写为替身服务器URL：<替身地址>/<原主机><原路径>?<原参数>"""
+    parts = urlsplit(url)
+    rewritten = f"{base_url.rstrip('/')}/{parts.hostname}{parts.path or '/'}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+
+class StandinAdapter(BaseAdapter):
+    """把请求转发到本地替身服务器（经过真实的网络栈和连接池）"""
+
+    def __init__(self, inner: BaseAdapter, base_url: str):
+        super().__init__()
+        self.inner = inner
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        request = request.copy()
+        request.url = standin_url(request.url, self.base_url)
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+
+def make_transport_adapter(
+    inner: BaseAdapter, config: Optional[Dict] = None
+) -> BaseAdapter:
+    """
+    按配置的传输模式包装底层 HTTPAdapter
+
+    Args:
+        inner: 直连使用的 HTTPAdapter
+        config: 传输层配置
+
+    Returns:
+        挂载到会话上的适配器
+    """
+    config = config or get_transport_config()
+    mode = config["MODE"]
+    if mode == MODE_RECORD:
+        return RecordingAdapter(inner, SerpCorpus.from_settings())
+    if mode == MODE_REPLAY:
+        return ReplayAdapter(SerpCorpus.from_settings())
+    if mode == MODE_STANDIN:
+        return StandinAdapter(inner, config["STANDIN_URL"])
+    return inner
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    本地替身服务器：按 /<原主机><原路径>?<原参数> 从语料库返回录制的响应，
+    可注入延迟、错误响应和超时
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        corpus: SerpCorpus,
+        address=("127.0.0.1", 8765),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(address, StandinRequestHandler)
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self):
+        """抽取本次请求的故障类型和延迟"""
+        with self.random_lock:
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        if roll < self.timeout_rate:
+            return "timeout", self.hang_seconds
+        if roll < self.timeout_rate + self.error_rate:
+            return "error", delay
+        return "ok", delay
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        host, _, rest = self.path.lstrip("/").partition("/")
+        entry = server.corpus.load(f"https://{host}/{rest}")
+        outcome, delay = server.draw()
+        server.stats[outcome if entry else "missing"] += 1
+        time.sleep(delay)
+
+        if entry is None:
+            self._send(404, {"Content-Type": "text/plain"}, b"not recorded")
+        elif outcome == "error":
+            self._send(503, {"Content-Type": "text/plain"}, b"injected error")
+        else:
+            # timeout 已在上面等待 hang_seconds，客户端通常早已超时断开
+            body = entry["body"].encode("utf-8")
+            headers = dict(entry.get("headers", {}))
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+            self._send(entry["status"], headers, body)
+
+    def do_HEAD(self):
+        self._send(200, {}, b"")
+
+    def _send(self, status: int, headers: Dict, body: bytes):
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        logger.debug(f"替身服务器: {format % args}")
+
+
+if httpx is not None:
+
+    class AsyncReplayTransport(httpx.AsyncBaseTransport):
+        """从语料库回放响应（异步客户端）"""
+
+        def __init__(self, corpus: SerpCorpus):
+            self.corpus = corpus
+
+        async def handle_async_request(self, request):
+            entry = self.corpus.load(str(request.url))
+            if entry is None:
+                raise httpx.ConnectError(
+                    f"语料库中没有该请求的记录: {request_key(str(request.url))}",
+                    request=request,
+                )
+            return httpx.Response(
+                entry["status"],
+                headers=entry.get("headers", {}),
+                content=entry["body"].encode("utf-8"),
+                request=request,
+            )
+
+    class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+        """透传请求并录制响应（异步客户端）"""
+
+        def __init__(self, inner, corpus: SerpCorpus):
+            self.inner = inner
+            self.corpus = corpus
+
+        async def handle_async_request(self, request):
+            response = await self.inner.handle_async_request(request)
+            body = await response.aread()
+            self.corpus.save(
+                str(request.url), response.status_code, response.headers, body
+            )
+            return httpx.Response(
+                response.status_code,
+                headers={
+                    name: response.headers[name]
+                    for name in RECORDED_HEADERS
+                    if name in response.headers
+                },
+                content=body,
+                request=request,
+            )
+
+        async def aclose(self):
+            await self.inner.aclose()
+
+    class AsyncStandinTransport(httpx.AsyncBaseTransport):
+        """把请求转发到本地替身服务器（异步客户端）"""
+
+        def __init__(self, inner, base_url: str):
+            self.inner = inner
+            self.base_url = base_url
+
+        async def handle_async_request(self, request):
+            request.url = httpx.URL(standin_url(str(request.url), self.base_url))
+            return await self.inner.handle_async_request(request)
+
+        async def aclose(self):
+            await self.inner.aclose()
+
+
+def make_async_transport(limits, config: Optional[Dict] = None):
+    """
+    按配置的传输模式创建 httpx 异步传输
+
+    Args:
+        limits: httpx.Limits 连接池限制
+        config: 传输层配置
+
+    Returns:
+        httpx 异步传输实例
+    """
+    config = config or get_transport_config()
+    mode = config["MODE"]
+    if mode == MODE_REPLAY:
+        return AsyncReplayTransport(SerpCorpus.from_settings())
+    inner = httpx.AsyncHTTPTransport(limits=limits)
+    if mode == MODE_RECORD:
+        return AsyncRecordingTransport(inner, SerpCorpus.from_settings())
+    if mode == MODE_STANDIN:
+        return AsyncStandinTransport(inner, config["STANDIN_URL"])
+    return inner
@@ -4,13 +4,19 @@
 """
 
 import logging
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
 logger = logging.getLogger(__name__)
 
+# 跟踪参数，不参与URL规范化
+TRACKING_PARAMS = {"spm", "from", "ref", "fbclid", "gclid", "msclkid"}
+
 
 def get_cache_key(prefix, *args):
     """
@@ -26,6 +32,56 @@ def get_cache_key(prefix, *args):
     return f"{prefix}:{':'.join(str(arg) for arg in args)}"
 
 
+def is_process_local_cache(alias="default"):
+    """
+    检查缓存是否只在当前进程内有效（LocMemCache 每个进程一份，DummyCache 不保存数据）
+
+    依赖缓存在进程间共享状态的功能（限流预算、预热结果等）需要 Redis、Memcached、
+    数据库或文件缓存
+
+    Args:
+        alias: settings.CACHES 中的缓存别名
+
+    Returns:
+        bool: 是否为进程内缓存
+    """
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def canonical_url(url: str) -> str:
+    """
+    规范化URL，用于跨引擎结果去重和判断页面是否已添加
+
+    忽略协议、www前缀、末尾斜杠、锚点和跟踪参数
+
+    Args:
+        url: 原始URL
+
+    Returns:
+        规范化后的URL
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or ""
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+        )
+    )
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
 def cache_get_or_set(key, callback, timeout=300):
     """
     获取缓存或设置缓存
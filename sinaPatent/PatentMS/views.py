@@ -1,8 +1,19 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from PatentMS.async_search_service import async_client_scope
+from PatentMS.counters import counters
 from PatentMS.models import Category, Page, UserProfile
 from PatentMS.forms import CategoryForm, PageForm, UserForm, UserProfileForm
-from PatentMS.search_service import search_service
+from PatentMS.search_metrics import (
+    debug_headers_requested,
+    get_metrics_config,
+    search_metrics,
+    trace_request,
+)
+from PatentMS.search_service import search_service, search_window
+from PatentMS.suggestion_index import KIND_CATEGORY, suggestion_index
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
@@ -14,8 +25,11 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+import hmac
 import logging
+from asgiref.sync import sync_to_async
 import json
+import time
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -65,8 +79,10 @@ def index(request):
     """首页视图"""
     try:
         context = {
-            "categories": Category.objects.exclude(slug="").order_by("-likes")[:5],
-            "pages": Page.objects.order_by("-views")[:5],
+            "categories": counters.with_pending(
+                Category.objects.exclude(slug="").order_by("-likes")[:5]
+            ),
+            "pages": counters.with_pending(Page.objects.order_by("-views")[:5]),
         }
         visitor_cookie_handler(request)
         context["visits"] = request.session["visits"]
@@ -92,9 +108,12 @@ def show_category(request, category_name_slug):
             messages.error(request, f"分类 '{category_name_slug}' 不存在")
             return redirect("index")
 
-        # 获取页面
-        pages = Page.objects.filter(category=category).order_by("-views")
-        logger.info(f"分类 {category.name} 有 {pages.count()} 个页面")
+        # 获取页面（计数加上尚未写入数据库的增量）
+        counters.with_pending([category])
+        pages = counters.with_pending(
+            Page.objects.filter(category=category).order_by("-views")
+        )
+        logger.info(f"分类 {category.name} 有 {len(pages)} 个页面")
 
         return render(
             request, "PatentMS/category.html", {"category": category, "pages": pages}
@@ -237,8 +256,7 @@ def goto_url(request):
 
     try:
         page = get_object_or_404(Page, id=page_id)
-        page.views += 1
-        page.save()
+        page.increment_views()
         return redirect(page.url)
     except Exception as e:
         logger.error(f"页面跳转失败: {e}")
@@ -378,7 +396,7 @@ class LikeCategoryView(BaseView):
     @method_decorator(login_required)
     def post(self, request):
         logger.info(f"点赞请求收到，用户: {request.user.username}")
-        category_id = request.POST.get("category_id")
+        category_id = request.POST.get("category_id") or request.GET.get("category_id")
         logger.info(f"分类ID参数: {category_id}")
 
         if not category_id:
@@ -387,9 +405,10 @@ class LikeCategoryView(BaseView):
 
         try:
             category = get_object_or_404(Category, id=int(category_id))
+            # 返回的点赞数包含缓冲中尚未写入数据库的点赞
+            counters.with_pending([category])
             logger.info(f"找到分类: {category.name}, 当前点赞数: {category.likes}")
-            category.likes += 1
-            category.save()
+            category.increment_likes()
             logger.info(f"更新后点赞数: {category.likes}")
 
             logger.info(f"用户 {request.user.username} 点赞了分类 {category.name}")
@@ -405,23 +424,6 @@ class LikeCategoryView(BaseView):
         return self.post(request)
 
 
-def get_category_list(max_results=0, starts_with=""):
-    """获取分类列表"""
-    try:
-        if starts_with:
-            category_list = Category.objects.filter(name__istartswith=starts_with)
-        else:
-            category_list = Category.objects.all()
-
-        if max_results > 0:
-            category_list = category_list[:max_results]
-
-        return category_list
-    except Exception as e:
-        logger.error(f"获取分类列表失败: {e}")
-        return []
-
-
 class CategorySuggestionView(BaseView):
     """分类建议视图"""
 
@@ -429,17 +431,21 @@ class CategorySuggestionView(BaseView):
         suggestion = request.GET.get("suggestion", "")
 
         try:
-            category_list = get_category_list(max_results=8, starts_with=suggestion)
+            # 使用内存前缀索引，不再每次按键都查询数据库
+            suggestion_index.ensure_fresh()
+            category_list = suggestion_index.suggest(
+                suggestion, 8, kinds=[KIND_CATEGORY]
+            )
             if not category_list:
-                category_list = Category.objects.order_by("-likes")[:8]
+                category_list = suggestion_index.suggest("", 8, kinds=[KIND_CATEGORY])
 
             # 使用模板渲染HTML片段
             html = '<ul class="list-unstyled">'
             for category in category_list:
                 if category.slug:
-                    html += f'<li><a href="{reverse("show_category", args=[category.slug])}">{category.name}</a></li>'
+                    html += f'<li><a href="{reverse("show_category", args=[category.slug])}">{category.text}</a></li>'
                 else:
-                    html += f'<li><a href="#" onclick="alert(\'该分类暂时无法访问\')">{category.name}</a></li>'
+                    html += f'<li><a href="#" onclick="alert(\'该分类暂时无法访问\')">{category.text}</a></li>'
             html += "</ul>"
 
             return HttpResponse(html)
@@ -471,7 +477,9 @@ class SearchAddPageView(BaseView):
                 logger.info(f"用户 {request.user.username} 添加了页面 {page.title}")
 
             # 返回更新后的页面列表HTML
-            pages = Page.objects.filter(category=category).order_by("-views")
+            pages = counters.with_pending(
+                Page.objects.filter(category=category).order_by("-views")
+            )
             html = "<ul><h2>页面列表</h2>"
             for p in pages:
                 html += f'<li><a href="{reverse("goto")}?page_id={p.id}">{p.title}</a> - {p.views} view{"s" if p.views != 1 else ""}</li>'
@@ -486,38 +494,78 @@ class SearchAddPageView(BaseView):
 
 
 class RealSearchView(BaseView):
-    """真正的搜索视图"""
+    """真正的搜索视图（异步视图，在 ASGI 下不占用工作线程等待外部搜索）"""
 
     @method_decorator(login_required)
-    def get(self, request):
+    async def get(self, request):
         query = request.GET.get("query", "").strip()
         category_id = request.GET.get("category_id", "")
 
         if not query:
             return JsonResponse({"error": "搜索关键词不能为空"}, status=400)
 
+        # 分批加载：cursor 为已加载的结果数，每批 SEARCH_BATCH_SIZE 条；
+        # 每次都按固定的结果数搜索（命中同一个缓存条目），各批次取同一个排序列表的切片
+        num_results = search_window()
+        try:
+            cursor = int(request.GET.get("cursor") or 0)
+        except ValueError:
+            cursor = -1
+        if not 0 <= cursor < num_results:
+            return JsonResponse({"error": "分页参数无效"}, status=400)
+
+        stream = request.GET.get("stream", "")
+        if stream in STREAM_FORMATS:
+            return self.stream_response(
+                request, query, category_id, stream, cursor, num_results
+            )
+
+        with trace_request() as trace:
+            async with async_client_scope(shares_event_loop(request)):
+                response = await self.search_response(
+                    request, query, category_id, cursor, num_results
+                )
+        if debug_headers_requested(request):
+            # 各阶段耗时和被丢弃的结果数（命中缓存时只有 search 和 optimize 阶段）
+            response["Server-Timing"] = trace.server_timing()
+            response["X-Search-Dropped"] = trace.dropped_header()
+        return response
+
+    async def search_response(self, request, query, category_id, cursor, num_results):
+        """
+        执行搜索并返回 JSON 响应
+
+        Args:
+            request: 请求对象
+            query: 搜索关键词
+            category_id: 分类ID（可为空）
+            cursor: 跳过的结果数（已加载的结果）
+            num_results: 搜索的结果总数（与 cursor 无关）
+        """
         try:
             # 获取分类信息
             category = None
             if category_id:
-                category = get_object_or_404(Category, id=int(category_id))
+                category = await aget_object_or_404(Category, id=int(category_id))
 
             # 执行搜索
-            results = search_service.search_pages(
+            results = await search_service.asearch_pages(
                 query=query,
                 category_name=category.name if category else "",
-                num_results=10,
+                num_results=num_results,
             )
+            next_cursor = next_search_cursor(len(results), cursor)
+            results = results[cursor : cursor + SEARCH_BATCH_SIZE]
 
-            # 检查是否已存在相同页面
+            # 检查是否已存在相同页面（按标题或规范化URL，一次查询）
             if category:
-                existing_pages = Page.objects.filter(category=category)
-                for result in results:
-                    result["exists"] = existing_pages.filter(
-                        title=result["title"]
-                    ).exists()
+                await Page.amark_existing(category, results)
+
+            if results:
+                suggestion_index.record_query(query)
 
-            logger.info(f"用户 {request.user.username} 搜索了关键词: {query}")
+            user = await request.auser()
+            logger.info(f"用户 {user.username} 搜索了关键词: {query}")
 
             return JsonResponse(
                 {
@@ -525,6 +573,8 @@ class RealSearchView(BaseView):
                     "results": results,
                     "query": query,
                     "total": len(results),
+                    "cursor": cursor,
+                    "next_cursor": next_cursor,
                 }
             )
 
@@ -532,19 +582,191 @@ class RealSearchView(BaseView):
             logger.error(f"搜索失败: {e}")
             return JsonResponse({"error": "搜索失败，请稍后重试"}, status=500)
 
+    def stream_response(
+        self, request, query, category_id, stream, cursor=0, num_results=10
+    ):
+        """
+        流式返回搜索结果：每个搜索引擎（或每个结果页）的结果到达后立即输出一个
+        batch 事件，最后输出 summary 事件（出错时输出 error 事件）
+
+        只输出 [cursor, cursor + SEARCH_BATCH_SIZE) 范围内的结果；之后的结果继续接收，
+        流结束时整个列表按到达顺序写入缓存，加载更多时从缓存取切片
+
+        Args:
+            request: 请求对象
+            query: 搜索关键词
+            category_id: 分类ID（可为空）
+            stream: 输出格式，ndjson 或 sse
+            cursor: 跳过的结果数（已加载的结果）
+            num_results: 搜索的结果总数（与 cursor 无关）
+        """
+        content_type, encode = STREAM_FORMATS[stream]
+        end = cursor + SEARCH_BATCH_SIZE
+
+        async def events():
+            async with async_client_scope(shares_event_loop(request)):
+                async for chunk in search_events():
+                    yield chunk
+
+        async def search_events():
+            started = time.monotonic()
+            position = 0
+            total = 0
+            sources = []
+            try:
+                category = None
+                if category_id:
+                    category = await Category.objects.filter(
+                        id=int(category_id)
+                    ).afirst()
+
+                async for source, results in search_service.astream_pages(
+                    query=query,
+                    category_name=category.name if category else "",
+                    num_results=num_results,
+                ):
+                    # 只输出本批范围内的结果（跳过已加载的，之后的留给下一批）
+                    start = position
+                    position += len(results)
+                    results = results[max(0, cursor - start) : max(0, end - start)]
+                    if not results:
+                        continue
+                    # 每批只查询一次已存在的页面
+                    if category:
+                        await Page.amark_existing(category, results)
+                    total += len(results)
+                    sources.append(source)
+                    yield encode(
+                        "batch", {"type": "batch", "source": source, "results": results}
+                    )
+
+                if total:
+                    suggestion_index.record_query(query)
+                user = await request.auser()
+                logger.info(f"用户 {user.username} 流式搜索了关键词: {query}")
+
+                yield encode(
+                    "summary",
+                    {
+                        "type": "summary",
+                        "success": True,
+                        "query": query,
+                        "total": total,
+                        "sources": sources,
+                        "cursor": cursor,
+                        "next_cursor": next_search_cursor(position, cursor),
+                        "elapsed_ms": round((time.monotonic() - started) * 1000),
+                    },
+                )
+            except Exception as e:
+                logger.error(f"流式搜索失败: {e}")
+                yield encode(
+                    "error", {"type": "error", "error": "搜索失败，请稍后重试"}
+                )
+
+        response = StreamingHttpResponse(events(), content_type=content_type)
+        response["Cache-Control"] = "no-cache"
+        # 禁止 Nginx 等反向代理缓冲，保证每批结果立即送达
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+# 搜索接口每批返回的结果数
+SEARCH_BATCH_SIZE = 10
+
+
+def shares_event_loop(request):
+    """
+    请求是否运行在 ASGI 服务器长期运行的事件循环中
+
+    WSGI 下 Django 通过 async_to_sync 为每个异步视图创建新的事件循环，
+    异步搜索客户端需在请求结束时关闭
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def next_search_cursor(found: int, cursor: int):
+    """
+    下一批结果的游标：搜索结果列表在本批之后还有结果时可以继续加载
+
+    Args:
+        found: 搜索结果列表的总数（包括已加载的部分）
+        cursor: 本批的 cursor
+
+    Returns:
+        下一批的 cursor，没有更多结果时返回 None
+    """
+    end = cursor + SEARCH_BATCH_SIZE
+    return end if found > end else None
+
+
+def encode_ndjson(event: str, data: dict) -> str:
+    """NDJSON：每个事件一行 JSON"""
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+def encode_sse(event: str, data: dict) -> str:
+    """Server-Sent Events：event 行 + data 行，空行结束"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# 流式搜索支持的格式：格式名 -> (Content-Type, 编码函数)
+STREAM_FORMATS = {
+    "ndjson": ("application/x-ndjson; charset=utf-8", encode_ndjson),
+    "sse": ("text/event-stream; charset=utf-8", encode_sse),
+}
+
 
 class SearchSuggestionsView(BaseView):
-    """搜索建议视图"""
+    """搜索建议视图（异步视图）"""
 
-    def get(self, request):
+    async def get(self, request):
         query = request.GET.get("query", "").strip()
 
         if not query or len(query) < 2:
             return JsonResponse({"suggestions": []})
 
         try:
-            suggestions = search_service.get_suggestions(query)
+            # 优先使用本地前缀索引，不足时才请求搜索引擎
+            if suggestion_index.needs_refresh():
+                await sync_to_async(suggestion_index.ensure_fresh)()
+            suggestions = suggestion_index.suggest_texts(query, 5)
+
+            if len(suggestions) < 5:
+                async with async_client_scope(shares_event_loop(request)):
+                    remote = await search_service.aget_suggestions(query)
+                for suggestion in remote:
+                    if suggestion not in suggestions:
+                        suggestions.append(suggestion)
+
             return JsonResponse({"suggestions": suggestions[:5]})  # 限制建议数量
         except Exception as e:
             logger.error(f"获取搜索建议失败: {e}")
             return JsonResponse({"suggestions": []})
+
+
+class SearchMetricsView(View):
+    """
+    搜索指标抓取接口（Prometheus 文本格式）
+
+    指标包含引擎健康、主机和限流状态：配置了访问令牌时校验 Authorization: Bearer，
+    未配置时只在 DEBUG 模式下开放
+    """
+
+    def get(self, request):
+        config = get_metrics_config()
+        if not config["ENABLED"]:
+            return HttpResponse(status=404)
+        token = config["ENDPOINT_TOKEN"]
+        if not token:
+            if not settings.DEBUG:
+                return HttpResponse(status=404)
+        elif not hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(),
+            f"Bearer {token}".encode(),
+        ):
+            return HttpResponse(status=403)
+        return HttpResponse(
+            search_metrics.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
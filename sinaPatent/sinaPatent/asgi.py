@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sinaPatent.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# 服务器关闭（lifespan.shutdown）时关闭共享的异步搜索客户端
+from PatentMS.async_search_service import with_lifespan  # noqa: E402
+
+application = with_lifespan(django_application)
+
+# 只在服务进程中启动后台任务（预热缓存、生成合成语料等）
+from PatentMS.apps import start_server_tasks  # noqa: E402
+
+start_server_tasks()
@@ -137,6 +137,160 @@ CACHES = {
     }
 }
 
+# 搜索结果缓存设置（新鲜期/过期可用期单位为秒）
+SEARCH_CACHE = {
+    "LOCAL_MAX_ENTRIES": 512,
+    "DEFAULT_TTL": 600,
+    "TTLS": {
+        "bing": 900,
+        "baidu": 600,
+        "duckduckgo": 900,
+        "mock": 60,
+        "adaptive": 900,
+    },
+    "STALE_TTL": 1800,
+    "EMPTY_TTL": 30,
+    "LOCK_TIMEOUT": 30,
+    "WAIT_TIMEOUT": 20,
+}
+
+# 元搜索设置（并发查询多个搜索引擎）
+SEARCH_METASEARCH = {
+    "ENGINES": ["bing", "baidu", "duckduckgo"],
+    "MAX_WORKERS": 8,
+    "DEADLINE": 6.0,
+    "EARLY_RETURN": True,
+}
+
+# 搜索引擎限流设置（按主机的令牌桶，状态保存在 CACHES["default"] 中）
+# 多进程部署时需配置共享缓存（Redis、Memcached 等）才能共用预算，
+# LocMemCache 下每个进程各自限流，服务进程启动时会记录警告
+SEARCH_RATE_LIMIT = {
+    "ENABLED": True,
+    "RATE": 1.0,
+    "BURST": 3,
+    "BUDGETS": {
+        "cn.bing.com": {"RATE": 2.0, "BURST": 5},
+        "www.baidu.com": {"RATE": 2.0, "BURST": 5},
+        "html.duckduckgo.com": {"RATE": 1.0, "BURST": 3},
+    },
+    "MAX_WAIT": 3.0,
+    "BLOCK_COOLDOWN": 60,
+}
+
+# 搜索缓存预热设置（python manage.py prewarm_search）
+# 预热命令在独立进程中运行，需为 CACHES["default"] 配置共享缓存，LocMemCache 下命令拒绝运行
+SEARCH_PREWARM = {
+    "TOP_CATEGORIES": 20,
+    "TOP_QUERIES": 50,
+    "REFRESH_AHEAD": 120,
+    "INTERVAL": 60,
+    "RESERVE_TOKENS": 2,
+}
+
+# 翻页设置：需要的结果超过一页或过滤后不足时并发请求后续结果页
+# 搜索接口每次按 MAX_RESULTS 条搜索并缓存，加载更多（cursor）从同一个列表中切片
+SEARCH_PAGINATION = {
+    "MAX_PAGES": 5,
+    "DEADLINE": 8.0,
+    "MAX_RESULTS": 50,
+}
+
+# 搜索后端："adaptive"（按健康数据自动选择引擎）、"meta"（元搜索）或单个引擎名称
+# 压力测试时可设为 "synthetic"（合成语料，不访问网络）
+SEARCH_BACKEND = "adaptive"
+
+# 合成搜索引擎设置（语料规模、延迟和错误分布，默认值见 PatentMS/synthetic_search.py）
+SEARCH_SYNTHETIC = {
+    "SEED": 20240601,
+    "DOCUMENTS": 200000,
+    "LATENCY_DISTRIBUTION": "lognormal",
+    "LATENCY_MEDIAN": 0.2,
+    "LATENCY_SIGMA": 0.6,
+    "ERROR_RATE": 0.0,
+    "TIMEOUT_RATE": 0.0,
+}
+
+# 搜索结果持久化存储（独立的 SQLite 文件）：重启后预热热门查询，搜索引擎全部不可用时返回历史结果
+SEARCH_STORE = {
+    "ENABLED": True,
+    "PATH": os.path.join(BASE_DIR, "search_store.sqlite3"),
+    "RETENTION": 7 * 24 * 3600,
+    "MAX_ENTRIES": 20000,
+    "WARM_ENTRIES": 200,
+}
+
+# 自适应搜索设置（引擎健康统计、熔断和对冲请求）
+SEARCH_ADAPTIVE = {
+    "ENGINES": ["bing", "baidu", "duckduckgo"],
+    "FAILURE_THRESHOLD": 3,
+    "ERROR_RATE_THRESHOLD": 0.5,
+    "OPEN_SECONDS": 30,
+    "MAX_OPEN_SECONDS": 300,
+    "HEDGE_MIN_DELAY": 0.3,
+    "HEDGE_MAX_DELAY": 3.0,
+    "DEADLINE": 8.0,
+}
+
+# 搜索引擎HTTP客户端设置（每线程一个会话，共享连接池）
+# 生产环境可开启 WARMUP，启动时预热到搜索引擎的连接
+SEARCH_HTTP_CLIENT = {
+    "POOL_CONNECTIONS": 10,
+    "POOL_MAXSIZE": 20,
+    "MAX_RETRIES": 2,
+    "BACKOFF_FACTOR": 0.3,
+    "WARMUP": False,
+    "WARMUP_TIMEOUT": 3,
+}
+
+# 搜索引擎传输层："live" 直连；"record" 录制响应到语料库；"replay" 从语料库回放；
+# "standin" 转发到本地替身服务器（python manage.py serp_standin）
+SEARCH_TRANSPORT = {
+    "MODE": "live",
+    "CORPUS_DIR": os.path.join(BASE_DIR, "serp_corpus"),
+    "STANDIN_URL": "http://127.0.0.1:8765",
+}
+
+# 搜索结果页解析引擎："html.parser" / "lxml" / "selectolax"（未安装时自动退回）
+SEARCH_HTML_PARSER = "lxml"
+
+# 搜索结果网站黑名单（按域名后缀匹配，同时屏蔽子域名）
+# 默认规则见 PatentMS/site_filter.py；可用 SEARCH_BLOCKED_DOMAINS /
+# SEARCH_ENGINE_BLOCKED_DOMAINS 覆盖，黑名单文件修改后会自动重新加载
+SEARCH_BLOCKLIST_FILE = os.path.join(BASE_DIR, "PatentMS", "blocked_domains.txt")
+
+# 分类别名（slug）术语表："术语 别名" 每行一条，可追加（修改后需重启进程生效）
+SLUG_TERMS_FILE = os.path.join(BASE_DIR, "PatentMS", "slug_terms.txt")
+
+# 汉字拼音表（术语表没有覆盖的汉字按拼音生成别名），由 build_pinyin_table 命令生成
+PINYIN_TABLE_FILE = os.path.join(BASE_DIR, "PatentMS", "pinyin_table.bin")
+
+# 搜索结果相关性（BM25 参数和加分项，默认值见 PatentMS/relevance.py）
+SEARCH_RELEVANCE = {
+    "TITLE_WEIGHT": 2.0,
+    "ABSTRACT_WEIGHT": 1.0,
+    "MIN_SCORE": 0.0,
+}
+
+# 搜索指标（各阶段耗时、结果数和丢弃原因，/metrics/ 以 Prometheus 格式输出）
+# 开启 DEBUG_HEADERS 后，请求携带 X-Search-Debug: 1 时返回 Server-Timing 响应头
+# 生产环境需设置 ENDPOINT_TOKEN 才能访问 /metrics/（未设置时只在 DEBUG 模式下开放）
+SEARCH_METRICS = {
+    "ENABLED": True,
+    "ENDPOINT_TOKEN": "",
+    "DEBUG_HEADERS": DEBUG,
+}
+
+# 浏览和点赞计数：缓冲在进程内，定期合并为 F() UPDATE 写入数据库（默认值见 PatentMS/counters.py）
+# DURABILITY："memory"（崩溃时丢失最近一个间隔的计数）/ "journal" / "fsync"（先写计数日志）
+COUNTERS = {
+    "BUFFERED": True,
+    "FLUSH_INTERVAL": 5,
+    "MAX_PENDING": 1000,
+    "DURABILITY": "journal",
+    "JOURNAL_DIR": os.path.join(BASE_DIR, "counters"),
+}
+
 # 会话设置
 SESSION_COOKIE_AGE = 1209600  # 2周
 SESSION_COOKIE_SECURE = False  # 开发环境设为False
@@ -29,6 +29,7 @@ from PatentMS.views import (
     SearchAddPageView,
     RealSearchView,
     SearchSuggestionsView,
+    SearchMetricsView,
 )
 
 urlpatterns = [
@@ -65,6 +66,8 @@ urlpatterns = [
         SearchSuggestionsView.as_view(),
         name="search_suggestions",
     ),
+    # 搜索指标（Prometheus 抓取）
+    path("metrics/", SearchMetricsView.as_view(), name="search_metrics"),
     # 注册应用URLs
     path("accounts/", include("registration.backends.default.urls")),
 ]
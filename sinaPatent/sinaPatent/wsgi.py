@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sinaPatent.settings')
 
 application = get_wsgi_application()
+
+# 只在服务进程中启动后台任务（预热缓存、生成合成语料等）
+from PatentMS.apps import start_server_tasks  # noqa: E402
+
+start_server_tasks()
@@ -1,5 +1,96 @@
 // jQuery功能文件
 
+// 流式搜索：每个搜索引擎的结果到达后立即回调 onBatch，结束时回调 onDone
+// （summary.next_cursor 不为 null 时可以传入 cursor 参数加载下一批）
+// 浏览器不支持流式读取时退化为普通请求
+function streamSearch(params, handlers) {
+  var onBatch = handlers.onBatch || function () {};
+  var onDone = handlers.onDone || function () {};
+  var onError = handlers.onError || function () {};
+
+  if (!window.fetch || !window.ReadableStream || !window.TextDecoder) {
+    $.ajax({
+      url: "/api/search/",
+      method: "GET",
+      data: params,
+      success: function (data) {
+        if (!data.success) {
+          onError(data.error || "搜索失败，请稍后重试");
+          return;
+        }
+        if (data.results.length > 0) {
+          onBatch({ type: "batch", source: "", results: data.results });
+        }
+        onDone({
+          type: "summary",
+          success: true,
+          total: data.total,
+          next_cursor: data.next_cursor,
+        });
+      },
+      error: function (xhr) {
+        onError(
+          (xhr.responseJSON && xhr.responseJSON.error) || "搜索失败，请稍后重试"
+        );
+      },
+    });
+    return;
+  }
+
+  var url = "/api/search/?" + $.param($.extend({ stream: "ndjson" }, params));
+  var decoder = new TextDecoder();
+  var buffer = "";
+  var finished = false;
+
+  function handleLine(line) {
+    if (!line.trim()) {
+      return;
+    }
+    var event = JSON.parse(line);
+    if (event.type === "batch") {
+      onBatch(event);
+    } else if (event.type === "summary") {
+      finished = true;
+      onDone(event);
+    } else if (event.type === "error") {
+      finished = true;
+      onError(event.error);
+    }
+  }
+
+  fetch(url, { credentials: "same-origin" })
+    .then(function (response) {
+      if (!response.ok) {
+        return response.json().then(function (data) {
+          throw new Error(data.error || "搜索失败，请稍后重试");
+        });
+      }
+      var reader = response.body.getReader();
+
+      function read() {
+        return reader.read().then(function (chunk) {
+          if (chunk.done) {
+            handleLine(buffer);
+            if (!finished) {
+              onError("搜索连接中断，请稍后重试");
+            }
+            return;
+          }
+          buffer += decoder.decode(chunk.value, { stream: true });
+          var lines = buffer.split("\n");
+          buffer = lines.pop();
+          lines.forEach(handleLine);
+          return read();
+        });
+      }
+      return read();
+    })
+    .catch(function (error) {
+      console.error("搜索失败:", error);
+      onError(error.message || "搜索失败，请稍后重试");
+    });
+}
+
 $(document).ready(function () {
   console.log("PatentMS jQuery文件加载成功！");
   console.log("jQuery版本:", $.fn.jquery);
@@ -47,47 +138,87 @@ $(document).ready(function () {
     $("#search-loading").show();
     $("#search-results").empty();
 
+    searchState = { query: query, results: [], seen: {}, nextCursor: null };
+    loadSearchResults(0);
+  });
+
+  // 当前搜索的状态：已加载的结果和下一批的游标
+  var searchState = { query: "", results: [], seen: {}, nextCursor: null };
+
+  // 加载一批搜索结果（cursor 为已加载的结果数）
+  function loadSearchResults(cursor) {
+    var state = searchState;
+
     // 获取分类ID
     var categoryId = $("[data-category-id]").data("category-id");
 
-    // 调用真实的搜索API
-    $.ajax({
-      url: "/api/search/",
-      method: "GET",
-      data: {
-        query: query,
-        category_id: categoryId,
-      },
-      success: function (data) {
-        $("#search-loading").hide();
-
-        if (data.success && data.results.length > 0) {
-          displaySearchResults(data.results);
-        } else {
+    // 调用真实的搜索API（流式返回，先到达的引擎结果先显示）
+    streamSearch(
+      { query: state.query, category_id: categoryId, cursor: cursor },
+      {
+        onBatch: function (event) {
+          if (state !== searchState) {
+            return; // 已开始新的搜索
+          }
+          $("#search-loading").hide();
+          event.results.forEach(function (result) {
+            if (!state.seen[result.url]) {
+              state.seen[result.url] = true;
+              state.results.push(result);
+            }
+          });
+          displaySearchResults(state.results);
+        },
+        onDone: function (summary) {
+          if (state !== searchState) {
+            return;
+          }
+          $("#search-loading").hide();
+          state.nextCursor =
+            summary.next_cursor === undefined ? null : summary.next_cursor;
+          if (state.results.length > 0) {
+            displaySearchResults(state.results);
+          } else {
+            $("#search-results").html(
+              '<div class="alert alert-info">' +
+                '<i class="fas fa-info-circle me-2"></i> 没有找到相关结果，请尝试其他关键词' +
+                "</div>"
+            );
+          }
+        },
+        onError: function (errorMsg) {
+          if (state !== searchState) {
+            return;
+          }
+          $("#search-loading").hide();
+          if (state.results.length > 0) {
+            // 加载更多失败时恢复按钮，允许重试
+            state.nextCursor = cursor;
+            displaySearchResults(state.results);
+            return;
+          }
           $("#search-results").html(
-            '<div class="alert alert-info">' +
-              '<i class="fas fa-info-circle me-2"></i> 没有找到相关结果，请尝试其他关键词' +
+            '<div class="alert alert-danger">' +
+              '<i class="fas fa-exclamation-triangle me-2"></i> ' +
+              errorMsg +
               "</div>"
           );
-        }
-      },
-      error: function (xhr, status, error) {
-        $("#search-loading").hide();
-        console.error("搜索失败:", error);
-
-        var errorMsg = "搜索失败，请稍后重试";
-        if (xhr.responseJSON && xhr.responseJSON.error) {
-          errorMsg = xhr.responseJSON.error;
-        }
+        },
+      }
+    );
+  }
 
-        $("#search-results").html(
-          '<div class="alert alert-danger">' +
-            '<i class="fas fa-exclamation-triangle me-2"></i> ' +
-            errorMsg +
-            "</div>"
-        );
-      },
-    });
+  // 加载更多搜索结果
+  $(document).on("click", "#load-more-btn", function () {
+    var cursor = searchState.nextCursor;
+    if (cursor === null) {
+      return;
+    }
+    searchState.nextCursor = null;
+    $(this)
+      .prop("disabled", true)
+      .html('<i class="fas fa-spinner fa-spin me-1"></i> 加载中...');
+    loadSearchResults(cursor);
   });
 
   // 显示搜索结果
@@ -142,6 +273,13 @@ $(document).ready(function () {
     });
 
     html += "</div>";
+    if (searchState.nextCursor !== null) {
+      html +=
+        '<div class="text-center mt-3">' +
+        '<button class="btn btn-outline-primary btn-sm" id="load-more-btn">' +
+        '<i class="fas fa-angle-down me-1"></i> 加载更多</button>' +
+        "</div>";
+    }
     html += '<div class="mt-3">';
     html += '<small class="text-muted">';
     html +=